@@ -16,6 +16,7 @@ from super_gradients.common import DatasetDataInterface
 from super_gradients.common.environment import AWS_ENV_NAME
 from super_gradients.training.utils.detection_utils import base_detection_collate_fn
 from super_gradients.training.datasets.mixup import CollateMixup
+from super_gradients.training.datasets.samplers import AspectRatioBatchSampler
 from super_gradients.training.exceptions.dataset_exceptions import IllegalDatasetParameterException
 from super_gradients.training.datasets.segmentation_datasets.cityscape_segmentation import CityscapesDataset
 from torch.utils.data import ConcatDataset
@@ -112,13 +113,11 @@ class DatasetInterface:
             train_sampler = DistributedSampler(self.trainset)
             val_sampler = DistributedSampler(self.valset)
             test_sampler = DistributedSampler(self.testset) if self.testset is not None else None
-            train_shuffle = False
         else:
             self.batch_size_factor = batch_size_factor
             train_sampler = None
             val_sampler = None
             test_sampler = None
-            train_shuffle = True
 
         if train_batch_size is None:
             train_batch_size = self.dataset_params.batch_size * self.batch_size_factor
@@ -154,33 +153,58 @@ class DatasetInterface:
         #                                   num_replicas=distributed_gpus_num) if distributed_sampler else None
 
         self.train_loader = torch.utils.data.DataLoader(self.trainset,
-                                                        batch_size=train_batch_size,
-                                                        shuffle=train_shuffle,
                                                         num_workers=num_workers,
                                                         pin_memory=True,
-                                                        sampler=train_sampler,
                                                         collate_fn=train_collate_fn,
-                                                        drop_last=train_loader_drop_last)
+                                                        **self._get_batching_kwargs(self.trainset, train_batch_size,
+                                                                                    shuffle=True, sampler=train_sampler,
+                                                                                    drop_last=train_loader_drop_last))
 
         self.val_loader = torch.utils.data.DataLoader(self.valset,
-                                                      batch_size=val_batch_size,
-                                                      shuffle=False,
                                                       num_workers=num_workers,
                                                       pin_memory=True,
-                                                      sampler=val_sampler,
-                                                      collate_fn=val_collate_fn)
+                                                      collate_fn=val_collate_fn,
+                                                      **self._get_batching_kwargs(self.valset, val_batch_size,
+                                                                                  shuffle=False, sampler=val_sampler))
 
         if self.testset is not None:
             self.test_loader = torch.utils.data.DataLoader(self.testset,
-                                                           batch_size=test_batch_size,
-                                                           shuffle=False,
                                                            num_workers=num_workers,
                                                            pin_memory=True,
-                                                           sampler=test_sampler,
-                                                           collate_fn=test_collate_fn)
+                                                           collate_fn=test_collate_fn,
+                                                           **self._get_batching_kwargs(self.testset, test_batch_size,
+                                                                                       shuffle=False,
+                                                                                       sampler=test_sampler))
 
         self.classes = self.trainset.classes
 
+    def _get_batching_kwargs(self, dataset, batch_size: int, shuffle: bool, sampler=None,
+                             drop_last: bool = False) -> dict:
+        """
+        _get_batching_kwargs - The batching arguments of the DataLoader of dataset. Detection datasets with the
+                               'rectangular_buckets' sample loading method are batched by an AspectRatioBatchSampler,
+                               which also takes care of the sharding in distributed training.
+
+            :param dataset:     The dataset to load
+            :param batch_size:  Batch size (per device)
+            :param shuffle:     Whether the dataset should be shuffled
+            :param sampler:     The DistributedSampler in distributed training, None otherwise
+            :param drop_last:   Drop the last incomplete batch
+            :return:            kwargs for torch.utils.data.DataLoader
+        """
+        if getattr(dataset, 'sample_loading_method', None) == 'rectangular_buckets':
+            num_buckets = core_utils.get_param(self.dataset_params, 'aspect_ratio_buckets', default_val=8)
+            batch_sampler = AspectRatioBatchSampler(dataset.get_aspect_ratios(), batch_size=batch_size,
+                                                    img_size=dataset.img_size, num_buckets=num_buckets,
+                                                    shuffle=shuffle, drop_last=drop_last,
+                                                    num_replicas=sampler.num_replicas if sampler is not None else 1,
+                                                    rank=sampler.rank if sampler is not None else 0)
+            return {'batch_sampler': batch_sampler}
+
+        # WITH A DistributedSampler THE SHUFFLING IS DONE BY THE SAMPLER
+        return {'batch_size': batch_size, 'shuffle': shuffle and sampler is None, 'sampler': sampler,
+                'drop_last': drop_last}
+
     def get_data_loaders(self, **kwargs):
         """
         Get self.train_loader, self.test_loader, self.classes.
@@ -295,7 +319,8 @@ class LibraryDatasetInterface(DatasetInterface):
         if self.lib_dataset_params['mean'] is None:
             trainset = torchvision.datasets.SVHN(root=self.dataset_params.dataset_dir, split='train', download=True,
                                                  transform=transforms.ToTensor())
-            self.lib_dataset_params['mean'], self.lib_dataset_params['std'] = datasets_utils.get_mean_and_std(trainset)
+            statistics = datasets_utils.compute_dataset_statistics(trainset)
+            self.lib_dataset_params['mean'], self.lib_dataset_params['std'] = statistics['mean'], statistics['std']
 
         # OVERWRITE MEAN AND STD IF DEFINED IN DATASET PARAMS
         self.lib_dataset_params['mean'] = core_utils.get_param(self.dataset_params, 'img_mean', default_val=self.lib_dataset_params['mean'])
@@ -598,6 +623,8 @@ class CoCoDetectionDatasetInterface(CoCoDataSetInterfaceBase):
         val_image_size = core_utils.get_param(self.dataset_params, 'val_image_size')
         labels_offset = core_utils.get_param(self.dataset_params, 'labels_offset', default_val=0)
         class_inclusion_list = core_utils.get_param(self.dataset_params, 'class_inclusion_list')
+        reduced_resolution_decoding = core_utils.get_param(self.dataset_params, 'reduced_resolution_decoding',
+                                                           default_val=False)
 
         if image_size is None:
             assert train_image_size is not None and val_image_size is not None, 'Please provide either only image_size or ' \
@@ -618,7 +645,8 @@ class CoCoDetectionDatasetInterface(CoCoDataSetInterfaceBase):
                                              cache_labels=cache_labels,
                                              cache_images=cache_images,
                                              labels_offset=labels_offset,
-                                             class_inclusion_list=class_inclusion_list)
+                                             class_inclusion_list=class_inclusion_list,
+                                             reduced_resolution_decoding=reduced_resolution_decoding)
 
         self.valset = COCODetectionDataSet(root=self.root_dir, list_file=val_list_file,
                                            dataset_hyper_params=self.coco_dataset_hyper_params,
@@ -629,7 +657,8 @@ class CoCoDetectionDatasetInterface(CoCoDataSetInterfaceBase):
                                            cache_labels=cache_labels,
                                            cache_images=cache_images,
                                            labels_offset=labels_offset,
-                                           class_inclusion_list=class_inclusion_list)
+                                           class_inclusion_list=class_inclusion_list,
+                                           reduced_resolution_decoding=reduced_resolution_decoding)
 
         self.coco_classes = self.trainset.classes
 
@@ -678,6 +707,7 @@ class CityscapesDatasetInterface(DatasetInterface):
         crop_size = core_utils.get_param(dataset_params, "crop_size", 512)
         image_mask_transforms = core_utils.get_param(dataset_params, "image_mask_transforms")
         image_mask_transforms_aug = core_utils.get_param(dataset_params, "image_mask_transforms_aug")
+        reduced_resolution_decoding = core_utils.get_param(dataset_params, "reduced_resolution_decoding", False)
 
         self.trainset = CityscapesDataset(
             root_dir=root_dir,
@@ -690,7 +720,8 @@ class CityscapesDatasetInterface(DatasetInterface):
             cache_labels=cache_labels,
             cache_images=cache_images,
             image_mask_transforms=image_mask_transforms,
-            image_mask_transforms_aug=image_mask_transforms_aug)
+            image_mask_transforms_aug=image_mask_transforms_aug,
+            reduced_resolution_decoding=reduced_resolution_decoding)
 
         self.valset = CityscapesDataset(
             root_dir=root_dir,
@@ -702,7 +733,8 @@ class CityscapesDatasetInterface(DatasetInterface):
             dataset_hyper_params=dataset_params,
             cache_labels=cache_labels,
             cache_images=cache_images,
-            image_mask_transforms=image_mask_transforms)
+            image_mask_transforms=image_mask_transforms,
+            reduced_resolution_decoding=reduced_resolution_decoding)
 
         self.classes = self.trainset.classes
 
@@ -1,8 +1,10 @@
 import copy
+import json
 import os
 from abc import ABC, abstractmethod
 from multiprocessing import Value, Lock
 import random
+from statistics import NormalDist
 import numpy as np
 import torch.nn.functional as F
 import torchvision
@@ -26,6 +28,8 @@ from super_gradients.training.utils.detection_utils import DetectionVisualizatio
 
 import matplotlib.pyplot as plt
 
+logger = get_logger(__name__)
+
 
 def get_mean_and_std_torch(data_dir=None, dataloader=None, num_workers=4, RandomResizeSize=224):
     """
@@ -73,7 +77,7 @@ def get_mean_and_std_torch(data_dir=None, dataloader=None, num_workers=4, Random
     return mean.view(-1).cpu().numpy().tolist(), std.view(-1).cpu().numpy().tolist()
 
 
-@deprecated(reason='Use get_mean_and_std_torch() instead. It is faster and more accurate')
+@deprecated(reason='Use compute_dataset_statistics() instead. It is faster and more accurate')
 def get_mean_and_std(dataset):
     '''Compute the mean and std value of dataset.'''
     dataloader = torch.utils.data.DataLoader(dataset, batch_size=1, shuffle=True, num_workers=1)
@@ -93,6 +97,282 @@ def get_mean_and_std(dataset):
     return mean, std
 
 
+class RunningChannelMoments:
+    """
+    Per-channel running mean and variance, accumulated with Welford's algorithm. Partial results (of batches, of
+    dataloader workers or of DDP ranks) are combined with the parallel variance formula of Chan et al., which is
+    numerically stable even for hundreds of millions of pixels.
+    """
+
+    def __init__(self):
+        self.count = 0.
+        self.mean = None
+        self.m2 = None
+
+    def merge(self, count: float, mean: torch.Tensor, m2: torch.Tensor):
+        """
+        merge - Adds the moments of another partition of the data
+            :param count:   number of values in the partition
+            :param mean:    per-channel mean of the partition
+            :param m2:      per-channel sum of squared differences from the mean of the partition
+        """
+        mean, m2 = mean.double(), m2.double()
+        if self.mean is None:
+            self.count, self.mean, self.m2 = float(count), mean.clone(), m2.clone()
+            return
+
+        total = self.count + count
+        delta = mean - self.mean.to(mean.device)
+        self.mean = self.mean.to(mean.device) + delta * (count / total)
+        self.m2 = self.m2.to(mean.device) + m2 + delta ** 2 * (self.count * count / total)
+        self.count = total
+
+    def update(self, values: torch.Tensor):
+        """
+        update - Adds a batch of values
+            :param values: N x C tensor (N values of C channels)
+        """
+        values = values.double()
+        mean = values.mean(dim=0)
+        self.merge(len(values), mean, ((values - mean) ** 2).sum(dim=0))
+
+    def update_with_images(self, images: torch.Tensor):
+        """
+        update_with_images - Adds all the pixels of a batch of images
+            :param images: B x C x H x W tensor
+        """
+        images = images.double()
+        pixels_per_image = images.shape[2] * images.shape[3]
+        image_means = images.mean(dim=(2, 3))
+        image_m2 = ((images - image_means[:, :, None, None]) ** 2).sum(dim=(2, 3))
+
+        # THE B IMAGES ARE EQUALLY SIZED PARTITIONS, SO THEY ARE MERGED IN ONE STEP
+        mean = image_means.mean(dim=0)
+        m2 = image_m2.sum(dim=0) + pixels_per_image * ((image_means - mean) ** 2).sum(dim=0)
+        self.merge(len(images) * pixels_per_image, mean, m2)
+
+    def all_reduce(self, device: str = None):
+        """
+        all_reduce - Merges the moments of all the DDP ranks (all the ranks should call it, also those without values)
+            :param device: device of the exchanged moments (of the process group backend), by default the device of
+                           the moments
+        """
+        device = device or (self.mean.device if self.mean is not None else 'cpu')
+        # A RANK WITHOUT VALUES (e.g. WHEN THERE ARE FEWER SAMPLES THAN RANKS) SENDS AN EMPTY STATE OF THE SAME SIZE
+        num_channels = torch.tensor([0 if self.mean is None else len(self.mean)], device=device)
+        torch.distributed.all_reduce(num_channels, op=torch.distributed.ReduceOp.MAX)
+        num_channels = int(num_channels.item())
+        if self.mean is None:
+            state = torch.zeros(1 + 2 * num_channels, dtype=torch.float64, device=device)
+        else:
+            state = torch.cat([torch.tensor([self.count], dtype=torch.float64, device=device), self.mean.to(device),
+                               self.m2.to(device)])
+        gathered_states = [torch.zeros_like(state) for _ in range(torch.distributed.get_world_size())]
+        torch.distributed.all_gather(gathered_states, state)
+
+        self.count, self.mean, self.m2 = 0., None, None
+        for rank_state in gathered_states:
+            if rank_state[0] > 0:
+                self.merge(rank_state[0].item(), rank_state[1:1 + num_channels], rank_state[1 + num_channels:])
+
+    @property
+    def variance(self) -> torch.Tensor:
+        return self.m2 / max(self.count - 1, 1)
+
+    @property
+    def std(self) -> torch.Tensor:
+        return torch.sqrt(self.variance)
+
+
+def _sample_to_tensor(image) -> torch.Tensor:
+    if isinstance(image, torch.Tensor):
+        return image
+    if isinstance(image, Image.Image):
+        return transforms.functional.to_tensor(image)
+    # NUMPY H x W x C
+    return transforms.functional.to_tensor(np.asarray(image))
+
+
+def _statistics_collate_fn(batch):
+    """
+    Keeps the images of the batch as a list, since the images of a dataset are not necessarily of the same size
+    """
+    if isinstance(batch[0], (tuple, list)):
+        return [_sample_to_tensor(sample[0]) for sample in batch], [sample[1] for sample in batch]
+    return [_sample_to_tensor(sample) for sample in batch], []
+
+
+def _targets_to_class_ids(targets: list) -> torch.Tensor:
+    """
+    Flattens the targets of a batch into class ids: class labels (classification), masks (segmentation) or
+    [image_index, class, x, y, w, h] rows (detection, as returned by DetectionDataSet)
+    """
+    class_ids = []
+    for target in targets:
+        target = torch.as_tensor(target)
+        if target.is_floating_point():
+            if target.dim() != 2 or target.shape[1] != 6:
+                continue
+            target = target[:, 1]
+        class_ids.append(target.reshape(-1).long())
+    return torch.cat(class_ids) if class_ids else torch.zeros(0, dtype=torch.long)
+
+
+def _get_dataset_identity(dataset: torch.utils.data.Dataset) -> dict:
+    # THE DATASETS UNDER THE SAME ROOT (e.g. THE SPLITS, OR THE SAME IMAGES WITH OTHER TRANSFORMS) SHARE THE CACHE FILE
+    return {'dataset_class': type(dataset).__name__, 'split': repr(getattr(dataset, 'split', None)),
+            'train': repr(getattr(dataset, 'train', None)), 'transform': repr(getattr(dataset, 'transform', None))}
+
+
+def _load_cached_dataset_statistics(cache_path: str, cache_key: dict):
+    if cache_path is None or not os.path.isfile(cache_path):
+        return None
+    with open(cache_path, 'r') as cache_file:
+        cached = json.load(cache_file)
+    if cached.get('cache_key') != cache_key:
+        return None
+    logger.info(f'Loaded dataset statistics from {cache_path}')
+    return cached['statistics']
+
+
+def _cache_dataset_statistics(cache_path: str, cache_key: dict, statistics: dict):
+    try:
+        with open(cache_path, 'w') as cache_file:
+            json.dump({'cache_key': cache_key, 'statistics': statistics}, cache_file)
+    except OSError as e:
+        logger.warning(f'Could not cache the dataset statistics in {cache_path}: {e}')
+
+
+def _add_padded(counts: torch.Tensor, other_counts: torch.Tensor) -> torch.Tensor:
+    length = max(len(counts), len(other_counts))
+    return F.pad(counts, (0, length - len(counts))) + F.pad(other_counts, (0, length - len(other_counts)))
+
+
+def _update_image_statistics(images: list, pixel_moments: RunningChannelMoments, image_moments: RunningChannelMoments,
+                             histograms: torch.Tensor, histogram_range: tuple):
+    # EQUALLY SIZED IMAGES ARE REDUCED TOGETHER
+    same_size = all(image.shape == images[0].shape for image in images)
+    for image_group in [torch.stack(images)] if same_size else [image.unsqueeze(0) for image in images]:
+        pixel_moments.update_with_images(image_group)
+        image_moments.update(image_group.mean(dim=(2, 3)))
+        for channel in range(image_group.shape[1]):
+            histograms[channel] += torch.histc(image_group[:, channel], bins=histograms.shape[1],
+                                               min=histogram_range[0], max=histogram_range[1]).double()
+
+
+def _all_reduce_class_counts(class_counts: torch.Tensor) -> torch.Tensor:
+    # THE RANKS MAY HAVE SEEN DIFFERENT SETS OF CLASSES
+    num_classes = torch.tensor([len(class_counts)], device=class_counts.device)
+    torch.distributed.all_reduce(num_classes, op=torch.distributed.ReduceOp.MAX)
+    class_counts = F.pad(class_counts, (0, int(num_classes.item()) - len(class_counts)))
+    torch.distributed.all_reduce(class_counts)
+    return class_counts
+
+
+def compute_dataset_statistics(dataset: torch.utils.data.Dataset, batch_size: int = 64, num_workers: int = 8,
+                               num_samples: int = None, seed: int = 0, histogram_bins: int = 256,
+                               histogram_range: tuple = (0., 1.), ignore_index: int = None, confidence: float = 0.95,
+                               cache_path: str = None, use_cache: bool = True, device: str = None) -> dict:
+    """
+    compute_dataset_statistics - Computes the per-channel mean and std of the images of a dataset in a single streaming
+                                 pass, together with per-channel histograms and class frequency counts.
+
+    The samples are loaded by a multi-worker DataLoader and reduced on the device in float64 (the per-batch moments are
+    merged with RunningChannelMoments), so the memory footprint does not depend on the size of the dataset. When a DDP
+    process group is initialized every rank processes its own shard and the results are reduced across the ranks.
+
+        :param dataset:             A dataset that returns images, or (image, target) tuples. The images may be C x H x W
+                                    tensors (i.e after ToTensor), PIL images or H x W x C numpy arrays, of any size
+        :param batch_size:          Number of samples per DataLoader batch
+        :param num_workers:         Number of DataLoader workers
+        :param num_samples:         If set, the statistics are estimated from a random subset of num_samples samples
+        :param seed:                Seed of the random subset
+        :param histogram_bins:      Number of bins of the per-channel histograms
+        :param histogram_range:     (min, max) range of the per-channel histograms
+        :param ignore_index:        Class id that is not counted (i.e the ignore label of segmentation masks)
+        :param confidence:          Confidence level of 'mean_confidence_interval'
+        :param cache_path:          Path of the json cache file. By default 'dataset_statistics.json' under dataset.root,
+                                    when the dataset has a root directory
+        :param use_cache:           Load the statistics from the cache file when it was computed with the same arguments
+                                    for the same dataset (class, split / train flag and transform repr), and write them to
+                                    it otherwise
+        :param device:              Device to reduce on (by default cuda if available)
+        :return:                    Dictionary with the keys:
+                                        'mean', 'std':                  per-channel mean and std over all the pixels
+                                        'mean_confidence_interval':     per-channel half-width of the confidence interval
+                                                                        of the mean, estimated from the variance of the
+                                                                        per-image means (0 when all samples are used)
+                                        'num_images', 'num_pixels':     number of images and pixels that were processed
+                                        'histograms':                   per-channel histogram counts
+                                        'class_counts':                 number of occurrences of every class id
+    """
+    is_distributed = torch.distributed.is_available() and torch.distributed.is_initialized()
+    is_main_process = not is_distributed or torch.distributed.get_rank() == 0
+    dataset_size = len(dataset)
+    num_samples = min(num_samples, dataset_size) if num_samples is not None else dataset_size
+
+    cache_key = {**_get_dataset_identity(dataset), 'dataset_size': dataset_size, 'num_samples': num_samples,
+                 'seed': seed, 'histogram_bins': histogram_bins, 'histogram_range': list(histogram_range),
+                 'ignore_index': ignore_index, 'confidence': confidence}
+    if cache_path is None and isinstance(getattr(dataset, 'root', None), str) and os.path.isdir(dataset.root):
+        cache_path = os.path.join(dataset.root, 'dataset_statistics.json')
+    cached_statistics = _load_cached_dataset_statistics(cache_path, cache_key) if use_cache else None
+    if cached_statistics is not None:
+        return cached_statistics
+
+    indices = list(range(dataset_size))
+    if num_samples < dataset_size:
+        generator = torch.Generator()
+        generator.manual_seed(seed)
+        indices = torch.randperm(dataset_size, generator=generator)[:num_samples].tolist()
+    if is_distributed:
+        indices = indices[torch.distributed.get_rank()::torch.distributed.get_world_size()]
+
+    device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
+    data_loader = torch.utils.data.DataLoader(torch.utils.data.Subset(dataset, indices), batch_size=batch_size,
+                                              num_workers=num_workers, collate_fn=_statistics_collate_fn,
+                                              pin_memory=device != 'cpu')
+    pixel_moments, image_moments = RunningChannelMoments(), RunningChannelMoments()
+    histograms, class_counts = None, torch.zeros(0, dtype=torch.float64, device=device)
+
+    for images, targets in tqdm(data_loader, desc='Computing dataset statistics', disable=not is_main_process):
+        images = [image.to(device, non_blocking=True).float() for image in images]
+        if histograms is None:
+            histograms = torch.zeros(images[0].shape[0], histogram_bins, dtype=torch.float64, device=device)
+
+        _update_image_statistics(images, pixel_moments, image_moments, histograms, histogram_range)
+
+        class_ids = _targets_to_class_ids(targets).to(device)
+        class_ids = class_ids[(class_ids >= 0) & (class_ids != (-1 if ignore_index is None else ignore_index))]
+        class_counts = _add_padded(class_counts, torch.bincount(class_ids).double())
+
+    if is_distributed:
+        pixel_moments.all_reduce(device)
+        image_moments.all_reduce(device)
+        if histograms is None:
+            histograms = torch.zeros(len(pixel_moments.mean), histogram_bins, dtype=torch.float64, device=device)
+        torch.distributed.all_reduce(histograms)
+        class_counts = _all_reduce_class_counts(class_counts)
+
+    # NORMAL APPROXIMATION OF THE MEAN OF THE PER-IMAGE MEANS, WITH A FINITE POPULATION CORRECTION
+    z_score = NormalDist().inv_cdf((1. + confidence) / 2.)
+    population_correction = (dataset_size - num_samples) / max(dataset_size - 1, 1)
+    mean_confidence_interval = z_score * torch.sqrt(image_moments.variance * population_correction / num_samples)
+
+    statistics = {'mean': pixel_moments.mean.tolist(),
+                  'std': pixel_moments.std.tolist(),
+                  'mean_confidence_interval': mean_confidence_interval.tolist(),
+                  'num_images': num_samples,
+                  'num_pixels': int(pixel_moments.count),
+                  'histograms': histograms.long().tolist(),
+                  'class_counts': class_counts.long().tolist()}
+
+    if use_cache and cache_path is not None and is_main_process:
+        _cache_dataset_statistics(cache_path, cache_key, statistics)
+
+    return statistics
+
+
 class AbstractCollateFunction(ABC):
     """
     A collate function (for torch DataLoader)
@@ -132,6 +412,9 @@ class MultiScaleCollateFunction(AbstractCollateFunction):
     """
     a collate function to implement multi-scale data augmentation
     according to https://arxiv.org/pdf/1612.08242.pdf
+
+    NOTE: the size is chosen independently by every worker (and every DDP rank) and the batch is resized on the CPU.
+    super_gradients.training.utils.callbacks.MultiScaleResizeCallback resizes on the device with synchronized sizes.
     """
     _counter = AtomicInteger(0)
     _current_size = AtomicInteger(0)
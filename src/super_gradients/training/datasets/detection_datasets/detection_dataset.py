@@ -4,9 +4,11 @@ import random
 import cv2
 import numpy as np
 import torch
+from functools import partial
 from typing import Callable
 from tqdm import tqdm
 from PIL import Image, ExifTags
+from super_gradients.training.datasets.image_loading_utils import cv2_reduced_resolution_loader
 from super_gradients.training.datasets.sg_dataset import ListDataset
 from super_gradients.training.utils.detection_utils import convert_xyxy_bbox_to_xywh
 from super_gradients.training.utils.utils import get_param
@@ -23,7 +25,8 @@ class DetectionDataSet(ListDataset):
     def __init__(self, root: str, list_file: str, img_size: int = 416, batch_size: int = 16, augment: bool = False,
                  dataset_hyper_params: dict = None, cache_labels: bool = False, cache_images: bool = False,
                  sample_loading_method: str = 'default', collate_fn: Callable = None, target_extension: str = '.txt',
-                 labels_offset: int = 0, class_inclusion_list=None, all_classes_list=None):
+                 labels_offset: int = 0, class_inclusion_list=None, all_classes_list=None,
+                 reduced_resolution_decoding: bool = False):
         """
         DetectionDataSet
             :param root:                    Root folder of the Data Set
@@ -42,9 +45,15 @@ class DetectionDataSet(ListDataset):
                                                       sizes in 4 different parts of the image (Extreme Augmentation)
                                             rectangular - Used mainly for inference, it letterboxes the image
                                                           for the expected image size of the model
+                                            rectangular_buckets - Letterboxes every image to the shape of its
+                                                          batch, which is passed along with the index by
+                                                          AspectRatioBatchSampler (see get_aspect_ratios)
             :param labels_offset:           offset value to add to the labels (class numbers)
             :param all_classes_list: list(str) containing all the class names.
             :param class_inclusion_list: list(str) containing the subclass names or None when subclassing is disabled.
+            :param reduced_resolution_decoding: Decode JPEG samples with cv2.IMREAD_REDUCED_COLOR_* (DCT scaling) at
+                                                the lowest resolution whose long side is still >= img_size, since
+                                                sample_transform resizes the long side to img_size anyway.
         """
         self.dataset_hyperparams = dataset_hyper_params
         self.cache_labels = cache_labels
@@ -54,6 +63,7 @@ class DetectionDataSet(ListDataset):
         self.augment = augment
         self.batch_index = None
         self.total_batches_num = None
+        self.shapes = None
         self.sample_loading_method = sample_loading_method
         self.labels_offset = labels_offset
 
@@ -61,6 +71,9 @@ class DetectionDataSet(ListDataset):
         self.all_classes_list = all_classes_list
         self.mixup_prob = get_param(self.dataset_hyperparams, "mixup", 0)
 
+        if reduced_resolution_decoding:
+            self.sample_loader = partial(cv2_reduced_resolution_loader, min_long_size=self.img_size)
+
         super(DetectionDataSet, self).__init__(root=root, file=list_file, target_extension=target_extension,
                                                collate_fn=collate_fn, sample_loader=self.sample_loader,
                                                sample_transform=self.sample_transform, target_loader=self.target_loader,
@@ -70,6 +83,7 @@ class DetectionDataSet(ListDataset):
         return len(self.img_files)
 
     def __getitem__(self, index):
+        index, shape = self._get_index_and_letterbox_shape(index)
         label_path = self.label_files[index]
 
         if self.sample_loading_method == 'mosaic' and self.augment:
@@ -87,8 +101,6 @@ class DetectionDataSet(ListDataset):
 
             # LETTERBOX
             h, w = img.shape[:2]
-            shape = self.batch_shapes[
-                self.batch_index[index]] if self.sample_loading_method == 'rectangular' else self.img_size
             img, ratio, pad = self.letterbox(img, shape, auto=False, scaleup=self.augment)
 
             # LOAD LABELS
@@ -135,6 +147,19 @@ class DetectionDataSet(ListDataset):
 
         return img, labels_out
 
+    def _get_index_and_letterbox_shape(self, index) -> tuple:
+        """
+        _get_index_and_letterbox_shape
+            :param index:   The sample index, or an (index, shape) tuple - batch samplers (AspectRatioBatchSampler) pass
+                            the letterbox shape of the batch along with the index
+            :return:        The sample index and the shape to letterbox the sample to
+        """
+        if isinstance(index, tuple):
+            return index
+        if self.sample_loading_method == 'rectangular':
+            return index, self.batch_shapes[self.batch_index[index]]
+        return index, self.img_size
+
     @staticmethod
     def mixup(im, labels, im2, labels2):
         # Applies MixUp augmentation https://arxiv.org/pdf/1710.09412.pdf
@@ -181,6 +206,8 @@ class DetectionDataSet(ListDataset):
         # RECTANGULAR TRAINING
         if self.sample_loading_method == 'rectangular':
             self._rectangular_loading(samples_len=samples_len)
+        elif self.sample_loading_method == 'rectangular_buckets':
+            self.shapes = np.array(self._get_image_shapes(samples_len=samples_len), dtype=np.float64)
 
         # PRELOAD LABELS (REQUIRED FOR WEIGHTED CE TRAINING)
         self.imgs = [None] * samples_len
@@ -212,6 +239,8 @@ class DetectionDataSet(ListDataset):
             self.label_files = [e for i, e in enumerate(self.label_files) if i in image_indices_to_keep]
             self.imgs = [e for i, e in enumerate(self.imgs) if i in image_indices_to_keep]
             self.labels = [e for i, e in enumerate(self.labels) if i in image_indices_to_keep]
+            if self.shapes is not None:
+                self.shapes = self.shapes[sorted(image_indices_to_keep)]
 
         # CACHE IMAGES INTO MEMORY FOR FASTER TRAINING (WARNING: LARGE DATASETS MAY EXCEED SYSTEM RAM)
         if self.cache_images:
@@ -225,11 +254,18 @@ class DetectionDataSet(ListDataset):
                 cached_images_mem_in_gb += self.imgs[i].nbytes
                 pbar.desc = 'Caching images (%.1fGB)' % (cached_images_mem_in_gb / 1E9)
 
-    def _rectangular_loading(self, samples_len, pad: float = 0.5):
+    def get_aspect_ratios(self) -> np.ndarray:
+        """
+        get_aspect_ratios - The aspect ratio (height / width) of every image, as required by AspectRatioBatchSampler.
+                            Available when sample_loading_method is 'rectangular' or 'rectangular_buckets'.
         """
+        return self.shapes[:, 1] / self.shapes[:, 0]
 
-        :param samples_len:
-        :return:
+    def _get_image_shapes(self, samples_len) -> list:
+        """
+        _get_image_shapes - Reads the (width, height) of all the images, from the .shapes file when it is in sync
+            :param samples_len:
+            :return:
         """
         shapes_file_path = self.root + self.list_file_path.replace('.txt', '.shapes')
         try:
@@ -243,8 +279,16 @@ class DetectionDataSet(ListDataset):
             # TODO: we are not writing the shapes into a file since this is risky. the files list might change
             # TODO: and then the shapes in the .shapes file will be wrong
 
+        return image_shapes
+
+    def _rectangular_loading(self, samples_len, pad: float = 0.5):
+        """
+
+        :param samples_len:
+        :return:
+        """
         # SORT BY ASPECT RATIO
-        image_shapes = np.array(image_shapes, dtype=np.float64)
+        image_shapes = np.array(self._get_image_shapes(samples_len), dtype=np.float64)
         aspect_ratio = image_shapes[:, 1] / image_shapes[:, 0]
         sorted_indices = aspect_ratio.argsort()
 
@@ -0,0 +1,151 @@
+import os
+import time
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from super_gradients.training.transforms.transforms import RandomFlip, Rescale
+
+# LARGEST FIRST - THE DCT SCALING FACTORS SUPPORTED BY LIBJPEG (AND THEREFORE BY PIL DRAFT MODE AND OPENCV)
+JPEG_REDUCTION_FACTORS = (8, 4, 2)
+JPEG_EXTENSIONS = ('.jpg', '.jpeg')
+
+_CV2_REDUCED_COLOR_FLAGS = {1: cv2.IMREAD_COLOR,
+                            2: cv2.IMREAD_REDUCED_COLOR_2,
+                            4: cv2.IMREAD_REDUCED_COLOR_4,
+                            8: cv2.IMREAD_REDUCED_COLOR_8}
+
+
+def is_jpeg_file(path: str) -> bool:
+    return os.path.splitext(path)[-1].lower() in JPEG_EXTENSIONS
+
+
+def get_jpeg_reduction_factor(image_size: Tuple[int, int], min_short_size: Optional[int] = None,
+                              min_long_size: Optional[int] = None) -> int:
+    """
+    get_jpeg_reduction_factor - Finds the largest DCT reduction factor that keeps the decoded image at least as large
+                                as the requested size, so that the following resize transform never up-samples.
+
+        :param image_size:      The original (width, height) of the image
+        :param min_short_size:  Minimal size of the short side of the decoded image
+        :param min_long_size:   Minimal size of the long side of the decoded image
+        :return:                One of 1 (full resolution decoding), 2, 4, 8
+    """
+    if min_short_size is None and min_long_size is None:
+        return 1
+
+    short_side, long_side = min(image_size), max(image_size)
+    for factor in JPEG_REDUCTION_FACTORS:
+        # LIBJPEG ROUNDS THE SCALED DIMENSIONS UP
+        reduced_short_side, reduced_long_side = -(-short_side // factor), -(-long_side // factor)
+        if (min_short_size is None or reduced_short_side >= min_short_size) and \
+                (min_long_size is None or reduced_long_side >= min_long_size):
+            return factor
+
+    return 1
+
+
+def pil_reduced_resolution_loader(sample_path: str, min_short_size: Optional[int] = None,
+                                  min_long_size: Optional[int] = None) -> Image:
+    """
+    pil_reduced_resolution_loader - Loads an RGB image using PIL. JPEG images are decoded in draft mode, i.e the
+                                    DCT scaling of libjpeg decodes them directly at 1/2, 1/4 or 1/8 of their resolution,
+                                    as long as the result is not smaller than the requested size.
+
+        :param sample_path:     The path to the sample image
+        :param min_short_size:  Minimal size of the short side of the loaded image
+        :param min_long_size:   Minimal size of the long side of the loaded image
+        :return:                The loaded Image
+    """
+    image = Image.open(sample_path)
+    factor = get_jpeg_reduction_factor(image.size, min_short_size=min_short_size, min_long_size=min_long_size)
+    if factor > 1 and image.format == 'JPEG':
+        w, h = image.size
+        # DRAFT PICKS THE LARGEST REDUCTION WHICH IS STILL AT LEAST AS LARGE AS THE REQUESTED SIZE
+        image.draft('RGB', (-(-w // factor), -(-h // factor)))
+
+    return image.convert('RGB')
+
+
+def cv2_reduced_resolution_loader(sample_path: str, min_short_size: Optional[int] = None,
+                                  min_long_size: Optional[int] = None) -> Optional[np.ndarray]:
+    """
+    cv2_reduced_resolution_loader - Loads a BGR image using OpenCV. JPEG images are decoded with the
+                                    cv2.IMREAD_REDUCED_COLOR_* flags (DCT scaling) as long as the result is not smaller
+                                    than the requested size.
+
+        :param sample_path:     The path to the sample image
+        :param min_short_size:  Minimal size of the short side of the loaded image
+        :param min_long_size:   Minimal size of the long side of the loaded image
+        :return:                The loaded image (HxWx3 BGR uint8) or None if the image could not be read
+    """
+    factor = 1
+    if is_jpeg_file(sample_path):
+        # PIL ONLY PARSES THE HEADER HERE - THE PIXELS ARE NOT DECODED
+        with Image.open(sample_path) as header:
+            factor = get_jpeg_reduction_factor(header.size, min_short_size=min_short_size, min_long_size=min_long_size)
+
+    return cv2.imread(sample_path, _CV2_REDUCED_COLOR_FLAGS[factor])
+
+
+def benchmark_image_loaders(image_paths: List[str], loaders: dict, repetitions: int = 1) -> dict:
+    """
+    benchmark_image_loaders - Measures the decoding throughput of several image loaders over the same images
+
+        Usage:
+            paths = glob.glob('/data/coco/images/val2017/*.jpg')[:500]
+            benchmark_image_loaders(paths, loaders={
+                'cv2_full': cv2.imread,
+                'cv2_reduced_640': partial(cv2_reduced_resolution_loader, min_long_size=640),
+                'pil_full': lambda p: Image.open(p).convert('RGB'),
+                'pil_draft_512': partial(pil_reduced_resolution_loader, min_short_size=512)})
+
+        :param image_paths:     The images to decode
+        :param loaders:         Dictionary of loader name to a callable that receives a path and returns an image
+        :param repetitions:     Number of passes over image_paths for every loader
+        :return:                Dictionary of loader name to {'images_per_sec', 'ms_per_image', 'mean_pixels'}
+    """
+    results = {}
+    for loader_name, loader in loaders.items():
+        total_pixels, num_images = 0, 0
+        start = time.perf_counter()
+        for _ in range(repetitions):
+            for path in image_paths:
+                image = loader(path)
+                total_pixels += _get_num_pixels(image)
+                num_images += 1
+        elapsed = time.perf_counter() - start
+
+        results[loader_name] = {'images_per_sec': num_images / elapsed,
+                                'ms_per_image': 1000. * elapsed / num_images,
+                                'mean_pixels': total_pixels / num_images}
+    return results
+
+
+def _get_num_pixels(image) -> int:
+    if isinstance(image, Image.Image):
+        return image.size[0] * image.size[1]
+    return image.shape[0] * image.shape[1]
+
+
+def get_rescale_target_sizes(image_mask_transforms: Callable) -> Tuple[Optional[int], Optional[int]]:
+    """
+    get_rescale_target_sizes - Inspects a segmentation transforms pipeline and returns the size that the first
+                               resizing transform rescales to, when it can be determined from the transform itself.
+                               Only transforms that do not depend on the image resolution may appear before it.
+
+        :param image_mask_transforms:   transforms.Compose of SegmentationTransforms
+        :return:                        (short_size, long_size), both None if the target size is unknown
+    """
+    for image_mask_transform in getattr(image_mask_transforms, 'transforms', []):
+        if isinstance(image_mask_transform, RandomFlip):
+            continue
+        if isinstance(image_mask_transform, Rescale) and image_mask_transform.scale_factor is None:
+            if image_mask_transform.short_size is not None:
+                return image_mask_transform.short_size, None
+            return None, image_mask_transform.long_size
+        break
+
+    return None, None
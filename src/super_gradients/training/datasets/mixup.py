@@ -10,7 +10,7 @@ CutMix: https://github.com/clovaai/CutMix-PyTorch
 CutMix by timm: https://github.com/rwightman/pytorch-image-models/timm
 
 """
-from typing import List, Union
+from typing import List, Tuple, Union
 
 import numpy as np
 import torch
@@ -46,14 +46,14 @@ def rand_bbox(img_shape: tuple, lam: float, margin: float = 0., count: int = Non
     support for enforcing a border margin as percent of bbox dimensions.
 
     :param img_shape: Image shape as tuple
-    :param lam: Cutmix lambda value
+    :param lam: Cutmix lambda value, or an array of count lambda values (one per bbox)
     :param margin: Percentage of bbox dimension to enforce as margin (reduce amount of box outside image)
     :param count: Number of bbox to generate
     """
     ratio = np.sqrt(1 - lam)
     img_h, img_w = img_shape[-2:]
-    cut_h, cut_w = int(img_h * ratio), int(img_w * ratio)
-    margin_y, margin_x = int(margin * cut_h), int(margin * cut_w)
+    cut_h, cut_w = (img_h * ratio).astype(int), (img_w * ratio).astype(int)
+    margin_y, margin_x = (margin * cut_h).astype(int), (margin * cut_w).astype(int)
     cy = np.random.randint(0 + margin_y, img_h - margin_y, size=count)
     cx = np.random.randint(0 + margin_x, img_w - margin_x, size=count)
     yl = np.clip(cy - cut_h // 2, 0, img_h)
@@ -85,6 +85,21 @@ def rand_bbox_minmax(img_shape: tuple, minmax: Union[tuple, list], count: int =
     return yl, yu, xl, xu
 
 
+def bbox_to_mask(bbox: tuple, img_shape: tuple, device: Union[str, torch.device] = 'cpu') -> torch.Tensor:
+    """
+    Builds a batch of boolean masks from per-sample bbox coordinates (as generated by cutmix_bbox_and_lam with count)
+
+    :param bbox: (yl, yh, xl, xh) arrays with one entry per sample
+    :param img_shape: Image shape as tuple
+    :param device: the device to build the masks on
+    :return: a bool tensor of shape (count, 1, H, W) that is True inside each sample's bbox
+    """
+    yl, yh, xl, xh = (torch.as_tensor(np.asarray(coord), device=device).view(-1, 1, 1, 1) for coord in bbox)
+    rows = torch.arange(img_shape[-2], device=device).view(1, 1, -1, 1)
+    cols = torch.arange(img_shape[-1], device=device).view(1, 1, 1, -1)
+    return (rows >= yl) & (rows < yh) & (cols >= xl) & (cols < xh)
+
+
 def cutmix_bbox_and_lam(img_shape: tuple, lam: float, ratio_minmax: Union[tuple, list] = None, correct_lam: bool = True,
                         count: int = None):
     """
@@ -104,11 +119,16 @@ class CollateMixup:
     """
     Collate with Mixup/Cutmix that applies different params to each element or whole batch
     A Mixup impl that's performed while collating the batches.
+
+    The mixing is vectorized over the stacked batch, so it can also be deferred to the training device: with
+    mix_on_device=True the collate only stacks the batch, and CollateMixup.mix should be called on the inputs and
+    targets after they were transferred (SgModel does so automatically for its train_loader's collate_fn).
     """
 
     def __init__(self, mixup_alpha: float = 1., cutmix_alpha: float = 0., cutmix_minmax: List[float] = None,
                  prob: float = 1.0, switch_prob: float = 0.5,
-                 mode: str = 'batch', correct_lam: bool = True, label_smoothing: float = 0.1, num_classes: int = 1000):
+                 mode: str = 'batch', correct_lam: bool = True, label_smoothing: float = 0.1, num_classes: int = 1000,
+                 mix_on_device: bool = False):
         """
         Mixup/Cutmix that applies different params to each element or whole batch
 
@@ -121,6 +141,8 @@ class CollateMixup:
         :param correct_lam: apply lambda correction when cutmix bbox clipped by image borders
         :param label_smoothing: apply label smoothing to the mixed target tensor
         :param num_classes: number of classes for target
+        :param mix_on_device: only stack the batch when collating and leave the mixing to CollateMixup.mix, which is
+                              called on the device after the batch was transferred
         """
         self.mixup_alpha = mixup_alpha
         self.cutmix_alpha = cutmix_alpha
@@ -136,6 +158,7 @@ class CollateMixup:
         self.mode = mode
         self.correct_lam = correct_lam  # correct lambda based on clipped area for cutmix
         self.mixup_enabled = True  # set to false to disable mixing (intended tp be set by train loop)
+        self.mix_on_device = mix_on_device
 
     def _params_per_elem(self, batch_size):
         """
@@ -148,18 +171,19 @@ class CollateMixup:
         """
         lam = torch.ones(batch_size, dtype=torch.float32)
         use_cutmix = torch.zeros(batch_size, dtype=torch.bool)
+        sample_shape = (batch_size,)
         if self.mixup_enabled:
             if self.mixup_alpha > 0. and self.cutmix_alpha > 0.:
                 use_cutmix = torch.rand(batch_size) < self.switch_prob
                 lam_mix = torch.where(
                     use_cutmix,
-                    torch.distributions.beta.Beta(self.cutmix_alpha, self.cutmix_alpha).sample(sample_shape=batch_size),
-                    torch.distributions.beta.Beta(self.mixup_alpha, self.mixup_alpha).sample(sample_shape=batch_size))
+                    torch.distributions.beta.Beta(self.cutmix_alpha, self.cutmix_alpha).sample(sample_shape=sample_shape),
+                    torch.distributions.beta.Beta(self.mixup_alpha, self.mixup_alpha).sample(sample_shape=sample_shape))
             elif self.mixup_alpha > 0.:
-                lam_mix = torch.distributions.beta.Beta(self.mixup_alpha, self.mixup_alpha).sample(sample_shape=batch_size)
+                lam_mix = torch.distributions.beta.Beta(self.mixup_alpha, self.mixup_alpha).sample(sample_shape=sample_shape)
             elif self.cutmix_alpha > 0.:
                 use_cutmix = torch.ones(batch_size, dtype=torch.bool)
-                lam_mix = torch.distributions.beta.Beta(self.cutmix_alpha, self.cutmix_alpha).sample(sample_shape=batch_size)
+                lam_mix = torch.distributions.beta.Beta(self.cutmix_alpha, self.cutmix_alpha).sample(sample_shape=sample_shape)
             else:
                 raise IllegalDatasetParameterException("One of mixup_alpha > 0., cutmix_alpha > 0., "
                                                        "cutmix_minmax not None should be true.")
@@ -193,112 +217,135 @@ class CollateMixup:
             lam = float(lam_mix)
         return lam, use_cutmix
 
-    def _mix_elem_collate(self, output: torch.Tensor, batch: list, half: bool = False):
+    def _cutmix_elements(self, output: torch.Tensor, sources: torch.Tensor, lam: torch.Tensor,
+                         indices: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Pastes a random bbox (one per element) from sources into output, for the elements in indices only
+
+        :param output: the (already stacked) output tensor, modified in place
+        :param sources: tensor with the same shape as output to take the patches from
+        :param lam: the lambda value per element
+        :param indices: the indices of the elements to apply cutmix to
+        :return: the masks that were applied (len(indices) x 1 x H x W) and the (corrected) lambda per element
+        """
+        bbox, lam_cutmix = cutmix_bbox_and_lam(output.shape, lam[indices].numpy(), ratio_minmax=self.cutmix_minmax,
+                                               correct_lam=self.correct_lam, count=len(indices))
+        masks = bbox_to_mask(bbox, output.shape, device=output.device)
+        device_indices = indices.to(output.device)
+        output[device_indices] = torch.where(masks, sources[device_indices], output[device_indices])
+        lam = lam.clone()
+        lam[indices] = torch.as_tensor(lam_cutmix, dtype=torch.float32)
+        return masks, lam
+
+    def _mix_elem(self, inputs: torch.Tensor, half: bool = False) -> Tuple[torch.Tensor, torch.Tensor]:
         """
         This is the implementation for 'elem' or 'half' modes
-        :param output: the output tensor to fill
-        :param batch: list of thr batch items
-        :return: a tensor containing the lambda values used for the mixing (this vector can be used for
-        mixing the labels as well)
+        :param inputs: the stacked batch
+        :return: the mixed batch and a tensor containing the lambda values used for the mixing (this vector can be used
+        for mixing the labels as well)
         """
-        batch_size = len(batch)
+        batch_size = len(inputs)
         num_elem = batch_size // 2 if half else batch_size
-        assert len(output) == num_elem
-        lam_batch, use_cutmix = self._params_per_elem(num_elem)
-        for i in range(num_elem):
-            j = batch_size - i - 1
-            lam = lam_batch[i]
-            mixed = batch[i][0]
-            if lam != 1.:
-                if use_cutmix[i]:
-                    if not half:
-                        mixed = torch.clone(mixed)
-                    (yl, yh, xl, xh), lam = cutmix_bbox_and_lam(
-                        output.shape, lam, ratio_minmax=self.cutmix_minmax, correct_lam=self.correct_lam)
-                    mixed[:, yl:yh, xl:xh] = batch[j][0][:, yl:yh, xl:xh]
-                    lam_batch[i] = lam
-                else:
-                    mixed = mixed * lam + batch[j][0] * (1 - lam)
-            output[i] += mixed
+        lam, use_cutmix = self._params_per_elem(num_elem)
+
+        # ELEMENT i IS MIXED WITH ELEMENT batch_size - i - 1
+        mixed_with = inputs[batch_size - num_elem:].flip(0)
+        # CUTMIX ELEMENTS KEEP THEIR OWN PIXELS OUTSIDE THE BBOX, UNMIXED ELEMENTS HAVE lam == 1
+        blend_lam = torch.where(use_cutmix, torch.ones_like(lam), lam).to(inputs.device).view(-1, 1, 1, 1)
+        output = inputs[:num_elem] * blend_lam + mixed_with * (1. - blend_lam)
+
+        cutmix_indices = torch.nonzero(use_cutmix & (lam != 1.)).flatten()
+        if len(cutmix_indices):
+            _, lam = self._cutmix_elements(output, mixed_with, lam, cutmix_indices)
+
         if half:
-            lam_batch = torch.cat((lam_batch, torch.ones(num_elem)))
-        return torch.tensor(lam_batch).unsqueeze(1)
+            lam = torch.cat((lam, torch.ones(num_elem)))
+        return output, lam.unsqueeze(1)
 
-    def _mix_pair_collate(self, output: torch.Tensor, batch: list):
+    def _mix_pair(self, inputs: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
         """
         This is the implementation for 'pair' mode
-        :param output: the output tensor to fill
-        :param batch: list of thr batch items
-        :return: a tensor containing the lambda values used for the mixing (this vector can be used for
-        mixing the labels as well)
+        :param inputs: the stacked batch
+        :return: the mixed batch and a tensor containing the lambda values used for the mixing (this vector can be used
+        for mixing the labels as well)
         """
-        batch_size = len(batch)
-        lam_batch, use_cutmix = self._params_per_elem(batch_size // 2)
-        for i in range(batch_size // 2):
-            j = batch_size - i - 1
-            lam = lam_batch[i]
-            mixed_i = batch[i][0]
-            mixed_j = batch[j][0]
-            assert 0 <= lam <= 1.0
-            if lam < 1.:
-                if use_cutmix[i]:
-                    (yl, yh, xl, xh), lam = cutmix_bbox_and_lam(
-                        output.shape, lam, ratio_minmax=self.cutmix_minmax, correct_lam=self.correct_lam)
-                    patch_i = torch.clone(mixed_i[:, yl:yh, xl:xh])
-                    mixed_i[:, yl:yh, xl:xh] = mixed_j[:, yl:yh, xl:xh]
-                    mixed_j[:, yl:yh, xl:xh] = patch_i
-                    lam_batch[i] = lam
-                else:
-                    mixed_temp = mixed_i.type(torch.float32) * lam + mixed_j.type(torch.float32) * (1 - lam)
-                    mixed_j = mixed_j.type(torch.float32) * lam + mixed_i.type(torch.float32) * (1 - lam)
-                    mixed_i = mixed_temp
-                    torch.rint(mixed_j, out=mixed_j)
-                    torch.rint(mixed_i, out=mixed_i)
-            output[i] += mixed_i
-            output[j] += mixed_j
-        lam_batch = torch.cat((lam_batch, lam_batch[::-1]))
-        return torch.tensor(lam_batch).unsqueeze(1)
-
-    def _mix_batch_collate(self, output: torch.Tensor, batch: list):
+        batch_size = len(inputs)
+        num_pairs = batch_size // 2
+        lam, use_cutmix = self._params_per_elem(num_pairs)
+
+        # ELEMENTS i AND batch_size - i - 1 ARE MIXED WITH EACH OTHER USING THE SAME PARAMS
+        mixed_with = inputs.flip(0)
+        blend_lam = torch.where(use_cutmix, torch.ones_like(lam), lam)
+        blend_lam = torch.cat((blend_lam, blend_lam.flip(0))).to(inputs.device).view(-1, 1, 1, 1)
+        output = inputs * blend_lam + mixed_with * (1. - blend_lam)
+
+        mixup = ~use_cutmix & (lam < 1.)
+        mixup = torch.cat((mixup, mixup.flip(0))).to(inputs.device)
+        output[mixup] = torch.round(output[mixup])
+
+        cutmix_indices = torch.nonzero(use_cutmix & (lam < 1.)).flatten()
+        if len(cutmix_indices):
+            masks, lam = self._cutmix_elements(output, mixed_with, lam, cutmix_indices)
+            # THE SECOND ELEMENT OF EACH PAIR GETS THE PATCH OF THE FIRST ONE, FROM THE SAME BBOX
+            pair_indices = (batch_size - 1 - cutmix_indices).to(inputs.device)
+            output[pair_indices] = torch.where(masks, mixed_with[pair_indices], output[pair_indices])
+
+        return output, torch.cat((lam, lam.flip(0))).unsqueeze(1)
+
+    def _mix_batch(self, inputs: torch.Tensor) -> Tuple[torch.Tensor, float]:
         """
         This is the implementation for 'batch' mode
-        :param output: the output tensor to fill
-        :param batch: list of thr batch items
-        :return: the lambda value used for the mixing
+        :param inputs: the stacked batch
+        :return: the mixed batch and the lambda value used for the mixing
         """
-        batch_size = len(batch)
         lam, use_cutmix = self._params_per_batch()
+        if lam == 1.:
+            return inputs, lam
+
+        mixed_with = inputs.flip(0)
         if use_cutmix:
             (yl, yh, xl, xh), lam = cutmix_bbox_and_lam(
-                output.shape, lam, ratio_minmax=self.cutmix_minmax, correct_lam=self.correct_lam)
-        for i in range(batch_size):
-            j = batch_size - i - 1
-            mixed = batch[i][0]
-            if lam != 1.:
-                if use_cutmix:
-                    mixed = torch.clone(mixed)  # don't want to modify the original while iterating
-                    mixed[:, yl:yh, xl:xh] = batch[j][0][:, yl:yh, xl:xh]
-                else:
-                    mixed = mixed * lam + batch[j][0] * (1 - lam)
-            output[i] += mixed
-        return lam
+                inputs.shape, lam, ratio_minmax=self.cutmix_minmax, correct_lam=self.correct_lam)
+            output = inputs.clone()
+            output[..., yl:yh, xl:xh] = mixed_with[..., yl:yh, xl:xh]
+        else:
+            output = inputs * lam + mixed_with * (1. - lam)
+        return output, lam
 
-    def __call__(self, batch, _=None):
-        batch_size = len(batch)
+    def mix(self, inputs: torch.Tensor, targets: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Applies mixup/cutmix to a stacked batch, on the device the batch is on
+
+        :param inputs: the stacked batch of images (B x C x H x W)
+        :param targets: the class indices (B)
+        :return: the mixed inputs and the mixed (soft) targets. In 'half' mode only the first half of the batch is
+        returned
+        """
+        batch_size = len(inputs)
         if batch_size % 2 != 0:
             raise IllegalDatasetParameterException('Batch size should be even when using this')
         half = 'half' in self.mode
-        if half:
-            batch_size //= 2
-        output = torch.zeros((batch_size, *batch[0][0].shape), dtype=torch.float32)
+        output_size = batch_size // 2 if half else batch_size
+
+        inputs = inputs.type(torch.float32)
         if self.mode == 'elem' or self.mode == 'half':
-            lam = self._mix_elem_collate(output, batch, half=half)
+            output, lam = self._mix_elem(inputs, half=half)
         elif self.mode == 'pair':
-            lam = self._mix_pair_collate(output, batch)
+            output, lam = self._mix_pair(inputs)
         else:
-            lam = self._mix_batch_collate(output, batch)
+            output, lam = self._mix_batch(inputs)
+
+        if isinstance(lam, torch.Tensor):
+            lam = lam.to(inputs.device)
+        targets = mixup_target(targets, self.num_classes, lam, self.label_smoothing, device=inputs.device)
+        return output, targets[:output_size]
+
+    def __call__(self, batch, _=None):
+        if len(batch) % 2 != 0:
+            raise IllegalDatasetParameterException('Batch size should be even when using this')
+        inputs = torch.stack([torch.as_tensor(b[0]) for b in batch])
         target = torch.tensor([b[1] for b in batch], dtype=torch.int32)
-        target = mixup_target(target, self.num_classes, lam, self.label_smoothing, device='cpu')
-        target = target[:batch_size]
+        if self.mix_on_device:
+            return inputs, target
 
-        return output, target
+        return self.mix(inputs, target)
@@ -0,0 +1,3 @@
+from super_gradients.training.datasets.samplers.aspect_ratio_batch_sampler import AspectRatioBatchSampler
+
+__all__ = ['AspectRatioBatchSampler']
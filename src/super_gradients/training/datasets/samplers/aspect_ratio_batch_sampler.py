@@ -0,0 +1,132 @@
+import math
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+import torch.distributed as dist
+from torch.utils.data import Sampler
+
+
+class AspectRatioBatchSampler(Sampler):
+    """
+    AspectRatioBatchSampler - Batch sampler for rectangular (letterboxed) training
+
+    The samples are sorted by aspect ratio and split into num_buckets equally populated buckets. Every epoch the samples
+    are shuffled within their bucket and cut into batches, and the batches of all buckets are shuffled together, so the
+    batch composition changes every epoch while each batch still holds images of similar aspect ratio.
+    In distributed training the batches are sharded across the ranks - all ranks use the same seed, so they agree on
+    the permutation without communicating.
+
+    Every yielded batch is a list of (index, (height, width)) tuples, where (height, width) is the smallest stride
+    multiple letterbox shape that fits the aspect ratios of the batch (the same shape that the 'rectangular' sample
+    loading method of DetectionDataSet computes for its fixed batches).
+    """
+
+    def __init__(self, aspect_ratios: Sequence[float], batch_size: int, img_size: int, num_buckets: int = 8,
+                 shuffle: bool = True, drop_last: bool = False, seed: int = 0, num_replicas: Optional[int] = None,
+                 rank: Optional[int] = None, stride: int = 32, pad: float = 0.5):
+        """
+        :param aspect_ratios:   The aspect ratio (height / width) of every sample in the dataset
+        :param batch_size:      Batch size (per rank)
+        :param img_size:        The size of the long side of the letterboxed images
+        :param num_buckets:     Number of aspect ratio buckets
+        :param shuffle:         Shuffle the samples within the buckets and the batches across buckets every epoch. When
+                                False the batches are consecutive samples in aspect ratio order
+        :param drop_last:       Drop the last incomplete batch and the batches that can not be evenly sharded across
+                                the ranks, instead of repeating batches to even them out
+        :param seed:            Random seed, must be identical across the ranks
+        :param num_replicas:    Number of distributed ranks (by default taken from the process group)
+        :param rank:            Rank of the current process (by default taken from the process group)
+        :param stride:          The letterbox shapes are multiples of stride
+        :param pad:             Extra padding of the letterbox shapes, in units of stride
+        """
+        if num_replicas is None:
+            num_replicas = dist.get_world_size() if dist.is_available() and dist.is_initialized() else 1
+        if rank is None:
+            rank = dist.get_rank() if dist.is_available() and dist.is_initialized() else 0
+        if not 0 <= rank < num_replicas:
+            raise ValueError(f"Invalid rank {rank}, rank should be in the interval [0, {num_replicas - 1}]")
+
+        self.aspect_ratios = np.asarray(aspect_ratios, dtype=np.float64)
+        self.batch_size = batch_size
+        self.img_size = img_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.seed = seed
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.stride = stride
+        self.pad = pad
+        self.epoch = 0
+
+        sorted_indices = np.argsort(self.aspect_ratios, kind='stable')
+        self.buckets = np.array_split(sorted_indices, max(1, min(num_buckets, len(sorted_indices))))
+
+    def set_epoch(self, epoch: int):
+        """
+        set_epoch - Sets the epoch that seeds the shuffling. Like DistributedSampler.set_epoch, it should be called at
+                    the start of every epoch (SgModel does so) so the batches differ between epochs.
+        """
+        self.epoch = epoch
+
+    def get_batch_shape(self, indices: Sequence[int]) -> Tuple[int, int]:
+        """
+        get_batch_shape - The (height, width) letterbox shape for a batch of samples
+        """
+        batch_aspect_ratios = self.aspect_ratios[indices]
+        min_aspect_ratio, max_aspect_ratio = batch_aspect_ratios.min(), batch_aspect_ratios.max()
+        shape = [1., 1.]
+        if max_aspect_ratio < 1:
+            shape = [max_aspect_ratio, 1.]
+        elif min_aspect_ratio > 1:
+            shape = [1., 1. / min_aspect_ratio]
+
+        height, width = (int(math.ceil(side * self.img_size / self.stride + self.pad)) * self.stride for side in shape)
+        return height, width
+
+    def _get_batches(self) -> List[np.ndarray]:
+        if not self.shuffle:
+            # CONSECUTIVE BATCHES OF THE SORTED SAMPLES, AS IN 'rectangular' LOADING
+            sorted_indices = np.concatenate(self.buckets)
+            batches = [sorted_indices[start:start + self.batch_size] for start in range(0, len(sorted_indices), self.batch_size)]
+            return batches[:-1] if self.drop_last and len(batches[-1]) < self.batch_size else batches
+
+        generator = torch.Generator()
+        generator.manual_seed(self.seed + self.epoch)
+
+        batches, leftovers = [], []
+        for bucket in self.buckets:
+            bucket = bucket[torch.randperm(len(bucket), generator=generator).numpy()]
+            num_full_batches = len(bucket) // self.batch_size
+            batches += np.split(bucket[:num_full_batches * self.batch_size], num_full_batches) if num_full_batches else []
+            leftovers.append(bucket[num_full_batches * self.batch_size:])
+
+        # THE LEFTOVERS OF NEIGHBOURING BUCKETS ARE BATCHED TOGETHER, SO ONLY THE LAST BATCH MAY BE INCOMPLETE
+        leftovers = np.concatenate(leftovers)
+        for start in range(0, len(leftovers), self.batch_size):
+            batch = leftovers[start:start + self.batch_size]
+            if len(batch) == self.batch_size or not self.drop_last:
+                batches.append(batch)
+
+        return [batches[i] for i in torch.randperm(len(batches), generator=generator).tolist()]
+
+    def _shard(self, batches: List[np.ndarray]) -> List[np.ndarray]:
+        if self.drop_last:
+            batches = batches[:len(batches) - len(batches) % self.num_replicas]
+        elif len(batches) % self.num_replicas:
+            # ALL THE RANKS MUST RUN THE SAME NUMBER OF STEPS
+            num_missing = self.num_replicas - len(batches) % self.num_replicas
+            batches = batches + (batches * math.ceil(num_missing / len(batches)))[:num_missing]
+        return batches[self.rank::self.num_replicas]
+
+    def __iter__(self) -> Iterator[List[Tuple[int, Tuple[int, int]]]]:
+        for batch in self._shard(self._get_batches()):
+            shape = self.get_batch_shape(batch)
+            yield [(int(index), shape) for index in batch]
+
+    def __len__(self) -> int:
+        num_samples = len(self.aspect_ratios)
+        num_batches = num_samples // self.batch_size if self.drop_last else math.ceil(num_samples / self.batch_size)
+        if self.drop_last:
+            return num_batches // self.num_replicas
+        return math.ceil(num_batches / self.num_replicas)
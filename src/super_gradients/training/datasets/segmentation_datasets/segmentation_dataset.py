@@ -1,18 +1,24 @@
 import os
 import torch
 import random
+from functools import partial
 import numpy as np
 from tqdm import tqdm
 from typing import Callable
 import torchvision.transforms as transform
 from PIL import Image
 
+from super_gradients.common.abstractions.abstract_logger import get_logger
 from super_gradients.common.decorators.factory_decorator import resolve_param
 from super_gradients.common.factories.transforms_factory import TransformsFactory
+from super_gradients.training.datasets.image_loading_utils import get_rescale_target_sizes, \
+    pil_reduced_resolution_loader
 from super_gradients.training.datasets.sg_dataset import DirectoryDataSet, ListDataset
 from super_gradients.training.transforms.transforms import RandomFlip, Rescale, RandomRescale, RandomRotate, \
     CropImageAndMask, RandomGaussianBlur, PadShortToCropSize
 
+logger = get_logger(__name__)
+
 
 class SegmentationDataSet(DirectoryDataSet, ListDataset):
 
@@ -24,7 +30,8 @@ class SegmentationDataSet(DirectoryDataSet, ListDataset):
                  dataset_hyper_params: dict = None,
                  cache_labels: bool = False, cache_images: bool = False, sample_loader: Callable = None,
                  target_loader: Callable = None, collate_fn: Callable = None, target_extension: str = '.png',
-                 image_mask_transforms: transform.Compose = None, image_mask_transforms_aug: transform.Compose = None):
+                 image_mask_transforms: transform.Compose = None, image_mask_transforms_aug: transform.Compose = None,
+                 reduced_resolution_decoding: bool = False):
         """
         SegmentationDataSet
                                 * Please use self.augment == True only for training
@@ -46,6 +53,10 @@ class SegmentationDataSet(DirectoryDataSet, ListDataset):
             :param target_extension:            file extension of the targets (defualt is .png for PASCAL VOC 2012)
             :param image_mask_transforms        transforms to be applied on image and mask when augment=False
             :param image_mask_transforms_aug    transforms to be applied on image and mask when augment=True
+            :param reduced_resolution_decoding: Decode JPEG samples in draft mode (DCT scaling) at the lowest
+                                                resolution that the first Rescale transform still down-scales from.
+                                                Ignored when a custom sample_loader is passed, or when the
+                                                transforms do not start with a Rescale to short_size/long_size.
         """
         self.samples_sub_directory = samples_sub_directory
         self.targets_sub_directory = targets_sub_directory
@@ -59,24 +70,6 @@ class SegmentationDataSet(DirectoryDataSet, ListDataset):
         self.batch_index = None
         self.total_batches_num = None
 
-        # ENABLES USING CUSTOM SAMPLE/TARGET LOADERS
-        if sample_loader is not None:
-            self.sample_loader = sample_loader
-        if target_loader is not None:
-            self.target_loader = target_loader
-
-        # CREATE A DIRECTORY DATASET OR A LIST DATASET BASED ON THE list_file INPUT VARIABLE
-        if list_file is not None:
-            ListDataset.__init__(self, root=root, file=list_file, target_extension=target_extension,
-                                 sample_loader=self.sample_loader, sample_transform=self.sample_transform,
-                                 target_loader=self.target_loader, target_transform=self.target_transform,
-                                 collate_fn=collate_fn)
-        else:
-            DirectoryDataSet.__init__(self, root=root, samples_sub_directory=samples_sub_directory,
-                                      targets_sub_directory=targets_sub_directory, target_extension=target_extension,
-                                      sample_loader=self.sample_loader, sample_transform=self.sample_transform,
-                                      target_loader=self.target_loader, target_transform=self.target_transform,
-                                      collate_fn=collate_fn)
         # DEFAULT TRANSFORMS
         # FIXME - Rescale before RandomRescale is kept for legacy support, consider removing it like most implementation
         #  papers regimes.
@@ -98,6 +91,27 @@ class SegmentationDataSet(DirectoryDataSet, ListDataset):
 
         self.image_mask_transforms = image_mask_transforms
 
+        # ENABLES USING CUSTOM SAMPLE/TARGET LOADERS
+        if sample_loader is not None:
+            self.sample_loader = sample_loader
+        elif reduced_resolution_decoding:
+            self._set_reduced_resolution_sample_loader()
+        if target_loader is not None:
+            self.target_loader = target_loader
+
+        # CREATE A DIRECTORY DATASET OR A LIST DATASET BASED ON THE list_file INPUT VARIABLE
+        if list_file is not None:
+            ListDataset.__init__(self, root=root, file=list_file, target_extension=target_extension,
+                                 sample_loader=self.sample_loader, sample_transform=self.sample_transform,
+                                 target_loader=self.target_loader, target_transform=self.target_transform,
+                                 collate_fn=collate_fn)
+        else:
+            DirectoryDataSet.__init__(self, root=root, samples_sub_directory=samples_sub_directory,
+                                      targets_sub_directory=targets_sub_directory, target_extension=target_extension,
+                                      sample_loader=self.sample_loader, sample_transform=self.sample_transform,
+                                      target_loader=self.target_loader, target_transform=self.target_transform,
+                                      collate_fn=collate_fn)
+
     def __getitem__(self, index):
         sample_path, target_path = self.samples_targets_tuples_list[index]
 
@@ -128,6 +142,22 @@ class SegmentationDataSet(DirectoryDataSet, ListDataset):
         image = Image.open(sample_path).convert('RGB')
         return image
 
+    def _set_reduced_resolution_sample_loader(self):
+        """
+        _set_reduced_resolution_sample_loader - Replaces the sample loader with a PIL draft-mode loader that decodes
+                                                JPEGs at the lowest resolution the first Rescale transform (of the
+                                                pipeline matching self.augment) still down-scales from
+        """
+        image_mask_transforms = self.image_mask_transforms_aug if self.augment else self.image_mask_transforms
+        min_short_size, min_long_size = get_rescale_target_sizes(image_mask_transforms)
+        if min_short_size is None and min_long_size is None:
+            logger.warning('reduced_resolution_decoding is set but the transforms do not start with a Rescale to '
+                           'short_size/long_size - decoding at full resolution')
+            return
+
+        self.sample_loader = partial(pil_reduced_resolution_loader, min_short_size=min_short_size,
+                                     min_long_size=min_long_size)
+
     @staticmethod
     def sample_transform(image):
         """
@@ -80,3 +80,17 @@ class UndefinedNumClassesException(KDModelException):
     def __init__(self):
         super().__init__(
             'Number of classes must be defined in students and teachers arch params or by connecting to a dataset interface')
+
+
+class TeacherOutputCacheBatchTransformException(KDModelException):
+    """Exception raised for batch transforms that change the training inputs after they were loaded, when the teacher
+     outputs are read from a teacher output cache (the cached outputs of the loaded samples would not match them).
+
+    Attributes:
+        message -- explanation of the error
+    """
+
+    def __init__(self, transform_name: str):
+        super().__init__(
+            transform_name + " transforms the loaded training batches - not supported with a teacher output cache "
+                             "(the cached teacher outputs are of the loaded samples)")
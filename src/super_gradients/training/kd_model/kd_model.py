@@ -12,8 +12,11 @@ from super_gradients.training.utils.checkpoint_utils import read_ckpt_state_dict
     load_checkpoint_to_model
 from super_gradients.training.exceptions.kd_model_exceptions import ArchitectureKwargsException, \
     UnsupportedKDArchitectureException, InconsistentParamsException, UnsupportedKDModelArgException, \
-    TeacherKnowledgeException, UndefinedNumClassesException
-from super_gradients.training.utils.callbacks import KDModelMetricsUpdateCallback
+    TeacherKnowledgeException, UndefinedNumClassesException, TeacherOutputCacheBatchTransformException
+from super_gradients.training.utils.callbacks import KDModelMetricsUpdateCallback, MultiScaleResizeCallback, \
+    TeacherOutputCacheCallback
+from super_gradients.training.datasets.datasets_utils import ComposedCollateFunction, MultiScaleCollateFunction
+from super_gradients.training.datasets.mixup import CollateMixup
 logger = get_logger(__name__)
 
 
@@ -228,6 +231,32 @@ class KDModel(SgModel):
 
         super(KDModel, self)._load_checkpoint_to_model()
 
+    def train(self, training_params: dict = dict()):
+        """
+        train - Trains the KDModule (see SgModel.train). When the KDModule reads the teacher outputs from a
+         TeacherOutputCache, a TeacherOutputCacheCallback is added to the phase callbacks (unless one is given).
+         Batch transforms that change the loaded inputs (CollateMixup, MultiScaleCollateFunction,
+         MultiScaleResizeCallback) are not supported with a TeacherOutputCache.
+        """
+        phase_callbacks = get_param(training_params, 'phase_callbacks') or []
+        if getattr(self.net.module, 'teacher_output_cache', None) is not None:
+            self._validate_teacher_output_cache_batch_transforms(phase_callbacks)
+            if not any(isinstance(callback, TeacherOutputCacheCallback) for callback in phase_callbacks):
+                training_params = dict(training_params,
+                                       phase_callbacks=list(phase_callbacks) + [TeacherOutputCacheCallback()])
+        super(KDModel, self).train(training_params)
+
+    def _validate_teacher_output_cache_batch_transforms(self, phase_callbacks: list):
+        """
+        The cached teacher outputs are keyed by the samples as the dataset loads them - a mixed or resized batch would
+         silently get the teacher outputs of its unmixed, unresized samples.
+        """
+        collate_fn = getattr(self.train_loader, 'collate_fn', None)
+        collate_fns = collate_fn.functions if isinstance(collate_fn, ComposedCollateFunction) else [collate_fn]
+        for batch_transform in list(collate_fns) + list(phase_callbacks):
+            if isinstance(batch_transform, (CollateMixup, MultiScaleCollateFunction, MultiScaleResizeCallback)):
+                raise TeacherOutputCacheBatchTransformException(type(batch_transform).__name__)
+
     def _add_metrics_update_callback(self, phase):
         """
         Adds KDModelMetricsUpdateCallback to be fired at phase
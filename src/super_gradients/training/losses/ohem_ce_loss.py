@@ -58,12 +58,20 @@ class OhemLoss(_Loss):
         num_mining = min(num_mining, num_pixels - 1)
 
         self.thresh = self.thresh.to(logits.device)
-        loss, _ = torch.sort(loss, descending=True)
-        if loss[num_mining] > self.thresh:
-            loss = loss[loss > self.thresh]
-        else:
-            loss = loss[:num_mining]
-        return torch.mean(loss)
+        # THE (num_mining + 1)-TH LARGEST LOSS, SELECTED WITHOUT SORTING ALL THE PIXEL LOSSES
+        kth_loss = torch.kthvalue(loss, num_pixels - num_mining).values
+
+        # ALL THE LOSSES ABOVE THE THRESHOLD - WHEN THERE ARE MORE THAN num_mining OF THEM
+        hard_mask = loss > self.thresh
+        hard_sum, hard_count = loss.masked_fill(~hard_mask, 0.).sum(), hard_mask.sum()
+
+        # OTHERWISE, THE num_mining LARGEST LOSSES - THE LOSSES ABOVE kth_loss, AND TIES WITH kth_loss TO FILL UP
+        top_mask = loss > kth_loss
+        top_sum = loss.masked_fill(~top_mask, 0.).sum() + (num_mining - top_mask.sum()) * kth_loss
+
+        # THE DECISION IS MADE ON THE DEVICE (NO HOST SYNC), AND BEFORE THE DIVISION SO THE GRADIENTS STAY FINITE
+        use_thresh = kth_loss > self.thresh
+        return torch.where(use_thresh, hard_sum, top_sum) / torch.where(use_thresh, hard_count, hard_count.new_tensor(num_mining))
 
 
 class OhemCELoss(OhemLoss):
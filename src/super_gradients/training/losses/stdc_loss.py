@@ -1,19 +1,67 @@
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
-from super_gradients.training.utils.segmentation_utils import to_one_hot
 from torch.nn.modules.loss import _Loss
 from super_gradients.training.losses.ohem_ce_loss import OhemCELoss, OhemBCELoss, OhemLoss
 from super_gradients.training.losses.dice_loss import BinaryDiceLoss
 from typing import Union, Tuple
 
 
+def get_stride_boundary_targets(gt_masks: torch.Tensor, ignore_label: int = None, detail_threshold: float = 1.,
+                                strides: Tuple[int, ...] = (1, 2, 4), binary: bool = False) -> torch.Tensor:
+    """
+    get_stride_boundary_targets - Binary boundary maps of the label map, as the laplacian filtering of its one-hot
+                                  encoding with each stride (upsampled back with nearest interpolation), computed on the
+                                  label map directly.
+
+    The laplacian response of the one-hot channel of a pixel's own class is 8 - (number of 3x3 neighbours with the same
+     label), and it is not positive for any other channel. A pixel is a boundary pixel if its label is valid and that
+     response is above detail_threshold, so the one-hot tensor and the grouped convolutions are not needed.
+
+    :param gt_masks: Class labels tensor, with shape [N, H, W].
+    :param ignore_label: Label of the ignored pixels, they are never boundary pixels.
+    :param detail_threshold: Threshold of the laplacian response to define a pixel as edge, between 1 and 8.
+    :param strides: Strides of the laplacian filter, one output channel each.
+    :param binary: The mask is a binary (foreground) mask - only the pixels labeled 1 can be boundary pixels.
+    :return: Binary float tensor with shape [N, len(strides), H, W].
+    """
+    height, width = gt_masks.shape[-2:]
+    gt_masks = gt_masks.long()
+    # THE ZERO PADDING OF THE ONE-HOT MAPS - A NEIGHBOUR OUTSIDE THE IMAGE NEVER SHARES THE LABEL OF A VALID PIXEL
+    padded_masks = F.pad(gt_masks, (1, 1, 1, 1), value=-1)
+
+    boundary_targets = []
+    for stride in strides:
+        centers = gt_masks[:, ::stride, ::stride]
+        out_height, out_width = centers.shape[-2:]
+        same_label_neighbours = torch.zeros_like(centers, dtype=torch.uint8)
+        for dy in range(3):
+            for dx in range(3):
+                if dy != 1 or dx != 1:
+                    neighbours = padded_masks[:, dy:dy + (out_height - 1) * stride + 1:stride,
+                                              dx:dx + (out_width - 1) * stride + 1:stride]
+                    same_label_neighbours += neighbours == centers
+
+        if binary:
+            valid = centers == 1
+        elif ignore_label is not None:
+            valid = centers != ignore_label
+        else:
+            valid = centers >= 0
+        stride_targets = (valid & (8 - same_label_neighbours >= detail_threshold)).unsqueeze(1).float()
+        if stride_targets.shape[2:] != (height, width):
+            stride_targets = F.interpolate(stride_targets, (height, width), mode='nearest')
+        boundary_targets.append(stride_targets)
+
+    return torch.cat(boundary_targets, dim=1)
+
+
 class DetailAggregateModule(nn.Module):
     """
     DetailAggregateModule to create ground-truth spatial details map. Given ground-truth segmentation masks and using
      laplacian kernels this module create feature-maps with special attention to classes edges aka details.
     """
-    _LAPLACIAN_KERNEL = [-1, -1, -1, -1, 8, -1, -1, -1, -1]
+    _STRIDES = (1, 2, 4)
     _INITIAL_FUSE_KERNEL = [[6. / 10], [3. / 10], [1. / 10]]
 
     def __init__(self,
@@ -29,51 +77,30 @@ class DetailAggregateModule(nn.Module):
         super().__init__()
         assert 1 <= detail_threshold <= 8, f"Detail threshold must be a value between 1 and 8, found: {detail_threshold}"
 
-        self.device = None
         self.detail_threshold = detail_threshold
         self.num_classes = num_classes
         self.ignore_label = ignore_label
 
-        # laplacian dw-convolution, each channel is a class label. apply laplacian filter once for each channel.
-        self.laplacian_kernel = torch.tensor(self._LAPLACIAN_KERNEL, dtype=torch.float32)\
-            .reshape(1, 1, 3, 3).expand(num_classes, 1, 3, 3).requires_grad_(False)
         # init param for 1x1 conv of strided gaussian feature maps.
-        self.fuse_kernel = torch.tensor(self._INITIAL_FUSE_KERNEL, dtype=torch.float32).reshape(1, 3, 1, 1)\
-            .requires_grad_(learnable_fusing_kernel)
+        fuse_kernel = torch.tensor(self._INITIAL_FUSE_KERNEL, dtype=torch.float32).reshape(1, 3, 1, 1)
         if learnable_fusing_kernel:
-            self.fuse_kernel = torch.nn.Parameter(self.fuse_kernel)
-
-    def forward(self, gt_masks: torch.Tensor):
-        if self.device is None:
-            self._set_kernels_to_device(gt_masks.device)
-        if self.num_classes > 1:
-            one_hot = to_one_hot(gt_masks, self.num_classes, self.ignore_label).float()
+            self.fuse_kernel = torch.nn.Parameter(fuse_kernel)
         else:
-            one_hot = gt_masks.unsqueeze(1).float()
-        # create binary detail maps using filters withs strides of 1, 2 and 4.
-        boundary_targets = F.conv2d(one_hot, self.laplacian_kernel, stride=1, padding=1, groups=self.num_classes)
-        boundary_targets_x2 = F.conv2d(one_hot, self.laplacian_kernel, stride=2, padding=1, groups=self.num_classes)
-        boundary_targets_x4 = F.conv2d(one_hot, self.laplacian_kernel, stride=4, padding=1, groups=self.num_classes)
-
-        boundary_targets = self._to_one_channel_binary(boundary_targets, self.detail_threshold)
-        boundary_targets_x2 = self._to_one_channel_binary(boundary_targets_x2, self.detail_threshold)
-        boundary_targets_x4 = self._to_one_channel_binary(boundary_targets_x4, self.detail_threshold)
-
-        boundary_targets_x4 = F.interpolate(boundary_targets_x4, boundary_targets.shape[2:], mode='nearest')
-        boundary_targets_x2 = F.interpolate(boundary_targets_x2, boundary_targets.shape[2:], mode='nearest')
+            self.register_buffer('fuse_kernel', fuse_kernel, persistent=False)
 
-        boundary_targets = torch.cat((boundary_targets, boundary_targets_x2, boundary_targets_x4), dim=1)
-
-        boundary_targets = F.conv2d(boundary_targets, self.fuse_kernel)
+    def forward(self, gt_masks: torch.Tensor):
+        # binary detail maps of the laplacian filters with strides of 1, 2 and 4.
+        boundary_targets = get_stride_boundary_targets(gt_masks, ignore_label=self.ignore_label,
+                                                       detail_threshold=self.detail_threshold, strides=self._STRIDES,
+                                                       binary=self.num_classes == 1)
+
+        # THE KERNEL IS MOVED WITH THE MODULE, A COPY IS USED ONLY IF THE LOSS IS CALLED WITH TARGETS ON ANOTHER DEVICE
+        fuse_kernel = self.fuse_kernel if self.fuse_kernel.device == gt_masks.device else self.fuse_kernel.to(gt_masks.device)
+        boundary_targets = F.conv2d(boundary_targets, fuse_kernel)
         boundary_targets = self._to_one_channel_binary(boundary_targets, 0.3)
 
         return boundary_targets
 
-    def _set_kernels_to_device(self, device: str):
-        self.device = device
-        self.laplacian_kernel = self.laplacian_kernel.to(device)
-        self.fuse_kernel = self.fuse_kernel.to(device)
-
     @staticmethod
     def _to_one_channel_binary(x: torch.Tensor, threshold: float):
         """
@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from typing import List, Tuple, Union
 
 import torch
@@ -50,6 +51,10 @@ class YoLoV5DetectionLoss(_Loss):
         if isinstance(cls_objectness_weights, list):
             self.cls_obj_weights = torch.nn.Parameter(torch.tensor(cls_objectness_weights))
 
+        # THE GRID SIZES (BY THE PREDICTIONS' SHAPES AND DEVICE) AND THE NEIGHBOUR OFFSETS (BY DEVICE) OF build_targets
+        self._grid_sizes_cache = OrderedDict()
+        self._offsets_cache = {}
+
     def forward(self, model_output, targets):
         if isinstance(model_output, tuple) and len(model_output) == 2:
             # in test/eval mode the Yolo v5 model output a tuple where the second item is the raw predictions
@@ -77,62 +82,69 @@ class YoLoV5DetectionLoss(_Loss):
                                         * anchor sizes.
                                     All the above can be indexed in parallel to get the selected correspondences
         """
-        num_anchors, num_targets = self.anchors.num_anchors, targets.shape[0]
-        target_classes, target_boxes, indices, anchors = [], [], [], []
+        device = targets.device
+        grid_sizes, offsets = self._get_assignment_tensors(predictions, device)
+        anchor_sizes = self.anchors.anchors.to(device)
 
-        gain = torch.ones(7, device=targets.device)  # normalized to gridspace gain
-        anchor_indices = torch.arange(num_anchors, device=targets.device)
-        anchor_indices = anchor_indices.float().view(num_anchors, 1).repeat(1, num_targets)
-        # repeat all targets for each anchor and append a corresponding anchor index
-        targets = torch.cat((targets.repeat(num_anchors, 1, 1), anchor_indices[:, :, None]), 2)
+        # ALL THE LAYERS AT ONCE - TARGET COORDINATES IN THE [0, GridX], [0, GridY] RANGES OF EACH LAYER: L x T x 2
+        grid_xy = targets[None, :, 2:4] * grid_sizes
+        grid_wh = targets[None, :, 4:6] * grid_sizes
 
+        # MATCH: FILTER TARGETS BY ANCHOR SIZE RATIO - L x A x T
+        ratio = grid_wh[:, None] / anchor_sizes[:, :, None]
+        anchor_match = torch.max(ratio, 1. / ratio).max(3)[0] < self.anchor_threshold
+
+        # THE CELL OF THE TARGET AND THE 2 NEAREST NEIGHBOUR CELLS (j, k, l, m) - 5 x L x T
         bias = 0.5
-        off = torch.tensor([[0, 0],
-                            [1, 0], [0, 1], [-1, 0], [0, -1],  # j,k,l,m
-                            ], device=targets.device).float() * bias  # offsets
-
-        for i in range(self.anchors.detection_layers_num):
-            anch = self.anchors.anchors[i]
-            gain[2:6] = torch.tensor(predictions[i].shape)[[3, 2, 3, 2]]  # xyxy gain
-
-            # Convert target coordinates from [0, 1] range to coordinates in [0, GridY], [0, GridX] ranges
-            t = targets * gain
-            if num_targets:
-                # Match: filter targets by anchor size ratio
-                r = t[:, :, 4:6] / anch[:, None]  # wh ratio
-                filtered_targets_ids = torch.max(r, 1. / r).max(2)[0] < self.anchor_threshold  # compare
-                t = t[filtered_targets_ids]
-
-                # Find coordinates of targets on a grid
-                gxy = t[:, 2:4]  # grid xy
-                gxi = gain[[2, 3]] - gxy  # inverse
-                j, k = ((gxy % 1. < bias) & (gxy > 1.)).T
-                l, m = ((gxi % 1. < bias) & (gxi > 1.)).T
-                j = torch.stack((torch.ones_like(j), j, k, l, m))
-                t = t.repeat((5, 1, 1))[j]
-                offsets = (torch.zeros_like(gxy)[None] + off[:, None])[j]
-            else:
-                t = targets[0]
-                offsets = 0
-
-            # Define
-            b, c = t[:, :2].long().T  # image, class
-            gxy = t[:, 2:4]  # grid xy
-            gwh = t[:, 4:6]  # grid wh
-            gij = (gxy - offsets).long()
-            gi, gj = gij.T  # grid xy indices
-            # prevent coordinates from going out of bounds
-            gi, gj = gi.clamp_(0, gain[2] - 1), gj.clamp_(0, gain[3] - 1)
-
-            # Append
-            a = t[:, 6].long()  # anchor indices
-            indices.append((b, a, gj, gi))  # image, anchor, grid indices
-            target_boxes.append(torch.cat((gxy - gij, gwh), 1))  # box
-            anchors.append(anch[a])  # anchors
-            target_classes.append(c)  # class
+        grid_xy_inverse = grid_sizes - grid_xy
+        j, k = ((grid_xy % 1. < bias) & (grid_xy > 1.)).unbind(2)
+        l, m = ((grid_xy_inverse % 1. < bias) & (grid_xy_inverse > 1.)).unbind(2)
+        offset_match = torch.stack((torch.ones_like(j), j, k, l, m))
+
+        # A SINGLE SELECTION OVER LAYER x OFFSET x ANCHOR x TARGET, IN THE ORDER OF THE PER-LAYER ASSIGNMENT
+        match = offset_match.transpose(0, 1)[:, :, None] & anchor_match[:, None]
+        layer_ids, offset_ids, anchor_ids, target_ids = match.nonzero(as_tuple=True)
+
+        b, c = targets[target_ids, :2].long().T  # image, class
+        gxy = grid_xy[layer_ids, target_ids]  # grid xy
+        gwh = grid_wh[layer_ids, target_ids]  # grid wh
+        # prevent coordinates from going out of bounds
+        max_gij = (grid_sizes[layer_ids, 0] - 1).long()
+        gij = torch.min(torch.max((gxy - offsets[offset_ids]).long(), torch.zeros_like(max_gij)), max_gij)
+        gi, gj = gij.T  # grid xy indices
+        boxes = torch.cat((gxy - gij, gwh), 1)
+        anchor_wh = anchor_sizes[layer_ids, anchor_ids]
+
+        # SPLIT BY LAYER
+        layer_sizes = torch.bincount(layer_ids, minlength=self.anchors.detection_layers_num).tolist()
+        indices = list(zip(*[x.split(layer_sizes) for x in (b, anchor_ids, gj, gi)]))  # image, anchor, grid indices
+        target_boxes = list(boxes.split(layer_sizes))
+        anchors = list(anchor_wh.split(layer_sizes))
+        target_classes = list(c.split(layer_sizes))
 
         return target_classes, target_boxes, indices, anchors
 
+    def _get_assignment_tensors(self, predictions: List[torch.Tensor],
+                                device: torch.device) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        :return: The (GridX, GridY) sizes of the layers (L x 1 x 2) and the offsets of the neighbour cells (5 x 2), cached
+                 so that no host to device copy is made every step
+        """
+        key = (tuple(tuple(prediction.shape[2:4]) for prediction in predictions), device)
+        if key not in self._grid_sizes_cache:
+            grid_sizes = [[prediction.shape[3], prediction.shape[2]] for prediction in predictions]
+            self._grid_sizes_cache[key] = torch.tensor(grid_sizes, device=device).float()[:, None]
+            if len(self._grid_sizes_cache) > 16:
+                self._grid_sizes_cache.popitem(last=False)
+        else:
+            self._grid_sizes_cache.move_to_end(key)
+
+        if device not in self._offsets_cache:
+            self._offsets_cache[device] = torch.tensor([[0, 0],
+                                                        [1, 0], [0, 1], [-1, 0], [0, -1],  # j,k,l,m
+                                                        ], device=device).float() * 0.5  # offsets
+        return self._grid_sizes_cache[key], self._offsets_cache[device]
+
     def compute_loss(self, predictions: List[torch.Tensor], targets: torch.Tensor, giou_loss_ratio: float = 1.0) \
             -> Tuple[torch.Tensor, torch.Tensor]:
         """
@@ -229,6 +229,9 @@ class ResNet(SgModule):
         else:
             super().load_state_dict(pretrained_model_weights_dict, strict)
 
+    def get_activation_checkpointing_stages(self) -> list:
+        return ['layer1', 'layer2', 'layer3', 'layer4']
+
     def replace_head(self, new_num_classes=None, new_head=None):
         if new_num_classes is None and new_head is None:
             raise ValueError("At least one of new_num_classes, new_head must be given to replace output layer.")
@@ -8,10 +8,20 @@ Code adapted from https://github.com/lucidrains/vit-pytorch/blob/main/vit_pytorc
 
 import torch
 from torch import nn
+import torch.nn.functional as F
+from super_gradients.common.abstractions.abstract_logger import get_logger
 from super_gradients.training.models import SgModule
 from super_gradients.training.utils import get_param
+from super_gradients.training.utils.module_utils import checkpoint_call
 from einops import repeat
 
+logger = get_logger(__name__)
+
+ATTENTION_BACKENDS = ['math', 'sdpa', 'chunked']
+
+# F.scaled_dot_product_attention WAS ADDED IN TORCH 2.0
+SDPA_AVAILABLE = hasattr(F, 'scaled_dot_product_attention')
+
 
 class PatchEmbed(nn.Module):
     """
@@ -59,14 +69,26 @@ class FeedForward(nn.Module):
 class Attention(nn.Module):
     '''
     self attention layer with residual connection
+
+    attention_backend:
+        'math' - computes the full [B, heads, N, N] attention matrix
+        'sdpa' - F.scaled_dot_product_attention (fused flash / memory efficient kernels), 'chunked' if not available
+        'chunked' - computes the attention of attention_chunk_size queries at a time, so only a
+         [B, heads, attention_chunk_size, N] matrix is materialized. When training, the chunks are recomputed during
+         the backward pass instead of being stored
     '''
-    def __init__(self, hidden_dim, heads=8):
+    def __init__(self, hidden_dim, heads=8, attention_backend='math', attention_chunk_size=256):
         super().__init__()
+        if attention_backend not in ATTENTION_BACKENDS:
+            raise ValueError(f'Unsupported attention backend {attention_backend}, the supported backends are '
+                             f'{ATTENTION_BACKENDS}')
         dim_head = hidden_dim // heads
         inner_dim = dim_head * heads
 
         self.heads = heads
         self.scale = dim_head ** -0.5
+        self.attention_backend = 'chunked' if attention_backend == 'sdpa' and not SDPA_AVAILABLE else attention_backend
+        self.attention_chunk_size = attention_chunk_size
 
         self.attend = nn.Softmax(dim=-1)
         self.to_qkv = nn.Linear(hidden_dim, inner_dim * 3, bias=True)  # Qx, Kx, Vx are calculated at once
@@ -79,22 +101,34 @@ class Attention(nn.Module):
         qkv = self.to_qkv(x).reshape(B, N, 3, self.heads, C // self.heads).permute(2, 0, 3, 1, 4)
         q, k, v = qkv[0], qkv[1], qkv[2]
 
-        attn = (q @ k.transpose(-2, -1)) * self.scale
-        attn = attn.softmax(dim=-1)
+        if self.attention_backend == 'sdpa':
+            # THE DEFAULT SCALE OF SDPA IS dim_head ** -0.5
+            out = F.scaled_dot_product_attention(q, k, v)
+        elif self.attention_backend == 'chunked':
+            out = torch.cat([checkpoint_call(self._attend, q_chunk, k, v)
+                             for q_chunk in q.split(self.attention_chunk_size, dim=2)], dim=2)
+        else:
+            out = self._attend(q, k, v)
 
-        out = (attn @ v).transpose(1, 2).reshape(B, N, C)
+        out = out.transpose(1, 2).reshape(B, N, C)
 
         out = self.proj(out)
 
         return out
 
+    def _attend(self, q, k, v):
+        attn = (q @ k.transpose(-2, -1)) * self.scale
+        attn = attn.softmax(dim=-1)
+        return attn @ v
+
 
 class TransformerBlock(nn.Module):
-    def __init__(self, hidden_dim, heads, mlp_dim, dropout_prob=0.):
+    def __init__(self, hidden_dim, heads, mlp_dim, dropout_prob=0., attention_backend='math', attention_chunk_size=256):
         super().__init__()
         self.layers = nn.ModuleList([])
         self.norm1 = nn.LayerNorm(hidden_dim, eps=1e-6)
-        self.attn = Attention(hidden_dim, heads=heads)
+        self.attn = Attention(hidden_dim, heads=heads, attention_backend=attention_backend,
+                              attention_chunk_size=attention_chunk_size)
         self.norm2 = nn.LayerNorm(hidden_dim, eps=1e-6)
         self.mlp = FeedForward(hidden_dim, mlp_dim, dropout=dropout_prob)
 
@@ -105,11 +139,14 @@ class TransformerBlock(nn.Module):
 
 
 class Transformer(nn.Module):
-    def __init__(self, hidden_dim, depth, heads, mlp_dim, dropout_prob=0.):
+    def __init__(self, hidden_dim, depth, heads, mlp_dim, dropout_prob=0., attention_backend='math',
+                 attention_chunk_size=256):
         super().__init__()
         self.blocks = nn.ModuleList([])
         for _ in range(depth):
-            self.blocks.append(TransformerBlock(hidden_dim, heads, mlp_dim, dropout_prob=dropout_prob))
+            self.blocks.append(TransformerBlock(hidden_dim, heads, mlp_dim, dropout_prob=dropout_prob,
+                                                attention_backend=attention_backend,
+                                                attention_chunk_size=attention_chunk_size))
 
     def forward(self, x):
         for block in self.blocks:
@@ -119,7 +156,8 @@ class Transformer(nn.Module):
 
 class ViT(SgModule):
     def __init__(self, image_size: tuple, patch_size: tuple, num_classes: int, hidden_dim: int, depth: int, heads: int,
-                 mlp_dim: int, in_channels=3, dropout_prob=0., emb_dropout_prob=0., backbone_mode=False):
+                 mlp_dim: int, in_channels=3, dropout_prob=0., emb_dropout_prob=0., backbone_mode=False,
+                 attention_backend='math', attention_chunk_size=256):
         '''
         :param image_size: Image size tuple for data processing into patches done within the model.
         :param patch_size: Patch size tuple for data processing into patches done within the model.
@@ -132,6 +170,8 @@ class ViT(SgModule):
         :param dropout: Dropout ratio between the feed forward layers.
         :param emb_dropout: Dropout ratio between after the embedding layer
         :param backbone_mode: If True output after pooling layer
+        :param attention_backend: Self attention implementation - 'math', 'sdpa' or 'chunked' (see Attention)
+        :param attention_chunk_size: Number of queries per chunk of the 'chunked' attention backend
         '''
 
         super().__init__()
@@ -142,13 +182,16 @@ class ViT(SgModule):
         assert hidden_dim % heads == 0, 'Hidden dimension must be divisible by the number of heads.'
 
         num_patches = (image_height // patch_height) * (image_width // patch_width)
+        if attention_backend == 'sdpa' and not SDPA_AVAILABLE:
+            logger.warning('F.scaled_dot_product_attention is not available (torch<2.0), using the chunked attention')
 
         self.patch_embedding = PatchEmbed(image_size, patch_size, in_channels=in_channels, hidden_dim=hidden_dim)
         self.cls_token = nn.Parameter(torch.randn(1, 1, hidden_dim))
         self.pos_embedding = nn.Parameter(torch.randn(1, num_patches + 1, hidden_dim))
         self.dropout = nn.Dropout(emb_dropout_prob)
 
-        self.transformer = Transformer(hidden_dim, depth, heads, mlp_dim, dropout_prob)
+        self.transformer = Transformer(hidden_dim, depth, heads, mlp_dim, dropout_prob,
+                                       attention_backend=attention_backend, attention_chunk_size=attention_chunk_size)
 
         self.backbone_mode = backbone_mode
         self.pre_head_norm = nn.LayerNorm(hidden_dim, eps=1e-6)
@@ -171,6 +214,9 @@ class ViT(SgModule):
         else:
             return self.head(x)
 
+    def get_activation_checkpointing_stages(self) -> list:
+        return [f'transformer.blocks.{i}' for i in range(len(self.transformer.blocks))]
+
     def replace_head(self, new_num_classes=None, new_head=None):
         if new_num_classes is None and new_head is None:
             raise ValueError("At least one of new_num_classes, new_head must be given to replace output layer.")
@@ -188,7 +234,9 @@ def vit_base(arch_params, num_classes=None, backbone_mode=None):
                in_channels=get_param(arch_params, 'in_channels', 3),
                dropout_prob=get_param(arch_params, "dropout_prob", 0),
                emb_dropout_prob=get_param(arch_params, "emb_dropout_prob", 0),
-               backbone_mode=backbone_mode)
+               backbone_mode=backbone_mode,
+               attention_backend=get_param(arch_params, "attention_backend", "math"),
+               attention_chunk_size=get_param(arch_params, "attention_chunk_size", 256))
 
 
 def vit_large(arch_params, num_classes=None, backbone_mode=None):
@@ -199,7 +247,9 @@ def vit_large(arch_params, num_classes=None, backbone_mode=None):
                in_channels=get_param(arch_params, 'in_channels', 3),
                dropout_prob=get_param(arch_params, "dropout_prob", 0),
                emb_dropout_prob=get_param(arch_params, "emb_dropout_prob", 0),
-               backbone_mode=backbone_mode)
+               backbone_mode=backbone_mode,
+               attention_backend=get_param(arch_params, "attention_backend", "math"),
+               attention_chunk_size=get_param(arch_params, "attention_chunk_size", 256))
 
 
 def vit_huge(arch_params, num_classes=None, backbone_mode=None):
@@ -210,4 +260,6 @@ def vit_huge(arch_params, num_classes=None, backbone_mode=None):
                in_channels=get_param(arch_params, 'in_channels', 3),
                dropout_prob=get_param(arch_params, "dropout_prob", 0),
                emb_dropout_prob=get_param(arch_params, "emb_dropout_prob", 0),
-               backbone_mode=backbone_mode)
+               backbone_mode=backbone_mode,
+               attention_backend=get_param(arch_params, "attention_backend", "math"),
+               attention_chunk_size=get_param(arch_params, "attention_chunk_size", 256))
@@ -228,3 +228,8 @@ class CSPDarknet53(SgModule):
 
     def forward(self, x):
         return self._modules_list(x)
+
+    def get_activation_checkpointing_stages(self) -> list:
+        # THE CSP BLOCKS OF THE DOWN-SAMPLING STAGES
+        return [f'_modules_list.{i}' for i, module in enumerate(self._modules_list)
+                if isinstance(module, (C3, BottleneckCSP))]
@@ -2,7 +2,8 @@
 YoloV5 code adapted from https://github.com/ultralytics/yolov5/blob/master/models/yolo.py
 """
 import math
-from typing import Union, Type, List
+from collections import OrderedDict
+from typing import Union, Type, List, Tuple
 
 import torch
 import torch.nn as nn
@@ -77,6 +78,14 @@ class Concat(nn.Module):
 
 
 class Detect(nn.Module):
+    """
+    The YOLOv5 detection head
+
+    In eval mode the decoding grids of each detection layer - (grid - 0.5) * stride and 4 * anchor_grid - are kept in an
+    LRU cache of grid_cache_size entries keyed by (ny, nx, device, dtype), so inputs of varying resolutions (e.g.
+    rectangular batches) do not rebuild them. The cache is cleared when the stride or anchor buffers change.
+    """
+    grid_cache_size = 16
 
     def __init__(self, num_classes: int, anchors: Anchors, channels: list = None):
         super().__init__()
@@ -85,7 +94,8 @@ class Detect(nn.Module):
         self.num_outputs = num_classes + 5
         self.detection_layers_num = anchors.detection_layers_num
         self.num_anchors = anchors.num_anchors
-        self.grid = [torch.zeros(1)] * self.detection_layers_num  # init grid
+        self._grid_cache = OrderedDict()
+        self._grid_cache_token = None
 
         self.register_buffer('stride', anchors.stride)
         self.register_buffer('anchors', anchors.anchors)
@@ -101,17 +111,46 @@ class Detect(nn.Module):
             x[i] = x[i].view(bs, self.num_anchors, self.num_outputs, ny, nx).permute(0, 1, 3, 4, 2).contiguous()
 
             if not self.training:  # inference
-                if self.grid[i].shape[2:4] != x[i].shape[2:4]:
-                    self.grid[i] = self._make_grid(nx, ny).to(x[i].device)
-
+                grid, anchor_grid, xy_gain = self._get_grids(i, ny, nx, x[i].device, x[i].dtype)
                 y = x[i].sigmoid()
-                xy = (y[..., 0:2] * 2. - 0.5 + self.grid[i].to(x[i].device)) * self.stride[i]  # xy
-                wh = (y[..., 2:4] * 2) ** 2 * self.anchor_grid[i].view(1, self.num_anchors, 1, 1, 2)  # wh
-                y = torch.cat([xy, wh, y[..., 4:]], dim=4)
+                if torch.is_grad_enabled() or torch.jit.is_tracing():
+                    xy = y[..., 0:2] * xy_gain + grid  # xy = (2 * sigmoid - 0.5 + grid) * stride
+                    wh = y[..., 2:4] ** 2 * anchor_grid  # wh = (2 * sigmoid) ** 2 * anchor
+                    y = torch.cat([xy, wh, y[..., 4:]], dim=4)
+                else:
+                    # FUSED IN-PLACE DECODE - NO xy / wh TENSORS AND NO CONCATENATION
+                    y[..., 0:2].mul_(xy_gain).add_(grid)
+                    y[..., 2:4].square_().mul_(anchor_grid)
                 z.append(y.view(bs, -1, self.num_outputs))
 
         return x if self.training else (torch.cat(z, 1), x)
 
+    def _get_grids(self, i: int, ny: int, nx: int, device: torch.device,
+                   dtype: torch.dtype) -> Tuple[torch.Tensor, torch.Tensor, float]:
+        """
+        :return: The cached (grid - 0.5) * stride, 4 * anchor_grid and 2 * stride of detection layer i
+        """
+        # THE BUFFERS MAY BE REPLACED (to(), load_state_dict()) OR MODIFIED IN PLACE (check_anchor_order)
+        token = (self.stride.data_ptr(), self.stride._version, self.anchor_grid.data_ptr(), self.anchor_grid._version)
+        if token != self._grid_cache_token:
+            self._grid_cache.clear()
+            self._grid_cache_token = token
+
+        key = (i, ny, nx, device, dtype)
+        if key in self._grid_cache:
+            self._grid_cache.move_to_end(key)
+            return self._grid_cache[key]
+
+        stride = float(self.stride[i])
+        grid = ((self._make_grid(nx, ny) - 0.5) * stride).to(device=device, dtype=dtype)
+        anchor_grid = (4 * self.anchor_grid[i].view(1, self.num_anchors, 1, 1, 2)).to(device=device, dtype=dtype)
+        grids = (grid, anchor_grid, 2 * stride)
+        if self.grid_cache_size > 0:
+            self._grid_cache[key] = grids
+            while len(self._grid_cache) > self.grid_cache_size:
+                self._grid_cache.popitem(last=False)
+        return grids
+
     @staticmethod
     def _make_grid(nx=20, ny=20):
         yv, xv = torch.meshgrid([torch.arange(ny), torch.arange(nx)])
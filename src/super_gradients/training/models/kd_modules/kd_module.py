@@ -3,9 +3,25 @@ from collections import namedtuple
 import torch
 from super_gradients.training.utils.utils import HpmStruct
 from super_gradients.training.utils import get_param
+from super_gradients.training.models.kd_modules.teacher_output_cache import TeacherOutputCache
+from super_gradients.training.utils.sg_model_utils import get_memory_format, get_mixed_precision_dtype, \
+    inputs_to_memory_format
 
 KDOutput = namedtuple('KDOutput', 'student_output teacher_output')
 
+# ONE SIDE STREAM PER DEVICE FOR THE TEACHER FORWARD (NOT A MODULE ATTRIBUTE - STREAMS CAN NOT BE DEEP-COPIED)
+_TEACHER_STREAMS = {}
+
+
+def _copy_teacher_output(teacher_output, device: torch.device, dtype: torch.dtype):
+    # A COPY OUTSIDE INFERENCE MODE - INFERENCE TENSORS CAN NOT BE SAVED FOR THE STUDENT'S BACKWARD PASS
+    if isinstance(teacher_output, torch.Tensor):
+        dtype = dtype if teacher_output.is_floating_point() else teacher_output.dtype
+        return teacher_output.to(device=device, dtype=dtype, copy=True)
+    if isinstance(teacher_output, list) or type(teacher_output) is tuple:
+        return type(teacher_output)(_copy_teacher_output(output, device, dtype) for output in teacher_output)
+    return teacher_output
+
 
 class KDModule(SgModule):
     """
@@ -23,6 +39,22 @@ class KDModule(SgModule):
         teacher = torch.nn.Sequential(teacher_input_adapter, teacher). This is useful when teacher net expects a
         different input format from the student (for example different normalization).
 
+        By passing teacher_output_cache_dir (str) the teacher outputs of the training batches are read from a
+        TeacherOutputCache (see build_teacher_output_cache) instead of running the teacher. The batches must carry
+        their cache keys (see SampleIndexDataset), which TeacherOutputCacheCallback passes to set_teacher_output_keys
+        before every training forward. Batches without keys (i.e validation) run the teacher. The cached outputs are of
+        the samples as they were loaded, so batch transforms that mix or resize the loaded batch (CollateMixup,
+        MultiScaleCollateFunction, MultiScaleResizeCallback) can not be used with the cache (KDModel.train rejects them).
+
+        The teacher runs in torch.inference_mode (no autograd recording, whatever the inputs), and its floating
+        outputs are copied to the student's input device and dtype. It can be placed and run differently from the
+        student with the arch_params:
+            teacher_dtype: str - cast the teacher weights and inputs to 'float16' or 'bfloat16'
+            teacher_memory_format: str - convert the teacher weights and inputs to 'channels_last'
+            teacher_device: str - place the teacher on another device (i.e 'cuda:1'), so it runs concurrently with
+             the student (not supported with DDP, that expects the module on a single device)
+            teacher_stream: bool - run the teacher on a side CUDA stream, that overlaps with the student forward
+
     """
 
     def __init__(self, arch_params: HpmStruct, student: SgModule, teacher: torch.nn.Module, run_teacher_on_eval=False):
@@ -36,6 +68,18 @@ class KDModule(SgModule):
         self.run_teacher_on_eval = run_teacher_on_eval
         self._freeze_teacher()
 
+        teacher_output_cache_dir = get_param(self.arch_params, "teacher_output_cache_dir")
+        self.teacher_output_cache = TeacherOutputCache(teacher_output_cache_dir) if teacher_output_cache_dir else None
+        self._teacher_output_keys = None
+
+        teacher_dtype = get_param(self.arch_params, "teacher_dtype")
+        teacher_memory_format = get_param(self.arch_params, "teacher_memory_format")
+        self.teacher_dtype = get_mixed_precision_dtype(teacher_dtype) if teacher_dtype else None
+        self.teacher_memory_format = get_memory_format(teacher_memory_format) if teacher_memory_format else None
+        self.teacher_device = get_param(self.arch_params, "teacher_device")
+        self.teacher_stream = get_param(self.arch_params, "teacher_stream", default_val=False)
+        self._place_teacher()
+
         # WHEN CREATING A MODULE SELF.TRAIN() ISN'T CALLED AND SO THE TEACHER MUST BE MOVED TO EVAL MODE EXPLICITLY
         if self.run_teacher_on_eval:
             self.teacher.eval()
@@ -44,6 +88,19 @@ class KDModule(SgModule):
         for p in self.teacher.parameters():
             p.requires_grad = False
 
+    def _place_teacher(self):
+        placement = {"device": self.teacher_device, "dtype": self.teacher_dtype,
+                     "memory_format": self.teacher_memory_format}
+        placement = {key: value for key, value in placement.items() if value is not None}
+        if placement:
+            self.teacher.to(**placement)
+
+    def _apply(self, fn, *args, **kwargs):
+        # MOVING OR CASTING THE KD MODULE (i.e TO THE STUDENT'S DEVICE) KEEPS THE TEACHER'S OWN PLACEMENT
+        super(KDModule, self)._apply(fn, *args, **kwargs)
+        self._place_teacher()
+        return self
+
     def train(self, mode=True):
         self.student.train(mode)
         if not self.run_teacher_on_eval:
@@ -54,8 +111,62 @@ class KDModule(SgModule):
         self.teacher.eval()
 
     def forward(self, x):
-        return KDOutput(student_output=self.student(x),
-                        teacher_output=self.teacher(x))
+        teacher_output = self._get_cached_teacher_output(x)
+        if teacher_output is not None:
+            return KDOutput(student_output=self.student(x), teacher_output=teacher_output)
+
+        # THE TEACHER IS LAUNCHED FIRST - ON ANOTHER DEVICE OR STREAM IT RUNS WHILE THE STUDENT FORWARD IS LAUNCHED
+        teacher_device = torch.device(self.teacher_device) if self.teacher_device is not None else x.device
+        teacher_stream = self._get_teacher_stream(teacher_device)
+        teacher_output = self._run_teacher(x, teacher_device, teacher_stream)
+        student_output = self.student(x)
+        if teacher_stream is not None:
+            # THE NEXT TEACHER FORWARD WAITS FOR THE CURRENT STREAM, SO THE TEACHER'S MEMORY IS NOT REUSED TOO EARLY
+            torch.cuda.current_stream(teacher_device).wait_stream(teacher_stream)
+        return KDOutput(student_output=student_output,
+                        teacher_output=_copy_teacher_output(teacher_output, x.device, x.dtype))
+
+    def _get_teacher_stream(self, teacher_device: torch.device):
+        if not self.teacher_stream or teacher_device.type != 'cuda':
+            return None
+        if teacher_device not in _TEACHER_STREAMS:
+            _TEACHER_STREAMS[teacher_device] = torch.cuda.Stream(teacher_device)
+        return _TEACHER_STREAMS[teacher_device]
+
+    def _prepare_teacher_inputs(self, x, teacher_device: torch.device):
+        x = x.to(teacher_device, dtype=self.teacher_dtype or x.dtype, non_blocking=True)
+        if self.teacher_memory_format is not None:
+            x = inputs_to_memory_format(x, self.teacher_memory_format)
+        return x
+
+    def _run_teacher(self, x, teacher_device: torch.device, teacher_stream):
+        if teacher_stream is None:
+            with torch.inference_mode():
+                return self.teacher(self._prepare_teacher_inputs(x, teacher_device))
+
+        teacher_stream.wait_stream(torch.cuda.current_stream(teacher_device))
+        if x.is_cuda and x.device != teacher_device:
+            teacher_stream.wait_stream(torch.cuda.current_stream(x.device))
+        # THE CAST (OR COPY) OF THE INPUTS IS ALLOCATED ON THE TEACHER STREAM - IT IS FREED WHEN THIS METHOD RETURNS, SO
+        # ALLOCATED ON THE CURRENT STREAM ITS MEMORY COULD BE REUSED BY THE STUDENT WHILE THE TEACHER STILL READS IT
+        with torch.inference_mode(), torch.cuda.stream(teacher_stream):
+            return self.teacher(self._prepare_teacher_inputs(x, teacher_device))
+
+    def set_teacher_output_keys(self, sample_indices: torch.Tensor, augmentation_seeds: torch.Tensor = None):
+        """
+        Sets the teacher output cache keys of the next forward's batch (they are used by a single forward).
+        """
+        self._teacher_output_keys = (sample_indices, augmentation_seeds)
+
+    def _get_cached_teacher_output(self, x):
+        keys, self._teacher_output_keys = self._teacher_output_keys, None
+        if self.teacher_output_cache is None or keys is None:
+            return None
+
+        sample_indices, augmentation_seeds = keys
+        if len(sample_indices) != x.shape[0]:
+            raise ValueError(f"Got {len(sample_indices)} teacher output cache keys for a batch of {x.shape[0]} samples")
+        return self.teacher_output_cache.read(sample_indices, augmentation_seeds, device=x.device)
 
     def initialize_param_groups(self, lr: float, training_params: HpmStruct) -> list:
         return self.student.initialize_param_groups(lr, training_params)
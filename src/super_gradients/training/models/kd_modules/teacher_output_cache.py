@@ -0,0 +1,201 @@
+import json
+import os
+import random
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset
+
+from super_gradients.common.abstractions.abstract_logger import get_logger
+from super_gradients.training.utils.sg_model_utils import unpack_batch_items
+
+logger = get_logger(__name__)
+
+
+class SampleIndexDataset(Dataset):
+    """
+    SampleIndexDataset - Wraps a dataset so its batches carry the keys of the teacher output cache
+
+    Every item is returned as (inputs, targets, {'sample_index': index, 'augmentation_seed': seed}), the additional
+    batch items are passed to the phase context (and so to TeacherOutputCacheCallback). The random augmentations of the
+    wrapped dataset are made reproducible - the python, numpy and torch RNGs are seeded by (index, seed) while the item
+    is loaded (and restored after), so a cached teacher output matches the augmented sample it was computed on.
+
+        :param dataset:             The wrapped dataset, its items are (inputs, targets) or (inputs, targets, dict)
+        :param num_augmentations:   Number of cached augmentations of every sample (1 for deterministic augmentations)
+        :param augmentation_seed:   Load every sample with this augmentation, a random one of num_augmentations if None
+        :param base_seed:           Seed of the augmentations, the same for building the cache and training with it
+    """
+
+    def __init__(self, dataset: Dataset, num_augmentations: int = 1, augmentation_seed: Optional[int] = None,
+                 base_seed: int = 0):
+        self.dataset = dataset
+        self.num_augmentations = num_augmentations
+        self.augmentation_seed = augmentation_seed
+        self.base_seed = base_seed
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __getitem__(self, index: int):
+        augmentation_seed = self.augmentation_seed
+        if augmentation_seed is None:
+            augmentation_seed = random.randrange(self.num_augmentations)
+
+        rng_states = random.getstate(), np.random.get_state()
+        seed = self.base_seed + index * self.num_augmentations + augmentation_seed
+        random.seed(seed)
+        np.random.seed(seed % 2 ** 32)
+        # ONLY THE CPU GENERATOR IS SEEDED AND RESTORED (torch.manual_seed WOULD RESEED THE CUDA GENERATORS AS WELL)
+        try:
+            with torch.random.fork_rng(devices=[]):
+                torch.default_generator.manual_seed(seed)
+                item = self.dataset[index]
+        finally:
+            random.setstate(rng_states[0])
+            np.random.set_state(rng_states[1])
+
+        inputs, targets, additional_items = unpack_batch_items(item)
+        return inputs, targets, dict(additional_items, sample_index=index, augmentation_seed=augmentation_seed)
+
+
+class TeacherOutputCache:
+    """
+    TeacherOutputCache - Teacher logits of every (sample index, augmentation seed), stored in memory-mapped files
+
+    The logits are stored in float16, or only their top_k values (float16) and class indices. The top-k outputs are
+    read back as logits with -inf outside the top-k classes, so the teacher's softmax is renormalized over its top-k
+    classes (as in KDklDivLoss) - distillation losses that use the raw logits need the full (top_k=None) outputs.
+
+    The cache directory holds meta.json, values.npy, indices.npy (with top_k) and filled.npy (the rows that were written).
+
+        :param cache_dir:   The cache directory (see build_teacher_output_cache)
+        :param mode:        The memory-map mode of the files - 'r' (read only) or 'r+' (to write the teacher outputs)
+    """
+    META_FILE = 'meta.json'
+
+    def __init__(self, cache_dir: str, mode: str = 'r'):
+        self.cache_dir = cache_dir
+        self.mode = mode
+        with open(os.path.join(cache_dir, self.META_FILE)) as meta_file:
+            meta = json.load(meta_file)
+        self.num_samples = meta['num_samples']
+        self.num_augmentations = meta['num_augmentations']
+        self.num_classes = meta['num_classes']
+        self.top_k = meta['top_k']
+        self._arrays = None
+
+    @classmethod
+    def create(cls, cache_dir: str, num_samples: int, num_classes: int, num_augmentations: int = 1,
+               top_k: Optional[int] = None) -> 'TeacherOutputCache':
+        """
+        create - Creates an empty cache directory (the files are allocated, and are filled with write)
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        num_rows = num_samples * num_augmentations
+        num_values = num_classes if top_k is None else top_k
+        np.lib.format.open_memmap(os.path.join(cache_dir, 'values.npy'), mode='w+', dtype=np.float16,
+                                  shape=(num_rows, num_values))
+        if top_k is not None:
+            indices_dtype = np.int16 if num_classes <= np.iinfo(np.int16).max else np.int32
+            np.lib.format.open_memmap(os.path.join(cache_dir, 'indices.npy'), mode='w+', dtype=indices_dtype,
+                                      shape=(num_rows, top_k))
+        np.lib.format.open_memmap(os.path.join(cache_dir, 'filled.npy'), mode='w+', dtype=np.bool_, shape=(num_rows,))
+        with open(os.path.join(cache_dir, cls.META_FILE), 'w') as meta_file:
+            json.dump({'num_samples': num_samples, 'num_augmentations': num_augmentations,
+                       'num_classes': num_classes, 'top_k': top_k}, meta_file)
+        return cls(cache_dir, mode='r+')
+
+    @property
+    def storage_bytes(self) -> int:
+        return sum(os.path.getsize(os.path.join(self.cache_dir, file_name)) for file_name in os.listdir(self.cache_dir))
+
+    def _get_arrays(self) -> dict:
+        # OPENED LAZILY (AND NOT PICKLED OR DEEP-COPIED, e.g BY THE EMA COPY OF THE MODEL)
+        if self._arrays is None:
+            names = ['values', 'filled'] + (['indices'] if self.top_k is not None else [])
+            self._arrays = {name: np.load(os.path.join(self.cache_dir, f'{name}.npy'), mmap_mode=self.mode) for name in names}
+        return self._arrays
+
+    def __getstate__(self):
+        return dict(self.__dict__, _arrays=None)
+
+    def _get_rows(self, sample_indices: Union[torch.Tensor, Sequence[int]],
+                  augmentation_seeds: Optional[Union[torch.Tensor, Sequence[int]]]) -> np.ndarray:
+        rows = torch.as_tensor(sample_indices).cpu().numpy().astype(np.int64) * self.num_augmentations
+        if augmentation_seeds is not None:
+            rows += torch.as_tensor(augmentation_seeds).cpu().numpy().astype(np.int64)
+        return rows
+
+    def write(self, teacher_output: torch.Tensor, sample_indices: Union[torch.Tensor, Sequence[int]],
+              augmentation_seeds: Optional[Union[torch.Tensor, Sequence[int]]] = None):
+        """
+        write - Stores the teacher logits (batch_size, num_classes) of the samples
+        """
+        arrays, rows = self._get_arrays(), self._get_rows(sample_indices, augmentation_seeds)
+        teacher_output = teacher_output.detach().float()
+        if self.top_k is not None:
+            teacher_output, indices = teacher_output.topk(self.top_k, dim=1)
+            arrays['indices'][rows] = indices.cpu().numpy()
+        arrays['values'][rows] = teacher_output.cpu().numpy().astype(np.float16)
+        arrays['filled'][rows] = True
+
+    def read(self, sample_indices: Union[torch.Tensor, Sequence[int]],
+             augmentation_seeds: Optional[Union[torch.Tensor, Sequence[int]]] = None,
+             device: Union[str, torch.device] = 'cpu', dtype: torch.dtype = torch.float32) -> torch.Tensor:
+        """
+        read - The cached teacher logits (batch_size, num_classes) of the samples
+        """
+        arrays, rows = self._get_arrays(), self._get_rows(sample_indices, augmentation_seeds)
+        if not arrays['filled'][rows].all():
+            raise ValueError(f'The teacher outputs of some of the samples are not in the cache {self.cache_dir}')
+
+        values = torch.from_numpy(arrays['values'][rows]).to(device, non_blocking=True).to(dtype)
+        if self.top_k is None:
+            return values
+        indices = torch.from_numpy(arrays['indices'][rows].astype(np.int64)).to(device, non_blocking=True)
+        teacher_output = torch.full((len(rows), self.num_classes), float('-inf'), device=device, dtype=dtype)
+        return teacher_output.scatter_(1, indices, values)
+
+
+def build_teacher_output_cache(teacher: torch.nn.Module, data_loader: DataLoader, cache_dir: str,
+                               top_k: Optional[int] = None, device: str = 'cpu') -> TeacherOutputCache:
+    """
+    build_teacher_output_cache - Runs the teacher (in eval mode) over every augmentation of every sample of the data
+                                 loader, and stores its outputs in a TeacherOutputCache
+
+    :param teacher:     The teacher model (with its input adapter, as in KDModule.teacher)
+    :param data_loader: A data loader of a SampleIndexDataset (it is iterated once for each augmentation seed)
+    :param cache_dir:   The cache directory (the files are overwritten)
+    :param top_k:       Store only the top_k logits of every sample (all the logits in float16 if None)
+    :param device:      The device to run the teacher on
+    :return:            The filled cache
+    """
+    dataset = data_loader.dataset
+    if not isinstance(dataset, SampleIndexDataset):
+        raise ValueError('The teacher output cache is built from a data loader of a SampleIndexDataset')
+
+    cache = None
+    was_training, augmentation_seed = teacher.training, dataset.augmentation_seed
+    teacher.eval()
+    try:
+        with torch.no_grad():
+            for seed in range(dataset.num_augmentations):
+                dataset.augmentation_seed = seed
+                for batch_items in data_loader:
+                    inputs, _, additional_batch_items = unpack_batch_items(batch_items)
+                    teacher_output = teacher(inputs.to(device))
+                    if cache is None:
+                        cache = TeacherOutputCache.create(cache_dir, num_samples=len(dataset),
+                                                          num_classes=teacher_output.shape[1],
+                                                          num_augmentations=dataset.num_augmentations, top_k=top_k)
+                    cache.write(teacher_output, additional_batch_items['sample_index'],
+                                additional_batch_items['augmentation_seed'])
+    finally:
+        teacher.train(was_training)
+        dataset.augmentation_seed = augmentation_seed
+
+    logger.info(f'Cached the teacher outputs of {len(dataset)} samples x {dataset.num_augmentations} augmentations in '
+                f'{cache_dir} ({cache.storage_bytes / 2 ** 20:.1f}MB)')
+    return cache
@@ -397,6 +397,11 @@ class DDRNet(SgModule):
             else:
                 return x
 
+    def get_activation_checkpointing_stages(self) -> list:
+        # THE LOW RESOLUTION (BACKBONE) AND HIGH RESOLUTION (SKIP) BRANCHES
+        return ['backbone.layer1', 'backbone.layer2', 'backbone.layer3', 'backbone.layer4', 'layer5',
+                'layer3_skip', 'layer4_skip', 'layer5_skip']
+
     def replace_head(self, new_num_classes=None, new_head=None, new_aux_head=None):
         if new_num_classes is None and new_head is None:
             raise ValueError("At least one of new_num_classes, new_head must be given to replace output layer.")
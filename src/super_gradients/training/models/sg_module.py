@@ -50,6 +50,16 @@ class SgModule(nn.Module):
         """
         return []
 
+    def get_activation_checkpointing_stages(self) -> list:
+        """
+        The submodules (names relative to this module) that run with activation checkpointing when it is enabled with
+        the default stages (training_params activation_checkpointing=True, see enable_activation_checkpointing).
+        Every stage stores only its inputs for the backward pass, and recomputes its activations during it - so the
+        stages are typically the blocks/layers the network is made of. By default, none.
+            :return: list of submodule names
+        """
+        return []
+
     def prep_model_for_conversion(self, input_size: Union[tuple, list] = None, **kwargs):
         """
         Prepare the model to be converted to ONNX or other frameworks.
@@ -9,6 +9,7 @@ DEFAULT_TRAINING_PARAMS = {"lr_warmup_epochs": 0,
                            "ema": False,
                            "batch_accumulate": 1,  # number of batches to accumulate before every backward pass
                            "ema_params": {},
+                           "shard_optimizer_state": False,  # ZeRO-1 sharding of the optimizer state between DDP processes
                            "zero_weight_decay_on_bias_and_bn": False,
                            "load_opt_params": True,
                            "run_validation_freq": 1,
@@ -18,6 +19,9 @@ DEFAULT_TRAINING_PARAMS = {"lr_warmup_epochs": 0,
                            "tb_files_user_prompt": False,  # Asks User for Tensorboard Deletion Prompt
                            "silent_mode": False,  # Silents the Print outs
                            "mixed_precision": False,
+                           "mixed_precision_dtype": "float16",  # float16 (CUDA only) or bfloat16 (CUDA or CPU)
+                           "memory_format": "contiguous_format",  # contiguous_format or channels_last
+                           "activation_checkpointing": False,  # True (default stages) or a list of submodule names
                            "tensorboard_port": None,
                            "save_ckpt_epoch_list": [],  # indices where the ckpt will save automatically
                            "average_best_models": True,
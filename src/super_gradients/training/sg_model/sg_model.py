@@ -1,3 +1,4 @@
+import contextlib
 import os
 import sys
 from copy import deepcopy
@@ -11,7 +12,7 @@ import torchvision.transforms as transforms
 from deprecated import deprecated
 from torch import nn
 from torch.utils.data import DataLoader, DistributedSampler
-from torch.cuda.amp import GradScaler, autocast
+from torch.cuda.amp import GradScaler
 from torchmetrics import MetricCollection
 from tqdm import tqdm
 from piptools.scripts.sync import _get_installed_distributions
@@ -43,15 +44,22 @@ from super_gradients.training.utils.detection_utils import DetectionPostPredicti
 from super_gradients.training.utils.distributed_training_utils import MultiGPUModeAutocastWrapper, \
     reduce_results_tuple_for_ddp, compute_precise_bn_stats
 from super_gradients.training.utils.ema import ModelEMA
-from super_gradients.training.utils.optimizer_utils import build_optimizer
+from super_gradients.training.utils.optimizer_utils import build_optimizer, get_optimizer_state_bytes, \
+    is_sharded_optimizer
 from super_gradients.training.utils.weight_averaging_utils import ModelWeightAveraging
+from super_gradients.training.utils.module_utils import enable_activation_checkpointing
+from super_gradients.training.utils.benchmark_utils import benchmark_model
+from super_gradients.training.utils.inference_optimization import measure_latency
+from super_gradients.training.utils.quantization_utils import QATModule, evaluate_on_cpu, prepare_model_for_qat, \
+    quantize_model_ptq
 from super_gradients.training.metrics import Accuracy, Top5
 from super_gradients.training.utils import random_seed
 from super_gradients.training.utils.checkpoint_utils import get_ckpt_local_path, read_ckpt_state_dict, \
     load_checkpoint_to_model, load_pretrained_weights
 from super_gradients.training.datasets.datasets_utils import DatasetStatisticsTensorboardLogger
+from super_gradients.training.datasets.mixup import CollateMixup
 from super_gradients.training.utils.callbacks import CallbackHandler, Phase, LR_SCHEDULERS_CLS_DICT, PhaseContext, \
-    MetricsUpdateCallback, LR_WARMUP_CLS_DICT
+    MetricsUpdateCallback, LR_WARMUP_CLS_DICT, QATFreezeCallback
 from super_gradients.common.environment import environment_config
 from super_gradients.training.utils import HpmStruct
 
@@ -149,12 +157,14 @@ class SgModel:
         self.device, self.multi_gpu = None, None
         self.ema = None
         self.ema_model = None
+        self.quantized_net = None
         self.sg_logger = None
         self.update_param_groups = None
         self.post_prediction_callback = None
         self.criterion = None
         self.training_params = None
         self.scaler = None
+        self.memory_format = None
         self.phase_callbacks = None
         self.checkpoint_params = None
 
@@ -353,6 +363,7 @@ class SgModel:
 
         context = PhaseContext(epoch=epoch,
                                optimizer=self.optimizer,
+                               net=self.net,
                                metrics_compute_fn=self.train_metrics,
                                loss_avg_meter=loss_avg_meter,
                                criterion=self.criterion,
@@ -360,31 +371,47 @@ class SgModel:
                                lr_warmup_epochs=self.training_params.lr_warmup_epochs,
                                sg_logger=self.sg_logger)
 
+        # MIXUP/CUTMIX THAT THE COLLATE FUNCTION DEFERRED TO THE DEVICE IS APPLIED AFTER THE TRANSFER
+        train_collate_fn = getattr(self.train_loader, 'collate_fn', None)
+        on_device_mixup = train_collate_fn if isinstance(train_collate_fn, CollateMixup) and train_collate_fn.mix_on_device else None
+
         for batch_idx, batch_items in enumerate(progress_bar_train_loader):
             batch_items = core_utils.tensor_container_to_device(batch_items, self.device, non_blocking=True)
             inputs, targets, additional_batch_items = sg_model_utils.unpack_batch_items(batch_items)
-            # AUTOCAST IS ENABLED ONLY IF self.training_params.mixed_precision - IF enabled=False AUTOCAST HAS NO EFFECT
-            with autocast(enabled=self.training_params.mixed_precision):
-                # FORWARD PASS TO GET NETWORK'S PREDICTIONS
-                outputs = self.net(inputs)
 
-                # COMPUTE THE LOSS FOR BACK PROP + EXTRA METRICS COMPUTED DURING THE LOSS FORWARD PASS
-                loss, loss_log_items = self._get_losses(outputs, targets)
+            # Phase.TRAIN_BATCH_START - CALLBACKS MAY TRANSFORM THE BATCH ON THE DEVICE (i.e MultiScaleResizeCallback)
+            context.update_context(batch_idx=batch_idx, inputs=inputs, target=targets, **additional_batch_items)
+            self.phase_callback_handler(Phase.TRAIN_BATCH_START, context)
+            inputs, targets = context.inputs, context.target
+
+            if on_device_mixup is not None:
+                inputs, targets = on_device_mixup.mix(inputs, targets)
+            if self.memory_format is not None:
+                inputs = sg_model_utils.inputs_to_memory_format(inputs, self.memory_format)
+            # DDP - THE GRADIENTS OF THE ACCUMULATED MICRO-BATCHES ARE NOT ALL-REDUCED, ONLY THE OPTIMIZER STEP BATCH SYNCS
+            with self._gradient_sync_context(epoch, batch_idx):
+                # AUTOCAST IS ENABLED ONLY IF self.training_params.mixed_precision - IF enabled=False AUTOCAST HAS NO EFFECT
+                with self._autocast():
+                    # FORWARD PASS TO GET NETWORK'S PREDICTIONS
+                    outputs = self.net(inputs)
+
+                    # COMPUTE THE LOSS FOR BACK PROP + EXTRA METRICS COMPUTED DURING THE LOSS FORWARD PASS
+                    loss, loss_log_items = self._get_losses(outputs, targets)
 
-            context.update_context(batch_idx=batch_idx,
-                                   inputs=inputs,
-                                   preds=outputs,
-                                   target=targets,
-                                   loss_log_items=loss_log_items,
-                                   **additional_batch_items)
+                context.update_context(batch_idx=batch_idx,
+                                       inputs=inputs,
+                                       preds=outputs,
+                                       target=targets,
+                                       loss_log_items=loss_log_items,
+                                       **additional_batch_items)
 
-            self.phase_callback_handler(Phase.TRAIN_BATCH_END, context)
+                self.phase_callback_handler(Phase.TRAIN_BATCH_END, context)
 
-            # LOG LR THAT WILL BE USED IN CURRENT EPOCH AND AFTER FIRST WARMUP/LR_SCHEDULER UPDATE BEFORE WEIGHT UPDATE
-            if not self.ddp_silent_mode and batch_idx == 0:
-                self._write_lrs(epoch)
+                # LOG LR THAT WILL BE USED IN CURRENT EPOCH AND AFTER FIRST WARMUP/LR_SCHEDULER UPDATE BEFORE WEIGHT UPDATE
+                if not self.ddp_silent_mode and batch_idx == 0:
+                    self._write_lrs(epoch)
 
-            self.backward_step(loss, epoch, batch_idx, context)
+                self.backward_step(loss, epoch, batch_idx, context)
 
             # COMPUTE THE RUNNING USER METRICS AND LOSS RUNNING ITEMS. RESULT TUPLE IS THEIR CONCATENATION.
             logging_values = loss_avg_meter.average + get_metrics_results_tuple(self.train_metrics)
@@ -431,14 +458,15 @@ class SgModel:
         # SCALER IS ENABLED ONLY IF self.training_params.mixed_precision=True
         self.scaler.scale(loss).backward()
 
-        # APPLY GRADIENT CLIPPING IF REQUIRED
-        if self.training_params.clip_grad_norm:
-            torch.nn.utils.clip_grad_norm_(self.net.parameters(), self.training_params.clip_grad_norm)
-
         # ACCUMULATE GRADIENT FOR X BATCHES BEFORE OPTIMIZING
         integrated_batches_num = batch_idx + len(self.train_loader) * epoch + 1
 
-        if integrated_batches_num % self.batch_accumulate == 0:
+        if self._is_optimizer_step(epoch, batch_idx):
+            # APPLY GRADIENT CLIPPING IF REQUIRED - TO THE ACCUMULATED (AND UNSCALED) GRADIENTS
+            if self.training_params.clip_grad_norm:
+                self.scaler.unscale_(self.optimizer)
+                torch.nn.utils.clip_grad_norm_(self.net.parameters(), self.training_params.clip_grad_norm)
+
             # SCALER IS ENABLED ONLY IF self.training_params.mixed_precision=True
             self.scaler.step(self.optimizer)
             self.scaler.update()
@@ -450,6 +478,42 @@ class SgModel:
             # RUN PHASE CALLBACKS
             self.phase_callback_handler(Phase.TRAIN_BATCH_STEP, context)
 
+    def _is_optimizer_step(self, epoch: int, batch_idx: int) -> bool:
+        """
+        Whether the optimizer steps after the backward pass of the batch - once every batch_accumulate batches
+        """
+        integrated_batches_num = batch_idx + len(self.train_loader) * epoch + 1
+        return integrated_batches_num % self.batch_accumulate == 0
+
+    def _gradient_sync_context(self, epoch: int, batch_idx: int):
+        """
+        The context of the forward and backward passes of a training batch. With DDP and batch_accumulate > 1, the
+        batches before the optimizer step run in net.no_sync() - their gradients are only accumulated locally, and
+        the backward pass of the optimizer step batch all-reduces the gradients accumulated over all of them.
+        """
+        if isinstance(self.net, nn.parallel.DistributedDataParallel) and not self._is_optimizer_step(epoch, batch_idx):
+            return self.net.no_sync()
+        return contextlib.nullcontext()
+
+    def _log_sharded_optimizer_state_memory(self):
+        """
+        Logs the optimizer state memory of this process, and of the whole (unsharded) optimizer state - the per
+        process saving of shard_optimizer_state. Called by all the DDP processes, after the state was created.
+        """
+        local_bytes = get_optimizer_state_bytes(self.optimizer)
+        total_bytes = torch.tensor(float(local_bytes), device=self.device)
+        torch.distributed.all_reduce(total_bytes)
+        logger.info(f'Sharded optimizer state - rank {torch.distributed.get_rank()} holds '
+                    f'{local_bytes / 2 ** 20:.3f}MB of {total_bytes.item() / 2 ** 20:.3f}MB '
+                    f'({torch.distributed.get_world_size()} shards)')
+
+    def _get_net_state(self) -> dict:
+        state = {'net': self.net.state_dict()}
+        # THE QUANTIZATION-AWARE TRAINING PARAMS ARE NEEDED TO PREPARE THE NET BEFORE LOADING ITS WEIGHTS
+        if isinstance(self.net.module, QATModule):
+            state['qat_params'] = self.net.module.qat_params
+        return state
+
     def save_checkpoint(self, optimizer=None, epoch: int = None, validation_results_tuple: tuple = None,
                         context: PhaseContext = None):
         """
@@ -458,7 +522,7 @@ class SgModel:
         """
         # WHEN THE validation_results_tuple IS NONE WE SIMPLY SAVE THE state_dict AS LATEST AND Return
         if validation_results_tuple is None:
-            self.sg_logger.add_checkpoint(tag='ckpt_latest_weights_only.pth', state_dict={'net': self.net.state_dict()},
+            self.sg_logger.add_checkpoint(tag='ckpt_latest_weights_only.pth', state_dict=self._get_net_state(),
                                           global_step=epoch)
             return
 
@@ -469,7 +533,7 @@ class SgModel:
             sum([validation_results_tuple[idx] for idx in self.metric_idx_in_results_tuple])
 
         # BUILD THE state_dict
-        state = {'net': self.net.state_dict(), 'acc': metric, 'epoch': epoch}
+        state = {**self._get_net_state(), 'acc': metric, 'epoch': epoch}
         if optimizer is not None:
             state['optimizer_state_dict'] = optimizer.state_dict()
 
@@ -649,12 +713,20 @@ class SgModel:
 
                 - `batch_accumulate` : int (default=1)
 
-                    Number of batches to accumulate before every backward pass.
+                    Number of batches to accumulate before every optimizer step. With DDP, the gradients are
+                    all-reduced only in the backward pass of the optimizer step batch (see _gradient_sync_context).
 
                 - `ema_params` : dict
 
                     Parameters for the ema model.
 
+                - `shard_optimizer_state` : bool (default=False)
+
+                    DDP only - shards the optimizer state (e.g. the Adam / Lamb moments) between the processes with a
+                    torch.distributed.optim.ZeroRedundancyOptimizer (ZeRO-1): every process keeps and updates the
+                    state of its shard of the parameters, and broadcasts the updated parameters. The state is
+                    consolidated in the main process for the checkpoints, and sharded again when resuming.
+
                 - `zero_weight_decay_on_bias_and_bn` : bool (default=False)
 
                     Whether to apply weight decay on batch normalization parameters or not (ignored when the passed
@@ -682,6 +754,24 @@ class SgModel:
 
                     Whether to use mixed precision or not.
 
+                - `mixed_precision_dtype` : str (default='float16')
+
+                    The autocast dtype of the mixed precision - 'float16' (CUDA only, with loss scaling) or 'bfloat16'
+                    (CUDA or CPU, without loss scaling). The evaluation runs with autocast as well.
+
+                - `memory_format` : str (default='contiguous_format')
+
+                    The memory format of the net and of its 4D inputs in training and evaluation - 'contiguous_format'
+                    or 'channels_last' (faster convolutions with tensor cores and on modern CPUs).
+
+                - `activation_checkpointing` : bool or list(str) (default=False)
+
+                    Activation checkpointing of stages of the net - their activations are not stored for the backward
+                    pass but recomputed during it, trading compute for memory (larger batches / resolutions). True
+                    for the architecture's default stages (SgModule.get_activation_checkpointing_stages, e.g. the
+                    ResNet layers or the ViT transformer blocks) or a list of submodule names.
+                    See benchmark_activation_checkpointing for the memory / throughput trade-off.
+
                 - `save_ckpt_epoch_list` : list(int) (default=[])
 
                     List of fixed epoch indices the user wishes to save checkpoints in.
@@ -738,11 +828,33 @@ class SgModel:
                 -   `clip_grad_norm` : float
 
                     Defines a maximal L2 norm of the gradients. Values which exceed the given value will be clipped
+                    (the gradients accumulated over batch_accumulate batches are clipped, before the optimizer step)
 
                 -   `lr_cooldown_epochs` : int (default=0)
 
                     Number of epochs to cooldown LR (i.e the last epoch from scheduling view point=max_epochs-cooldown).
 
+                -   `qat` : dict (default=None)
+
+                    Quantization-aware training params. When set, the net is prepared with fake-quantize modules
+                     (torch.fx graph mode, see quantization_utils.prepare_model_for_qat) before the training starts,
+                     and is converted to an int8 model when it ends. The dict may include:
+
+                        `backend` : str (default='fbgemm'), the quantized engine of the int8 model ('fbgemm', 'x86' or
+                         'qnnpack').
+
+                        `per_channel` : bool (default=True), fake-quantize the weights per-channel.
+
+                        `skip_module_names`, `skip_module_types` : modules to keep in float (by default the YOLOv5
+                         Detect head and NMS).
+
+                        `freeze_bn_epoch` : int (default=None), the epoch to freeze the BatchNorm statistics at.
+
+                        `freeze_observers_epoch` : int (default=None), the epoch to freeze the quantization ranges at.
+
+                        `export_int8` : bool (default=True), convert the final (EMA) net to int8 when the training
+                         ends. It is kept in self.quantized_net and saved (TorchScript) to ckpt_int8.pt.
+
 
         :return:
         """
@@ -791,6 +903,28 @@ class SgModel:
 
         self.max_epochs = self.training_params.max_epochs
 
+        # QUANTIZATION-AWARE TRAINING - THE NET IS PREPARED BEFORE THE EMA AND THE OPTIMIZER ARE BUILT
+        qat_params = core_utils.get_param(self.training_params, 'qat')
+        if qat_params is not None:
+            self._prepare_qat({key: value for key, value in qat_params.items()
+                               if key not in ['freeze_bn_epoch', 'freeze_observers_epoch', 'export_int8']})
+
+        # CHANNELS LAST - THE NET IS CONVERTED BEFORE THE EMA AND THE OPTIMIZER ARE BUILT
+        memory_format = sg_model_utils.get_memory_format(self.training_params.memory_format)
+        self.memory_format = memory_format if memory_format != torch.contiguous_format else None
+        if self.memory_format is not None:
+            self.net.to(memory_format=self.memory_format)
+
+        # ACTIVATION CHECKPOINTING - THE STAGES ARE SET BEFORE THE EMA COPY OF THE NET IS MADE
+        activation_checkpointing = core_utils.get_param(self.training_params, 'activation_checkpointing', False)
+        if activation_checkpointing:
+            checkpointed_stages = enable_activation_checkpointing(self.net.module, activation_checkpointing)
+            if not checkpointed_stages:
+                logger.warning(f'activation_checkpointing is set, but {self.net.module.__class__.__name__} has no '
+                               f'default stages to checkpoint - pass a list of submodule names instead')
+            elif not silent_mode:
+                logger.info(f'Using activation checkpointing for {checkpointed_stages}')
+
         self.ema = self.training_params.ema
 
         self.precise_bn = self.training_params.precise_bn
@@ -838,6 +972,11 @@ class SgModel:
                                                             update_param_groups=self.update_param_groups,
                                                             **self.training_params.to_dict()))
 
+        if qat_params is not None:
+            self.phase_callbacks.append(QATFreezeCallback(
+                freeze_bn_epoch=core_utils.get_param(qat_params, 'freeze_bn_epoch'),
+                freeze_observers_epoch=core_utils.get_param(qat_params, 'freeze_observers_epoch')))
+
         self._add_metrics_update_callback(Phase.TRAIN_BATCH_END)
         self._add_metrics_update_callback(Phase.VALIDATION_BATCH_END)
 
@@ -887,7 +1026,8 @@ class SgModel:
         if self.load_checkpoint and load_opt_params:
             self.optimizer.load_state_dict(self.checkpoint['optimizer_state_dict'])
 
-        self._initialize_mixed_precision(self.training_params.mixed_precision)
+        self._initialize_mixed_precision(self.training_params.mixed_precision,
+                                         self.training_params.mixed_precision_dtype)
 
         context = PhaseContext(optimizer=self.optimizer, net=self.net, experiment_name=self.experiment_name,
                                ckpt_dir=self.checkpoints_dir_path, criterion=self.criterion,
@@ -911,10 +1051,15 @@ class SgModel:
 
                 # IN DDP- SET_EPOCH WILL CAUSE EVERY PROCESS TO BE EXPOSED TO THE ENTIRE DATASET BY SHUFFLING WITH A
                 # DIFFERENT SEED EACH EPOCH START
-                if self.multi_gpu == MultiGPUMode.DISTRIBUTED_DATA_PARALLEL:
+                # BATCH SAMPLERS THAT RESHUFFLE BY EPOCH (AspectRatioBatchSampler) ARE SET IN ANY MODE
+                if hasattr(getattr(self.train_loader, 'batch_sampler', None), 'set_epoch'):
+                    self.train_loader.batch_sampler.set_epoch(epoch)
+                elif self.multi_gpu == MultiGPUMode.DISTRIBUTED_DATA_PARALLEL:
                     self.train_loader.sampler.set_epoch(epoch)
 
                 train_metrics_tuple = self._train_epoch(epoch=epoch, silent_mode=silent_mode)
+                if epoch == self.start_epoch and is_sharded_optimizer(self.optimizer):
+                    self._log_sharded_optimizer_state_memory()
 
                 # Phase.TRAIN_EPOCH_END
                 # RUN PHASE CALLBACKS
@@ -958,6 +1103,10 @@ class SgModel:
                 if self.ema:
                     self.net = keep_model
 
+                # THE SHARDED OPTIMIZER STATE IS GATHERED TO THE MAIN PROCESS FOR THE CHECKPOINT (BY ALL THE PROCESSES)
+                if self.training_params.save_model and is_sharded_optimizer(self.optimizer):
+                    self.optimizer.consolidate_state_dict(to=0)
+
                 if not self.ddp_silent_mode:
                     # SAVING AND LOGGING OCCURS ONLY IN THE MAIN PROCESS (IN CASES THERE ARE SEVERAL PROCESSES - DDP)
                     self._write_to_disk_operations(train_metrics_tuple, validation_results_tuple, inf_time, epoch,
@@ -967,6 +1116,10 @@ class SgModel:
             if self.training_params.average_best_models:
                 self._validate_final_average_model(cleanup_snapshots_pkl_file=True)
 
+            if qat_params is not None and core_utils.get_param(qat_params, 'export_int8', default_val=True) \
+                    and not self.ddp_silent_mode:
+                self._export_int8_model()
+
         except KeyboardInterrupt:
             logger.info(
                 '\n[MODEL TRAINING EXECUTION HAS BEEN INTERRUPTED]... Please wait until SOFT-TERMINATION process '
@@ -997,22 +1150,25 @@ class SgModel:
     def _set_valid_metrics(self, valid_metrics_list):
         self.valid_metrics = MetricCollection(valid_metrics_list)
 
-    def _initialize_mixed_precision(self, mixed_precision_enabled: bool):
-        # SCALER IS ALWAYS INITIALIZED BUT IS DISABLED IF MIXED PRECISION WAS NOT SET
-        self.scaler = GradScaler(enabled=mixed_precision_enabled)
+    def _initialize_mixed_precision(self, mixed_precision_enabled: bool, mixed_precision_dtype: str = 'float16'):
+        dtype = sg_model_utils.get_mixed_precision_dtype(mixed_precision_dtype)
+        # SCALER IS ALWAYS INITIALIZED BUT IS DISABLED IF MIXED PRECISION WAS NOT SET - BFLOAT16 HAS THE RANGE OF FLOAT32
+        # SO ITS GRADIENTS DO NOT UNDERFLOW AND ARE NOT SCALED
+        self.scaler = GradScaler(enabled=mixed_precision_enabled and dtype == torch.float16)
 
         if mixed_precision_enabled:
-            assert self.device.startswith('cuda'), "mixed precision is not available for CPU"
+            assert self.device.startswith('cuda') or dtype == torch.bfloat16, \
+                "float16 mixed precision is not available for CPU, use mixed_precision_dtype='bfloat16'"
             if self.multi_gpu == MultiGPUMode.DATA_PARALLEL:
                 # IN DATAPARALLEL MODE WE NEED TO WRAP THE FORWARD FUNCTION OF OUR MODEL SO IT WILL RUN WITH AUTOCAST.
                 # BUT SINCE THE MODULE IS CLONED TO THE DEVICES ON EACH FORWARD CALL OF A DATAPARALLEL MODEL,
                 # WE HAVE TO REGISTER THE WRAPPER BEFORE EVERY FORWARD CALL
                 def hook(module, _):
-                    module.forward = MultiGPUModeAutocastWrapper(module.forward)
+                    module.forward = MultiGPUModeAutocastWrapper(module.forward, dtype=dtype)
 
                 self.net.module.register_forward_pre_hook(hook=hook)
 
-            if self.load_checkpoint:
+            if self.load_checkpoint and self.scaler.is_enabled():
                 scaler_state_dict = core_utils.get_param(self.checkpoint, 'scaler_state_dict')
                 if scaler_state_dict is None:
                     logger.warning(
@@ -1021,6 +1177,16 @@ class SgModel:
                 else:
                     self.scaler.load_state_dict(scaler_state_dict)
 
+    def _autocast(self):
+        """
+        The autocast context of the forward passes in training and evaluation, enabled only with
+        training_params.mixed_precision (in training_params.mixed_precision_dtype)
+        """
+        enabled = bool(core_utils.get_param(self.training_params, 'mixed_precision', False))
+        dtype = sg_model_utils.get_mixed_precision_dtype(
+            core_utils.get_param(self.training_params, 'mixed_precision_dtype', 'float16'))
+        return sg_model_utils.get_autocast(self.device.split(':')[0], dtype, enabled)
+
     def _validate_final_average_model(self, cleanup_snapshots_pkl_file=False):
         """
         Testing the averaged model by loading the last saved average checkpoint and running test.
@@ -1062,7 +1228,7 @@ class SgModel:
                 self.model_weight_averaging.cleanup()
 
     # FIXME - we need to resolve flake8's 'function is too complex' for this function
-    @deprecated(version='0.1', reason="directly predict using the nn_module")  # noqa: C901
+    @deprecated(version='0.1', reason="use super_gradients.training.utils.inference_pipeline.InferencePipeline")  # noqa: C901
     def predict(self, inputs, targets=None, half=False, normalize=False, verbose=False,
                 move_outputs_to_cpu=True):
         """
@@ -1239,6 +1405,70 @@ class SgModel:
 
         return logs
 
+    def benchmark(self, **kwargs) -> list:
+        """
+        Sweeps the inference performance over batch size x resolution x dtype x memory format x fusion.
+        Unlike compute_model_runtime, it reports latency percentiles, peak memory and warm-up time, and can also time
+        the end-to-end inference path (decode -> preprocess -> forward -> post-processing).
+        :param kwargs: super_gradients.training.utils.benchmark_utils.benchmark_model params - the device,
+            the post_prediction_callback (with the detection task) and the architecture name default to the model's
+        :return: results: list
+            A dict per configuration (see benchmark_model), use benchmark_utils.save_benchmark_results to save them
+        """
+        assert self.multi_gpu not in (MultiGPUMode.DATA_PARALLEL, MultiGPUMode.DISTRIBUTED_DATA_PARALLEL), \
+            'The model is on multiple GPUs, move it to a single GPU is order to benchmark it'
+
+        kwargs.setdefault('device', self.device)
+        kwargs.setdefault('architecture', self.architecture if isinstance(self.architecture, str) else None)
+        if self.post_prediction_callback is not None:
+            kwargs.setdefault('post_prediction_callback', self.post_prediction_callback)
+            kwargs.setdefault('task', 'detection')
+        return benchmark_model(self.net, **kwargs)
+
+    def quantize(self, num_calibration_batches: int = 32, backend: str = 'fbgemm', per_channel: bool = True,
+                 skip_module_names=None, skip_module_types=None, valid_metrics_list=None,
+                 num_eval_batches: int = None, latency_repetitions: int = 20, verbose: bool = True):
+        """
+        Post-training static int8 quantization (torch.fx graph mode) of the model for CPU inference, calibrated on the
+        validation loader of the connected dataset interface. The float and the quantized models are evaluated on the
+        validation loader to report the accuracy drop and the speedup.
+        :param num_calibration_batches: Number of validation batches to calibrate the activation observers on
+        :param backend:                 The quantized engine - 'fbgemm' or 'x86' (x86 servers) or 'qnnpack' (ARM)
+        :param per_channel:             Quantize the weights with per-channel (instead of per-tensor) observers
+        :param skip_module_names:       Qualified names of quantization-sensitive modules to keep in float
+        :param skip_module_types:       Module types to keep in float (by default the YOLOv5 Detect head and NMS)
+        :param valid_metrics_list:      Metrics to evaluate (self.valid_metrics by default)
+        :param num_eval_batches:        Evaluate only the first num_eval_batches validation batches (all by default)
+        :param latency_repetitions:     Number of timed CPU forward passes of each model (0 to skip the latency report)
+        :param verbose:                 Prints the report to screen
+        :return: quantized_model, report: (nn.Module, dict)
+            The quantized model (on the CPU) and the report - the float and int8 metrics, the delta of each metric and
+            the CPU latency (ms) of both models and the speedup
+        """
+        if self.valid_loader is None:
+            raise RuntimeError('A dataset interface with a validation loader must be connected in order to quantize '
+                               'the model, use connect_dataset_interface')
+        model = self.net.module if hasattr(self.net, 'module') else self.net
+        float_model = deepcopy(model).cpu().eval()
+        metrics = valid_metrics_list if valid_metrics_list is not None else self.valid_metrics
+
+        quantized_model = quantize_model_ptq(float_model, self.valid_loader, num_calibration_batches, backend=backend,
+                                             per_channel=per_channel, skip_module_names=skip_module_names,
+                                             skip_module_types=skip_module_types)
+
+        report = {'fp32': evaluate_on_cpu(float_model, self.valid_loader, metrics, num_eval_batches),
+                  'int8': evaluate_on_cpu(quantized_model, self.valid_loader, metrics, num_eval_batches)}
+        report['delta'] = {name: report['int8'][name] - value for name, value in report['fp32'].items()}
+        if latency_repetitions:
+            inputs, _, _ = sg_model_utils.unpack_batch_items(next(iter(self.valid_loader)))
+            report['latency_fp32'] = measure_latency(float_model, inputs.cpu(), 'cpu', latency_repetitions)
+            report['latency_int8'] = measure_latency(quantized_model, inputs.cpu(), 'cpu', latency_repetitions)
+            report['speedup'] = report['latency_fp32'] / report['latency_int8']
+
+        if verbose:
+            logger.info('Quantization report:\n' + '\n'.join(f'\t{key}: {value}' for key, value in report.items()))
+        return quantized_model, report
+
     def get_arch_params(self):
         return self.arch_params.to_dict()
 
@@ -1422,6 +1652,12 @@ class SgModel:
                                                   overwrite_local_checkpoint=self.overwrite_local_checkpoint,
                                                   load_weights_only=self.load_weights_only)
 
+            # A QUANTIZATION-AWARE TRAINING CHECKPOINT IS LOADED TO A NET PREPARED WITH THE SAME PARAMS
+            checkpoint = read_ckpt_state_dict(ckpt_path=ckpt_local_path) if ckpt_local_path is not None and \
+                os.path.exists(ckpt_local_path) else {}
+            if 'qat_params' in checkpoint.keys() and not self.load_backbone:
+                self._prepare_qat(checkpoint['qat_params'])
+
             # LOAD CHECKPOINT TO MODEL
             self.checkpoint = load_checkpoint_to_model(ckpt_local_path=ckpt_local_path,
                                                        load_backbone=self.load_backbone,
@@ -1429,7 +1665,8 @@ class SgModel:
                                                        strict=self.strict_load.value if isinstance(self.strict_load,
                                                                                                    StrictLoad) else self.strict_load,
                                                        load_weights_only=self.load_weights_only,
-                                                       load_ema_as_net=self.load_ema_as_net)
+                                                       load_ema_as_net=self.load_ema_as_net,
+                                                       checkpoint=checkpoint or None)
 
             if 'ema_net' in self.checkpoint.keys():
                 logger.warning("[WARNING] Main network has been loaded from checkpoint but EMA network exists as "
@@ -1440,6 +1677,36 @@ class SgModel:
         self.best_metric = self.checkpoint['acc'] if 'acc' in self.checkpoint.keys() else -1
         self.start_epoch = self.checkpoint['epoch'] if 'epoch' in self.checkpoint.keys() else 0
 
+    def _prepare_qat(self, qat_params: dict):
+        """
+        Prepares self.net for quantization-aware training (see quantization_utils.prepare_model_for_qat) and wraps it
+        again according to self.multi_gpu
+        :param qat_params: prepare_model_for_qat params (backend, per_channel, skip_module_names, skip_module_types)
+        """
+        if isinstance(self.net.module, QATModule):
+            # ALREADY PREPARED, WHEN A QUANTIZATION-AWARE TRAINING CHECKPOINT WAS LOADED
+            return
+        if self.train_loader is None:
+            raise RuntimeError('A dataset interface must be connected in order to prepare the model for '
+                               'quantization-aware training')
+        inputs, _, _ = sg_model_utils.unpack_batch_items(next(iter(self.train_loader)))
+        self.net = prepare_model_for_qat(self.net.module, inputs.to(self.device), **qat_params)
+        self._net_to_device()
+
+    def _export_int8_model(self):
+        """
+        Converts the quantization-aware trained net (the EMA net when training with EMA) to an int8 model for CPU
+        inference, keeps it in self.quantized_net and saves it (TorchScript) to ckpt_int8.pt
+        """
+        qat_net = self.ema_model.ema if self.ema else self.net
+        self.quantized_net = qat_net.module.convert()
+        inputs, _, _ = sg_model_utils.unpack_batch_items(next(iter(self.valid_loader)))
+        with torch.no_grad():
+            scripted_net = torch.jit.trace(self.quantized_net, inputs.cpu(), check_trace=False)
+        int8_model_path = os.path.join(self.checkpoints_dir_path, 'ckpt_int8.pt')
+        torch.jit.save(scripted_net, int8_model_path)
+        logger.info(f'The quantization-aware trained model was converted to int8 and saved to {int8_model_path}')
+
     def _prep_for_test(self, test_loader: torch.utils.data.DataLoader = None, loss=None, post_prediction_callback=None,
                        test_metrics_list=None,
                        loss_logging_items_names=None, test_phase_callbacks=None):
@@ -1672,12 +1939,16 @@ class SgModel:
             for batch_idx, batch_items in enumerate(progress_bar_data_loader):
                 batch_items = core_utils.tensor_container_to_device(batch_items, self.device, non_blocking=True)
                 inputs, targets, additional_batch_items = sg_model_utils.unpack_batch_items(batch_items)
+                if self.memory_format is not None:
+                    inputs = sg_model_utils.inputs_to_memory_format(inputs, self.memory_format)
 
-                output = self.net(inputs)
+                # AUTOCAST IS ENABLED ONLY IF self.training_params.mixed_precision (AS IN TRAINING)
+                with self._autocast():
+                    output = self.net(inputs)
 
-                if self.criterion is not None:
-                    # STORE THE loss_items ONLY, THE 1ST RETURNED VALUE IS THE loss FOR BACKPROP DURING TRAINING
-                    loss_tuple = self._get_losses(output, targets)[1].cpu()
+                    if self.criterion is not None:
+                        # STORE THE loss_items ONLY, THE 1ST RETURNED VALUE IS THE loss FOR BACKPROP DURING TRAINING
+                        loss_tuple = self._get_losses(output, targets)[1].cpu()
 
                 context.update_context(batch_idx=batch_idx,
                                        inputs=inputs,
@@ -0,0 +1,902 @@
+import copy
+import csv
+import itertools
+import json
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+import torch
+from torch import nn
+
+from super_gradients.common.abstractions.abstract_logger import get_logger
+from super_gradients.training.utils.detection_utils import DetectionPostPredictionCallback
+from super_gradients.training.utils.inference_pipeline import InferencePipeline
+from super_gradients.training.utils.module_utils import enable_activation_checkpointing
+from super_gradients.training.utils.sg_model_utils import get_autocast, get_mixed_precision_dtype
+from super_gradients.training.utils.utils import HpmStruct, Timer
+
+logger = get_logger(__name__)
+
+DTYPES = ['fp32', 'fp16', 'bf16']
+MEMORY_FORMATS = ['nchw', 'channels_last']
+RESULT_FIELDS = ['architecture', 'batch_size', 'resolution', 'dtype', 'memory_format', 'fused', 'device',
+                 'repetitions', 'warmup_time', 'first_forward_time', 'mean_latency', 'p50_latency', 'p90_latency',
+                 'p99_latency', 'throughput', 'peak_memory_mb', 'e2e_mean_latency', 'e2e_p50_latency',
+                 'e2e_p90_latency', 'e2e_p99_latency', 'e2e_throughput', 'error']
+CHECKPOINTING_RESULT_FIELDS = ['architecture', 'batch_size', 'resolution', 'mixed_precision_dtype', 'device',
+                               'activation_checkpointing', 'checkpointed_stages', 'repetitions', 'mean_latency',
+                               'p50_latency', 'p90_latency', 'p99_latency', 'throughput', 'saved_activations_mb',
+                               'peak_memory_mb', 'error']
+COMPARISON_RESULT_FIELDS = ['benchmark', 'implementation', 'settings', 'device', 'batch_size', 'repetitions',
+                            'mean_latency', 'p50_latency', 'p90_latency', 'p99_latency', 'throughput', 'speedup',
+                            'saved_tensors_mb', 'peak_memory_mb', 'error']
+
+
+def _synchronize(device: str):
+    if device == 'cuda':
+        torch.cuda.synchronize()
+
+
+def time_repetitions(function: Callable, device: str, min_repetitions: int, max_repetitions: int,
+                     min_run_time_ms: float) -> List[float]:
+    """
+    time_repetitions - Times function (in ms) at least min_repetitions and at most max_repetitions times, stopping once
+    the accumulated time exceeds min_run_time_ms - so fast models get enough samples for stable percentiles and slow
+    models do not take forever.
+    """
+    timer = Timer(device)
+    latencies = []
+    while len(latencies) < max_repetitions and (len(latencies) < min_repetitions or sum(latencies) < min_run_time_ms):
+        timer.start()
+        function()
+        latencies.append(timer.stop())
+    return latencies
+
+
+def latency_stats(latencies: Sequence[float], batch_size: int, prefix: str = '') -> Dict[str, float]:
+    """
+    latency_stats - The mean and percentile latencies (ms) and the throughput (samples per second) of latencies
+    """
+    mean_latency = float(np.mean(latencies))
+    return {f'{prefix}mean_latency': mean_latency,
+            f'{prefix}p50_latency': float(np.percentile(latencies, 50)),
+            f'{prefix}p90_latency': float(np.percentile(latencies, 90)),
+            f'{prefix}p99_latency': float(np.percentile(latencies, 99)),
+            f'{prefix}throughput': batch_size * 1000 / mean_latency}
+
+
+def _encode_images(batch_size: int, resolution: Tuple[int, int]) -> List[np.ndarray]:
+    images = np.random.randint(0, 256, size=(batch_size, *resolution, 3), dtype=np.uint8)
+    return [cv2.imencode('.jpg', image)[1] for image in images]
+
+
+def _benchmark_configuration(pipeline: InferencePipeline, batch_size: int, resolution: Tuple[int, int],
+                             num_warmup: int, min_repetitions: int, max_repetitions: int, min_run_time_ms: float,
+                             end_to_end: bool) -> Dict[str, float]:
+    device = pipeline.device
+    result = {}
+    inputs = pipeline.preprocess(torch.rand(batch_size, 3, *resolution))
+
+    def forward():
+        return pipeline.net(inputs)
+
+    if device == 'cuda':
+        torch.cuda.reset_peak_memory_stats()
+
+    with torch.no_grad():
+        # THE FIRST FORWARD PASS INCLUDES THE LAZY INITIALIZATION / COMPILATION / CUDNN AUTO-TUNING
+        start = time.perf_counter()
+        forward()
+        _synchronize(device)
+        result['first_forward_time'] = (time.perf_counter() - start) * 1000
+
+        for _ in range(num_warmup - 1):
+            forward()
+        _synchronize(device)
+        result['warmup_time'] = (time.perf_counter() - start) * 1000
+
+        latencies = time_repetitions(forward, device, min_repetitions, max_repetitions, min_run_time_ms)
+        result.update(repetitions=len(latencies), **latency_stats(latencies, batch_size))
+        result['peak_memory_mb'] = torch.cuda.max_memory_allocated() / 2 ** 20 if device == 'cuda' else None
+
+        if end_to_end:
+            # DECODE -> PREPROCESS -> FORWARD -> POST-PROCESSING (e.g. NMS) -> OUTPUTS ON THE CPU
+            encoded_images = _encode_images(batch_size, resolution)
+
+            def end_to_end_inference():
+                images = [cv2.imdecode(encoded_image, cv2.IMREAD_COLOR) for encoded_image in encoded_images]
+                return pipeline.postprocess(pipeline.net(pipeline.preprocess(images)))
+
+            end_to_end_inference()
+            latencies = time_repetitions(end_to_end_inference, device, min_repetitions, max_repetitions,
+                                         min_run_time_ms)
+            result.update(latency_stats(latencies, batch_size, prefix='e2e_'))
+    return result
+
+
+def _try_benchmark_configuration(*args) -> Dict[str, float]:
+    try:
+        return _benchmark_configuration(*args)
+    except RuntimeError as e:
+        # ONLY FOR THE CASE OF CUDA OUT OF MEMORY WE CATCH THE EXCEPTION AND CONTINUE THE SWEEP
+        if 'out of memory' not in str(e):
+            raise
+        torch.cuda.empty_cache()
+        return {'error': 'CUDA out of memory'}
+
+
+def _validate_sweep(dtypes: Sequence[str], memory_formats: Sequence[str]):
+    for dtype in dtypes:
+        if dtype not in DTYPES:
+            raise ValueError(f'Unsupported dtype {dtype}, dtype should be one of {DTYPES}')
+    for memory_format in memory_formats:
+        if memory_format not in MEMORY_FORMATS:
+            raise ValueError(f'Unsupported memory format {memory_format}, it should be one of {MEMORY_FORMATS}')
+
+
+def benchmark_model(model: nn.Module, batch_sizes: Union[int, Sequence[int]] = (1, 8, 32),
+                    resolutions: Sequence[Union[int, Tuple[int, int]]] = (224,), dtypes: Sequence[str] = ('fp32',),
+                    memory_formats: Sequence[str] = ('nchw',), fuse: Sequence[bool] = (False,), device: str = None,
+                    task: str = 'classification', post_prediction_callback: DetectionPostPredictionCallback = None,
+                    end_to_end: bool = False, num_warmup: int = 10, min_repetitions: int = 20,
+                    max_repetitions: int = 200, min_run_time_ms: float = 1000., architecture: str = None,
+                    verbose: bool = True) -> List[Dict]:
+    """
+    benchmark_model - Sweeps batch size x resolution x dtype x memory format x fusion and times the model's inference
+
+    Every configuration runs on its own InferencePipeline copy of the model (the model itself is left untouched).
+    The forward pass is timed on a pre-made device input; with end_to_end=True the full path is timed as well - JPEG
+    decoding, preprocessing, forward pass and task post-processing (e.g. NMS with a post_prediction_callback).
+    The number of repetitions adapts to the model's speed: at least min_repetitions, at most max_repetitions, and
+    otherwise until min_run_time_ms has been spent. Configurations that can not run (e.g. fp16 on CPU or CUDA out of
+    memory) are reported with an 'error' instead of being skipped.
+
+    :param model:                       The network to benchmark
+    :param batch_sizes:                 Batch sizes to sweep
+    :param resolutions:                 Input resolutions to sweep - an int for square inputs or a (height, width)
+    :param dtypes:                      Any of 'fp32', 'fp16' (CUDA only) and 'bf16'
+    :param memory_formats:              Any of 'nchw' and 'channels_last'
+    :param fuse:                        Fusion settings to sweep (see InferencePipeline's fuse_model)
+    :param device:                      The device to run on (by default, the device of the model's parameters)
+    :param task:                        The InferencePipeline task, used by the end-to-end post-processing
+    :param post_prediction_callback:    Detection post-processing for the end-to-end timing
+    :param end_to_end:                  Time the decode -> preprocess -> forward -> post-processing path as well
+    :param num_warmup:                  Number of warm-up forward passes
+    :param min_repetitions:             Minimal number of timed repetitions
+    :param max_repetitions:             Maximal number of timed repetitions
+    :param min_run_time_ms:             Keep repeating (up to max_repetitions) until this much time was spent
+    :param architecture:                Name to report in the results
+    :param verbose:                     Prints the results to screen
+    :return: results: list
+        A dict per configuration with its settings and the latency percentiles (ms per batch), throughput (im/s),
+        peak CUDA memory (MB, None on CPU), the warm-up and first forward pass times (ms) and the end-to-end
+        percentiles and throughput (with end_to_end=True)
+    """
+    batch_sizes = [batch_sizes] if isinstance(batch_sizes, int) else batch_sizes
+    resolutions = [(resolution, resolution) if isinstance(resolution, int) else tuple(resolution)
+                   for resolution in resolutions]
+    _validate_sweep(dtypes, memory_formats)
+    device = device or next(model.parameters()).device.type
+
+    results = []
+    for dtype, memory_format, fused in itertools.product(dtypes, memory_formats, fuse):
+        pipeline = None
+        if dtype != 'fp16' or device != 'cpu':
+            pipeline = InferencePipeline(model, device=device, task=task, half=dtype == 'fp16', bf16=dtype == 'bf16',
+                                         channels_last=memory_format == 'channels_last', fuse_model=fused,
+                                         post_prediction_callback=post_prediction_callback)
+
+        for resolution, batch_size in itertools.product(resolutions, sorted(batch_sizes)):
+            result = {'architecture': architecture, 'batch_size': batch_size, 'resolution': f'{resolution[0]}x{resolution[1]}',
+                      'dtype': dtype, 'memory_format': memory_format, 'fused': fused, 'device': device}
+            if pipeline is None:
+                result['error'] = 'fp16 is not supported on CPU'
+            else:
+                result.update(_try_benchmark_configuration(pipeline, batch_size, resolution, num_warmup,
+                                                           min_repetitions, max_repetitions, min_run_time_ms,
+                                                           end_to_end))
+            results.append(result)
+
+        del pipeline
+
+    if verbose:
+        logger.info(format_benchmark_results(results))
+    return results
+
+
+def benchmark_multi_resolution(model: nn.Module, resolutions: Sequence[Union[int, Tuple[int, int]]],
+                               batch_size: int = 1, device: str = None, num_warmup: int = 10,
+                               min_repetitions: int = 20, max_repetitions: int = 200,
+                               min_run_time_ms: float = 1000.) -> Dict:
+    """
+    benchmark_multi_resolution - Times the model's forward pass when the input resolution changes on every call (e.g.
+                                 rectangular batches), cycling through resolutions. Unlike benchmark_model, this
+                                 includes the per-resolution overhead of the model (e.g. building the YOLOv5 Detect
+                                 grids), which a fixed resolution sweep hides.
+
+    :param model:       The network to benchmark (in eval mode, on device)
+    :param resolutions: Input resolutions to cycle through - an int for square inputs or a (height, width)
+    :param batch_size:  The batch size of the inputs
+    :param device:      The device to run on (by default, the device of the model's parameters)
+    :return: The batch size, the resolutions, the number of repetitions and the latency percentiles (ms per batch) and
+             throughput (im/s)
+    """
+    resolutions = [(resolution, resolution) if isinstance(resolution, int) else tuple(resolution)
+                   for resolution in resolutions]
+    device = device or next(model.parameters()).device.type
+    inputs = itertools.cycle([torch.rand(batch_size, 3, *resolution, device=device) for resolution in resolutions])
+
+    model.eval()
+    with torch.no_grad():
+        for _ in range(num_warmup):
+            model(next(inputs))
+        _synchronize(device)
+        latencies = time_repetitions(lambda: model(next(inputs)), device, min_repetitions, max_repetitions,
+                                     min_run_time_ms)
+    return {'batch_size': batch_size, 'resolutions': [f'{height}x{width}' for height, width in resolutions],
+            'repetitions': len(latencies), **latency_stats(latencies, batch_size)}
+
+
+def benchmark_architectures(architectures: Sequence[str] = None, arch_params: Dict = None,
+                            output_path: str = None, **kwargs) -> List[Dict]:
+    """
+    benchmark_architectures - Runs benchmark_model for entries of ARCHITECTURES, e.g. to track inference performance
+                              regressions across releases. An architecture that fails to build or run is reported
+                              with an 'error' and the sweep goes on.
+
+    :param architectures:   Names from ARCHITECTURES (by default, all of them)
+    :param arch_params:     Architecture params for building the networks (num_classes defaults to 1000)
+    :param output_path:     Optional .json or .csv file to write the results to
+    :param kwargs:          benchmark_model params
+    :return: results: list
+        The results of all the architectures
+    """
+    from super_gradients.training.models import ARCHITECTURES
+
+    device = kwargs.pop('device', 'cuda' if torch.cuda.is_available() else 'cpu')
+    results = []
+    for architecture in architectures or list(ARCHITECTURES.keys()):
+        try:
+            net = ARCHITECTURES[architecture](arch_params=HpmStruct(**{'num_classes': 1000, **(arch_params or {})}))
+            results += benchmark_model(net.to(device), device=device, architecture=architecture, **kwargs)
+        except Exception as e:
+            logger.warning(f'Failed to benchmark {architecture}: {e}')
+            results.append({'architecture': architecture, 'device': device, 'error': str(e)})
+
+    if output_path is not None:
+        save_benchmark_results(results, output_path)
+    return results
+
+
+def _saved_activations_bytes(forward: Callable, excluded_tensors: Iterable[torch.Tensor] = ()) -> int:
+    """
+    The bytes of the tensors saved for the backward pass by forward (excluded_tensors, e.g. the model parameters, are not
+    counted)
+    """
+    excluded_pointers = {tensor.data_ptr() for tensor in excluded_tensors}
+    saved_pointers = {}
+
+    def pack(tensor):
+        pointer = tensor.data_ptr()
+        if pointer not in excluded_pointers:
+            saved_pointers[pointer] = max(saved_pointers.get(pointer, 0), tensor.numel() * tensor.element_size())
+        return tensor
+
+    with torch.autograd.graph.saved_tensors_hooks(pack, lambda tensor: tensor):
+        forward()
+    return sum(saved_pointers.values())
+
+
+def _output_sum(output) -> torch.Tensor:
+    if isinstance(output, torch.Tensor):
+        return output.float().sum()
+    if isinstance(output, dict):
+        output = list(output.values())
+    return sum(_output_sum(item) for item in output if isinstance(item, (torch.Tensor, list, tuple, dict)))
+
+
+def _benchmark_training_step(model: nn.Module, batch_size: int, resolution: Tuple[int, int], device: str,
+                             mixed_precision_dtype: Optional[str], num_warmup: int, min_repetitions: int,
+                             max_repetitions: int, min_run_time_ms: float) -> Dict[str, float]:
+    inputs = torch.rand(batch_size, 3, *resolution, device=device)
+    autocast_dtype = get_mixed_precision_dtype(mixed_precision_dtype or 'float16')
+
+    def forward():
+        with get_autocast(device, autocast_dtype, enabled=mixed_precision_dtype is not None):
+            return _output_sum(model(inputs))
+
+    def training_step():
+        forward().backward()
+        model.zero_grad(set_to_none=True)
+
+    for _ in range(num_warmup):
+        training_step()
+    _synchronize(device)
+    if device == 'cuda':
+        torch.cuda.reset_peak_memory_stats()
+    latencies = time_repetitions(training_step, device, min_repetitions, max_repetitions, min_run_time_ms)
+    result = {'repetitions': len(latencies), **latency_stats(latencies, batch_size),
+              'peak_memory_mb': torch.cuda.max_memory_allocated() / 2 ** 20 if device == 'cuda' else None}
+
+    saved_activations = _saved_activations_bytes(forward, model.parameters())
+    model.zero_grad(set_to_none=True)
+    result['saved_activations_mb'] = saved_activations / 2 ** 20
+    return result
+
+
+def benchmark_activation_checkpointing(model: nn.Module, stages: Union[bool, Sequence[str]] = True,
+                                       batch_size: int = 8, resolution: Union[int, Tuple[int, int]] = 224,
+                                       mixed_precision_dtype: Optional[str] = None, device: str = None,
+                                       num_warmup: int = 2, min_repetitions: int = 5, max_repetitions: int = 50,
+                                       min_run_time_ms: float = 1000., architecture: str = None,
+                                       verbose: bool = True) -> List[Dict]:
+    """
+    benchmark_activation_checkpointing - The memory / throughput trade-off of activation checkpointing: times the
+                                         training step (forward + backward) of the model without and with its
+                                         stages checkpointed (see enable_activation_checkpointing), and measures the
+                                         activations kept for the backward pass
+
+    Every configuration runs on its own copy of the model (the model itself is left untouched), in training mode.
+    The saved activations are the tensors autograd stores for the backward pass (on any device) - with
+    checkpointing, the activations inside the stages are not stored (the stage inputs, which the checkpoint keeps,
+    are not counted either). The peak memory of the training step is measured on CUDA.
+
+    :param model:                   The network to benchmark
+    :param stages:                  The checkpointed stages - True for the architecture's default stages, or a list
+                                    of submodule names
+    :param batch_size:              The batch size of the training step
+    :param resolution:              The input resolution - an int for square inputs or a (height, width)
+    :param mixed_precision_dtype:   Runs the forward pass with autocast in this dtype ('float16' or 'bfloat16')
+    :param device:                  The device to run on (by default, the device of the model's parameters)
+    :param num_warmup:              Number of warm-up training steps
+    :param min_repetitions:         Minimal number of timed repetitions
+    :param max_repetitions:         Maximal number of timed repetitions
+    :param min_run_time_ms:         Keep repeating (up to max_repetitions) until this much time was spent
+    :param architecture:            Name to report in the results
+    :param verbose:                 Prints the results to screen
+    :return: results: list
+        A dict without and with checkpointing - the latency percentiles (ms per training step), throughput (im/s),
+        saved activations (MB), peak CUDA memory (MB, None on CPU) and the number of checkpointed stages
+    """
+    resolution = (resolution, resolution) if isinstance(resolution, int) else tuple(resolution)
+    device = device or next(model.parameters()).device.type
+
+    results = []
+    for activation_checkpointing in [False, True]:
+        result = {'architecture': architecture, 'batch_size': batch_size,
+                  'resolution': f'{resolution[0]}x{resolution[1]}', 'mixed_precision_dtype': mixed_precision_dtype,
+                  'device': device, 'activation_checkpointing': activation_checkpointing}
+        net = copy.deepcopy(model).to(device).train()
+        result['checkpointed_stages'] = len(enable_activation_checkpointing(net, stages)) if activation_checkpointing else 0
+        try:
+            result.update(_benchmark_training_step(net, batch_size, resolution, device, mixed_precision_dtype,
+                                                   num_warmup, min_repetitions, max_repetitions, min_run_time_ms))
+        except RuntimeError as e:
+            # OUT OF MEMORY WITHOUT CHECKPOINTING IS A RESULT OF THE TRADE-OFF
+            if 'out of memory' not in str(e):
+                raise
+            result['error'] = 'CUDA out of memory'
+            if device == 'cuda':
+                torch.cuda.empty_cache()
+        results.append(result)
+        del net
+
+    if verbose:
+        logger.info(format_activation_checkpointing_results(results))
+    return results
+
+
+def benchmark_activation_checkpointing_architectures(architectures: Sequence[str] = None, arch_params: Dict = None,
+                                                     output_path: str = None, **kwargs) -> List[Dict]:
+    """
+    benchmark_activation_checkpointing_architectures - Runs benchmark_activation_checkpointing with the default stages
+                                                       (see SgModule.get_activation_checkpointing_stages) for entries
+                                                       of ARCHITECTURES - the trade-off report of every architecture.
+                                                       An architecture that fails to build or run, or has no default
+                                                       stages, is reported with an 'error' and the sweep goes on.
+
+    :param architectures:   Names from ARCHITECTURES (by default, all of them)
+    :param arch_params:     Architecture params for building the networks (num_classes defaults to 1000)
+    :param output_path:     Optional .json or .csv file to write the results to
+    :param kwargs:          benchmark_activation_checkpointing params
+    :return: results: list
+        The results of all the architectures
+    """
+    from super_gradients.training.models import ARCHITECTURES
+
+    device = kwargs.pop('device', 'cuda' if torch.cuda.is_available() else 'cpu')
+    results = []
+    for architecture in architectures or list(ARCHITECTURES.keys()):
+        try:
+            net = ARCHITECTURES[architecture](arch_params=HpmStruct(**{'num_classes': 1000, **(arch_params or {})}))
+            if not enable_activation_checkpointing(copy.deepcopy(net)):
+                raise ValueError('The architecture has no default activation checkpointing stages')
+            results += benchmark_activation_checkpointing(net, device=device, architecture=architecture, **kwargs)
+        except Exception as e:
+            logger.warning(f'Failed to benchmark the activation checkpointing of {architecture}: {e}')
+            results.append({'architecture': architecture, 'device': device, 'error': str(e)})
+
+    if output_path is not None:
+        save_benchmark_results(results, output_path, fieldnames=CHECKPOINTING_RESULT_FIELDS)
+    return results
+
+
+def _get_benchmark_devices(devices: Optional[Sequence[str]]) -> List[str]:
+    return list(devices) if devices else ['cpu'] + (['cuda'] if torch.cuda.is_available() else [])
+
+
+def _benchmark_implementation(function: Callable, device: str, batch_size: int, grad_inputs: Sequence[torch.Tensor],
+                              num_warmup: int, min_repetitions: int, max_repetitions: int,
+                              min_run_time_ms: float) -> Dict[str, float]:
+    def step():
+        output = function()
+        if grad_inputs:
+            # torch.autograd.grad DOES NOT ACCUMULATE INTO .grad, SO THE REPETITIONS DO NOT NEED TO ZERO THE GRADIENTS
+            torch.autograd.grad(_output_sum(output), grad_inputs, allow_unused=True)
+
+    for _ in range(num_warmup):
+        step()
+    _synchronize(device)
+    allocated_memory = 0
+    if device == 'cuda':
+        torch.cuda.reset_peak_memory_stats()
+        allocated_memory = torch.cuda.memory_allocated()
+    latencies = time_repetitions(step, device, min_repetitions, max_repetitions, min_run_time_ms)
+    result = {'repetitions': len(latencies), **latency_stats(latencies, batch_size),
+              'peak_memory_mb': (torch.cuda.max_memory_allocated() - allocated_memory) / 2 ** 20 if device == 'cuda' else None}
+    if grad_inputs:
+        result['saved_tensors_mb'] = _saved_activations_bytes(function, grad_inputs) / 2 ** 20
+    return result
+
+
+def _compare_implementations(benchmark: str, implementations: Dict[str, Callable], settings: str, device: str,
+                             batch_size: int, grad_inputs: Sequence[torch.Tensor] = (), num_warmup: int = 2,
+                             min_repetitions: int = 5, max_repetitions: int = 50,
+                             min_run_time_ms: float = 1000.) -> List[Dict]:
+    """
+    _compare_implementations - Times every implementation (the first one is the reference the speedups are relative to)
+                               on the same inputs. With grad_inputs, the timed step includes the backward pass to them,
+                               and the tensors saved for the backward pass are measured (on any device). The peak
+                               memory is the CUDA memory allocated by the step on top of the inputs.
+    """
+    results = []
+    for implementation, function in implementations.items():
+        result = {'benchmark': benchmark, 'implementation': implementation, 'settings': settings, 'device': device,
+                  'batch_size': batch_size}
+        try:
+            result.update(_benchmark_implementation(function, device, batch_size, grad_inputs, num_warmup,
+                                                    min_repetitions, max_repetitions, min_run_time_ms))
+        except RuntimeError as e:
+            # ONLY FOR THE CASE OF CUDA OUT OF MEMORY WE CATCH THE EXCEPTION AND CONTINUE THE COMPARISON
+            if 'out of memory' not in str(e):
+                raise
+            result['error'] = 'CUDA out of memory'
+            torch.cuda.empty_cache()
+        results.append(result)
+
+    reference = results[0]
+    for result in results:
+        if not result.get('error') and not reference.get('error'):
+            result['speedup'] = reference['mean_latency'] / result['mean_latency']
+    return results
+
+
+def _sort_ohem_loss(criterion: nn.Module, logits: torch.Tensor, labels: torch.Tensor) -> torch.Tensor:
+    """
+    The reference OhemLoss.forward - a full descending sort of the pixel losses
+    """
+    loss = criterion.criteria(logits, labels).view(-1)
+    if criterion.num_pixels_exclude_ignored:
+        loss = loss[labels.view(-1) != criterion.ignore_lb]
+        num_pixels = loss.numel()
+    else:
+        num_pixels = labels.numel()
+    num_mining = min(int(criterion.mining_percent * num_pixels), num_pixels - 1)
+    thresh = criterion.thresh.to(logits.device)
+    loss, _ = torch.sort(loss, descending=True)
+    if loss[num_mining] > thresh:
+        loss = loss[loss > thresh]
+    else:
+        loss = loss[:num_mining]
+    return torch.mean(loss)
+
+
+def benchmark_ohem_loss(batch_size: int = 8, num_classes: int = 19, resolution: Union[int, Tuple[int, int]] = (512, 1024),
+                        threshold: float = 0.7, mining_percent: float = 0.1, ignore_lb: int = 255,
+                        devices: Sequence[str] = None, verbose: bool = True, **kwargs) -> List[Dict]:
+    """
+    benchmark_ohem_loss - Compares the OhemCELoss step (forward + backward) of the reference hard example selection,
+                          that sorts all the pixel losses, with the kthvalue selection of OhemLoss
+
+    :param batch_size:      The batch size of the logits
+    :param num_classes:     The number of classes of the logits (19 for Cityscapes)
+    :param resolution:      The resolution of the logits - an int for square logits or a (height, width)
+    :param threshold:       OhemCELoss threshold
+    :param mining_percent:  OhemCELoss mining_percent
+    :param ignore_lb:       OhemCELoss ignore label (20% of the labels are ignored)
+    :param devices:         The devices to compare on (by default, the CPU and the GPU when available)
+    :param verbose:         Prints the results to screen
+    :param kwargs:          The timing params - num_warmup, min_repetitions, max_repetitions and min_run_time_ms
+    :return: results: list
+        A dict per device and implementation - the latency percentiles (ms per step), the speedup over the sort, the
+        tensors saved for the backward pass (MB) and the peak CUDA memory of the step (MB, None on CPU)
+    """
+    from super_gradients.training.losses.ohem_ce_loss import OhemCELoss
+
+    resolution = (resolution, resolution) if isinstance(resolution, int) else tuple(resolution)
+    criterion = OhemCELoss(threshold=threshold, mining_percent=mining_percent, ignore_lb=ignore_lb)
+    results = []
+    for device in _get_benchmark_devices(devices):
+        logits = torch.randn(batch_size, num_classes, *resolution, device=device).mul_(2).requires_grad_()
+        labels = torch.randint(0, num_classes, (batch_size, *resolution), device=device)
+        labels[torch.rand(labels.shape, device=device) < 0.2] = ignore_lb
+        implementations = {'sort': lambda: _sort_ohem_loss(criterion, logits, labels),
+                           'kthvalue': lambda: criterion(logits, labels)}
+        results += _compare_implementations('ohem_loss', implementations, f'{num_classes} classes, '
+                                            f'{resolution[0]}x{resolution[1]}', device, batch_size, [logits], **kwargs)
+
+    if verbose:
+        logger.info(format_comparison_results(results))
+    return results
+
+
+def _build_targets_per_layer(loss: nn.Module, predictions: List[torch.Tensor], targets: torch.Tensor) -> Tuple:
+    """
+    The reference YoLoV5DetectionLoss.build_targets - the target assignment of every detection layer in turn
+    """
+    num_anchors, num_targets = loss.anchors.num_anchors, targets.shape[0]
+    target_classes, target_boxes, indices, anchors = [], [], [], []
+
+    gain = torch.ones(7, device=targets.device)
+    anchor_indices = torch.arange(num_anchors, device=targets.device).float().view(num_anchors, 1).repeat(1, num_targets)
+    targets = torch.cat((targets.repeat(num_anchors, 1, 1), anchor_indices[:, :, None]), 2)
+
+    bias = 0.5
+    off = torch.tensor([[0, 0], [1, 0], [0, 1], [-1, 0], [0, -1]], device=targets.device).float() * bias
+
+    for i in range(loss.anchors.detection_layers_num):
+        anch = loss.anchors.anchors[i].to(targets.device)
+        gain[2:6] = torch.tensor(predictions[i].shape)[[3, 2, 3, 2]]
+        t = targets * gain
+        if num_targets:
+            r = t[:, :, 4:6] / anch[:, None]
+            t = t[torch.max(r, 1. / r).max(2)[0] < loss.anchor_threshold]
+            gxy = t[:, 2:4]
+            gxi = gain[[2, 3]] - gxy
+            j, k = ((gxy % 1. < bias) & (gxy > 1.)).T
+            l, m = ((gxi % 1. < bias) & (gxi > 1.)).T
+            j = torch.stack((torch.ones_like(j), j, k, l, m))
+            t = t.repeat((5, 1, 1))[j]
+            offsets = (torch.zeros_like(gxy)[None] + off[:, None])[j]
+        else:
+            t = targets[0]
+            offsets = 0
+
+        b, c = t[:, :2].long().T
+        gxy = t[:, 2:4]
+        gwh = t[:, 4:6]
+        gij = (gxy - offsets).long()
+        gi, gj = gij.T
+        gi, gj = gi.clamp_(0, int(gain[2]) - 1), gj.clamp_(0, int(gain[3]) - 1)
+        a = t[:, 6].long()
+        indices.append((b, a, gj, gi))
+        target_boxes.append(torch.cat((gxy - gij, gwh), 1))
+        anchors.append(anch[a])
+        target_classes.append(c)
+
+    return target_classes, target_boxes, indices, anchors
+
+
+def benchmark_build_targets(batch_size: int = 8, resolution: Union[int, Tuple[int, int]] = 640,
+                            targets_per_image: int = 100, num_classes: int = 80, devices: Sequence[str] = None,
+                            verbose: bool = True, **kwargs) -> List[Dict]:
+    """
+    benchmark_build_targets - Compares the per-layer reference YOLOv5 target assignment with the vectorized
+                              YoLoV5DetectionLoss.build_targets (all the detection layers at once), on crowded images
+
+    :param batch_size:          The batch size of the predictions
+    :param resolution:          The input resolution - an int for square inputs or a (height, width)
+    :param targets_per_image:   The number of targets of every image (crowded images have hundreds)
+    :param num_classes:         The number of classes of the predictions
+    :param devices:             The devices to compare on (by default, the CPU and the GPU when available)
+    :param verbose:             Prints the results to screen
+    :param kwargs:              The timing params - num_warmup, min_repetitions, max_repetitions and min_run_time_ms
+    :return: results: list
+        A dict per device and implementation - the latency percentiles (ms per assignment), the speedup over the
+        per-layer assignment and the peak CUDA memory of the assignment (MB, None on CPU)
+    """
+    from super_gradients.training.losses.yolo_v5_loss import YoLoV5DetectionLoss
+    from super_gradients.training.models.detection_models.yolov5 import COCO_DETECTION_80_CLASSES_BBOX_ANCHORS
+
+    height, width = (resolution, resolution) if isinstance(resolution, int) else tuple(resolution)
+    num_targets = batch_size * targets_per_image
+    results = []
+    for device in _get_benchmark_devices(devices):
+        loss = YoLoV5DetectionLoss(anchors=copy.deepcopy(COCO_DETECTION_80_CLASSES_BBOX_ANCHORS)).to(device)
+        predictions = [torch.randn(batch_size, 3, height // stride, width // stride, num_classes + 5, device=device)
+                       for stride in [8, 16, 32]]
+        # IMAGE ID IN THE BATCH, CLASS, BOX x y w h (RELATIVE TO THE IMAGE SIZE)
+        targets = torch.cat([torch.randint(0, batch_size, (num_targets, 1), device=device).float(),
+                             torch.randint(0, num_classes, (num_targets, 1), device=device).float(),
+                             torch.rand(num_targets, 2, device=device),
+                             torch.rand(num_targets, 2, device=device) * 0.5 + 0.01], dim=1)
+        implementations = {'per_layer': lambda: _build_targets_per_layer(loss, predictions, targets),
+                           'vectorized': lambda: loss.build_targets(predictions, targets)}
+        results += _compare_implementations('build_targets', implementations, f'{targets_per_image} targets, '
+                                            f'{height}x{width}', device, batch_size, **kwargs)
+
+    if verbose:
+        logger.info(format_comparison_results(results))
+    return results
+
+
+def _per_image_ssd_loss(loss: nn.Module, predictions: Tuple[torch.Tensor, torch.Tensor],
+                        targets: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    The reference SSDLoss.forward - the default boxes are matched image by image, and the hard negatives are ranked
+    with two full sorts
+    """
+    ploc, plabel = predictions
+    matches = [loss.match_dboxes(targets[targets[:, 0] == i]) for i in range(ploc.shape[0])]
+    batch_target_locations = torch.stack([target_locations for target_locations, _ in matches])
+    batch_target_labels = torch.stack([target_labels for _, target_labels in matches]).type(torch.long)
+
+    mask = batch_target_labels > 0
+    pos_num = mask.sum(dim=1)
+    vec_gd = loss._norm_relative_bbox(batch_target_locations)
+    sl1 = (mask.float() * loss.sl1_loss(ploc, vec_gd).sum(dim=1)).sum(dim=1)
+
+    con = loss.con_loss(plabel, batch_target_labels)
+    con_neg = con.clone()
+    con_neg[mask] = 0
+    _, con_idx = con_neg.sort(dim=1, descending=True)
+    _, con_rank = con_idx.sort(dim=1)
+    neg_num = torch.clamp(3 * pos_num, max=mask.size(1)).unsqueeze(-1)
+    neg_mask = con_rank < neg_num
+    closs = (con * (mask.float() + neg_mask.float())).sum(dim=1)
+
+    total_loss = (2 - loss.alpha) * sl1 + loss.alpha * closs
+    num_mask = (pos_num > 0).float()
+    pos_num = pos_num.float().clamp(min=1e-6)
+    ret = (total_loss * num_mask / pos_num).mean(dim=0)
+    return ret, torch.cat((sl1.mean().unsqueeze(0), closs.mean().unsqueeze(0), ret.unsqueeze(0))).detach()
+
+
+def benchmark_ssd_loss(batch_sizes: Union[int, Sequence[int]] = (1, 8, 32), targets_per_image: int = 10,
+                       num_classes: int = 21, devices: Sequence[str] = None, verbose: bool = True,
+                       **kwargs) -> List[Dict]:
+    """
+    benchmark_ssd_loss - Compares the SSDLoss step (forward + backward) of the reference per-image default box matching
+                         and double sort hard negative mining with the batched matching (match_dboxes_batch) and the
+                         top-k hard negative mining of SSDLoss, with the SSD300 COCO default boxes
+
+    :param batch_sizes:         Batch sizes to compare on
+    :param targets_per_image:   The average number of targets of an image
+    :param num_classes:         The number of classes of the predictions (including the background)
+    :param devices:             The devices to compare on (by default, the CPU and the GPU when available)
+    :param verbose:             Prints the results to screen
+    :param kwargs:              The timing params - num_warmup, min_repetitions, max_repetitions and min_run_time_ms
+    :return: results: list
+        A dict per device, batch size and implementation - the latency percentiles (ms per step), the speedup over the
+        per-image matching, the tensors saved for the backward pass (MB) and the peak CUDA memory of the step (MB, None
+        on CPU)
+    """
+    from super_gradients.training.losses.ssd_loss import SSDLoss
+    from super_gradients.training.utils.ssd_utils import DefaultBoxes
+
+    batch_sizes = [batch_sizes] if isinstance(batch_sizes, int) else batch_sizes
+    results = []
+    for device, batch_size in itertools.product(_get_benchmark_devices(devices), sorted(batch_sizes)):
+        loss = SSDLoss(DefaultBoxes.dboxes300_coco()).to(device)
+        num_dboxes, num_targets = loss.dboxes.shape[2], batch_size * targets_per_image
+        # IMAGE ID IN THE BATCH, LABEL (NOT THE BACKGROUND), BOX x y w h (RELATIVE TO THE IMAGE SIZE)
+        targets = torch.cat([torch.randint(0, batch_size, (num_targets, 1), device=device).float(),
+                             torch.randint(1, num_classes, (num_targets, 1), device=device).float(),
+                             torch.rand(num_targets, 2, device=device) * 0.8 + 0.1,
+                             torch.rand(num_targets, 2, device=device) * 0.5 + 0.05], dim=1)
+        predictions = (torch.randn(batch_size, 4, num_dboxes, device=device, requires_grad=True),
+                       torch.randn(batch_size, num_classes, num_dboxes, device=device, requires_grad=True))
+        implementations = {'per_image': lambda: _per_image_ssd_loss(loss, predictions, targets),
+                           'batched_top_k': lambda: loss(predictions, targets)}
+        results += _compare_implementations('ssd_loss', implementations, f'{targets_per_image} targets/image',
+                                            device, batch_size, predictions, **kwargs)
+
+    if verbose:
+        logger.info(format_comparison_results(results))
+    return results
+
+
+def _one_hot_boundary_targets(detail_module: nn.Module, gt_masks: torch.Tensor) -> torch.Tensor:
+    """
+    The reference DetailAggregateModule.forward - grouped laplacian convolutions of the one-hot encoded masks
+    """
+    from super_gradients.training.utils.segmentation_utils import to_one_hot
+
+    num_classes = detail_module.num_classes
+    laplacian_kernel = torch.tensor([-1, -1, -1, -1, 8, -1, -1, -1, -1], dtype=torch.float32, device=gt_masks.device)\
+        .reshape(1, 1, 3, 3).expand(num_classes, 1, 3, 3)
+    one_hot = to_one_hot(gt_masks, num_classes, detail_module.ignore_label).float()
+    stride_targets = []
+    for stride in (1, 2, 4):
+        targets = torch.nn.functional.conv2d(one_hot, laplacian_kernel, stride=stride, padding=1, groups=num_classes)
+        targets = detail_module._to_one_channel_binary(targets, detail_module.detail_threshold)
+        stride_targets.append(torch.nn.functional.interpolate(targets, gt_masks.shape[1:], mode='nearest'))
+    boundary_targets = torch.nn.functional.conv2d(torch.cat(stride_targets, dim=1), detail_module.fuse_kernel)
+    return detail_module._to_one_channel_binary(boundary_targets, 0.3)
+
+
+def benchmark_boundary_targets(batch_size: int = 2, num_classes: int = 19,
+                               resolution: Union[int, Tuple[int, int]] = (1024, 2048), devices: Sequence[str] = None,
+                               verbose: bool = True, **kwargs) -> List[Dict]:
+    """
+    benchmark_boundary_targets - Compares the STDC boundary targets of the reference one-hot laplacian convolutions with
+                                 the label map path of DetailAggregateModule (get_stride_boundary_targets), by default
+                                 on 19 classes Cityscapes masks at full resolution
+
+    :param batch_size:  The batch size of the masks
+    :param num_classes: The number of classes of the masks (label num_classes is the ignore label)
+    :param resolution:  The resolution of the masks - an int for square masks or a (height, width)
+    :param devices:     The devices to compare on (by default, the CPU and the GPU when available)
+    :param verbose:     Prints the results to screen
+    :param kwargs:      The timing params - num_warmup, min_repetitions, max_repetitions and min_run_time_ms
+    :return: results: list
+        A dict per device and implementation - the latency percentiles (ms per batch of targets), the speedup over the
+        one-hot path and the peak CUDA memory (MB, None on CPU)
+    """
+    from super_gradients.training.losses.stdc_loss import DetailAggregateModule
+
+    height, width = (resolution, resolution) if isinstance(resolution, int) else tuple(resolution)
+    results = []
+    for device in _get_benchmark_devices(devices):
+        detail_module = DetailAggregateModule(num_classes=num_classes, ignore_label=num_classes,
+                                              learnable_fusing_kernel=False).to(device)
+        # LOW RESOLUTION LABELS (AND IGNORED REGIONS), UPSAMPLED - REGIONS WITH BOUNDARIES, AS IN SEGMENTATION MASKS
+        gt_masks = torch.randint(0, num_classes + 1, (batch_size, 1, height // 8 + 1, width // 8 + 1), device=device)
+        gt_masks = torch.nn.functional.interpolate(gt_masks.float(), (height, width), mode='nearest').squeeze(1).long()
+        implementations = {'one_hot': lambda: _one_hot_boundary_targets(detail_module, gt_masks),
+                           'label_map': lambda: detail_module(gt_masks)}
+        results += _compare_implementations('boundary_targets', implementations, f'{num_classes} classes, '
+                                            f'{height}x{width}', device, batch_size, **kwargs)
+
+    if verbose:
+        logger.info(format_comparison_results(results))
+    return results
+
+
+def benchmark_kd_teacher(student: nn.Module, teacher: nn.Module, batch_size: int = 16,
+                         resolution: Union[int, Tuple[int, int]] = 224, teacher_dtype: Optional[str] = None,
+                         teacher_memory_format: Optional[str] = 'channels_last', teacher_stream: bool = True,
+                         devices: Sequence[str] = None, verbose: bool = True, **kwargs) -> List[Dict]:
+    """
+    benchmark_kd_teacher - Compares the knowledge distillation training step (student forward + backward) of the
+                           reference teacher path, where the teacher runs in the student's autograd context, precision
+                           and memory format, with the KDModule teacher in inference mode, and in inference mode with
+                           the teacher_dtype, teacher_memory_format and (CUDA only) teacher_stream arch_params
+
+    :param student:                 The student network
+    :param teacher:                 The teacher network
+    :param batch_size:              The batch size of the training step
+    :param resolution:              The input resolution - an int for square inputs or a (height, width)
+    :param teacher_dtype:           The teacher dtype of the optimized path ('float16' on CUDA and 'bfloat16' on CPU by
+                                    default)
+    :param teacher_memory_format:   The teacher memory format of the optimized path
+    :param teacher_stream:          Run the teacher of the optimized path on a side CUDA stream
+    :param devices:                 The devices to compare on (by default, the CPU and the GPU when available)
+    :param verbose:                 Prints the results to screen
+    :param kwargs:                  The timing params - num_warmup, min_repetitions, max_repetitions and min_run_time_ms
+    :return: results: list
+        A dict per device and implementation - the latency percentiles (ms per step), the speedup over the reference
+        path, the tensors saved for the backward pass (MB) and the peak CUDA memory of the step (MB, None on CPU)
+    """
+    from super_gradients.training.models.kd_modules.kd_module import KDModule
+
+    resolution = (resolution, resolution) if isinstance(resolution, int) else tuple(resolution)
+    results = []
+    for device in _get_benchmark_devices(devices):
+        dtype = teacher_dtype or ('float16' if device == 'cuda' else 'bfloat16')
+        kd_module = KDModule(arch_params=HpmStruct(), student=copy.deepcopy(student), teacher=copy.deepcopy(teacher),
+                             run_teacher_on_eval=True).to(device)
+        # THE SAME STUDENT, WITH A TEACHER PLACED BY THE ARCH PARAMS
+        placed_kd_module = KDModule(arch_params=HpmStruct(teacher_dtype=dtype, teacher_memory_format=teacher_memory_format,
+                                                          teacher_stream=teacher_stream),
+                                    student=kd_module.student, teacher=copy.deepcopy(teacher),
+                                    run_teacher_on_eval=True).to(device)
+        kd_module.train()
+        placed_kd_module.train()
+        inputs = torch.rand(batch_size, 3, *resolution, device=device)
+        implementations = {'reference': lambda: (kd_module.student(inputs), kd_module.teacher(inputs)),
+                           'inference_mode': lambda: kd_module(inputs),
+                           'placed_teacher': lambda: placed_kd_module(inputs)}
+        results += _compare_implementations('kd_teacher', implementations, f'teacher {dtype}', device, batch_size,
+                                            list(kd_module.student.parameters()), **kwargs)
+
+    if verbose:
+        logger.info(format_comparison_results(results))
+    return results
+
+
+def save_benchmark_results(results: List[Dict], output_path: str, fieldnames: Sequence[str] = RESULT_FIELDS):
+    """
+    save_benchmark_results - Writes benchmark results to a .json or a .csv file (by the file extension)
+    """
+    extension = os.path.splitext(output_path)[1].lower()
+    if extension == '.json':
+        with open(output_path, 'w') as f:
+            json.dump(results, f, indent=2)
+    elif extension == '.csv':
+        with open(output_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        raise ValueError(f'Unsupported benchmark results file {output_path}, use a .json or a .csv file')
+
+
+def format_benchmark_results(results: List[Dict], end_to_end: Optional[bool] = None) -> str:
+    """
+    format_benchmark_results - Formats benchmark results as a table, in the style of compute_model_runtime
+    """
+    end_to_end = any('e2e_mean_latency' in result for result in results) if end_to_end is None else end_to_end
+    log_print = f"{'-' * 96}\n" \
+                f"Batch  Resolution  Dtype  Format         Fused    p50      p90      p99   Throughput  Peak mem\n" \
+                f"size                                              (ms)     (ms)     (ms)    (im/s)      (MB)\n" \
+                f"{'-' * 96}\n"
+    for result in results:
+        settings = f"{result.get('batch_size', '-')!s:>5}  {result.get('resolution', '-'):>10}  " \
+                   f"{result.get('dtype', '-'):>5}  {result.get('memory_format', '-'):>13}  {result.get('fused', '-')!s:>5}"
+        if result.get('error'):
+            log_print += f"{settings}  {result['error']}\n"
+            continue
+        peak_memory = result['peak_memory_mb']
+        log_print += f"{settings} {result['p50_latency']:8.2f} {result['p90_latency']:8.2f} " \
+                     f"{result['p99_latency']:8.2f} {result['throughput']:10.0f} " \
+                     f"{'N/A' if peak_memory is None else f'{peak_memory:.0f}':>9}\n"
+        if end_to_end:
+            log_print += f"{'end-to-end':>50} {result['e2e_p50_latency']:8.2f} {result['e2e_p90_latency']:8.2f} " \
+                         f"{result['e2e_p99_latency']:8.2f} {result['e2e_throughput']:10.0f}\n"
+    return log_print
+
+
+def format_activation_checkpointing_results(results: List[Dict]) -> str:
+    """
+    format_activation_checkpointing_results - Formats benchmark_activation_checkpointing results as a table
+    """
+    log_print = f"{'-' * 104}\n" \
+                f"Architecture          Batch  Resolution  Checkpointed     p50      p90   Throughput  Saved act.  Peak mem\n" \
+                f"                       size              stages          (ms)     (ms)    (im/s)       (MB)      (MB)\n" \
+                f"{'-' * 104}\n"
+    for result in results:
+        settings = f"{str(result.get('architecture') or '-'):<20} {result.get('batch_size', '-')!s:>6}  " \
+                   f"{result.get('resolution', '-'):>10}  {result.get('checkpointed_stages', '-')!s:>12}"
+        if result.get('error'):
+            log_print += f"{settings}  {result['error']}\n"
+            continue
+        peak_memory = result['peak_memory_mb']
+        log_print += f"{settings} {result['p50_latency']:8.2f} {result['p90_latency']:8.2f} " \
+                     f"{result['throughput']:10.1f} {result['saved_activations_mb']:11.1f} " \
+                     f"{'N/A' if peak_memory is None else f'{peak_memory:.0f}':>9}\n"
+    return log_print
+
+
+def format_comparison_results(results: List[Dict]) -> str:
+    """
+    format_comparison_results - Formats implementation comparison results (e.g. benchmark_ohem_loss) as a table
+    """
+    log_print = f"{'-' * 122}\n" \
+                f"Benchmark         Implementation   Settings                  Device Batch      p50      p90  Speedup  Saved tensors  Peak mem\n" \
+                f"                                                                    size     (ms)     (ms)                  (MB)      (MB)\n" \
+                f"{'-' * 122}\n"
+    for result in results:
+        settings = f"{result.get('benchmark', '-'):<17} {result.get('implementation', '-'):<16} " \
+                   f"{result.get('settings', '-'):<25} {result.get('device', '-'):<6} {result.get('batch_size', '-')!s:>5}"
+        if result.get('error'):
+            log_print += f"{settings}  {result['error']}\n"
+            continue
+        saved_tensors, peak_memory = result.get('saved_tensors_mb'), result['peak_memory_mb']
+        log_print += f"{settings} {result['p50_latency']:8.2f} {result['p90_latency']:8.2f} {result['speedup']:7.2f}x " \
+                     f"{'N/A' if saved_tensors is None else f'{saved_tensors:.1f}':>14} " \
+                     f"{'N/A' if peak_memory is None else f'{peak_memory:.0f}':>9}\n"
+    return log_print
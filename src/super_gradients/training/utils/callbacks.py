@@ -8,6 +8,7 @@ import numpy as np
 import onnx
 import onnxruntime
 import torch
+import torch.nn.functional as F
 
 from super_gradients.common.abstractions.abstract_logger import get_logger
 from super_gradients.training.utils.utils import get_filename_suffix_by_framework
@@ -29,6 +30,7 @@ except (ImportError, NameError, ModuleNotFoundError) as import_err:
 
 class Phase(Enum):
     PRE_TRAINING = "PRE_TRAINING"
+    TRAIN_BATCH_START = "TRAIN_BATCH_START"
     TRAIN_BATCH_END = "TRAIN_BATCH_END"
     TRAIN_BATCH_STEP = "TRAIN_BATCH_STEP"
     TRAIN_EPOCH_START = "TRAIN_EPOCH_START"
@@ -495,6 +497,23 @@ class KDModelMetricsUpdateCallback(MetricsUpdateCallback):
             context.loss_avg_meter.update(context.loss_log_items, len(context.inputs))
 
 
+class TeacherOutputCacheCallback(PhaseCallback):
+    """
+    Passes the teacher output cache keys of the training batch (the sample_index and augmentation_seed additional
+     batch items of SampleIndexDataset) to the KDModule, so its teacher outputs are read from the cache.
+    """
+    def __init__(self):
+        super(TeacherOutputCacheCallback, self).__init__(Phase.TRAIN_BATCH_START)
+
+    def __call__(self, context: PhaseContext):
+        # A BATCH WITHOUT KEYS RUNS THE TEACHER
+        sample_index = getattr(context, 'sample_index', None)
+        if sample_index is None:
+            return
+        kd_module = context.net.module if hasattr(context.net, 'module') else context.net
+        kd_module.set_teacher_output_keys(sample_index, getattr(context, 'augmentation_seed', None))
+
+
 class PhaseContextTestCallback(PhaseCallback):
     """
     A callback that saves the phase context the for testing.
@@ -564,6 +583,70 @@ class BinarySegmentationVisualizationCallback(PhaseCallback):
             context.sg_logger.add_images(tag=tag, images=batch_imgs[:self.last_img_idx_in_batch], global_step=context.epoch, data_format='NHWC')
 
 
+class MultiScaleResizeCallback(PhaseCallback):
+    """
+    A callback that implements multi-scale data augmentation (https://arxiv.org/pdf/1612.08242.pdf) on the device.
+
+    Unlike MultiScaleCollateFunction, the batch is resized after it was transferred to the device, and the size only
+    depends on (seed, epoch, batch_idx // change_frequency). Therefore all the DDP ranks pick the same size without
+    communicating, and since every side is rounded to a multiple of image_size_steps the model only ever sees a small,
+    fixed set of shapes (which cudnn.benchmark autotunes once).
+    Dense targets (i.e segmentation masks of the same spatial size as the inputs) are resized with nearest
+    interpolation, other targets (i.e normalized detection boxes) are left as is.
+
+    Attributes:
+        target_size: scales will be [0.66 * target_size, 1.5 * target_size]
+        min_image_size: the minimum size to scale down to (in pixels)
+        max_image_size: the maximum size to scale up to (in pixels)
+        image_size_steps: typically, the stride of the net, which defines the possible image size multiplications
+        change_frequency: number of batches between size changes
+        seed: random seed for the size selection, must be identical across the ranks
+    """
+
+    def __init__(self, target_size: int = None, min_image_size: int = None, max_image_size: int = None,
+                 image_size_steps: int = 32, change_frequency: int = 10, seed: int = 0):
+        super(MultiScaleResizeCallback, self).__init__(Phase.TRAIN_BATCH_START)
+        assert target_size is not None or (max_image_size is not None and min_image_size is not None), \
+            'either target_size or min_image_size and max_image_size has to be set'
+        assert target_size is None or max_image_size is None, 'target_size and max_image_size cannot be both defined'
+
+        if target_size is not None:
+            min_image_size = int(0.66 * target_size - ((0.66 * target_size) % image_size_steps) + image_size_steps)
+            max_image_size = int(1.5 * target_size - ((1.5 * target_size) % image_size_steps))
+
+        self.sizes = np.arange(min_image_size, max_image_size + image_size_steps, image_size_steps)
+        self.image_size_steps = image_size_steps
+        self.change_frequency = change_frequency
+        self.seed = seed
+
+    def get_size(self, epoch: int, batch_idx: int) -> int:
+        """
+        get_size - The size of the long side of the images for the given training step
+        """
+        rng = np.random.default_rng([self.seed, epoch, batch_idx // self.change_frequency])
+        return int(self.sizes[rng.integers(len(self.sizes))])
+
+    def __call__(self, context: PhaseContext):
+        images = context.inputs
+        size = self.get_size(context.epoch, context.batch_idx)
+        if size == max(images.shape[2:]):
+            return
+
+        ratio = float(size) / max(images.shape[2:])
+        new_size = tuple(max(self.image_size_steps, int(round(side * ratio / self.image_size_steps)) * self.image_size_steps)
+                         for side in images.shape[2:])
+        target = context.target
+        if isinstance(target, torch.Tensor) and target.dim() in (3, 4) and target.shape[-2:] == images.shape[-2:]:
+            dense_target = target.unsqueeze(1) if target.dim() == 3 else target
+            dense_target = F.interpolate(dense_target.float(), size=new_size, mode='nearest').to(target.dtype)
+            context.update_context(target=dense_target.squeeze(1) if target.dim() == 3 else dense_target)
+
+        context.update_context(inputs=F.interpolate(images, size=new_size, mode='bilinear', align_corners=False))
+
+    def __repr__(self):
+        return f"MultiScaleResizeCallback(sizes={self.sizes.tolist()}, change_frequency={self.change_frequency})"
+
+
 class CallbackHandler:
     """
     Runs all callbacks who's phase attribute equals to the given phase.
@@ -581,6 +664,30 @@ class CallbackHandler:
                 callback(context)
 
 
+class QATFreezeCallback(PhaseCallback):
+    """
+    Quantization-aware training callback that freezes the BatchNorm statistics and the quantization observers of the
+    (QATModule) net from the start of the given epochs. It is applied at the start of every following epoch as well,
+    so the freezing is restored when the training is resumed from a checkpoint.
+
+    Attributes:
+        freeze_bn_epoch: The epoch to freeze the BatchNorm statistics at (None - never)
+        freeze_observers_epoch: The epoch to freeze the quantization ranges at (None - never)
+    """
+
+    def __init__(self, freeze_bn_epoch: int = None, freeze_observers_epoch: int = None):
+        super(QATFreezeCallback, self).__init__(Phase.TRAIN_EPOCH_START)
+        self.freeze_bn_epoch = freeze_bn_epoch
+        self.freeze_observers_epoch = freeze_observers_epoch
+
+    def __call__(self, context: PhaseContext):
+        qat_module = context.net.module
+        if self.freeze_bn_epoch is not None and context.epoch >= self.freeze_bn_epoch:
+            qat_module.freeze_bn_stats()
+        if self.freeze_observers_epoch is not None and context.epoch >= self.freeze_observers_epoch:
+            qat_module.freeze_observers()
+
+
 # DICT FOR LEGACY LR HARD-CODED REGIMES, WILL BE DELETED IN THE FUTURE
 LR_SCHEDULERS_CLS_DICT = {"step": StepLRCallback,
                           "poly": PolyLRCallback,
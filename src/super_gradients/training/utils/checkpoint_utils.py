@@ -172,11 +172,13 @@ def raise_informative_runtime_error(state_dict, checkpoint, exception_msg):
         raise RuntimeError(exception_msg)
 
 
-def load_checkpoint_to_model(ckpt_local_path: str, load_backbone: bool, net: torch.nn.Module, strict: str, load_weights_only: bool, load_ema_as_net: bool = False):
+def load_checkpoint_to_model(ckpt_local_path: str, load_backbone: bool, net: torch.nn.Module, strict: str, load_weights_only: bool, load_ema_as_net: bool = False,
+                             checkpoint: dict = None):
     """
     Loads the state dict in ckpt_local_path to net and returns the checkpoint's state dict.
 
     @param load_ema_as_net: Will load the EMA inside the checkpoint file to the network when set
+    @param checkpoint: the state dict of ckpt_local_path, when it was already read (it is not read again)
     @param ckpt_local_path: local path to the checkpoint file
     @param load_backbone: whether to load the checkpoint as a backbone
     @param net: network to load the checkpoint to
@@ -192,7 +194,8 @@ def load_checkpoint_to_model(ckpt_local_path: str, load_backbone: bool, net: tor
         raise ValueError("No backbone attribute in net - Can't load backbone weights")
 
     # LOAD THE LOCAL CHECKPOINT PATH INTO A state_dict OBJECT
-    checkpoint = read_ckpt_state_dict(ckpt_path=ckpt_local_path)
+    if checkpoint is None:
+        checkpoint = read_ckpt_state_dict(ckpt_path=ckpt_local_path)
 
     if load_ema_as_net:
         if 'ema_net' not in checkpoint.keys():
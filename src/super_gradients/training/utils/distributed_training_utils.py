@@ -1,8 +1,9 @@
 import torch
-from torch.cuda.amp import autocast
 import torch.nn as nn
 import itertools
 
+from super_gradients.training.utils.sg_model_utils import get_autocast
+
 
 def distributed_all_reduce_tensor_average(tensor, n):
     """
@@ -29,11 +30,12 @@ def reduce_results_tuple_for_ddp(validation_results_tuple, device):
 
 
 class MultiGPUModeAutocastWrapper():
-    def __init__(self, func):
+    def __init__(self, func, dtype: torch.dtype = torch.float16):
         self.func = func
+        self.dtype = dtype
 
     def __call__(self, *args, **kwargs):
-        with autocast():
+        with get_autocast('cuda', self.dtype):
             out = self.func(*args, **kwargs)
         return out
 
@@ -0,0 +1,276 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from super_gradients.common.abstractions.abstract_logger import get_logger
+from super_gradients.training.datasets.detection_datasets.detection_dataset import DetectionDataSet
+from super_gradients.training.utils.inference_pipeline import InferencePipeline
+
+logger = get_logger(__name__)
+
+
+class _InferenceRequest:
+    def __init__(self, image: np.ndarray, bucket: Tuple[int, int], future: asyncio.Future):
+        self.image = image
+        self.bucket = bucket
+        self.future = future
+
+
+class DynamicBatchingServer:
+    """
+    DynamicBatchingServer - In-process dynamic batching of single image inference requests
+
+    Concurrent requests (e.g. from the handlers of an HTTP server running on the same event loop) are queued, and a
+    background task gathers them into batches of up to max_batch_size requests, waiting at most max_wait_ms after the
+    first request of a batch. Every batch runs as one forward pass of the InferencePipeline (including its task
+    post-processing) on a worker thread, so the event loop keeps accepting requests meanwhile, and the predictions are
+    scattered back to the awaiting requests.
+
+    Only images of the same shape can share a forward pass. When shape_buckets are given, every image is letterboxed
+    to the bucket that fits it with the least padding and the predictions are mapped back to the original image
+    (detection boxes are shifted and rescaled, segmentation masks are cropped and resized), otherwise the requests
+    are grouped by their exact image shape.
+
+    Usage:
+        async with DynamicBatchingServer(InferencePipeline.from_sg_model(model), max_batch_size=32) as server:
+            prediction = await server.predict(image)
+    """
+
+    def __init__(self, pipeline: InferencePipeline, max_batch_size: int = 32, max_wait_ms: float = 5.,
+                 shape_buckets: Optional[Sequence[Tuple[int, int]]] = None, letterbox_color=(114, 114, 114)):
+        """
+        :param pipeline:            The InferencePipeline that runs the batches (every batch is a single forward
+                                    pass, regardless of the pipeline's batch_size)
+        :param max_batch_size:      Maximal number of requests in a batch
+        :param max_wait_ms:         Maximal time to wait for more requests after the first request of a batch
+        :param shape_buckets:       (height, width) input shapes to letterbox the images to
+        :param letterbox_color:     The padding color of the letterboxed images
+        """
+        self.pipeline = pipeline
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.shape_buckets = [tuple(bucket) for bucket in shape_buckets] if shape_buckets else None
+        self.letterbox_color = letterbox_color
+        self._executor = None
+        self._queue = None
+        self._batching_task = None
+        self.batch_sizes = []
+
+    async def __aenter__(self) -> 'DynamicBatchingServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    @property
+    def is_running(self) -> bool:
+        return self._batching_task is not None and not self._batching_task.done()
+
+    async def start(self):
+        """
+        start - Starts the batching task on the running event loop
+        """
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue()
+        # A SINGLE WORKER - THE FORWARD PASSES ARE SERIALIZED ON THE DEVICE ANYWAY
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._batching_task = asyncio.ensure_future(self._batching_loop())
+
+    async def stop(self):
+        """
+        stop - Serves the requests that are already queued and stops the batching task
+        """
+        if not self.is_running:
+            return
+        await self._queue.put(None)
+        await self._batching_task
+        self._executor.shutdown(wait=True)
+
+    async def predict(self, image: np.ndarray):
+        """
+        predict - Queues a single (H, W, C) image and returns its post-processed prediction once its batch is done
+        """
+        if not self.is_running:
+            raise RuntimeError('The server is not running, call start() (or use it as an async context manager)')
+        future = asyncio.get_event_loop().create_future()
+        await self._queue.put(_InferenceRequest(image, self.get_bucket(image.shape[:2]), future))
+        return await future
+
+    def get_bucket(self, image_shape: Tuple[int, int]) -> Tuple[int, int]:
+        """
+        get_bucket - The shape bucket with the least padding once the image is letterboxed into it (the image shape
+                     itself when there are no shape_buckets)
+        """
+        if self.shape_buckets is None:
+            return tuple(image_shape)
+
+        height, width = image_shape
+        padding_fractions = []
+        for bucket_height, bucket_width in self.shape_buckets:
+            scale = min(bucket_height / height, bucket_width / width)
+            padding_fractions.append(1 - (height * scale) * (width * scale) / (bucket_height * bucket_width))
+        return self.shape_buckets[int(np.argmin(padding_fractions))]
+
+    async def _collect_batch(self) -> Tuple[List[_InferenceRequest], bool]:
+        loop = asyncio.get_event_loop()
+        request = await self._queue.get()
+        if request is None:
+            return [], True
+
+        batch = [request]
+        deadline = loop.time() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0 and self._queue.empty():
+                break
+            try:
+                request = self._queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    async def _batching_loop(self):
+        loop = asyncio.get_event_loop()
+        stop = False
+        while not stop:
+            batch, stop = await self._collect_batch()
+
+            requests_by_bucket: Dict[Tuple[int, int], List[_InferenceRequest]] = {}
+            for request in batch:
+                requests_by_bucket.setdefault(request.bucket, []).append(request)
+
+            for requests in requests_by_bucket.values():
+                self.batch_sizes.append(len(requests))
+                predictions, error = await loop.run_in_executor(self._executor, self._try_run_batch, requests)
+                for request_index, request in enumerate(requests):
+                    if request.future.done():
+                        continue
+                    if error is not None:
+                        request.future.set_exception(error)
+                    else:
+                        request.future.set_result(predictions[request_index])
+
+    def _try_run_batch(self, requests: List[_InferenceRequest]) -> Tuple[Optional[list], Optional[Exception]]:
+        # THE ERROR IS RETURNED RATHER THAN RAISED, SO ITS TRACEBACK DOES NOT HOLD THE FRAME OF THE BATCHING LOOP
+        try:
+            return self._run_batch(requests), None
+        except Exception as e:
+            return None, e
+
+    def _run_batch(self, requests: List[_InferenceRequest]) -> list:
+        if self.shape_buckets is None:
+            return list(self.pipeline.predict_batch([request.image for request in requests]))
+
+        images, letterbox_params = [], []
+        for request in requests:
+            image, ratio, (pad_width, pad_height) = DetectionDataSet.letterbox(
+                request.image, new_shape=request.bucket, color=self.letterbox_color, auto=False,
+                interp=cv2.INTER_LINEAR)
+            images.append(image)
+            letterbox_params.append((ratio[0], int(round(pad_height - 0.1)), int(round(pad_width - 0.1))))
+
+        predictions = self.pipeline.predict_batch(images)
+        return [self._undo_letterbox(prediction, request.image.shape[:2], *params)
+                for prediction, request, params in zip(predictions, requests, letterbox_params)]
+
+    def _undo_letterbox(self, prediction, image_shape: Tuple[int, int], scale: float, top: int, left: int):
+        height, width = image_shape
+        if self.pipeline.task == 'detection' and isinstance(prediction, torch.Tensor):
+            # [x1, y1, x2, y2, ...] BOXES IN PIXELS OF THE LETTERBOXED IMAGE
+            prediction = prediction.clone()
+            prediction[:, [0, 2]] = ((prediction[:, [0, 2]] - left) / scale).clamp(0, width)
+            prediction[:, [1, 3]] = ((prediction[:, [1, 3]] - top) / scale).clamp(0, height)
+        elif self.pipeline.task == 'segmentation':
+            resized_height, resized_width = int(round(height * scale)), int(round(width * scale))
+            prediction = prediction[top:top + resized_height, left:left + resized_width]
+            prediction = F.interpolate(prediction[None, None].float(), size=(height, width), mode='nearest')
+            prediction = prediction[0, 0].to(torch.long)
+        return prediction
+
+
+async def _run_load(server: DynamicBatchingServer, images: Sequence[np.ndarray], num_requests: int,
+                    concurrency: int) -> List[float]:
+    latencies = []
+    request_indices = iter(range(num_requests))
+
+    async def client():
+        # CLOSED LOOP CLIENT - SENDS ITS NEXT REQUEST AS SOON AS THE PREVIOUS ONE RETURNS
+        for request_index in request_indices:
+            start = time.perf_counter()
+            await server.predict(images[request_index % len(images)])
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    return latencies
+
+
+def benchmark_dynamic_batching(pipeline: InferencePipeline, images: Sequence[np.ndarray],
+                               max_batch_sizes: Sequence[int] = (1, 8, 32), max_wait_ms: float = 5.,
+                               num_requests: int = 256, concurrency: int = 64,
+                               shape_buckets: Optional[Sequence[Tuple[int, int]]] = None,
+                               verbose: bool = True) -> Dict[int, Dict[str, float]]:
+    """
+    benchmark_dynamic_batching - Load generator for the DynamicBatchingServer
+
+    For every max_batch_size, concurrency clients send num_requests requests in total (cycling over images) to a fresh
+    server, each client sending its next request as soon as the previous one is answered. max_batch_size=1 is the
+    baseline of one request per forward pass.
+
+    :param pipeline:        The InferencePipeline to serve
+    :param images:          (H, W, C) images to send
+    :param max_batch_sizes: The max_batch_size values to benchmark
+    :param max_wait_ms:     The server's max_wait_ms
+    :param num_requests:    Total number of requests per benchmarked max_batch_size
+    :param concurrency:     Number of concurrent clients
+    :param shape_buckets:   The server's shape_buckets
+    :param verbose:         Prints the results to screen
+    :return: log: dict
+        p50 and p99 latency (ms), throughput (requests/s) and mean batch size for each max_batch_size
+    """
+    logs = {}
+    log_print = f"{'-' * 58}\n" \
+                f"Max batch   p50 latency   p99 latency   Throughput   Mean\n" \
+                f"size        (ms)          (ms)          (req/s)      batch\n" \
+                f"{'-' * 58}\n"
+
+    async def run(max_batch_size: int):
+        async with DynamicBatchingServer(pipeline, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+                                         shape_buckets=shape_buckets) as server:
+            # WARM UP
+            await _run_load(server, images, num_requests=min(num_requests, concurrency), concurrency=concurrency)
+            server.batch_sizes = []
+
+            start = time.perf_counter()
+            latencies = await _run_load(server, images, num_requests=num_requests, concurrency=concurrency)
+            total_time = time.perf_counter() - start
+        return latencies, total_time, float(np.mean(server.batch_sizes))
+
+    for max_batch_size in max_batch_sizes:
+        loop = asyncio.new_event_loop()
+        try:
+            latencies, total_time, mean_batch_size = loop.run_until_complete(run(max_batch_size))
+        finally:
+            loop.close()
+
+        logs[max_batch_size] = {'p50_latency': float(np.percentile(latencies, 50)),
+                                'p99_latency': float(np.percentile(latencies, 99)),
+                                'throughput': num_requests / total_time,
+                                'mean_batch_size': mean_batch_size}
+        log_print += f"{max_batch_size:9d} {logs[max_batch_size]['p50_latency']:13.1f} " \
+                     f"{logs[max_batch_size]['p99_latency']:13.1f} {logs[max_batch_size]['throughput']:12.0f} " \
+                     f"{mean_batch_size:6.1f}\n"
+
+    if verbose:
+        logger.info(log_print)
+    return logs
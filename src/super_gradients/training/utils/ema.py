@@ -75,9 +75,21 @@ class ModelEMA:
         with torch.no_grad():
             decay = self.decay_function(training_percent)
 
-            for ema_v, model_v in zip(self.ema.module.state_dict().values(), model.state_dict().values()):
-                if ema_v.dtype.is_floating_point:
+            # MATCHED BY NAME - A COPIED torch.fx GraphModule DOES NOT KEEP THE REGISTRATION ORDER OF ITS MODULES
+            model_state_dict = model.module.state_dict()
+            reshaped_buffers = {}
+            for name, ema_v in self.ema.module.state_dict().items():
+                model_v = model_state_dict[name]
+                if ema_v.shape != model_v.shape:
+                    # LAZILY SHAPED BUFFERS (E.G. PER-CHANNEL QUANTIZATION RANGES) ARE COPIED ONCE THEIR SHAPE IS SET
+                    reshaped_buffers[name] = model_v.detach()
+                elif ema_v.dtype.is_floating_point:
                     ema_v.copy_(ema_v * decay + (1. - decay) * model_v.detach())
+                else:
+                    # INTEGER BUFFERS (E.G. QUANTIZATION ZERO POINTS AND OBSERVER FLAGS) CAN NOT BE AVERAGED
+                    ema_v.copy_(model_v)
+            if reshaped_buffers:
+                self.ema.module.load_state_dict(reshaped_buffers, strict=False)
 
     def update_attr(self, model):
         """
@@ -4,104 +4,61 @@ from typing import Union
 from collections import OrderedDict
 import torch
 import torch.nn as nn
-from super_gradients.training.utils.utils import Timer
+from super_gradients.training.utils.layer_profiler import LayerProfiler
 
 
 def get_model_stats(model: nn.Module, input_dims: Union[list, tuple], high_verbosity: bool = True, batch_size: int = 1,
-                    device: str = 'cuda',  # noqa: C901
-                    dtypes=None, iterations: int = 100):
+                    device: str = 'cuda', dtypes=None, iterations: int = 100):
     """
     return the model summary as a string
     The block(type) column represents the lines (layers) above
+    The layers are profiled with a LayerProfiler (see layer_profiler.profile_model_layers for the per-layer FLOPs,
+    MACs, activation memory and Chrome trace)
         :param dtypes:          The input types (list of inputs types)
         :param high_verbosity:  prints layer by layer information
     """
-    dtypes = dtypes or [torch.FloatTensor] * len(input_dims)
-
-    def register_hook(module):
-        """
-        add a hook (all the desirable actions) for every layer that is not nn.Sequential/nn.ModuleList
-        """
-
-        def hook(module, input, output):
-
-            class_name = str(module.__class__).split(".")[-1].split("'")[0]
-            module_idx = len(summary)
-
-            m_key = f'{class_name}-{module_idx + 1}'
-            summary[m_key] = OrderedDict()
-
-            # block_name refers to all layers that contains other layers
-            if len(module._modules) != 0:
-                summary[m_key]["block_name"] = class_name
-
-            summary[m_key]["inference_time"] = np.round(timer.stop(), 3)
-            timer.start()
-
-            summary[m_key]["gpu_occupation"] = (round(torch.cuda.memory_allocated(0) / 1024 ** 3, 2), 'GB') if torch.cuda.is_available() else [0]
-            summary[m_key]["gpu_cached_memory"] = (round(torch.cuda.memory_reserved(0) / 1024 ** 3, 2), 'GB') if torch.cuda.is_available() else [0]
-
-            summary[m_key]["input_shape"], summary[m_key]["output_shape"] = get_input_output_shapes(
-                batch_size=batch_size, input_dims=input, output_dims=output)
-
-            params = 0
-            if hasattr(module, "weight") and hasattr(module.weight, "size"):
-                params += torch.prod(torch.LongTensor(list(module.weight.size())))
-                summary[m_key]["trainable"] = module.weight.requires_grad
-            if hasattr(module, "bias") and hasattr(module.bias, "size"):
-                params += torch.prod(torch.LongTensor(list(module.bias.size())))
-            summary[m_key]["nb_params"] = params
-
-        if (not isinstance(module, nn.Sequential) and not isinstance(module, nn.ModuleList)):
-            hooks.append(module.register_forward_hook(hook))
-
     # multiple inputs to the network
     if isinstance(input_dims, tuple):
         input_dims = [input_dims]
 
-    x = [torch.rand(batch_size, *input_dim).type(dtype).to(device=device)
-         for input_dim, dtype in zip(input_dims, dtypes)]
+    with LayerProfiler(model, input_dims, batch_size=batch_size, device=device, dtypes=dtypes) as profiler:
+        # we start counting from the 10th iteration for warmup
+        stats = profiler.profile(iterations=iterations, warmup=10)
 
-    summary_list = []
-    with torch.no_grad():
-        for i in range(iterations + 10):
-            # create properties
-            summary = OrderedDict()
-            hooks = []
+    summary = _convert_layer_stats_to_summary(model=model, stats=stats, batch_size=batch_size)
 
-            # register hook
-            model.apply(register_hook)
+    return _convert_summary_dict_to_string(summary=summary, high_verbosity=high_verbosity, input_dims=input_dims,
+                                           batch_size=batch_size, device=device)
 
-            timer = Timer(device=device)
-            timer.start()
-            # make a forward pass
-            model(*x)
 
-            # remove these hooks
-            for h in hooks:
-                h.remove()
+def _convert_layer_stats_to_summary(model: nn.Module, stats: OrderedDict, batch_size: int) -> OrderedDict:
+    """
+    Converts the LayerProfiler stats to the layer by layer summary of all the layers that are not nn.Sequential/nn.ModuleList
+    """
+    summary = OrderedDict()
+    for name, layer_stats in stats.items():
+        module = model.get_submodule(name)
+        if isinstance(module, (nn.Sequential, nn.ModuleList)):
+            continue
 
-            # we start counting from the 10th iteration for warmup
-            if i >= 10:
-                summary_list.append(summary)
+        m_key = f"{layer_stats['type']}-{len(summary) + 1}"
+        summary[m_key] = OrderedDict()
 
-    summary = _average_inference_time(summary_list=summary_list, summary=summary, divisor=iterations)
+        # block_name refers to all layers that contains other layers
+        if layer_stats['is_block']:
+            summary[m_key]["block_name"] = layer_stats['type']
 
-    return _convert_summary_dict_to_string(summary=summary, high_verbosity=high_verbosity, input_dims=input_dims,
-                                           batch_size=batch_size, device=device)
+        summary[m_key]["inference_time"] = np.round(layer_stats['time'], 3)
 
+        memory_allocated = layer_stats['memory_allocated']
+        summary[m_key]["gpu_occupation"] = (round(memory_allocated / 1024 ** 3, 2), 'GB') if memory_allocated is not None else [0]
+        summary[m_key]["gpu_cached_memory"] = (round(torch.cuda.memory_reserved(0) / 1024 ** 3, 2), 'GB') if torch.cuda.is_available() else [0]
 
-def _average_inference_time(summary_list: list, summary: OrderedDict, divisor: int = 100):
-    inference_time_dict = {}
-    for idx, sum in enumerate(summary_list):
-        for key, _ in sum.items():
-            if idx == 0:
-                inference_time_dict[key] = sum[key]['inference_time']
-            else:
-                inference_time_dict[key] += sum[key]['inference_time']
+        summary[m_key]["input_shape"], summary[m_key]["output_shape"] = layer_stats['input_shape'], layer_stats['output_shape']
 
-    for key, _ in summary.items():
-        summary[key]['inference_time'] = np.round(inference_time_dict[key] / divisor, 3)
+        summary[m_key]["nb_params"] = sum(p.numel() for p in module.parameters(recurse=False))
+        if hasattr(module, "weight") and hasattr(module.weight, "size"):
+            summary[m_key]["trainable"] = module.weight.requires_grad
 
     return summary
 
@@ -0,0 +1,255 @@
+import copy
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+import torch.fx as fx
+from torch import nn
+
+from super_gradients.common.abstractions.abstract_logger import get_logger
+from super_gradients.training.utils.export_utils import ExportableHardswish, ExportableSiLU
+from super_gradients.training.utils.module_utils import NormalizationAdapter
+from super_gradients.training.utils.regularization_utils import DropPath
+from super_gradients.training.utils.utils import Timer
+
+logger = get_logger(__name__)
+
+CONV_BN_TYPES = {nn.Conv1d: nn.BatchNorm1d, nn.Conv2d: nn.BatchNorm2d, nn.Conv3d: nn.BatchNorm3d}
+DROPOUT_TYPES = (nn.Dropout, nn.Dropout2d, nn.Dropout3d, nn.AlphaDropout, DropPath)
+
+# EXPORT-FRIENDLY ACTIVATIONS AND THEIR NATIVE (SINGLE KERNEL) EQUIVALENTS
+NATIVE_ACTIVATIONS = {ExportableSiLU: nn.SiLU, ExportableHardswish: nn.Hardswish}
+
+
+class _LeafNormalizationAdapterTracer(fx.Tracer):
+    """
+    A tracer that keeps NormalizationAdapter as a single call_module node, so it can be folded into its consumer
+    """
+
+    def is_leaf_module(self, m: nn.Module, module_qualified_name: str) -> bool:
+        return isinstance(m, NormalizationAdapter) or super().is_leaf_module(m, module_qualified_name)
+
+
+def _get_parent_and_attribute(model: nn.Module, name: str) -> Tuple[nn.Module, str]:
+    parent_name, _, attribute = name.rpartition('.')
+    return model.get_submodule(parent_name), attribute
+
+
+def _trace_graphs(module: nn.Module, prefix: str = '') -> List[Tuple[str, fx.Graph]]:
+    """
+    Traces module with torch.fx. Modules that can not be traced (e.g. with control flow that depends on the input, as
+    in detection heads) are split - each of their children is traced on its own.
+    :return: (qualified name prefix, graph) for every traced sub-module
+    """
+    try:
+        return [(prefix, _LeafNormalizationAdapterTracer().trace(module))]
+    except Exception:
+        graphs = []
+        for name, child in module.named_children():
+            graphs += _trace_graphs(child, prefix=f'{prefix}{name}.')
+        return graphs
+
+
+def _count_module_calls(graphs: List[Tuple[str, fx.Graph]]) -> Dict[str, int]:
+    calls = {}
+    for prefix, graph in graphs:
+        for node in graph.nodes:
+            if node.op == 'call_module':
+                calls[prefix + node.target] = calls.get(prefix + node.target, 0) + 1
+    return calls
+
+
+def _find_sequential_pairs(model: nn.Module, graphs: List[Tuple[str, fx.Graph]], producer_types: tuple,
+                           consumer_types: tuple) -> List[Tuple[str, str]]:
+    """
+    Finds (producer, consumer) pairs of modules where the consumer is the only user of the producer's output, and both
+    modules are called exactly once in the traced graphs
+    """
+    calls = _count_module_calls(graphs)
+    pairs = []
+    for prefix, graph in graphs:
+        for node in graph.nodes:
+            if node.op != 'call_module' or len(node.users) != 1:
+                continue
+            user = next(iter(node.users))
+            if user.op != 'call_module' or user.args[:1] != (node,):
+                continue
+            producer_name, consumer_name = prefix + node.target, prefix + user.target
+            if calls[producer_name] != 1 or calls[consumer_name] != 1:
+                continue
+            if isinstance(model.get_submodule(producer_name), producer_types) and \
+                    isinstance(model.get_submodule(consumer_name), consumer_types):
+                pairs.append((producer_name, consumer_name))
+    return pairs
+
+
+def _fuse_conv_bn_pairs(model: nn.Module, graphs: List[Tuple[str, fx.Graph]]) -> int:
+    num_fused = 0
+    for conv_name, bn_name in _find_sequential_pairs(model, graphs, tuple(CONV_BN_TYPES.keys()),
+                                                     tuple(CONV_BN_TYPES.values())):
+        conv, bn = model.get_submodule(conv_name), model.get_submodule(bn_name)
+        if CONV_BN_TYPES[type(conv)] != type(bn) or not bn.track_running_stats:
+            continue
+        parent, attribute = _get_parent_and_attribute(model, conv_name)
+        setattr(parent, attribute, torch.nn.utils.fuse_conv_bn_eval(conv, bn))
+        parent, attribute = _get_parent_and_attribute(model, bn_name)
+        setattr(parent, attribute, nn.Identity())
+        num_fused += 1
+    return num_fused
+
+
+def _has_padding(conv: nn.Conv2d) -> bool:
+    if isinstance(conv.padding, str):
+        return conv.padding != 'valid'
+    return any(padding != 0 for padding in conv.padding)
+
+
+def _fold_normalization_adapters(model: nn.Module, graphs: List[Tuple[str, fx.Graph]]) -> int:
+    """
+    Folds (x + additive) * multiplier into the weights of the convolution that consumes it. The folding is exact only
+    without padding (the padded zeros are not normalized), so padded or grouped convolutions are left as they are.
+    """
+    num_folded = 0
+    for adapter_name, conv_name in _find_sequential_pairs(model, graphs, (NormalizationAdapter,), (nn.Conv2d,)):
+        adapter, conv = model.get_submodule(adapter_name), model.get_submodule(conv_name)
+        if conv.groups != 1 or _has_padding(conv):
+            continue
+
+        with torch.no_grad():
+            # conv((x + a) * m) = conv'(x) WITH W' = W * m AND b' = b + sum(W * a * m)
+            multiplier, additive = adapter.multiplier.view(1, -1, 1, 1), adapter.additive.view(1, -1, 1, 1)
+            folded_conv = copy.deepcopy(conv)
+            folded_conv.weight.copy_(conv.weight * multiplier)
+            bias_shift = (conv.weight * multiplier * additive).sum(dim=(1, 2, 3))
+            bias = conv.bias if conv.bias is not None else torch.zeros_like(bias_shift)
+            folded_conv.bias = nn.Parameter(bias + bias_shift)
+
+        parent, attribute = _get_parent_and_attribute(model, conv_name)
+        setattr(parent, attribute, folded_conv)
+        parent, attribute = _get_parent_and_attribute(model, adapter_name)
+        setattr(parent, attribute, nn.Identity())
+        num_folded += 1
+    return num_folded
+
+
+def _reparameterize_repvgg_blocks(model: nn.Module) -> int:
+    num_blocks = 0
+    for module in list(model.modules()):
+        if hasattr(module, 'fuse_block_residual_branches') and getattr(module, 'build_residual_branches', True):
+            module.fuse_block_residual_branches()
+            num_blocks += 1
+    if hasattr(model, 'build_residual_branches'):
+        model.build_residual_branches = False
+    return num_blocks
+
+
+def _replace_modules(model: nn.Module, module_types: tuple, new_module_fn) -> int:
+    names = [name for name, module in model.named_modules() if name and isinstance(module, module_types)]
+    for name in names:
+        parent, attribute = _get_parent_and_attribute(model, name)
+        setattr(parent, attribute, new_module_fn(getattr(parent, attribute)))
+    return len(names)
+
+
+def _flatten_tensors(outputs) -> List[torch.Tensor]:
+    if isinstance(outputs, torch.Tensor):
+        return [outputs]
+    if isinstance(outputs, (list, tuple)):
+        return [tensor for output in outputs for tensor in _flatten_tensors(output)]
+    if isinstance(outputs, dict):
+        return [tensor for output in outputs.values() for tensor in _flatten_tensors(output)]
+    return []
+
+
+def measure_latency(model: nn.Module, inputs: torch.Tensor, device: str, repetitions: int) -> float:
+    """
+    measure_latency - The median latency (ms) of repetitions forward passes of model on inputs, after 3 warm-up passes
+    """
+    timer = Timer(device)
+    latencies = []
+    with torch.no_grad():
+        for _ in range(3):
+            model(inputs)
+        for _ in range(repetitions):
+            timer.start()
+            model(inputs)
+            latencies.append(timer.stop())
+    return float(np.median(latencies))
+
+
+def optimize_for_inference(model: nn.Module, input_size: Optional[Sequence[int]] = None, inplace: bool = False,
+                           verify: bool = True, rtol: float = 1e-3, atol: float = 1e-4,
+                           latency_repetitions: int = 20, verbose: bool = True) -> Tuple[nn.Module, Dict]:
+    """
+    optimize_for_inference - Optimizes a model for inference, keeping its module structure (and classes) intact
+
+    The model is put in eval mode and:
+        - RepVGG blocks are reparameterized into a single convolution
+        - Dropout and DropPath layers are removed (replaced with nn.Identity)
+        - Export-friendly activations (ExportableSiLU, ExportableHardswish) are swapped for the native ones
+        - The model is traced with torch.fx to find every Conv followed by a BatchNorm in the data flow (including
+          ConvBNReLU.seq, the YOLOv5 Conv blocks and pairs that are not adjacent children), and the BatchNorm is folded
+          into the convolution. Sub-modules that can not be traced are split into their traced children
+        - NormalizationAdapter layers are folded into the unpadded convolution that consumes them
+
+    With input_size, the optimized model is verified to be numerically equivalent to the original on a random input,
+    and the median latency before and after the optimization is measured.
+
+    :param model:               The model to optimize
+    :param input_size:          The full input shape, e.g. (1, 3, 224, 224), for the verification and latency report
+    :param inplace:             Optimize the model itself instead of a copy
+    :param verify:              Verify the numerical equivalence (requires input_size)
+    :param rtol:                Relative tolerance of the verification
+    :param atol:                Absolute tolerance of the verification
+    :param latency_repetitions: Number of timed forward passes before and after (0 to skip the latency report)
+    :param verbose:             Prints the report to screen
+    :return: model, report: (nn.Module, dict)
+        The optimized model and the report - the number of each optimization applied, the traced sub-modules and,
+        with input_size, the max absolute difference of the outputs and the latency (ms) before and after
+    """
+    device = next(model.parameters()).device.type if len(list(model.parameters())) else 'cpu'
+    inputs = torch.rand(*input_size, device=device) if input_size is not None else None
+
+    was_training = model.training
+    model.eval()
+    report, expected_outputs = {}, None
+    if inputs is not None and latency_repetitions:
+        report['latency_before'] = measure_latency(model, inputs, device, latency_repetitions)
+    if inputs is not None and verify:
+        with torch.no_grad():
+            expected_outputs = [output.clone() for output in _flatten_tensors(model(inputs))]
+
+    if not inplace:
+        original_model = model
+        model = copy.deepcopy(original_model)
+        original_model.train(was_training)
+
+    report['repvgg_blocks'] = _reparameterize_repvgg_blocks(model)
+    report['dropouts_removed'] = _replace_modules(model, DROPOUT_TYPES, lambda _: nn.Identity())
+    report['activations_swapped'] = _replace_modules(model, tuple(NATIVE_ACTIVATIONS.keys()),
+                                                     lambda activation: NATIVE_ACTIVATIONS[type(activation)]())
+
+    # TRACE A SCRATCH COPY - TRACING RUNS THE PYTHON CODE OF THE FORWARD PASSES, WHICH MAY HAVE SIDE EFFECTS
+    graphs = _trace_graphs(copy.deepcopy(model))
+    report['traced_modules'] = [prefix.rstrip('.') for prefix, _ in graphs]
+    report['conv_bn_fusions'] = _fuse_conv_bn_pairs(model, graphs)
+    report['normalization_adapters_folded'] = _fold_normalization_adapters(model, graphs)
+
+    if expected_outputs is not None:
+        with torch.no_grad():
+            outputs = _flatten_tensors(model(inputs))
+        max_abs_diff = max([(output.float() - expected.float()).abs().max().item()
+                            for output, expected in zip(outputs, expected_outputs)] or [0.])
+        report['max_abs_diff'] = max_abs_diff
+        if len(outputs) != len(expected_outputs) or not all(torch.allclose(output, expected, rtol=rtol, atol=atol)
+                                                            for output, expected in zip(outputs, expected_outputs)):
+            raise RuntimeError(f'The optimized model is not equivalent to the original model (max absolute '
+                               f'difference {max_abs_diff})')
+
+    if inputs is not None and latency_repetitions:
+        report['latency_after'] = measure_latency(model, inputs, device, latency_repetitions)
+        report['speedup'] = report['latency_before'] / report['latency_after']
+
+    if verbose:
+        logger.info('Inference optimization report:\n' + '\n'.join(f'\t{key}: {value}' for key, value in report.items()))
+    return model, report
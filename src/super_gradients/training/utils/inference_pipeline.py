@@ -0,0 +1,209 @@
+import copy
+from typing import Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import torch
+from torch import nn
+
+from super_gradients.common.abstractions.abstract_logger import get_logger
+from super_gradients.training.utils import get_param
+from super_gradients.training.utils.detection_utils import DetectionPostPredictionCallback
+from super_gradients.training.utils.inference_optimization import optimize_for_inference
+from super_gradients.training.utils.utils import tensor_container_to_device
+
+logger = get_logger(__name__)
+
+SUPPORTED_TASKS = ['classification', 'segmentation', 'detection']
+
+
+class InferencePipeline:
+    """
+    InferencePipeline - Batched inference for a trained model
+
+    The network is copied and prepared once (eval mode, optimize_for_inference fusions, half precision and
+    channels_last memory format), so the weights are not converted back and forth on every call. The inputs are moved
+    to the device as they are (e.g. uint8 HWC images) and converted, permuted and normalized there in a single pass,
+    large inputs are split into micro-batches of batch_size, and the task post-processing is applied to the outputs:
+        - detection:        the post_prediction_callback (e.g. YoloV5PostPredictionCallback)
+        - segmentation:     argmax over the classes dimension
+        - classification:   the raw logits
+
+    Usage:
+        pipeline = InferencePipeline.from_sg_model(sg_model, half=True)
+        predictions = pipeline(images)                  # A BATCH (N, H, W, C) ARRAY, A LIST OF IMAGES OR A TENSOR
+        for prediction in pipeline.stream(image_list):  # ONE PREDICTION PER IMAGE, COMPUTED IN BATCHES
+            ...
+    """
+
+    def __init__(self, model: nn.Module, device: str = None, mean: Sequence[float] = None,
+                 std: Sequence[float] = None, input_scale: float = 1. / 255, task: str = 'classification',
+                 post_prediction_callback: DetectionPostPredictionCallback = None, batch_size: int = 32,
+                 half: bool = False, bf16: bool = False, channels_last: bool = False, fuse_model: bool = True,
+                 move_outputs_to_cpu: bool = True):
+        """
+        :param model:                       The network (it is copied, the original module is left untouched)
+        :param device:                      The device to run on (by default, the device of the model's parameters)
+        :param mean:                        Per channel normalization mean (None for no normalization)
+        :param std:                         Per channel normalization std (None for no normalization)
+        :param input_scale:                 Scale applied to integer (e.g. uint8) inputs before the normalization
+        :param task:                        One of 'classification', 'segmentation' or 'detection'
+        :param post_prediction_callback:    Detection post-processing (e.g. NMS), applied to the network's output
+        :param batch_size:                  Micro-batch size, larger inputs are split into several forward passes
+        :param half:                        Run in half precision (CUDA only)
+        :param bf16:                        Run in bfloat16 precision (CUDA and CPU)
+        :param channels_last:               Keep the weights and inputs in channels_last memory format
+        :param fuse_model:                  Optimize the network with optimize_for_inference (fuse the RepVGG
+                                            residual branches and the Conv-BatchNorm pairs, remove dropout...)
+        :param move_outputs_to_cpu:         Move the predictions to the CPU
+        """
+        if task not in SUPPORTED_TASKS:
+            raise ValueError(f'Unsupported task {task}, task should be one of {SUPPORTED_TASKS}')
+        if half and bf16:
+            raise ValueError('Only one of half and bf16 can be set')
+        if task == 'detection' and post_prediction_callback is None:
+            logger.warning('InferencePipeline: no post_prediction_callback was given for detection, '
+                           'the raw network outputs will be returned')
+
+        model = model.module if isinstance(model, (nn.DataParallel, nn.parallel.DistributedDataParallel)) else model
+        if device is None:
+            device = next(model.parameters()).device.type
+
+        # HALF IS NOT SUPPORTED ON CPU
+        if half and device == 'cpu':
+            half = False
+            logger.warning('NOTICE: half is set to True but is not supported on CPU ==> using full precision')
+
+        self.device = device
+        self.task = task
+        self.post_prediction_callback = post_prediction_callback
+        self.batch_size = batch_size
+        self.half = half
+        self.bf16 = bf16
+        self.channels_last = channels_last
+        self.input_scale = input_scale
+        self.move_outputs_to_cpu = move_outputs_to_cpu
+        self.dtype = torch.float16 if half else torch.bfloat16 if bf16 else torch.float32
+        self.memory_format = torch.channels_last if channels_last else torch.contiguous_format
+
+        self.mean = self._to_channel_tensor(mean)
+        self.std = self._to_channel_tensor(std)
+        self.net = self._prepare_model(model, fuse_model)
+
+    @classmethod
+    def from_sg_model(cls, sg_model, **kwargs) -> 'InferencePipeline':
+        """
+        from_sg_model - Builds the pipeline from an SgModel, taking the device, the post_prediction_callback and the
+                        normalization of its dataset params (img_mean and img_std, or the library dataset's mean and
+                        std) unless they are passed explicitly in kwargs.
+        """
+        dataset_params = getattr(sg_model, 'dataset_params', None)
+        lib_dataset_params = getattr(getattr(sg_model, 'dataset_interface', None), 'lib_dataset_params', None) or {}
+
+        kwargs.setdefault('device', sg_model.device)
+        kwargs.setdefault('mean', get_param(dataset_params, 'img_mean', default_val=lib_dataset_params.get('mean')))
+        kwargs.setdefault('std', get_param(dataset_params, 'img_std', default_val=lib_dataset_params.get('std')))
+        if sg_model.post_prediction_callback is not None:
+            kwargs.setdefault('post_prediction_callback', sg_model.post_prediction_callback)
+            kwargs.setdefault('task', 'detection')
+        return cls(sg_model.net, **kwargs)
+
+    def _to_channel_tensor(self, values: Optional[Sequence[float]]) -> Optional[torch.Tensor]:
+        if values is None:
+            return None
+        return torch.as_tensor(values, dtype=torch.float32, device=self.device).view(1, -1, 1, 1)
+
+    def _prepare_model(self, model: nn.Module, fuse_model: bool) -> nn.Module:
+        net = copy.deepcopy(model).to(self.device).eval()
+        if fuse_model:
+            net, _ = optimize_for_inference(net, inplace=True, verbose=False)
+        return net.to(dtype=self.dtype, memory_format=self.memory_format)
+
+    def preprocess(self, inputs: Union[np.ndarray, torch.Tensor, List[np.ndarray]]) -> torch.Tensor:
+        """
+        preprocess - Moves a batch to the device and turns it into a normalized network input
+
+        :param inputs:  A numpy (N, H, W, C) array or a list of (H, W, C) images, or a (N, C, H, W) tensor. A single
+                        image (without the batch dimension) is also accepted. Integer inputs are scaled by
+                        input_scale.
+        :return:        A (N, C, H, W) tensor in the pipeline's dtype and memory format
+        """
+        channels_first = isinstance(inputs, torch.Tensor)
+        if isinstance(inputs, (list, tuple)):
+            inputs = np.stack(inputs)
+        inputs = torch.as_tensor(inputs)
+        if inputs.dim() == 3:
+            inputs = inputs.unsqueeze(0)
+
+        # THE CONVERSION IS DONE ON THE DEVICE, SO uint8 IMAGES ARE UPLOADED AS 1 BYTE PER PIXEL
+        inputs = inputs.to(self.device, non_blocking=True)
+        if not channels_first:
+            inputs = inputs.permute(0, 3, 1, 2)
+        is_integer = not inputs.is_floating_point()
+        inputs = inputs.float()
+        if is_integer:
+            inputs = inputs * self.input_scale
+        if self.mean is not None:
+            inputs = inputs - self.mean
+        if self.std is not None:
+            inputs = inputs / self.std
+        return inputs.to(dtype=self.dtype, memory_format=self.memory_format)
+
+    def postprocess(self, outputs):
+        """
+        postprocess - Applies the task post-processing to the network outputs of a batch
+        """
+        if self.post_prediction_callback is not None:
+            outputs = self.post_prediction_callback(outputs, device=self.device)
+        elif self.task == 'segmentation':
+            # SEGMENTATION NETWORKS WITH AUXILIARY HEADS RETURN THE MAIN OUTPUT FIRST
+            outputs = outputs[0] if isinstance(outputs, (tuple, list)) else outputs
+            outputs = outputs.argmax(1)
+
+        if self.move_outputs_to_cpu:
+            outputs = tensor_container_to_device(outputs, 'cpu', non_blocking=False)
+        return outputs
+
+    def predict_batch(self, inputs: Union[np.ndarray, torch.Tensor, List[np.ndarray]]):
+        """
+        predict_batch - Runs a single forward pass (no micro-batching) and returns the post-processed predictions
+        """
+        with torch.no_grad():
+            return self.postprocess(self.net(self.preprocess(inputs)))
+
+    def __call__(self, inputs: Union[np.ndarray, torch.Tensor, List[np.ndarray]]):
+        """
+        :param inputs:  A batch of images of the same size (see preprocess)
+        :return:        The predictions of the batch - a tensor (classification and segmentation) or a list with one
+                        item per image (detection post-processing)
+        """
+        if (isinstance(inputs, (np.ndarray, torch.Tensor)) and inputs.ndim == 3) or len(inputs) <= self.batch_size:
+            return self.predict_batch(inputs)
+
+        predictions = [self.predict_batch(inputs[start:start + self.batch_size])
+                       for start in range(0, len(inputs), self.batch_size)]
+        if isinstance(predictions[0], torch.Tensor):
+            return torch.cat(predictions)
+        return [prediction for batch_predictions in predictions for prediction in batch_predictions]
+
+    def stream(self, images: Iterable[Union[np.ndarray, torch.Tensor]]) -> Iterator:
+        """
+        stream - Lazily predicts an iterable of single images (e.g. a generator that reads them from disk), yielding
+                 one prediction per image in the input order.
+                 The images are gathered into batches of batch_size; a batch is also closed early when the image size
+                 changes, so images of different sizes can be mixed.
+        """
+        batch = []
+        for image in images:
+            if batch and image.shape != batch[0].shape:
+                yield from self._predict_images(batch)
+                batch = []
+            batch.append(image)
+            if len(batch) == self.batch_size:
+                yield from self._predict_images(batch)
+                batch = []
+        if batch:
+            yield from self._predict_images(batch)
+
+    def _predict_images(self, images: List[Union[np.ndarray, torch.Tensor]]):
+        inputs = torch.stack(images) if isinstance(images[0], torch.Tensor) else np.stack(images)
+        return iter(self.predict_batch(inputs))
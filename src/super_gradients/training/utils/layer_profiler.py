@@ -0,0 +1,325 @@
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+CONV_TYPES = (nn.Conv1d, nn.Conv2d, nn.Conv3d)
+CONV_TRANSPOSE_TYPES = (nn.ConvTranspose1d, nn.ConvTranspose2d, nn.ConvTranspose3d)
+NORMALIZATION_TYPES = (nn.BatchNorm1d, nn.BatchNorm2d, nn.BatchNorm3d, nn.GroupNorm, nn.LayerNorm,
+                       nn.InstanceNorm1d, nn.InstanceNorm2d, nn.InstanceNorm3d)
+ELEMENTWISE_TYPES = (nn.ReLU, nn.ReLU6, nn.LeakyReLU, nn.PReLU, nn.ELU, nn.SiLU, nn.GELU, nn.Sigmoid, nn.Tanh,
+                     nn.Hardswish, nn.Hardsigmoid, nn.Hardtanh, nn.Mish, nn.Upsample, nn.Dropout)
+POOLING_TYPES = (nn.MaxPool1d, nn.MaxPool2d, nn.MaxPool3d, nn.AvgPool1d, nn.AvgPool2d, nn.AvgPool3d)
+ADAPTIVE_POOLING_TYPES = (nn.AdaptiveAvgPool1d, nn.AdaptiveAvgPool2d, nn.AdaptiveAvgPool3d, nn.AdaptiveMaxPool1d,
+                          nn.AdaptiveMaxPool2d, nn.AdaptiveMaxPool3d)
+
+
+def _tensors(obj) -> List[torch.Tensor]:
+    if isinstance(obj, torch.Tensor):
+        return [obj]
+    if isinstance(obj, (list, tuple)):
+        return [tensor for item in obj for tensor in _tensors(item)]
+    if isinstance(obj, dict):
+        return [tensor for item in obj.values() for tensor in _tensors(item)]
+    return []
+
+
+def _shapes(obj) -> Union[List[int], List[List[int]]]:
+    shapes = [list(tensor.shape) for tensor in _tensors(obj)]
+    return shapes[0] if len(shapes) == 1 else shapes
+
+
+def count_module_macs_and_flops(module: nn.Module, inputs: tuple, output) -> Tuple[int, int]:
+    """
+    count_module_macs_and_flops - Estimates the multiply-accumulates and the floating point operations of a single
+                                  forward call of a leaf module. Convolutions and linear layers count 2 FLOPs per MAC
+                                  (plus the bias), normalization, activation and pooling layers count FLOPs only, and
+                                  other modules (as well as functional ops inside a module's forward) count 0.
+    """
+    outputs = _tensors(output)
+    if not outputs:
+        return 0, 0
+    output_numel = outputs[0].numel()
+    input_numel = _tensors(inputs)[0].numel() if _tensors(inputs) else 0
+    has_bias = getattr(module, 'bias', None) is not None
+
+    if isinstance(module, CONV_TYPES):
+        macs = output_numel * (module.in_channels // module.groups) * int(np.prod(module.kernel_size))
+        return macs, 2 * macs + (output_numel if has_bias else 0)
+    if isinstance(module, CONV_TRANSPOSE_TYPES):
+        macs = input_numel * (module.out_channels // module.groups) * int(np.prod(module.kernel_size))
+        return macs, 2 * macs + (output_numel if has_bias else 0)
+    if isinstance(module, nn.Linear):
+        macs = output_numel * module.in_features
+        return macs, 2 * macs + (output_numel if has_bias else 0)
+    if isinstance(module, NORMALIZATION_TYPES):
+        return 0, 2 * output_numel
+    if isinstance(module, ELEMENTWISE_TYPES):
+        return 0, output_numel
+    if isinstance(module, POOLING_TYPES):
+        kernel_size = module.kernel_size if isinstance(module.kernel_size, (tuple, list)) else [module.kernel_size]
+        return 0, output_numel * int(np.prod(kernel_size))
+    if isinstance(module, ADAPTIVE_POOLING_TYPES):
+        return 0, input_numel
+    return 0, 0
+
+
+class LayerProfiler:
+    """
+    LayerProfiler - Per-layer (and per-block) profiling of a model's forward pass
+
+    The forward pre/post hooks are registered once on every module (and removed by remove_hooks, or when leaving the
+    profiler's context). A first forward pass records the static statistics of every module - input and output
+    shapes, parameters, MACs and FLOPs (summed over the leaf layers for blocks), activation memory of the outputs and
+    the allocated CUDA memory after the module. The timed passes then only record CUDA events (or read the CPU clock)
+    around each module, so the measured time is the module itself, and the events are read once per iteration, after
+    a single synchronization.
+    export_chrome_trace runs the model under torch.profiler with a record_function range per module, so the kernels in
+    the trace are grouped by the module that launched them.
+
+    Usage:
+        with LayerProfiler(model, input_dims=(3, 224, 224), device='cuda') as profiler:
+            profiler.profile(iterations=100)
+            print(profiler.get_table())
+            profiler.export_chrome_trace('trace.json')
+    """
+
+    def __init__(self, model: nn.Module, input_dims: Union[list, tuple], batch_size: int = 1, device: str = 'cuda',
+                 dtypes=None):
+        """
+        :param model:       The model to profile
+        :param input_dims:  The input dims (without the batch dimension), or a list of them for multiple inputs
+        :param batch_size:  Batch size of the profiled inputs
+        :param device:      'cpu' or 'cuda'
+        :param dtypes:      The input types (list of inputs types), torch.FloatTensor by default
+        """
+        # MULTIPLE INPUTS TO THE NETWORK
+        input_dims = [input_dims] if isinstance(input_dims, tuple) else input_dims
+        dtypes = dtypes or [torch.FloatTensor] * len(input_dims)
+
+        self.model = model
+        self.device = device
+        self.batch_size = batch_size
+        self.inputs = [torch.rand(batch_size, *input_dim).type(dtype).to(device=device)
+                       for input_dim, dtype in zip(input_dims, dtypes)]
+
+        self.stats: Dict[str, OrderedDict] = OrderedDict()
+        self._mode = None
+        self._start_times: Dict[str, List] = {}
+        self._iteration_times: Dict[str, float] = {}
+        self._events: Dict[str, List[Tuple[torch.cuda.Event, torch.cuda.Event]]] = {}
+        self._call_counts: Dict[str, int] = {}
+        self._record_functions: List = []
+        self._hooks = []
+        for name, module in model.named_modules():
+            self._hooks.append(module.register_forward_pre_hook(self._pre_hook(name)))
+            self._hooks.append(module.register_forward_hook(self._post_hook(name)))
+
+    def __enter__(self) -> 'LayerProfiler':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.remove_hooks()
+
+    def remove_hooks(self):
+        for hook in self._hooks:
+            hook.remove()
+        self._hooks = []
+
+    def _pre_hook(self, name: str):
+        def hook(module, inputs):
+            if self._mode == 'trace':
+                record_function = torch.autograd.profiler.record_function(f'{name or "model"} ({type(module).__name__})')
+                record_function.__enter__()
+                self._record_functions.append(record_function)
+            elif self._mode == 'time':
+                call_index = self._call_counts.get(name, 0)
+                if self.device == 'cuda':
+                    events = self._events.setdefault(name, [])
+                    if call_index == len(events):
+                        events.append((torch.cuda.Event(enable_timing=True), torch.cuda.Event(enable_timing=True)))
+                    events[call_index][0].record()
+                else:
+                    self._start_times.setdefault(name, []).append(time.perf_counter())
+        return hook
+
+    def _post_hook(self, name: str):
+        def hook(module, inputs, output):
+            if self._mode == 'trace':
+                self._record_functions.pop().__exit__(None, None, None)
+            elif self._mode == 'time':
+                call_index = self._call_counts.get(name, 0)
+                self._call_counts[name] = call_index + 1
+                if self.device == 'cuda':
+                    self._events[name][call_index][1].record()
+                else:
+                    elapsed = (time.perf_counter() - self._start_times[name].pop()) * 1000
+                    self._iteration_times[name] = self._iteration_times.get(name, 0.) + elapsed
+            elif self._mode == 'stats':
+                self._record_stats(name, module, inputs, output)
+        return hook
+
+    def _record_stats(self, name: str, module: nn.Module, inputs: tuple, output):
+        if name in self.stats:
+            # A MODULE THAT IS CALLED SEVERAL TIMES IN A FORWARD PASS (E.G. A SHARED ACTIVATION)
+            module_stats = self.stats[name]
+            module_stats['calls'] += 1
+        else:
+            module_stats = OrderedDict(type=type(module).__name__, is_block=len(module._modules) != 0,
+                                       depth=0 if name == '' else name.count('.') + 1,
+                                       input_shape=_shapes(inputs), output_shape=_shapes(output),
+                                       params=sum(p.numel() for p in module.parameters()),
+                                       trainable_params=sum(p.numel() for p in module.parameters() if p.requires_grad),
+                                       calls=1, macs=0, flops=0, activation_memory=0, memory_allocated=None, time=None)
+            self.stats[name] = module_stats
+
+        if not module_stats['is_block']:
+            macs, flops = count_module_macs_and_flops(module, inputs, output)
+            module_stats['macs'] += macs
+            module_stats['flops'] += flops
+        module_stats['activation_memory'] += sum(t.numel() * t.element_size() for t in _tensors(output))
+        if self.device == 'cuda':
+            module_stats['memory_allocated'] = torch.cuda.memory_allocated()
+
+    def _aggregate_blocks(self):
+        # A BLOCK'S MACS AND FLOPS ARE THE SUM OF ITS LEAF LAYERS'
+        leaves = [(name, stats) for name, stats in self.stats.items() if not stats['is_block']]
+        for name, stats in self.stats.items():
+            if stats['is_block']:
+                descendants = [leaf_stats for leaf_name, leaf_stats in leaves
+                               if name == '' or leaf_name.startswith(name + '.')]
+                stats['macs'] = sum(leaf_stats['macs'] for leaf_stats in descendants)
+                stats['flops'] = sum(leaf_stats['flops'] for leaf_stats in descendants)
+
+    def _forward(self):
+        with torch.no_grad():
+            self.model(*self.inputs)
+        if self.device == 'cuda':
+            torch.cuda.synchronize()
+
+    def collect_stats(self) -> Dict[str, OrderedDict]:
+        """
+        collect_stats - Runs a single forward pass that records the static statistics of every module
+        """
+        self.stats = OrderedDict()
+        self._mode = 'stats'
+        try:
+            self._forward()
+        finally:
+            self._mode = None
+        self._aggregate_blocks()
+        return self.stats
+
+    def profile(self, iterations: int = 100, warmup: int = 10) -> Dict[str, OrderedDict]:
+        """
+        profile - Collects the static statistics and measures the mean time of every module
+
+        :param iterations:  Number of timed forward passes
+        :param warmup:      Number of forward passes before the timing starts
+        :return:            The stats, an OrderedDict by module name ('' is the whole model) in the order in which the
+                            modules finished their first forward call
+        """
+        was_training = self.model.training
+        self.model.eval()
+        self.collect_stats()
+
+        total_times = {name: 0. for name in self.stats}
+        try:
+            for iteration in range(warmup + iterations):
+                self._mode = 'time'
+                self._call_counts, self._iteration_times = {}, {}
+                self._forward()
+                self._mode = None
+                if iteration < warmup:
+                    continue
+                for name in self._call_counts:
+                    total_times[name] += self._read_iteration_time(name)
+        finally:
+            self._mode = None
+            self.model.train(was_training)
+
+        for name, stats in self.stats.items():
+            stats['time'] = total_times[name] / iterations if iterations else None
+        return self.stats
+
+    def _read_iteration_time(self, name: str) -> float:
+        if self.device != 'cuda':
+            return self._iteration_times[name]
+        return sum(start.elapsed_time(end) for start, end in self._events[name][:self._call_counts[name]])
+
+    def export_chrome_trace(self, path: str, iterations: int = 5):
+        """
+        export_chrome_trace - Profiles a few forward passes with torch.profiler and writes a Chrome trace (viewable in
+                              chrome://tracing or Perfetto), with a range per module around the kernels it launched
+        """
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if self.device == 'cuda':
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+
+        was_training = self.model.training
+        self.model.eval()
+        try:
+            with torch.profiler.profile(activities=activities, record_shapes=True) as profiler:
+                self._mode = 'trace'
+                for _ in range(iterations):
+                    self._forward()
+        finally:
+            self._mode = None
+            self._record_functions = []
+            self.model.train(was_training)
+        profiler.export_chrome_trace(path)
+
+    def get_table(self, max_depth: Optional[int] = None, sort_by: Optional[str] = None) -> str:
+        """
+        get_table - The profiling results as a table
+
+        :param max_depth:   Show only the modules up to this depth (0 is the whole model, 1 its direct children...)
+        :param sort_by:     A stats key to sort the rows by (descending), e.g. 'time' or 'flops'. By default the rows
+                            are in forward order
+        """
+        rows = [(name, stats) for name, stats in self.stats.items() if max_depth is None or stats['depth'] <= max_depth]
+        if sort_by is not None:
+            rows = sorted(rows, key=lambda row: row[1][sort_by] or 0, reverse=True)
+
+        total_time = self.stats[''].get('time') if '' in self.stats else None
+        table = f"{'-' * 160}\n" \
+                f"{'Module':<50} {'Type':<20} {'Output Shape':>24} {'Params':>12} {'MACs':>14} {'FLOPs':>14} " \
+                f"{'Act. mem (MB)':>14} {'Time (ms)':>10} {'Time %':>7}\n" \
+                f"{'=' * 160}\n"
+        for name, stats in rows:
+            indented_name = ('  ' * stats['depth'] + (name.split('.')[-1] or 'model'))[:50]
+            time_ms = f"{stats['time']:.3f}" if stats['time'] is not None else 'N/A'
+            time_percent = f"{100 * stats['time'] / total_time:.1f}" if stats['time'] is not None and total_time else 'N/A'
+            table += f"{indented_name:<50} {stats['type'][:20]:<20} {str(stats['output_shape'])[:24]:>24} " \
+                     f"{stats['params']:>12,} {stats['macs']:>14,} {stats['flops']:>14,} " \
+                     f"{stats['activation_memory'] / 2 ** 20:>14.2f} {time_ms:>10} {time_percent:>7}\n"
+
+        if '' in self.stats:
+            model_stats = self.stats['']
+            table += f"{'=' * 160}\n" \
+                     f"Total params: {model_stats['params']:,}\n" \
+                     f"Trainable params: {model_stats['trainable_params']:,}\n" \
+                     f"Total MACs: {model_stats['macs']:,}\n" \
+                     f"Total FLOPs: {model_stats['flops']:,}\n" \
+                     f"{'-' * 160}\n"
+        return table
+
+
+def profile_model_layers(model: nn.Module, input_dims: Union[list, tuple], batch_size: int = 1, device: str = 'cuda',
+                         dtypes=None, iterations: int = 100, warmup: int = 10, trace_path: str = None,
+                         max_depth: Optional[int] = None) -> Tuple[Dict[str, OrderedDict], str]:
+    """
+    profile_model_layers - Profiles the model's layers with a LayerProfiler and removes its hooks
+
+    :param trace_path:  Also export a Chrome trace to this path
+    :param max_depth:   The max_depth of the table
+    :return:            The per-module stats and their table
+    """
+    with LayerProfiler(model, input_dims, batch_size=batch_size, device=device, dtypes=dtypes) as profiler:
+        stats = profiler.profile(iterations=iterations, warmup=warmup)
+        if trace_path is not None:
+            profiler.export_chrome_trace(trace_path)
+        return stats, profiler.get_table(max_depth=max_depth)
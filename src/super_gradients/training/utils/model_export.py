@@ -0,0 +1,357 @@
+import copy
+import inspect
+import os
+import tempfile
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import onnx
+import onnxruntime
+import torch
+import torchvision
+from torch import nn
+
+from super_gradients.common.abstractions.abstract_logger import get_logger
+from super_gradients.training.models.detection_models.ssd import SSD
+from super_gradients.training.models.detection_models.yolov5 import YoLoV5Base
+from super_gradients.training.models.sg_module import SgModule
+from super_gradients.training.utils.benchmark_utils import latency_stats, time_repetitions
+from super_gradients.training.utils.detection_utils import convert_xywh_bbox_to_xyxy
+from super_gradients.training.utils.ssd_utils import DefaultBoxes
+
+logger = get_logger(__name__)
+
+EXPORT_FORMATS = ['onnx', 'torchscript']
+RUNTIMES = ['pytorch', 'onnxruntime', 'torchscript']
+
+# NEWER TORCH VERSIONS DEFAULT TO THE torch.export BASED ONNX EXPORTER, THE TRACING EXPORTER IS USED FOR ALL VERSIONS
+_ONNX_EXPORT_KWARGS = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+
+
+class YoloV5ExportDecoder(nn.Module):
+    """
+    Converts the YOLOv5 (eval mode) predictions to xyxy boxes (in pixels) and per-class confidences
+    """
+
+    @staticmethod
+    def forward(predictions):
+        predictions = predictions[0]
+        return convert_xywh_bbox_to_xyxy(predictions[..., :4]), predictions[..., 5:] * predictions[..., 4:5]
+
+
+class SSDExportDecoder(nn.Module):
+    """
+    Converts the SSD predictions (relative to the default boxes) to xyxy boxes (in pixels) and per-class confidences,
+    without the background class
+    """
+
+    def __init__(self, dboxes: DefaultBoxes):
+        super(SSDExportDecoder, self).__init__()
+        self.register_buffer('dboxes_xywh', dboxes('xywh').unsqueeze(0).float())
+        self.scale_xy = dboxes.scale_xy
+        self.scale_wh = dboxes.scale_wh
+        self.img_size = dboxes.fig_size
+
+    def forward(self, predictions):
+        locations, confidences = predictions[0].permute(0, 2, 1), predictions[1].permute(0, 2, 1)
+        xy = locations[..., :2] * self.scale_xy * self.dboxes_xywh[..., 2:] + self.dboxes_xywh[..., :2]
+        wh = (locations[..., 2:] * self.scale_wh).exp() * self.dboxes_xywh[..., 2:]
+        boxes = convert_xywh_bbox_to_xyxy(torch.cat([xy, wh], dim=-1)) * self.img_size
+        return boxes, confidences.softmax(dim=-1)[..., 1:]
+
+
+class ExportableDetectionNMS(nn.Module):
+    """
+    Export-friendly batched NMS (a single NonMaxSuppression op in ONNX), with a dynamic batch size.
+    The best class of each box is kept, and the boxes of different images and classes never suppress each other.
+
+        :param conf:            Confidence threshold
+        :param iou:             IoU threshold
+        :param class_offset:    Added to the class indices (1 for SSD, which keeps the class indices of its labels)
+        :return: (N, 7) detections - image index, x1, y1, x2, y2, confidence, class
+    """
+
+    def __init__(self, conf: float = 0.25, iou: float = 0.45, class_offset: int = 0):
+        super(ExportableDetectionNMS, self).__init__()
+        self.conf = conf
+        self.iou = iou
+        self.class_offset = class_offset
+
+    def forward(self, boxes, scores):
+        confidences, classes = scores.max(dim=-1)
+        image_indices = torch.arange(boxes.shape[0], device=boxes.device).view(-1, 1).expand_as(confidences)
+        boxes, confidences, classes, image_indices = \
+            boxes.reshape(-1, 4), confidences.reshape(-1), classes.reshape(-1), image_indices.reshape(-1)
+
+        candidates = confidences > self.conf
+        boxes, confidences, classes, image_indices = \
+            boxes[candidates], confidences[candidates], classes[candidates], image_indices[candidates]
+
+        groups = image_indices * scores.shape[-1] + classes
+        keep = torchvision.ops.batched_nms(boxes, confidences, groups, self.iou)
+        return torch.cat([image_indices[keep, None].float(), boxes[keep], confidences[keep, None],
+                          (classes[keep, None] + self.class_offset).float()], dim=1)
+
+
+class DetectionModelWithNMS(nn.Module):
+    """
+    A detection model followed by its decoder and the exportable NMS (without the NMS it outputs the decoded boxes and
+    confidences)
+    """
+
+    def __init__(self, model: nn.Module, decoder: nn.Module, nms: Optional[ExportableDetectionNMS]):
+        super(DetectionModelWithNMS, self).__init__()
+        self.model = model
+        self.decoder = decoder
+        self.nms = nms
+
+    def forward(self, x):
+        predictions = self.decoder(self.model(x))
+        return self.nms(*predictions) if self.nms is not None else predictions
+
+
+def prepare_model_for_export(model: nn.Module, input_size: Sequence[int], embed_nms: bool = False,
+                             nms_conf: float = 0.25, nms_iou: float = 0.45,
+                             dboxes: Optional[DefaultBoxes] = None) -> nn.Module:
+    """
+    prepare_model_for_export - A copy of model in eval mode on the CPU, prepared with prep_model_for_conversion and,
+                               with embed_nms, followed by the NMS (YOLOv5 and SSD only)
+
+    :param model:       The model to export
+    :param input_size:  The full input shape, e.g. (1, 3, 320, 320)
+    :param embed_nms:   Embed the NMS in the exported graph, which then outputs (N, 7) detections - image index,
+                        x1, y1, x2, y2, confidence and class
+    :param nms_conf:    The confidence threshold of the embedded NMS
+    :param nms_iou:     The IoU threshold of the embedded NMS
+    :param dboxes:      The default boxes of SSD models (DefaultBoxes.dboxes300_coco() by default)
+    """
+    model = copy.deepcopy(model.module if hasattr(model, 'module') else model).cpu().eval()
+    if isinstance(model, SgModule):
+        model.prep_model_for_conversion(input_size=input_size)
+    if not embed_nms:
+        return model
+
+    if isinstance(model, YoLoV5Base):
+        decoder, class_offset = YoloV5ExportDecoder(), 0
+    elif isinstance(model, SSD):
+        decoder, class_offset = SSDExportDecoder(dboxes or DefaultBoxes.dboxes300_coco()), 1
+    else:
+        raise ValueError(f'The NMS can only be embedded in YOLOv5 and SSD models, got {type(model).__name__}')
+    return DetectionModelWithNMS(model, decoder, ExportableDetectionNMS(nms_conf, nms_iou, class_offset)).eval()
+
+
+def _flatten_outputs(outputs) -> List[np.ndarray]:
+    if isinstance(outputs, torch.Tensor):
+        return [outputs.detach().cpu().numpy()]
+    if isinstance(outputs, (list, tuple)):
+        return [array for output in outputs for array in _flatten_outputs(output)]
+    return []
+
+
+def export_to_onnx(model: nn.Module, output_path: str, input_size: Sequence[int], opset_version: int = 11,
+                   dynamic_batch: bool = True, input_names: Sequence[str] = ('input',),
+                   output_names: Optional[Sequence[str]] = None) -> str:
+    """
+    export_to_onnx - Exports a prepared model (see prepare_model_for_export) to ONNX and checks the exported graph
+
+    :param dynamic_batch:   Export the batch axis of the inputs and outputs as dynamic
+    :param output_names:    The output names (output_0, output_1... by default)
+    :return:                output_path
+    """
+    inputs = torch.rand(*input_size)
+    with torch.no_grad():
+        num_outputs = len(_flatten_outputs(model(inputs)))
+    output_names = list(output_names or [f'output_{i}' for i in range(num_outputs)])
+    dynamic_axes = {name: {0: 'batch_size'} for name in list(input_names) + output_names} if dynamic_batch else None
+
+    torch.onnx.export(model, inputs, output_path, export_params=True, opset_version=opset_version,
+                      do_constant_folding=True, input_names=list(input_names), output_names=output_names,
+                      dynamic_axes=dynamic_axes, **_ONNX_EXPORT_KWARGS)
+    onnx.checker.check_model(onnx.load(output_path))
+    return output_path
+
+
+def export_to_torchscript(model: nn.Module, output_path: str, input_size: Sequence[int], script: bool = False) -> str:
+    """
+    export_to_torchscript - Exports a prepared model (see prepare_model_for_export) to TorchScript
+
+    :param script:  Compile the model with torch.jit.script (keeps the data dependent control flow) instead of tracing
+    :return:        output_path
+    """
+    with torch.no_grad():
+        scripted_model = torch.jit.script(model) if script else torch.jit.trace(model, torch.rand(*input_size))
+    torch.jit.save(scripted_model, output_path)
+    return output_path
+
+
+def create_onnxruntime_session(onnx_path: str) -> onnxruntime.InferenceSession:
+    return onnxruntime.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+
+
+def _compare_outputs(expected_outputs: List[np.ndarray], outputs: List[np.ndarray], runtime: str, rtol: float,
+                     atol: float) -> float:
+    if len(outputs) != len(expected_outputs) or any(output.shape != expected.shape
+                                                    for output, expected in zip(outputs, expected_outputs)):
+        raise RuntimeError(f'The {runtime} output shapes {[output.shape for output in outputs]} differ from the '
+                           f'PyTorch output shapes {[expected.shape for expected in expected_outputs]}')
+    max_abs_diff = max([float(np.abs(output - expected).max()) if output.size else 0.
+                        for output, expected in zip(outputs, expected_outputs)] or [0.])
+    if not all(np.allclose(output, expected, rtol=rtol, atol=atol)
+               for output, expected in zip(outputs, expected_outputs)):
+        raise RuntimeError(f'The {runtime} outputs differ from the PyTorch outputs (max absolute difference '
+                           f'{max_abs_diff})')
+    return max_abs_diff
+
+
+def check_onnx_parity(model: nn.Module, onnx_path: str, inputs: torch.Tensor, rtol: float = 1e-3,
+                      atol: float = 1e-4) -> float:
+    """
+    check_onnx_parity - Verifies that the onnxruntime (CPU) outputs of the exported model match the PyTorch outputs
+
+    :return: The max absolute difference of the outputs (a RuntimeError is raised when they do not match)
+    """
+    with torch.no_grad():
+        expected_outputs = _flatten_outputs(model(inputs))
+    session = create_onnxruntime_session(onnx_path)
+    outputs = session.run(None, {session.get_inputs()[0].name: inputs.cpu().numpy()})
+    return _compare_outputs(expected_outputs, outputs, 'onnxruntime', rtol, atol)
+
+
+def check_torchscript_parity(model: nn.Module, torchscript_path: str, inputs: torch.Tensor, rtol: float = 1e-3,
+                             atol: float = 1e-4) -> float:
+    """
+    check_torchscript_parity - Verifies that the outputs of the exported TorchScript model match the PyTorch outputs
+
+    :return: The max absolute difference of the outputs (a RuntimeError is raised when they do not match)
+    """
+    with torch.no_grad():
+        expected_outputs = _flatten_outputs(model(inputs))
+        outputs = _flatten_outputs(torch.jit.load(torchscript_path)(inputs))
+    return _compare_outputs(expected_outputs, outputs, 'TorchScript', rtol, atol)
+
+
+def _get_runtime_forward(runtime: str, model: nn.Module, onnx_path: str, torchscript_path: str):
+    if runtime == 'onnxruntime':
+        session = create_onnxruntime_session(onnx_path)
+        input_name = session.get_inputs()[0].name
+        return lambda inputs: session.run(None, {input_name: inputs.numpy()})
+    return torch.jit.load(torchscript_path) if runtime == 'torchscript' else model
+
+
+def benchmark_runtimes(model: nn.Module, input_size: Sequence[int], onnx_path: str = None,
+                       torchscript_path: str = None, batch_sizes: Sequence[int] = (1,), num_warmup: int = 10,
+                       min_repetitions: int = 20, max_repetitions: int = 200,
+                       min_run_time_ms: float = 1000.) -> List[Dict]:
+    """
+    benchmark_runtimes - Benchmarks the CPU latency of a prepared model (see prepare_model_for_export) in PyTorch and of
+                         its exported ONNX (onnxruntime) and TorchScript models, with the same harness as
+                         benchmark_utils.benchmark_model
+
+    :param input_size:  The input shape (its batch size is replaced by each of batch_sizes - the ONNX model must be
+                        exported with a dynamic batch size to benchmark several batch sizes)
+    :return: A dict per runtime and batch size - runtime, batch_size, repetitions, mean/p50/p90/p99 latency (ms) and
+             throughput (samples per second)
+    """
+    runtime_paths = {'pytorch': True, 'onnxruntime': onnx_path, 'torchscript': torchscript_path}
+    results = []
+    for runtime in [runtime for runtime in RUNTIMES if runtime_paths[runtime]]:
+        forward = _get_runtime_forward(runtime, model, onnx_path, torchscript_path)
+        for batch_size in batch_sizes:
+            inputs = torch.rand(batch_size, *input_size[1:])
+            with torch.no_grad():
+                for _ in range(num_warmup):
+                    forward(inputs)
+                latencies = time_repetitions(lambda: forward(inputs), 'cpu', min_repetitions, max_repetitions,
+                                             min_run_time_ms)
+            results.append({'runtime': runtime, 'batch_size': batch_size, 'repetitions': len(latencies),
+                            **latency_stats(latencies, batch_size)})
+    return results
+
+
+def _export(model: nn.Module, output_dir: str, name: str, input_size: Sequence[int], formats: Sequence[str],
+            opset_version: int, dynamic_batch: bool) -> Dict[str, str]:
+    paths = {}
+    if 'onnx' in formats:
+        paths['onnx_path'] = export_to_onnx(model, os.path.join(output_dir, f'{name}.onnx'), input_size, opset_version,
+                                            dynamic_batch)
+    if 'torchscript' in formats:
+        paths['torchscript_path'] = export_to_torchscript(model, os.path.join(output_dir, f'{name}.pt'), input_size)
+    return paths
+
+
+def _check_parity(model: nn.Module, paths: Dict[str, str], inputs: torch.Tensor, rtol: float,
+                  atol: float) -> Dict[str, float]:
+    max_abs_diffs = {}
+    if 'onnx_path' in paths:
+        max_abs_diffs['onnx_max_abs_diff'] = check_onnx_parity(model, paths['onnx_path'], inputs, rtol, atol)
+    if 'torchscript_path' in paths:
+        max_abs_diffs['torchscript_max_abs_diff'] = check_torchscript_parity(model, paths['torchscript_path'], inputs,
+                                                                             rtol, atol)
+    return max_abs_diffs
+
+
+def _get_fastest_runtimes(benchmark_results: List[Dict]) -> Dict[int, str]:
+    fastest_runtimes = {}
+    for result in sorted(benchmark_results, key=lambda result: result['mean_latency'], reverse=True):
+        fastest_runtimes[result['batch_size']] = result['runtime']
+    return fastest_runtimes
+
+
+def export_model(model: nn.Module, output_dir: str, name: str = 'model', input_size: Sequence[int] = (1, 3, 224, 224),
+                 formats: Sequence[str] = ('onnx', 'torchscript'), embed_nms: bool = False, nms_conf: float = 0.25,
+                 nms_iou: float = 0.45, dboxes: Optional[DefaultBoxes] = None, opset_version: int = 11,
+                 dynamic_batch: bool = True, check_parity: bool = True, rtol: float = 1e-3, atol: float = 1e-4,
+                 benchmark: bool = False, batch_sizes: Sequence[int] = (1,), verbose: bool = True) -> Tuple[nn.Module, Dict]:
+    """
+    export_model - Exports a model to ONNX and TorchScript, verifies the exported models against PyTorch on the CPU and
+                   benchmarks the runtimes, in order to choose the fastest deployment runtime
+
+    :param model:           The model to export (it is copied, the original model is left untouched)
+    :param output_dir:      The directory of the exported models (<name>.onnx and <name>.pt)
+    :param name:            The file name of the exported models
+    :param input_size:      The full input shape, e.g. (1, 3, 320, 320)
+    :param formats:         The export formats (EXPORT_FORMATS)
+    :param embed_nms:       Embed the NMS of YOLOv5 and SSD models (see prepare_model_for_export)
+    :param nms_conf:        The confidence threshold of the embedded NMS
+    :param nms_iou:         The IoU threshold of the embedded NMS
+    :param dboxes:          The default boxes of SSD models (DefaultBoxes.dboxes300_coco() by default)
+    :param opset_version:   The ONNX opset (>= 11 with the embedded NMS)
+    :param dynamic_batch:   Export the ONNX model with a dynamic batch size
+    :param check_parity:    Verify that the exported models' outputs match the PyTorch outputs on a random input
+                            (with the embedded NMS, the predictions are compared before the NMS)
+    :param rtol:            Relative tolerance of the parity checks
+    :param atol:            Absolute tolerance of the parity checks
+    :param benchmark:       Benchmark PyTorch and the exported models (see benchmark_runtimes)
+    :param batch_sizes:     The batch sizes to benchmark
+    :param verbose:         Prints the report to screen
+    :return: prepared_model, report: (nn.Module, dict)
+        The prepared PyTorch model and the report - the paths of the exported models, the max absolute difference of
+        their outputs and, with benchmark, the benchmark results and the fastest runtime per batch size
+    """
+    unsupported_formats = set(formats) - set(EXPORT_FORMATS)
+    if unsupported_formats:
+        raise ValueError(f'Unsupported export formats {unsupported_formats}, the supported formats are {EXPORT_FORMATS}')
+
+    os.makedirs(output_dir, exist_ok=True)
+    prepared_model = prepare_model_for_export(model, input_size, embed_nms, nms_conf, nms_iou, dboxes)
+    inputs = torch.rand(*input_size)
+    report = _export(prepared_model, output_dir, name, input_size, formats, opset_version, dynamic_batch)
+
+    if check_parity and isinstance(prepared_model, DetectionModelWithNMS):
+        # THE NMS OUTPUTS ARE NOT COMPARABLE (ALMOST EQUAL CONFIDENCES MAY BE RANKED DIFFERENTLY BY DIFFERENT
+        # RUNTIMES), SO THE PARITY IS CHECKED ON THE DECODED PREDICTIONS OF A COPY EXPORTED WITHOUT THE NMS
+        parity_model = DetectionModelWithNMS(prepared_model.model, prepared_model.decoder, nms=None).eval()
+        with tempfile.TemporaryDirectory() as parity_dir:
+            parity_paths = _export(parity_model, parity_dir, name, input_size, formats, opset_version, dynamic_batch)
+            report.update(_check_parity(parity_model, parity_paths, inputs, rtol, atol))
+    elif check_parity:
+        report.update(_check_parity(prepared_model, report, inputs, rtol, atol))
+
+    if benchmark:
+        report['benchmark'] = benchmark_runtimes(prepared_model, input_size, report.get('onnx_path'),
+                                                 report.get('torchscript_path'), batch_sizes)
+        report['fastest_runtime'] = _get_fastest_runtimes(report['benchmark'])
+
+    if verbose:
+        logger.info('Export report:\n' + '\n'.join(f'\t{key}: {value}' for key, value in report.items()))
+    return prepared_model, report
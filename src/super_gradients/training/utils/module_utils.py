@@ -1,8 +1,14 @@
 from collections import OrderedDict
+import contextlib
 import copy
-from typing import List, Union, Tuple
+import inspect
+from typing import Callable, List, Sequence, Union, Tuple
 import torch
 from torch import nn
+from torch.utils.checkpoint import checkpoint
+
+# THE NON-REENTRANT CHECKPOINT (use_reentrant=False) WAS ADDED IN TORCH 1.11
+_CHECKPOINT_SUPPORTS_USE_REENTRANT = 'use_reentrant' in inspect.signature(checkpoint).parameters
 
 
 class MultiOutputModule(nn.Module):
@@ -131,6 +137,108 @@ def replace_activations(module: nn.Module, new_activation: nn.Module, activation
     _replace_activations_recursive(module, new_activation, activations_to_replace)
 
 
+def checkpoint_call(function: Callable, *args):
+    """
+    checkpoint_call - Calls function with activation checkpointing when autograd records it - its intermediate
+                      activations are not stored, and are recomputed during the backward pass
+    """
+    if not torch.is_grad_enabled():
+        return function(*args)
+    if _CHECKPOINT_SUPPORTS_USE_REENTRANT:
+        return checkpoint(function, *args, use_reentrant=False)
+    # THE REENTRANT CHECKPOINT DOES NOT BACK-PROPAGATE TO THE PARAMETERS IF NONE OF THE INPUTS REQUIRES GRAD
+    if not any(isinstance(arg, torch.Tensor) and arg.requires_grad for arg in args):
+        return function(*args)
+    return checkpoint(function, *args)
+
+
+@contextlib.contextmanager
+def _preserved_batchnorm_stats(module: nn.Module):
+    """
+    Restores the running statistics of the batch norm layers of module on exit
+    """
+    batchnorm_layers = [layer for layer in module.modules() if isinstance(layer, nn.modules.batchnorm._BatchNorm)]
+    buffers = [buffer for layer in batchnorm_layers if layer.training and layer.track_running_stats
+               for buffer in layer.buffers()]
+    saved_buffers = [buffer.clone() for buffer in buffers]
+    try:
+        yield
+    finally:
+        for buffer, saved_buffer in zip(buffers, saved_buffers):
+            buffer.copy_(saved_buffer)
+
+
+class CheckpointedForward:
+    """
+    CheckpointedForward - Replaces the forward of a module (as an instance attribute) with its forward under activation
+                          checkpointing (see checkpoint_call)
+
+    The module itself is left as it is - its type, state dict keys and hooks do not change, so checkpoints, the EMA
+    copy, DDP and get_model_stats work as before. The forward pass recomputed during the backward pass does not
+    update the running statistics of the batch norm layers a second time.
+    """
+
+    def __init__(self, module: nn.Module):
+        self.module = module
+
+    def __call__(self, *args):
+        module_forward = type(self.module).forward
+        called = []
+
+        def forward(*inputs):
+            if not called:
+                called.append(True)
+                return module_forward(self.module, *inputs)
+            with _preserved_batchnorm_stats(self.module):
+                return module_forward(self.module, *inputs)
+
+        return checkpoint_call(forward, *args)
+
+
+def get_activation_checkpointing_stages(model: nn.Module) -> List[str]:
+    """
+    get_activation_checkpointing_stages - The names (relative to model) of the default checkpointed stages of all the
+                                          SgModules in model (see SgModule.get_activation_checkpointing_stages)
+    """
+    stages = []
+    for name, module in model.named_modules():
+        if hasattr(module, 'get_activation_checkpointing_stages'):
+            prefix = f'{name}.' if name else ''
+            stages += [prefix + stage for stage in module.get_activation_checkpointing_stages()]
+    # A STAGE INSIDE ANOTHER STAGE IS ALREADY RECOMPUTED WITH IT
+    return [stage for stage in stages if not any(stage.startswith(f'{other}.') for other in stages)]
+
+
+def enable_activation_checkpointing(model: nn.Module, stages: Union[bool, Sequence[str]] = True) -> List[str]:
+    """
+    enable_activation_checkpointing - Runs the forward pass of stages of model with activation checkpointing - only
+                                      the stage inputs are stored for the backward pass, and the activations inside the
+                                      stages are recomputed (less memory for an additional forward pass of the stages)
+
+    :param model:   The network (not wrapped by DataParallel / DDP)
+    :param stages:  Names of the checkpointed submodules, or True for the default stages of the architecture
+    :return:        The names of the checkpointed stages
+    """
+    if stages is True:
+        stages = get_activation_checkpointing_stages(model)
+    elif stages is False:
+        stages = []
+    for stage in stages:
+        module = model.get_submodule(stage)
+        module.forward = CheckpointedForward(module)
+    return list(stages)
+
+
+def disable_activation_checkpointing(model: nn.Module):
+    """
+    disable_activation_checkpointing - Restores the forward pass of the stages checkpointed by
+                                       enable_activation_checkpointing
+    """
+    for module in model.modules():
+        if isinstance(module.__dict__.get('forward'), CheckpointedForward):
+            del module.forward
+
+
 def fuse_repvgg_blocks_residual_branches(model: nn.Module):
     '''
     Call fuse_block_residual_branches for all repvgg blocks in the model
@@ -1,3 +1,5 @@
+import torch
+import torch.distributed as dist
 import torch.optim as optim
 import torch.nn as nn
 from torch.nn.modules.batchnorm import _BatchNorm
@@ -9,6 +11,12 @@ from super_gradients.training.params import DEFAULT_OPTIMIZER_PARAMS_SGD, DEFAUL
 from super_gradients.training.utils import get_param
 from super_gradients.training.utils.optimizers.rmsprop_tf import RMSpropTF
 
+try:
+    from torch.distributed.optim import ZeroRedundancyOptimizer
+except ImportError:
+    # TORCH BUILDS WITHOUT DISTRIBUTED SUPPORT
+    ZeroRedundancyOptimizer = None
+
 logger = get_logger(__name__)
 
 OPTIMIZERS_DEFAULT_PARAMS = {optim.SGD: DEFAULT_OPTIMIZER_PARAMS_SGD,
@@ -103,7 +111,33 @@ def build_optimizer(net, lr, training_params):
             net_named_params[ind_group] = param_group
         optimizer_training_params = net_named_params
 
+    # ZeRO-1 - EVERY DDP PROCESS KEEPS AND UPDATES THE OPTIMIZER STATE OF ITS SHARD OF THE PARAMETERS ONLY
+    if get_param(training_params, 'shard_optimizer_state', False):
+        if ZeroRedundancyOptimizer is not None and dist.is_initialized():
+            return ZeroRedundancyOptimizer(optimizer_training_params, optimizer_class=optimizer_cls, lr=lr,
+                                           **training_params.optimizer_params)
+        logger.warning('shard_optimizer_state is supported only in distributed training - the optimizer state is '
+                       'not sharded')
+
     # CREATE AN OPTIMIZER OBJECT AND INITIALIZE IT
     optimizer = optimizer_cls(optimizer_training_params, lr=lr, **training_params.optimizer_params)
 
     return optimizer
+
+
+def is_sharded_optimizer(optimizer: optim.Optimizer) -> bool:
+    """
+    is_sharded_optimizer - Whether the optimizer state is sharded between the DDP processes (shard_optimizer_state)
+    """
+    return ZeroRedundancyOptimizer is not None and isinstance(optimizer, ZeroRedundancyOptimizer)
+
+
+def get_optimizer_state_bytes(optimizer: optim.Optimizer) -> int:
+    """
+    get_optimizer_state_bytes - The bytes of the optimizer state tensors held by this process (only the local shard of
+                                a ZeroRedundancyOptimizer)
+    """
+    if is_sharded_optimizer(optimizer):
+        optimizer = optimizer.optim
+    return sum(value.numel() * value.element_size() for param_state in optimizer.state.values()
+               for value in param_state.values() if isinstance(value, torch.Tensor))
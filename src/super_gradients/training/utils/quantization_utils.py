@@ -0,0 +1,240 @@
+import copy
+from typing import Dict, Iterable, List, Optional, Sequence, Type, Union
+
+import torch
+from torch import nn
+from torchmetrics import MetricCollection
+
+from super_gradients.common.abstractions.abstract_logger import get_logger
+from super_gradients.training.metrics.metric_utils import get_metrics_dict, get_metrics_results_tuple
+from super_gradients.training.models.sg_module import SgModule
+from super_gradients.training.models.detection_models.yolov5 import Detect, YoLoV5Base, YoloV5PostPredictionCallback
+from super_gradients.training.utils.sg_model_utils import unpack_batch_items
+from super_gradients.training.utils.utils import load_func
+
+logger = get_logger(__name__)
+
+try:
+    # torch.fx GRAPH MODE QUANTIZATION WITH QConfigMapping AND example_inputs (torch>=1.13)
+    from torch.ao.quantization import QConfig, QConfigMapping, default_fused_per_channel_wt_fake_quant, \
+        default_fused_wt_fake_quant, get_default_qat_qconfig, get_default_qat_qconfig_mapping, get_default_qconfig, \
+        get_default_qconfig_mapping
+    from torch.ao.quantization.fx.custom_config import PrepareCustomConfig
+    from torch.ao.quantization.observer import default_per_channel_weight_observer, default_weight_observer
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx, prepare_qat_fx
+
+    _imported_quantization_failure = None
+except ImportError as import_err:
+    _imported_quantization_failure = import_err
+
+QUANTIZATION_BACKENDS = ['fbgemm', 'qnnpack', 'x86']
+
+# LAYERS THAT ARE SENSITIVE TO QUANTIZATION (OR CAN NOT BE TRACED) AND ARE KEPT IN FLOAT BY DEFAULT
+DEFAULT_SKIP_MODULE_TYPES = [Detect, YoloV5PostPredictionCallback]
+
+
+def _get_default_skip_module_names(model: nn.Module) -> List[str]:
+    # THE YOLOv5 NMS PLACEHOLDER CONSUMES THE (FLOAT) OUTPUTS OF THE DETECT HEAD
+    return ['_nms'] if isinstance(model, YoLoV5Base) else []
+
+
+def _check_quantization_support():
+    if _imported_quantization_failure is not None:
+        raise ImportError(f'int8 quantization requires torch>=1.13, found torch {torch.__version__}') \
+            from _imported_quantization_failure
+
+
+def _set_quantization_backend(backend: str):
+    if backend not in QUANTIZATION_BACKENDS or backend not in torch.backends.quantized.supported_engines:
+        raise ValueError(f'Unsupported quantization backend {backend}, the supported backends are '
+                         f'{[b for b in QUANTIZATION_BACKENDS if b in torch.backends.quantized.supported_engines]}')
+    torch.backends.quantized.engine = backend
+
+
+def _get_inputs(batch_items) -> torch.Tensor:
+    inputs, _, _ = unpack_batch_items(batch_items)
+    return inputs.cpu()
+
+
+def get_qconfig_mapping(backend: str = 'fbgemm', per_channel: bool = True, skip_module_names: Sequence[str] = (),
+                        skip_module_types: Sequence[Type[nn.Module]] = (), qat: bool = False) -> 'QConfigMapping':
+    """
+    get_qconfig_mapping - The backend's default static int8 qconfig mapping, with per-channel (or per-tensor) weight
+                          observers and without quantizing the skipped modules
+
+    :param qat: Use fake-quantize modules (for quantization-aware training) instead of observers
+    """
+    _check_quantization_support()
+    if qat:
+        default_qconfig, qconfig_mapping = get_default_qat_qconfig(backend), get_default_qat_qconfig_mapping(backend)
+        weight_observer = default_fused_per_channel_wt_fake_quant if per_channel else default_fused_wt_fake_quant
+    else:
+        default_qconfig, qconfig_mapping = get_default_qconfig(backend), get_default_qconfig_mapping(backend)
+        weight_observer = default_per_channel_weight_observer if per_channel else default_weight_observer
+    qconfig_mapping.set_global(QConfig(activation=default_qconfig.activation, weight=weight_observer))
+    for module_name in skip_module_names:
+        qconfig_mapping.set_module_name(module_name, None)
+    for module_type in skip_module_types:
+        qconfig_mapping.set_object_type(module_type, None)
+    return qconfig_mapping
+
+
+def _get_prepare_custom_config(skip_module_names: Sequence[str],
+                               skip_module_types: Sequence[Type[nn.Module]]) -> 'PrepareCustomConfig':
+    return PrepareCustomConfig().set_non_traceable_module_names(list(skip_module_names)) \
+        .set_non_traceable_module_classes(list(skip_module_types))
+
+
+def quantize_model_ptq(model: nn.Module, calibration_loader: Iterable, num_calibration_batches: int = 32,
+                       backend: str = 'fbgemm', per_channel: bool = True,
+                       skip_module_names: Optional[Sequence[str]] = None,
+                       skip_module_types: Optional[Sequence[Type[nn.Module]]] = None) -> nn.Module:
+    """
+    quantize_model_ptq - Post-training static int8 quantization with torch.fx graph mode quantization
+
+    The model is copied to the CPU, traced and prepared with observers (Conv-BN-ReLU patterns are fused), calibrated on
+    the inputs of the first num_calibration_batches batches of calibration_loader and converted to int8.
+    The skipped modules are kept in float and are not traced, so they may hold control flow that fx can not trace
+    (e.g. the YOLOv5 Detect head).
+
+    :param model:                       The float model (it is copied, the original module is left untouched)
+    :param calibration_loader:          Data loader of the calibration batches (e.g. the validation loader)
+    :param num_calibration_batches:     Number of calibration batches
+    :param backend:                     The quantized engine - 'fbgemm' or 'x86' (x86 servers) or 'qnnpack' (ARM)
+    :param per_channel:                 Quantize the weights with per-channel (instead of per-tensor) observers
+    :param skip_module_names:           Qualified names of modules to keep in float (by default the YOLOv5 NMS)
+    :param skip_module_types:           Module types to keep in float (DEFAULT_SKIP_MODULE_TYPES by default)
+    :return:                            The quantized model (on the CPU)
+    """
+    _check_quantization_support()
+    _set_quantization_backend(backend)
+    skip_module_names = _get_default_skip_module_names(model) if skip_module_names is None else skip_module_names
+    skip_module_types = DEFAULT_SKIP_MODULE_TYPES if skip_module_types is None else skip_module_types
+    model = copy.deepcopy(model).cpu().eval()
+    batches = iter(calibration_loader)
+    first_inputs = _get_inputs(next(batches))
+
+    qconfig_mapping = get_qconfig_mapping(backend, per_channel, skip_module_names, skip_module_types)
+    prepared_model = prepare_fx(model, qconfig_mapping, example_inputs=(first_inputs,),
+                                prepare_custom_config=_get_prepare_custom_config(skip_module_names, skip_module_types))
+
+    # CALIBRATION - THE OBSERVERS RECORD THE ACTIVATION RANGES
+    with torch.no_grad():
+        prepared_model(first_inputs)
+        for _, batch_items in zip(range(num_calibration_batches - 1), batches):
+            prepared_model(_get_inputs(batch_items))
+
+    return convert_fx(prepared_model)
+
+
+class QATModule(SgModule):
+    """
+    QATModule - A float SgModule prepared for quantization-aware training (see prepare_model_for_qat)
+
+    The prepared (fake-quantized) graph shares its weights with the float model, so the float model's optimizer
+    parameter groups and their LR updates (initialize_param_groups, update_param_groups) are used as they are.
+
+        :param float_model:     The float model that was prepared
+        :param qat_model:       The prepared model (torch.fx GraphModule with fake-quantize modules)
+        :param qat_params:      The preparation params (saved with the checkpoints, to prepare the model on resume)
+    """
+
+    def __init__(self, float_model: nn.Module, qat_model: nn.Module, qat_params: dict):
+        super(QATModule, self).__init__()
+        self.qat_model = qat_model
+        self.qat_params = qat_params
+        # NOT REGISTERED AS A SUB-MODULE - ITS WEIGHTS ARE ALREADY IN qat_model
+        self.__dict__['_float_model'] = float_model
+
+    def forward(self, x):
+        return self.qat_model(x)
+
+    def initialize_param_groups(self, lr: float, training_params) -> list:
+        if isinstance(self._float_model, SgModule):
+            return self._float_model.initialize_param_groups(lr, training_params)
+        return super(QATModule, self).initialize_param_groups(lr, training_params)
+
+    def update_param_groups(self, param_groups: list, lr: float, epoch: int, iter: int, training_params,
+                            total_batch: int) -> list:
+        if isinstance(self._float_model, SgModule):
+            return self._float_model.update_param_groups(param_groups, lr, epoch, iter, training_params, total_batch)
+        return super(QATModule, self).update_param_groups(param_groups, lr, epoch, iter, training_params, total_batch)
+
+    def get_exclude_attributes(self) -> list:
+        return ['qat_params']
+
+    def freeze_bn_stats(self):
+        """
+        Stops updating the BatchNorm statistics of the fused Conv-BN modules (they are used as they are)
+        """
+        self.qat_model.apply(torch.ao.nn.intrinsic.qat.freeze_bn_stats)
+
+    def freeze_observers(self):
+        """
+        Stops updating the quantization ranges (scales and zero points) - the fake-quantization keeps running
+        """
+        self.qat_model.apply(torch.ao.quantization.disable_observer)
+
+    def convert(self) -> nn.Module:
+        """
+        convert - Converts a copy of the fake-quantized model to an int8 model for CPU inference
+        """
+        _set_quantization_backend(self.qat_params['backend'])
+        return convert_fx(copy.deepcopy(self.qat_model).cpu().eval())
+
+
+def prepare_model_for_qat(model: nn.Module, example_inputs: torch.Tensor, backend: str = 'fbgemm',
+                          per_channel: bool = True, skip_module_names: Optional[Sequence[str]] = None,
+                          skip_module_types: Optional[Sequence[Union[Type[nn.Module], str]]] = None) -> QATModule:
+    """
+    prepare_model_for_qat - Prepares a float model for quantization-aware training with torch.fx graph mode quantization
+
+    The model is traced in training mode, Conv-BN(-ReLU) patterns are fused into QAT modules that keep updating the
+    BatchNorm statistics, and fake-quantize modules are inserted on the weights and activations. The skipped modules are
+    kept in float and are not traced (e.g. the YOLOv5 Detect head).
+
+    :param model:               The float model (prepared in place - the weights are shared with the prepared model)
+    :param example_inputs:      An input batch
+    :param backend:             The quantized engine of the int8 model - 'fbgemm' or 'x86' (x86 servers) or 'qnnpack' (ARM)
+    :param per_channel:         Fake-quantize the weights per-channel (instead of per-tensor)
+    :param skip_module_names:   Qualified names of modules to keep in float (by default the YOLOv5 NMS)
+    :param skip_module_types:   Module types (or their dotted paths) to keep in float (DEFAULT_SKIP_MODULE_TYPES by default)
+    :return:                    The prepared model, wrapped as a QATModule
+    """
+    _check_quantization_support()
+    _set_quantization_backend(backend)
+    skip_module_names = _get_default_skip_module_names(model) if skip_module_names is None else skip_module_names
+    skip_module_types = DEFAULT_SKIP_MODULE_TYPES if skip_module_types is None else skip_module_types
+    skip_module_types = [load_func(module_type) if isinstance(module_type, str) else module_type
+                         for module_type in skip_module_types]
+
+    qconfig_mapping = get_qconfig_mapping(backend, per_channel, skip_module_names, skip_module_types, qat=True)
+    qat_model = prepare_qat_fx(model.train(), qconfig_mapping, example_inputs=(example_inputs,),
+                               prepare_custom_config=_get_prepare_custom_config(skip_module_names, skip_module_types))
+    # THE TYPES ARE SAVED AS DOTTED PATHS, SO THE CHECKPOINTS CAN BE LOADED WITH torch.load(weights_only=True)
+    qat_params = {'backend': backend, 'per_channel': per_channel, 'skip_module_names': list(skip_module_names),
+                  'skip_module_types': [f'{module_type.__module__}.{module_type.__qualname__}'
+                                        for module_type in skip_module_types]}
+    return QATModule(model, qat_model, qat_params)
+
+
+def evaluate_on_cpu(model: nn.Module, data_loader: Iterable, metrics: Union[List, MetricCollection],
+                    num_batches: int = None) -> Dict:
+    """
+    evaluate_on_cpu - Computes the metrics (torchmetrics, e.g. SgModel's valid_metrics_list) of model on the CPU
+
+    :param metrics:     A list of metrics or a MetricCollection (it is copied, the original metrics are left untouched)
+    :param num_batches: Evaluate only the first num_batches batches
+    :return:            The metric values by name
+    """
+    metrics = copy.deepcopy(metrics if isinstance(metrics, MetricCollection) else MetricCollection(metrics)).cpu()
+    metrics.reset()
+    model.eval()
+    with torch.no_grad():
+        for batch_idx, batch_items in enumerate(data_loader):
+            if num_batches is not None and batch_idx >= num_batches:
+                break
+            inputs, targets, _ = unpack_batch_items(batch_items)
+            inputs = inputs.cpu()
+            metrics.update(preds=model(inputs), target=targets.cpu(), device='cpu', inputs=inputs)
+    return get_metrics_dict(get_metrics_results_tuple(metrics), metrics, [])
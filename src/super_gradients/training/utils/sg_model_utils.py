@@ -11,6 +11,9 @@ from torch.utils.tensorboard import SummaryWriter
 
 from super_gradients.training.exceptions.dataset_exceptions import UnsupportedBatchItemsFormat
 
+MEMORY_FORMATS = {'contiguous_format': torch.contiguous_format, 'channels_last': torch.channels_last}
+MIXED_PRECISION_DTYPES = {'float16': torch.float16, 'bfloat16': torch.bfloat16}
+
 # TODO: These utils should move to sg_model package as internal (private) helper functions
 
 
@@ -159,6 +162,47 @@ def unpack_batch_items(batch_items: Union[tuple, torch.Tensor]):
     return inputs, target, additional_batch_items
 
 
+def get_memory_format(memory_format: str) -> torch.memory_format:
+    """
+    get_memory_format - The torch memory format by name ('contiguous_format' or 'channels_last')
+    """
+    if memory_format not in MEMORY_FORMATS:
+        raise ValueError(f'Unsupported memory format {memory_format}, the supported formats are {list(MEMORY_FORMATS)}')
+    return MEMORY_FORMATS[memory_format]
+
+
+def get_mixed_precision_dtype(dtype: str) -> torch.dtype:
+    """
+    get_mixed_precision_dtype - The autocast dtype by name ('float16' or 'bfloat16')
+    """
+    if dtype not in MIXED_PRECISION_DTYPES:
+        raise ValueError(f'Unsupported mixed precision dtype {dtype}, the supported dtypes are '
+                         f'{list(MIXED_PRECISION_DTYPES)}')
+    return MIXED_PRECISION_DTYPES[dtype]
+
+
+def get_autocast(device_type: str, dtype: torch.dtype, enabled: bool = True):
+    """
+    get_autocast - The autocast context of the device type ('cuda' or 'cpu') in dtype
+
+    torch<1.10 has only the CUDA float16 autocast (torch.cuda.amp.autocast)
+    """
+    if hasattr(torch, 'autocast'):
+        return torch.autocast(device_type=device_type, dtype=dtype, enabled=enabled)
+    if enabled and (device_type != 'cuda' or dtype != torch.float16):
+        raise ValueError(f'{dtype} mixed precision on {device_type} requires torch>=1.10')
+    return torch.cuda.amp.autocast(enabled=enabled)
+
+
+def inputs_to_memory_format(inputs, memory_format: torch.memory_format):
+    """
+    inputs_to_memory_format - Converts 4D (image) input batches to memory_format, other inputs are returned as they are
+    """
+    if isinstance(inputs, torch.Tensor) and inputs.dim() == 4:
+        return inputs.contiguous(memory_format=memory_format)
+    return inputs
+
+
 def log_uncaught_exceptions(logger):
     """
     Makes logger log uncaught exceptions
@@ -1,3 +1,4 @@
+import inspect
 import os
 import torch
 import numpy as np
@@ -5,6 +6,9 @@ import pkg_resources
 from super_gradients.training import utils as core_utils
 from super_gradients.training.utils.utils import move_state_dict_to_device
 
+# THE SNAPSHOTS FILE IS WRITTEN BY THIS CLASS AND HOLDS MORE THAN TENSORS (torch>=2.6 LOADS WEIGHTS ONLY BY DEFAULT)
+_TORCH_LOAD_KWARGS = {'weights_only': False} if 'weights_only' in inspect.signature(torch.load).parameters else {}
+
 
 class ModelWeightAveraging:
     """
@@ -132,4 +136,4 @@ class ModelWeightAveraging:
         return False, None
 
     def _get_averaging_snapshots_dict(self):
-        return torch.load(self.averaging_snapshots_file)
+        return torch.load(self.averaging_snapshots_file, **_TORCH_LOAD_KWARGS)
@@ -16,6 +16,28 @@ from tests.unit_tests.kd_model_test import KDModelTest
 from tests.unit_tests.dice_loss_test import DiceLossTest
 from tests.unit_tests.vit_unit_test import TestViT
 from tests.unit_tests.lr_cooldown_test import LRCooldownTest
+from tests.unit_tests.image_loading_utils_test import ImageLoadingUtilsTest
+from tests.unit_tests.mixup_test import MixupTest
+from tests.unit_tests.aspect_ratio_batch_sampler_test import AspectRatioBatchSamplerTest
+from tests.unit_tests.multi_scale_resize_callback_test import MultiScaleResizeCallbackTest
+from tests.unit_tests.compute_dataset_statistics_test import ComputeDatasetStatisticsTest
+from tests.unit_tests.inference_pipeline_test import InferencePipelineTest
+from tests.unit_tests.dynamic_batching_server_test import DynamicBatchingServerTest
+from tests.unit_tests.benchmark_utils_test import BenchmarkUtilsTest
+from tests.unit_tests.layer_profiler_test import LayerProfilerTest
+from tests.unit_tests.inference_optimization_test import InferenceOptimizationTest
+from tests.unit_tests.quantization_utils_test import QuantizationUtilsTest
+from tests.unit_tests.qat_test import QATTest
+from tests.unit_tests.model_export_test import ModelExportTest
+from tests.unit_tests.channels_last_mixed_precision_test import ChannelsLastMixedPrecisionTest
+from tests.unit_tests.yolo_v5_loss_test import YoloV5LossTest
+from tests.unit_tests.ssd_loss_test import SSDLossTest
+from tests.unit_tests.stdc_loss_test import STDCLossTest
+from tests.unit_tests.teacher_output_cache_test import TeacherOutputCacheTest
+from tests.unit_tests.kd_module_test import KDModuleTest
+from tests.unit_tests.activation_checkpointing_test import ActivationCheckpointingTest
+from tests.unit_tests.gradient_accumulation_test import GradientAccumulationTest
+from tests.unit_tests.shard_optimizer_state_test import ShardOptimizerStateTest
 
 
 class CoreUnitTestSuiteRunner:
@@ -55,6 +77,28 @@ class CoreUnitTestSuiteRunner:
         self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(KDModelTest))
         self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(InitializeWithDataloadersTest))
         self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(LRCooldownTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(ImageLoadingUtilsTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(MixupTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(AspectRatioBatchSamplerTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(MultiScaleResizeCallbackTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(ComputeDatasetStatisticsTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(InferencePipelineTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(DynamicBatchingServerTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(BenchmarkUtilsTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(LayerProfilerTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(InferenceOptimizationTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(QuantizationUtilsTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(QATTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(ModelExportTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(ChannelsLastMixedPrecisionTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(YoloV5LossTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(SSDLossTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(STDCLossTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TeacherOutputCacheTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(KDModuleTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(ActivationCheckpointingTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(GradientAccumulationTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(ShardOptimizerStateTest))
 
     def _add_modules_to_end_to_end_tests_suite(self):
         """
@@ -0,0 +1,166 @@
+import copy
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import torch
+from torch.utils.data import DataLoader, TensorDataset
+
+from super_gradients.training import SgModel
+from super_gradients.training.metrics import Accuracy
+from super_gradients.training.models.classification_models.resnet import ResNet18
+from super_gradients.training.models.classification_models.vit import ViT
+from super_gradients.training.models.detection_models.yolov5 import YoLoV5N
+from super_gradients.training.models.segmentation_models.ddrnet import DDRNet23Slim
+from super_gradients.training.utils import HpmStruct, WrappedModel
+from super_gradients.training.utils.benchmark_utils import benchmark_activation_checkpointing, \
+    benchmark_activation_checkpointing_architectures
+from super_gradients.training.utils.ema import ModelEMA
+from super_gradients.training.utils.layer_profiler import LayerProfiler
+from super_gradients.training.utils.module_utils import CheckpointedForward, disable_activation_checkpointing, \
+    enable_activation_checkpointing, get_activation_checkpointing_stages
+
+
+def output_sum(output) -> torch.Tensor:
+    if isinstance(output, torch.Tensor):
+        return output.sum()
+    return sum(output_sum(item) for item in output)
+
+
+def small_vit() -> ViT:
+    return ViT(image_size=(32, 32), patch_size=(8, 8), num_classes=10, hidden_dim=64, depth=4, heads=4, mlp_dim=128)
+
+
+class ActivationCheckpointingTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def _models(self):
+        return {'resnet18': (ResNet18(arch_params=HpmStruct(num_classes=10)), (2, 3, 32, 32)),
+                'vit': (small_vit(), (2, 3, 32, 32)),
+                'ddrnet_23_slim': (DDRNet23Slim(arch_params=HpmStruct(num_classes=5, aux_head=False)), (2, 3, 64, 64)),
+                'yolo_v5n': (YoLoV5N(arch_params=HpmStruct(num_classes=5)), (2, 3, 64, 64))}
+
+    def test_default_stages(self):
+        expected_stages = {'resnet18': ['layer1', 'layer2', 'layer3', 'layer4'],
+                           'vit': [f'transformer.blocks.{i}' for i in range(4)],
+                           'ddrnet_23_slim': ['backbone.layer1', 'backbone.layer2', 'backbone.layer3',
+                                              'backbone.layer4', 'layer5', 'layer3_skip', 'layer4_skip',
+                                              'layer5_skip'],
+                           # THE CSP BLOCKS OF THE CSPDarknet53 BACKBONE (A NESTED SgModule)
+                           'yolo_v5n': ['_backbone._modules_list.2', '_backbone._modules_list.4',
+                                        '_backbone._modules_list.6', '_backbone._modules_list.8']}
+        for name, (model, _) in self._models().items():
+            self.assertEqual(get_activation_checkpointing_stages(model), expected_stages[name])
+
+    def test_gradient_parity(self):
+        for name, (model, input_shape) in self._models().items():
+            checkpointed_model = copy.deepcopy(model)
+            self.assertTrue(enable_activation_checkpointing(checkpointed_model))
+            x = torch.rand(input_shape)
+            for net in [model, checkpointed_model]:
+                net.train()
+                output_sum(net(x)).backward()
+
+            for (param_name, param), checkpointed_param in zip(model.named_parameters(),
+                                                               checkpointed_model.parameters()):
+                # UNUSED PARAMETERS (e.g. OF AN AUXILIARY HEAD) GET NO GRADIENT IN BOTH
+                if param.grad is None:
+                    self.assertIsNone(checkpointed_param.grad, f'{name}: {param_name}')
+                    continue
+                self.assertTrue(torch.allclose(param.grad, checkpointed_param.grad, rtol=1e-3, atol=1e-4),
+                                f'{name}: {param_name}')
+            # THE RECOMPUTED FORWARD PASS DOES NOT UPDATE THE BATCH NORM STATISTICS A SECOND TIME
+            for (buffer_name, buffer), checkpointed_buffer in zip(model.state_dict().items(),
+                                                                  checkpointed_model.state_dict().values()):
+                self.assertTrue(torch.allclose(buffer.float(), checkpointed_buffer.float(), atol=1e-5),
+                                f'{name}: {buffer_name}')
+
+    def test_module_is_unchanged(self):
+        model = ResNet18(arch_params=HpmStruct(num_classes=10))
+        state_dict_keys = list(model.state_dict().keys())
+        enable_activation_checkpointing(model, ['layer2', 'layer3'])
+        self.assertIsInstance(model.layer2.forward, CheckpointedForward)
+        self.assertNotIsInstance(model.layer1.forward, CheckpointedForward)
+        self.assertEqual(list(model.state_dict().keys()), state_dict_keys)
+
+        # THE EMA COPY AND A PICKLED MODEL ARE CHECKPOINTED AS WELL, EACH WITH ITS OWN MODULES
+        for model_copy in [ModelEMA(WrappedModel(model)).ema.module, pickle.loads(pickle.dumps(model))]:
+            self.assertIs(model_copy.layer2.forward.module, model_copy.layer2)
+
+        # THE LAYER PROFILER OF get_model_stats SEES THE SAME MODULES
+        with LayerProfiler(model.eval(), (3, 32, 32), device='cpu') as profiler:
+            stats = profiler.collect_stats()
+        with LayerProfiler(ResNet18(arch_params=HpmStruct(num_classes=10)).eval(), (3, 32, 32),
+                           device='cpu') as profiler:
+            expected_stats = profiler.collect_stats()
+        self.assertEqual(list(stats.keys()), list(expected_stats.keys()))
+        self.assertEqual(stats['layer2']['flops'], expected_stats['layer2']['flops'])
+
+        disable_activation_checkpointing(model)
+        self.assertNotIn('forward', model.layer2.__dict__)
+
+    def test_mixed_precision(self):
+        model = small_vit().train()
+        checkpointed_model = copy.deepcopy(model)
+        enable_activation_checkpointing(checkpointed_model)
+        x = torch.rand(2, 3, 32, 32)
+        for net in [model, checkpointed_model]:
+            with torch.autocast(device_type='cpu', dtype=torch.bfloat16):
+                output = net(x)
+            self.assertEqual(output.dtype, torch.bfloat16)
+            output.float().sum().backward()
+        self.assertTrue(torch.allclose(model.transformer.blocks[0].attn.to_qkv.weight.grad,
+                                       checkpointed_model.transformer.blocks[0].attn.to_qkv.weight.grad,
+                                       rtol=1e-2, atol=1e-2))
+
+    def test_train_with_activation_checkpointing(self):
+        train_loader = DataLoader(TensorDataset(torch.rand(8, 3, 32, 32), torch.randint(0, 10, (8,))), batch_size=4)
+        model = SgModel('test_train_with_activation_checkpointing', device='cpu', train_loader=train_loader,
+                        valid_loader=train_loader, classes=list(range(10)))
+        model.build_model(ResNet18(arch_params=HpmStruct(num_classes=10)), arch_params={'num_classes': 10})
+        model.train({"max_epochs": 1, "lr_mode": "step", "lr_updates": [1], "lr_decay_factor": 0.1,
+                     "lr_warmup_epochs": 0, "initial_lr": 0.1, "loss": "cross_entropy", "optimizer": "SGD",
+                     "train_metrics_list": [Accuracy()], "valid_metrics_list": [Accuracy()],
+                     "loss_logging_items_names": ["Loss"], "metric_to_watch": "Accuracy",
+                     "greater_metric_to_watch_is_better": True, "average_best_models": False, "ema": True,
+                     "mixed_precision": True, "mixed_precision_dtype": "bfloat16",
+                     "activation_checkpointing": True})
+        self.assertIsInstance(model.net.module.layer1.forward, CheckpointedForward)
+        self.assertIsInstance(model.ema_model.ema.module.layer1.forward, CheckpointedForward)
+
+    def test_activation_checkpointing_report(self):
+        output_path = os.path.join(self.tmp_dir, 'report.csv')
+        results = benchmark_activation_checkpointing_architectures(['resnet18', 'mobilenet_v2'], device='cpu',
+                                                                   batch_size=2, resolution=32, num_warmup=1,
+                                                                   min_repetitions=1, max_repetitions=1,
+                                                                   output_path=output_path, verbose=False)
+        self.assertEqual([result['activation_checkpointing'] for result in results[:2]], [False, True])
+        self.assertEqual(results[1]['checkpointed_stages'], 4)
+        # AN ARCHITECTURE WITHOUT DEFAULT STAGES IS REPORTED WITH AN ERROR
+        self.assertEqual(results[2]['architecture'], 'mobilenet_v2')
+        self.assertIn('error', results[2])
+        self.assertTrue(os.path.exists(output_path))
+
+    def test_activation_checkpointing_benchmark(self):
+        results = {}
+        for name, model, resolution in [('resnet18', ResNet18(arch_params=HpmStruct(num_classes=1000)), 128),
+                                        ('vit', ViT(image_size=(64, 64), patch_size=(8, 8), num_classes=1000,
+                                                    hidden_dim=192, depth=6, heads=3, mlp_dim=768), 64)]:
+            results[name] = benchmark_activation_checkpointing(model, batch_size=8, resolution=resolution,
+                                                               device='cuda' if torch.cuda.is_available() else 'cpu',
+                                                               min_repetitions=1, max_repetitions=1,
+                                                               min_run_time_ms=0, architecture=name)
+        for name, (baseline, checkpointed) in results.items():
+            self.assertLess(checkpointed['saved_activations_mb'], baseline['saved_activations_mb'] / 2, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+
+from super_gradients.training.datasets.samplers import AspectRatioBatchSampler
+
+
+class AspectRatioBatchSamplerTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        np.random.seed(0)
+        self.aspect_ratios = np.concatenate([np.random.uniform(0.5, 0.8, 45), np.random.uniform(1.2, 2., 55)])
+
+    @staticmethod
+    def _indices(batches):
+        return [index for batch in batches for index, _ in batch]
+
+    def test_covers_dataset_once(self):
+        sampler = AspectRatioBatchSampler(self.aspect_ratios, batch_size=8, img_size=320, num_buckets=4)
+        batches = list(sampler)
+        self.assertEqual(len(batches), len(sampler))
+        self.assertEqual(sorted(self._indices(batches)), list(range(100)))
+        # ONLY THE LAST BATCH OF THE LEFTOVERS MAY BE INCOMPLETE
+        self.assertEqual(sum(len(batch) < 8 for batch in batches), 1)
+
+        sampler = AspectRatioBatchSampler(self.aspect_ratios, batch_size=8, img_size=320, drop_last=True)
+        batches = list(sampler)
+        self.assertEqual(len(batches), len(sampler))
+        self.assertTrue(all(len(batch) == 8 for batch in batches))
+
+    def test_batch_shapes(self):
+        sampler = AspectRatioBatchSampler(self.aspect_ratios, batch_size=8, img_size=320, num_buckets=4)
+        for batch in sampler:
+            indices = [index for index, _ in batch]
+            shapes = {shape for _, shape in batch}
+            self.assertEqual(len(shapes), 1)
+            height, width = shapes.pop()
+            self.assertEqual((height % 32, width % 32), (0, 0))
+            self.assertEqual((height, width), sampler.get_batch_shape(indices))
+            # THE LETTERBOX FITS EVERY IMAGE OF THE BATCH WHEN ITS LONG SIDE IS RESIZED TO img_size
+            for aspect_ratio in self.aspect_ratios[indices]:
+                if aspect_ratio < 1:
+                    self.assertGreaterEqual(height, 320 * aspect_ratio)
+                else:
+                    self.assertGreaterEqual(width, 320 / aspect_ratio)
+
+        # PORTRAIT AND LANDSCAPE IMAGES ARE NOT MIXED, SO RECTANGULAR BATCHES SAVE PADDING
+        self.assertTrue(any(shape != (320 + 32, 320 + 32) for batch in sampler for _, shape in batch))
+
+    def test_shuffles_by_epoch(self):
+        sampler = AspectRatioBatchSampler(self.aspect_ratios, batch_size=8, img_size=320)
+        first_epoch = list(sampler)
+        self.assertEqual(first_epoch, list(sampler))
+        sampler.set_epoch(1)
+        self.assertNotEqual(first_epoch, list(sampler))
+
+        sampler = AspectRatioBatchSampler(self.aspect_ratios, batch_size=8, img_size=320, shuffle=False)
+        indices = self._indices(sampler)
+        self.assertTrue(np.all(np.diff(self.aspect_ratios[indices]) >= 0))
+
+    def test_distributed_sharding(self):
+        samplers = [AspectRatioBatchSampler(self.aspect_ratios, batch_size=8, img_size=320, num_replicas=3, rank=rank)
+                    for rank in range(3)]
+        rank_batches = [list(sampler) for sampler in samplers]
+
+        # ALL THE RANKS RUN THE SAME NUMBER OF STEPS AND TOGETHER COVER THE WHOLE DATASET
+        self.assertTrue(all(len(batches) == len(samplers[0]) for batches in rank_batches))
+        all_indices = [index for batches in rank_batches for index in self._indices(batches)]
+        self.assertEqual(set(all_indices), set(range(100)))
+
+        samplers = [AspectRatioBatchSampler(self.aspect_ratios, batch_size=8, img_size=320, num_replicas=3, rank=rank,
+                                            drop_last=True) for rank in range(3)]
+        rank_indices = [self._indices(sampler) for sampler in samplers]
+        all_indices = [index for indices in rank_indices for index in indices]
+        self.assertEqual(len(all_indices), len(set(all_indices)))
+        self.assertTrue(all(len(list(sampler)) == len(sampler) for sampler in samplers))
+
+
+if __name__ == '__main__':
+    unittest.main()
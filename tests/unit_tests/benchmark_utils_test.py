@@ -0,0 +1,94 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import torch
+
+from super_gradients import SgModel
+from super_gradients.training.models.detection_models.yolov5 import YoloV5PostPredictionCallback
+from super_gradients.training.utils.benchmark_utils import benchmark_model, benchmark_architectures, \
+    benchmark_multi_resolution, save_benchmark_results, format_benchmark_results
+
+FAST_SETTINGS = {'num_warmup': 2, 'min_repetitions': 3, 'max_repetitions': 5, 'min_run_time_ms': 0., 'verbose': False}
+
+
+class BenchmarkUtilsTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.model = torch.nn.Sequential(torch.nn.Conv2d(3, 8, 3), torch.nn.BatchNorm2d(8), torch.nn.ReLU(),
+                                         torch.nn.AdaptiveAvgPool2d(1), torch.nn.Flatten(), torch.nn.Linear(8, 10))
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def test_sweep(self):
+        results = benchmark_model(self.model, batch_sizes=(1, 4), resolutions=(32, (24, 48)),
+                                  dtypes=('fp32', 'fp16', 'bf16'), memory_formats=('nchw', 'channels_last'),
+                                  fuse=(False, True), device='cpu', **FAST_SETTINGS)
+        self.assertEqual(len(results), 2 * 2 * 3 * 2 * 2)
+        for result in results:
+            if result['dtype'] == 'fp16':
+                # HALF PRECISION IS NOT SUPPORTED ON CPU
+                self.assertIn('error', result)
+                continue
+            self.assertTrue(3 <= result['repetitions'] <= 5)
+            self.assertTrue(result['p50_latency'] <= result['p90_latency'] <= result['p99_latency'])
+            self.assertAlmostEqual(result['throughput'], result['batch_size'] * 1000 / result['mean_latency'])
+            self.assertIsNone(result['peak_memory_mb'])
+            self.assertGreaterEqual(result['warmup_time'], result['first_forward_time'])
+            self.assertNotIn('e2e_mean_latency', result)
+
+        self.assertIn('24x48', format_benchmark_results(results))
+
+        # THE BENCHMARKED MODEL IS LEFT UNTOUCHED
+        self.assertTrue(self.model.training)
+        self.assertEqual(next(self.model.parameters()).dtype, torch.float32)
+
+    def test_min_run_time(self):
+        results = benchmark_model(self.model, batch_sizes=1, resolutions=(32,), device='cpu', num_warmup=1,
+                                  min_repetitions=1, max_repetitions=1000, min_run_time_ms=50., verbose=False)
+        self.assertGreater(results[0]['repetitions'], 1)
+        self.assertGreaterEqual(results[0]['repetitions'] * results[0]['mean_latency'], 50.)
+
+    def test_end_to_end_detection(self):
+        model = SgModel('benchmark_utils_test', model_checkpoints_location='local', device='cpu',
+                        post_prediction_callback=YoloV5PostPredictionCallback())
+        model.build_model('yolo_v5s', arch_params={'num_classes': 80})
+        results = model.benchmark(batch_sizes=2, resolutions=(64,), end_to_end=True, **FAST_SETTINGS)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['architecture'], 'yolo_v5s')
+        self.assertGreater(results[0]['e2e_p50_latency'], 0)
+
+    def test_multi_resolution(self):
+        settings = {key: value for key, value in FAST_SETTINGS.items() if key != 'verbose'}
+        result = benchmark_multi_resolution(self.model, resolutions=(32, (24, 48)), batch_size=2, **settings)
+        self.assertEqual(result['resolutions'], ['32x32', '24x48'])
+        self.assertTrue(3 <= result['repetitions'] <= 5)
+        self.assertTrue(result['p50_latency'] <= result['p90_latency'] <= result['p99_latency'])
+
+    def test_save_results(self):
+        results = benchmark_architectures(['resnet18_cifar', 'not_an_architecture'], arch_params={'num_classes': 10},
+                                          output_path=os.path.join(self.tmp_dir, 'results.csv'), device='cpu',
+                                          batch_sizes=1, resolutions=(32,), **FAST_SETTINGS)
+        self.assertEqual([result['architecture'] for result in results], ['resnet18_cifar', 'not_an_architecture'])
+        self.assertIn('error', results[1])
+
+        with open(os.path.join(self.tmp_dir, 'results.csv')) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(rows[0]['architecture'], 'resnet18_cifar')
+        self.assertAlmostEqual(float(rows[0]['p50_latency']), results[0]['p50_latency'])
+
+        save_benchmark_results(results, os.path.join(self.tmp_dir, 'results.json'))
+        with open(os.path.join(self.tmp_dir, 'results.json')) as f:
+            self.assertEqual(json.load(f), results)
+
+        with self.assertRaises(ValueError):
+            save_benchmark_results(results, os.path.join(self.tmp_dir, 'results.txt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
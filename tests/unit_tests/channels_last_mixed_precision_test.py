@@ -0,0 +1,74 @@
+import unittest
+
+import torch
+
+from super_gradients import SgModel, ClassificationTestDatasetInterface
+from super_gradients.training.metrics import Accuracy, Top5
+from super_gradients.training.models import ResNet18
+from super_gradients.training.utils.callbacks import Phase, PhaseCallback
+
+
+class InputsRecorderCallback(PhaseCallback):
+    def __init__(self, phase: Phase):
+        super(InputsRecorderCallback, self).__init__(phase)
+        self.inputs, self.preds = [], []
+
+    def __call__(self, context):
+        self.inputs.append(context.inputs)
+        self.preds.append(context.preds)
+
+
+class ChannelsLastMixedPrecisionTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dataset = ClassificationTestDatasetInterface(dataset_params={"batch_size": 10})
+        self.train_params = {"max_epochs": 1, "lr_updates": [1], "lr_decay_factor": 0.1, "lr_mode": "step",
+                             "lr_warmup_epochs": 0, "initial_lr": 0.1, "loss": "cross_entropy", "optimizer": "SGD",
+                             "criterion_params": {}, "optimizer_params": {"weight_decay": 1e-4, "momentum": 0.9},
+                             "train_metrics_list": [Accuracy(), Top5()], "valid_metrics_list": [Accuracy(), Top5()],
+                             "loss_logging_items_names": ["Loss"], "metric_to_watch": "Accuracy",
+                             "greater_metric_to_watch_is_better": True, "average_best_models": False}
+
+    def _get_model(self, experiment_name: str) -> SgModel:
+        model = SgModel(experiment_name, model_checkpoints_location='local', device='cpu')
+        model.connect_dataset_interface(self.dataset)
+        model.build_model(ResNet18(num_classes=5, arch_params={}))
+        return model
+
+    def test_train_channels_last_bfloat16_on_cpu(self):
+        model = self._get_model("test_train_channels_last_bfloat16_on_cpu")
+        train_recorder = InputsRecorderCallback(Phase.TRAIN_BATCH_END)
+        valid_recorder = InputsRecorderCallback(Phase.VALIDATION_BATCH_END)
+        model.train({**self.train_params, "memory_format": "channels_last", "mixed_precision": True,
+                     "mixed_precision_dtype": "bfloat16", "phase_callbacks": [train_recorder, valid_recorder]})
+
+        self.assertTrue(model.net.module.conv1.weight.is_contiguous(memory_format=torch.channels_last))
+        # BFLOAT16 GRADIENTS ARE NOT SCALED
+        self.assertFalse(model.scaler.is_enabled())
+        for recorder in [train_recorder, valid_recorder]:
+            self.assertGreater(len(recorder.inputs), 0)
+            self.assertTrue(all(inputs.is_contiguous(memory_format=torch.channels_last)
+                                for inputs in recorder.inputs))
+            self.assertTrue(all(preds.dtype == torch.bfloat16 for preds in recorder.preds))
+
+    def test_default_memory_format_and_precision(self):
+        model = self._get_model("test_default_memory_format_and_precision")
+        valid_recorder = InputsRecorderCallback(Phase.VALIDATION_BATCH_END)
+        model.train({**self.train_params, "phase_callbacks": [valid_recorder]})
+
+        self.assertIsNone(model.memory_format)
+        self.assertTrue(all(preds.dtype == torch.float32 for preds in valid_recorder.preds))
+
+    def test_unsupported_params(self):
+        with self.assertRaises(ValueError):
+            self._get_model("test_unsupported_params").train({**self.train_params, "memory_format": "channels_first"})
+        with self.assertRaises(ValueError):
+            self._get_model("test_unsupported_params").train({**self.train_params, "mixed_precision": True,
+                                                              "mixed_precision_dtype": "float8"})
+        # FLOAT16 AUTOCAST IS CUDA ONLY
+        with self.assertRaises(AssertionError):
+            self._get_model("test_unsupported_params").train({**self.train_params, "mixed_precision": True})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from torch.utils.data import Dataset, TensorDataset
+from torchvision import transforms
+
+from super_gradients.training.datasets.datasets_utils import compute_dataset_statistics, RunningChannelMoments
+
+
+class RaggedImagesDataset(Dataset):
+    """
+    Images of different sizes with segmentation masks
+    """
+
+    def __init__(self, root: str = None, transform=None):
+        self.root = root
+        self.transform = transform
+        generator = torch.Generator()
+        generator.manual_seed(0)
+        self.images = [torch.rand(3, 8 + i % 3, 10 + i % 5, generator=generator) * (1 + i % 2) / 2 for i in range(20)]
+        self.masks = [torch.randint(0, 4, image.shape[1:], generator=generator) for image in self.images]
+
+    def __len__(self):
+        return len(self.images)
+
+    def __getitem__(self, index):
+        image = self.images[index] if self.transform is None else self.transform(self.images[index])
+        return image, self.masks[index]
+
+
+def compute_statistics_rank(rank: int, dataset: Dataset, tmp_dir: str):
+    dist.init_process_group('gloo', init_method=f"file://{os.path.join(tmp_dir, 'init_file')}", rank=rank,
+                            world_size=2)
+    try:
+        statistics = compute_dataset_statistics(dataset, num_workers=0, histogram_bins=10, device='cpu')
+        with open(os.path.join(tmp_dir, f'rank_{rank}.json'), 'w') as statistics_file:
+            json.dump(statistics, statistics_file)
+    finally:
+        dist.destroy_process_group()
+
+
+class ComputeDatasetStatisticsTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def test_running_channel_moments(self):
+        values = torch.randn(1000, 3, dtype=torch.float64) * torch.tensor([1., 2., 3.]) + 5.
+        moments = RunningChannelMoments()
+        for chunk in torch.split(values, [1, 10, 400, 589]):
+            moments.update(chunk)
+        self.assertTrue(torch.allclose(moments.mean, values.mean(0)))
+        self.assertTrue(torch.allclose(moments.std, values.std(0)))
+
+        images = torch.rand(6, 3, 4, 5)
+        moments = RunningChannelMoments()
+        moments.update_with_images(images[:2])
+        moments.update_with_images(images[2:])
+        pixels = images.permute(0, 2, 3, 1).reshape(-1, 3).double()
+        self.assertEqual(moments.count, len(pixels))
+        self.assertTrue(torch.allclose(moments.mean, pixels.mean(0)))
+        self.assertTrue(torch.allclose(moments.std, pixels.std(0)))
+
+    def test_statistics_of_ragged_dataset(self):
+        dataset = RaggedImagesDataset()
+        statistics = compute_dataset_statistics(dataset, batch_size=4, num_workers=0, histogram_bins=10, device='cpu')
+
+        pixels = torch.cat([image.reshape(3, -1) for image in dataset.images], dim=1).double()
+        np.testing.assert_allclose(statistics['mean'], pixels.mean(1).numpy(), rtol=1e-6)
+        np.testing.assert_allclose(statistics['std'], pixels.std(1).numpy(), rtol=1e-6)
+        self.assertEqual(statistics['num_images'], 20)
+        self.assertEqual(statistics['num_pixels'], pixels.shape[1])
+        self.assertEqual(statistics['mean_confidence_interval'], [0., 0., 0.])
+
+        self.assertEqual(len(statistics['histograms']), 3)
+        self.assertEqual([sum(histogram) for histogram in statistics['histograms']], [pixels.shape[1]] * 3)
+
+        masks = torch.cat([mask.reshape(-1) for mask in dataset.masks])
+        self.assertEqual(statistics['class_counts'], torch.bincount(masks).tolist())
+
+        statistics = compute_dataset_statistics(dataset, num_workers=0, ignore_index=0, device='cpu')
+        self.assertEqual(statistics['class_counts'][0], 0)
+
+    def test_subsampling(self):
+        inputs = torch.rand(200, 3, 4, 4) + torch.rand(200, 1, 1, 1)
+        dataset = TensorDataset(inputs, torch.randint(0, 5, (200,)))
+        statistics = compute_dataset_statistics(dataset, num_workers=0, num_samples=50, device='cpu')
+        self.assertEqual(statistics['num_images'], 50)
+        self.assertEqual(sum(statistics['class_counts']), 50)
+
+        # THE TRUE MEAN SHOULD FALL WITHIN A FEW CONFIDENCE INTERVALS OF THE ESTIMATE
+        true_mean = inputs.mean(dim=(0, 2, 3)).numpy()
+        interval = np.array(statistics['mean_confidence_interval'])
+        self.assertTrue((interval > 0).all())
+        self.assertTrue((np.abs(np.array(statistics['mean']) - true_mean) < 3 * interval).all())
+
+    def test_cache(self):
+        dataset = RaggedImagesDataset(root=self.tmp_dir)
+        statistics = compute_dataset_statistics(dataset, num_workers=0, device='cpu')
+        cache_path = os.path.join(self.tmp_dir, 'dataset_statistics.json')
+        self.assertTrue(os.path.isfile(cache_path))
+
+        # THE CACHED RESULT IS RETURNED WITHOUT ITERATING THE DATASET
+        dataset.masks = None
+        self.assertEqual(compute_dataset_statistics(dataset, num_workers=0, device='cpu'), statistics)
+
+        with open(cache_path, 'r') as cache_file:
+            self.assertEqual(json.load(cache_file)['statistics'], statistics)
+
+        # THE SAME IMAGES WITH ANOTHER TRANSFORM, OR ANOTHER SPLIT, UNDER THE SAME ROOT ARE NOT SERVED FROM THE CACHE
+        normalized_dataset = RaggedImagesDataset(root=self.tmp_dir, transform=transforms.Normalize(0.5, 0.5))
+        normalized_statistics = compute_dataset_statistics(normalized_dataset, num_workers=0, device='cpu')
+        np.testing.assert_allclose(normalized_statistics['mean'], (np.array(statistics['mean']) - 0.5) / 0.5, atol=1e-6)
+        dataset = RaggedImagesDataset(root=self.tmp_dir)
+        dataset.split = 'test'
+        dataset.images = [image / 2 for image in dataset.images]
+        self.assertNotEqual(compute_dataset_statistics(dataset, num_workers=0, device='cpu')['mean'],
+                            statistics['mean'])
+
+    @unittest.skipIf(not dist.is_available(), 'torch.distributed is not available')
+    def test_ddp_rank_without_samples(self):
+        # A SINGLE SAMPLE - THE SECOND RANK GETS NO SAMPLES
+        dataset = RaggedImagesDataset()
+        dataset.images, dataset.masks = dataset.images[:1], dataset.masks[:1]
+        mp.spawn(compute_statistics_rank, args=(dataset, self.tmp_dir), nprocs=2, join=True)
+
+        expected_statistics = compute_dataset_statistics(dataset, num_workers=0, histogram_bins=10, device='cpu')
+        for rank in range(2):
+            with open(os.path.join(self.tmp_dir, f'rank_{rank}.json'), 'r') as statistics_file:
+                statistics = json.load(statistics_file)
+            np.testing.assert_allclose(statistics['mean'], expected_statistics['mean'], rtol=1e-6)
+            np.testing.assert_allclose(statistics['std'], expected_statistics['std'], rtol=1e-6)
+            self.assertEqual(statistics['histograms'], expected_statistics['histograms'])
+            self.assertEqual(statistics['class_counts'], expected_statistics['class_counts'])
+
+
+if __name__ == '__main__':
+    unittest.main()
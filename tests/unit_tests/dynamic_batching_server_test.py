@@ -0,0 +1,107 @@
+import asyncio
+import unittest
+
+import numpy as np
+import torch
+
+from super_gradients.training.utils.detection_utils import DetectionPostPredictionCallback
+from super_gradients.training.utils.dynamic_batching_server import DynamicBatchingServer, benchmark_dynamic_batching
+from super_gradients.training.utils.inference_pipeline import InferencePipeline
+from tests.core_test_utils import async_test_runner
+
+
+class BatchRecordingModel(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.conv = torch.nn.Conv2d(3, 4, 1)
+        self.batch_sizes = []
+
+    def forward(self, x):
+        self.batch_sizes.append(x.shape[0])
+        return self.conv(x)
+
+
+class ImageBoxPostPredictionCallback(DetectionPostPredictionCallback):
+    """
+    Detects the white (non padded) area of the letterboxed inputs as a single box
+    """
+
+    def forward(self, x, device: str = None):
+        boxes = []
+        for image in x:
+            ys, xs = torch.nonzero(image[0] == 1., as_tuple=True)
+            boxes.append(torch.tensor([[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1, 1., 0.]]))
+        return boxes
+
+
+class DynamicBatchingServerTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        np.random.seed(0)
+        self.images = [np.random.randint(0, 256, size=(16, 24, 3), dtype=np.uint8) for _ in range(10)]
+
+    @async_test_runner
+    async def test_requests_are_batched(self):
+        pipeline = InferencePipeline(BatchRecordingModel(), fuse_model=False)
+        async with DynamicBatchingServer(pipeline, max_batch_size=4, max_wait_ms=100.) as server:
+            predictions = await asyncio.gather(*[server.predict(image) for image in self.images])
+
+        self.assertEqual(pipeline.net.batch_sizes, [4, 4, 2])
+        self.assertEqual(server.batch_sizes, [4, 4, 2])
+        for image, prediction in zip(self.images, predictions):
+            self.assertTrue(torch.allclose(prediction, pipeline(image)[0], atol=1e-6))
+
+    @async_test_runner
+    async def test_shape_buckets(self):
+        pipeline = InferencePipeline(torch.nn.Identity(), device='cpu', task='detection',
+                                     post_prediction_callback=ImageBoxPostPredictionCallback())
+        server = DynamicBatchingServer(pipeline, max_batch_size=8, shape_buckets=[(64, 64), (32, 64), (64, 32)])
+        self.assertEqual(server.get_bucket((100, 50)), (64, 32))
+        self.assertEqual(server.get_bucket((40, 80)), (32, 64))
+        self.assertEqual(server.get_bucket((50, 50)), (64, 64))
+
+        images = [np.full(shape, 255, dtype=np.uint8) for shape in [(100, 50, 3), (40, 80, 3), (50, 50, 3), (20, 40, 3)]]
+        await server.start()
+        predictions = await asyncio.gather(*[server.predict(image) for image in images])
+        await server.stop()
+
+        # TWO REQUESTS SHARE THE (32, 64) BUCKET
+        self.assertEqual(sorted(server.batch_sizes), [1, 1, 2])
+        # THE BOXES ARE MAPPED BACK TO THE ORIGINAL IMAGES
+        for image, prediction in zip(images, predictions):
+            height, width = image.shape[:2]
+            self.assertTrue(torch.allclose(prediction[0, :4], torch.tensor([0., 0., width, height]), atol=2.))
+
+    @async_test_runner
+    async def test_segmentation_masks_are_restored(self):
+        pipeline = InferencePipeline(torch.nn.Conv2d(3, 2, 1), task='segmentation')
+        async with DynamicBatchingServer(pipeline, shape_buckets=[(32, 32)]) as server:
+            predictions = await asyncio.gather(*[server.predict(image) for image in self.images])
+        self.assertTrue(all(prediction.shape == (16, 24) for prediction in predictions))
+
+    @async_test_runner
+    async def test_errors_are_propagated(self):
+        pipeline = InferencePipeline(torch.nn.Conv2d(3, 2, 1))
+        async with DynamicBatchingServer(pipeline) as server:
+            with self.assertRaises(RuntimeError):
+                await server.predict(np.zeros((16, 16, 5), dtype=np.uint8))
+            # THE SERVER KEEPS SERVING AFTER A FAILED BATCH
+            self.assertEqual((await server.predict(self.images[0])).shape, (2, 16, 24))
+
+        with self.assertRaises(RuntimeError):
+            await server.predict(self.images[0])
+
+    def test_benchmark(self):
+        pipeline = InferencePipeline(torch.nn.Conv2d(3, 2, 1))
+        logs = benchmark_dynamic_batching(pipeline, self.images, max_batch_sizes=(1, 4), num_requests=32,
+                                          concurrency=8, verbose=False)
+        self.assertEqual(set(logs.keys()), {1, 4})
+        self.assertEqual(logs[1]['mean_batch_size'], 1)
+        for log in logs.values():
+            self.assertLessEqual(log['p50_latency'], log['p99_latency'])
+            self.assertGreater(log['throughput'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
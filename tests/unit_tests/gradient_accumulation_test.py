@@ -0,0 +1,128 @@
+import contextlib
+import os
+import shutil
+import tempfile
+import unittest
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from torch import nn
+from torch.distributed.algorithms.ddp_comm_hooks import default_hooks
+from torch.utils.data import DataLoader, Subset, TensorDataset
+
+from super_gradients.training import SgModel
+from super_gradients.training.metrics import Accuracy
+
+WORLD_SIZE = 2
+MICRO_BATCH_SIZE = 4
+BATCH_ACCUMULATE = 4
+NUM_MICRO_BATCHES = 8
+
+
+class AlwaysSyncSgModel(SgModel):
+    """
+    The reference SgModel - every backward pass all-reduces the gradients, also of the accumulated batches
+    """
+
+    def _gradient_sync_context(self, epoch: int, batch_idx: int):
+        return contextlib.nullcontext()
+
+
+def small_net() -> nn.Module:
+    # NO BATCH NORM - THE PER-RANK BATCH STATISTICS WOULD DIFFER FROM THE SINGLE PROCESS ONES
+    return nn.Sequential(nn.Conv2d(3, 8, 3), nn.ReLU(), nn.Conv2d(8, 8, 3), nn.ReLU(), nn.AdaptiveAvgPool2d(1),
+                         nn.Flatten(), nn.Linear(8, 10))
+
+
+def training_params() -> dict:
+    return {"max_epochs": 1, "lr_mode": "step", "lr_updates": [1], "lr_decay_factor": 0.1, "lr_warmup_epochs": 0,
+            "initial_lr": 0.5, "loss": "cross_entropy", "optimizer": "SGD", "train_metrics_list": [Accuracy()],
+            "valid_metrics_list": [Accuracy()], "loss_logging_items_names": ["Loss"], "metric_to_watch": "Accuracy",
+            "greater_metric_to_watch_is_better": True, "average_best_models": False, "save_model": False,
+            "batch_accumulate": BATCH_ACCUMULATE, "clip_grad_norm": 0.1, "ema": True}
+
+
+def rank_indices(rank: int) -> list:
+    # MICRO-BATCH i OF THE RANK IS ITS SHARE OF MICRO-BATCH i OF THE SINGLE PROCESS TRAINING
+    global_batch_size = MICRO_BATCH_SIZE * WORLD_SIZE
+    return [i * global_batch_size + rank * MICRO_BATCH_SIZE + j
+            for i in range(NUM_MICRO_BATCHES) for j in range(MICRO_BATCH_SIZE)]
+
+
+def counting_allreduce_hook(state: dict, bucket):
+    state['allreduce_calls'] += 1
+    return default_hooks.allreduce_hook(None, bucket)
+
+
+def train_ddp_rank(rank: int, sg_model_cls: type, dataset: TensorDataset, initial_state: dict, tmp_dir: str):
+    # A NEW INIT FILE FOR EVERY RUN - THE FILE STORE MAY DELETE IT WHEN THE PROCESS GROUP IS DESTROYED
+    init_file = os.path.join(tmp_dir, f'{sg_model_cls.__name__}_init_file')
+    dist.init_process_group('gloo', init_method=f"file://{init_file}", rank=rank, world_size=WORLD_SIZE)
+    try:
+        loader = DataLoader(Subset(dataset, rank_indices(rank)), batch_size=MICRO_BATCH_SIZE)
+        model = sg_model_cls(f'{sg_model_cls.__name__}_{rank}', device='cpu', ckpt_root_dir=tmp_dir,
+                             train_loader=loader, valid_loader=loader, classes=list(range(10)))
+        net = small_net()
+        net.load_state_dict(initial_state)
+        model.build_model(net, arch_params={'num_classes': 10})
+        # CPU DDP OVER GLOO (SgModel BUILDS DDP FOR CUDA DEVICES ONLY)
+        model.net = nn.parallel.DistributedDataParallel(model.net.module)
+        state = {'allreduce_calls': 0}
+        model.net.register_comm_hook(state, counting_allreduce_hook)
+        model.train(training_params())
+        if rank == 0:
+            torch.save({'net': model.net.module.state_dict(), 'ema_net': model.ema_model.ema.module.state_dict(),
+                        'allreduce_calls': state['allreduce_calls']},
+                       os.path.join(tmp_dir, f'{sg_model_cls.__name__}.pth'))
+    finally:
+        dist.destroy_process_group()
+
+
+class GradientAccumulationTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        self.tmp_dir = tempfile.mkdtemp()
+        num_samples = NUM_MICRO_BATCHES * MICRO_BATCH_SIZE * WORLD_SIZE
+        self.dataset = TensorDataset(torch.rand(num_samples, 3, 16, 16), torch.randint(0, 10, (num_samples,)))
+        self.initial_state = small_net().state_dict()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def _train_single_process(self) -> SgModel:
+        loader = DataLoader(self.dataset, batch_size=MICRO_BATCH_SIZE * WORLD_SIZE)
+        model = SgModel('single_process', device='cpu', ckpt_root_dir=self.tmp_dir, train_loader=loader,
+                        valid_loader=loader, classes=list(range(10)))
+        net = small_net()
+        net.load_state_dict(self.initial_state)
+        model.build_model(net, arch_params={'num_classes': 10})
+        model.train(training_params())
+        return model
+
+    def _train_ddp(self, sg_model_cls: type) -> dict:
+        mp.spawn(train_ddp_rank, args=(sg_model_cls, self.dataset, self.initial_state, self.tmp_dir),
+                 nprocs=WORLD_SIZE, join=True)
+        return torch.load(os.path.join(self.tmp_dir, f'{sg_model_cls.__name__}.pth'))
+
+    @unittest.skipIf(not dist.is_available(), 'torch.distributed is not available')
+    def test_ddp_gradient_accumulation(self):
+        expected_model = self._train_single_process()
+        results = {sg_model_cls: self._train_ddp(sg_model_cls) for sg_model_cls in [SgModel, AlwaysSyncSgModel]}
+
+        # THE SAME WEIGHTS (AND EMA WEIGHTS, WITH THE CLIPPED ACCUMULATED GRADIENTS) AS THE SINGLE PROCESS TRAINING
+        for result in results.values():
+            for key, expected_value in expected_model.net.module.state_dict().items():
+                self.assertTrue(torch.allclose(result['net'][key], expected_value, atol=1e-5), key)
+            for key, expected_value in expected_model.ema_model.ema.module.state_dict().items():
+                self.assertTrue(torch.allclose(result['ema_net'][key], expected_value, atol=1e-5), key)
+
+        # A SINGLE ALL-REDUCE (ONE BUCKET) PER OPTIMIZER STEP INSTEAD OF ONE PER ACCUMULATED BATCH
+        allreduce_calls = {sg_model_cls.__name__: result['allreduce_calls'] for sg_model_cls, result in results.items()}
+        self.assertEqual(allreduce_calls['SgModel'], NUM_MICRO_BATCHES // BATCH_ACCUMULATE)
+        self.assertEqual(allreduce_calls['AlwaysSyncSgModel'], NUM_MICRO_BATCHES)
+
+
+if __name__ == '__main__':
+    unittest.main()
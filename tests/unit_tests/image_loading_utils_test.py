@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import torchvision.transforms as transform
+from PIL import Image
+
+from super_gradients.training.datasets.image_loading_utils import get_jpeg_reduction_factor, \
+    pil_reduced_resolution_loader, cv2_reduced_resolution_loader, get_rescale_target_sizes, benchmark_image_loaders
+from super_gradients.training.transforms.transforms import RandomFlip, Rescale, RandomRotate
+
+
+class ImageLoadingUtilsTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.mkdtemp()
+        self.jpeg_path = os.path.join(self.tmp_dir, 'sample.jpg')
+        self.png_path = os.path.join(self.tmp_dir, 'sample.png')
+        image = Image.fromarray(np.random.randint(0, 255, (1024, 2048, 3), dtype=np.uint8))
+        image.save(self.jpeg_path, quality=90)
+        image.save(self.png_path)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def test_reduction_factor(self):
+        self.assertEqual(get_jpeg_reduction_factor((2048, 1024)), 1)
+        self.assertEqual(get_jpeg_reduction_factor((2048, 1024), min_short_size=512), 2)
+        self.assertEqual(get_jpeg_reduction_factor((2048, 1024), min_short_size=100), 8)
+        self.assertEqual(get_jpeg_reduction_factor((2048, 1024), min_long_size=640), 2)
+        self.assertEqual(get_jpeg_reduction_factor((2048, 1024), min_long_size=2000), 1)
+        # ODD SIZES ARE ROUNDED UP BY LIBJPEG
+        self.assertEqual(get_jpeg_reduction_factor((1001, 1001), min_short_size=501), 2)
+
+    def test_pil_reduced_resolution_loader(self):
+        image = pil_reduced_resolution_loader(self.jpeg_path, min_short_size=256)
+        self.assertEqual(image.mode, 'RGB')
+        self.assertEqual(image.size, (512, 256))
+
+        # NEVER DECODES BELOW THE REQUESTED SIZE
+        image = pil_reduced_resolution_loader(self.jpeg_path, min_short_size=300)
+        self.assertEqual(image.size, (1024, 512))
+
+        # DRAFT MODE IS NOT APPLICABLE FOR PNG
+        image = pil_reduced_resolution_loader(self.png_path, min_short_size=256)
+        self.assertEqual(image.size, (2048, 1024))
+
+    def test_cv2_reduced_resolution_loader(self):
+        image = cv2_reduced_resolution_loader(self.jpeg_path, min_long_size=640)
+        self.assertEqual(image.shape, (512, 1024, 3))
+
+        image = cv2_reduced_resolution_loader(self.png_path, min_long_size=640)
+        self.assertEqual(image.shape, (1024, 2048, 3))
+
+    def test_get_rescale_target_sizes(self):
+        self.assertEqual(get_rescale_target_sizes(transform.Compose([RandomFlip(), Rescale(short_size=512)])),
+                         (512, None))
+        self.assertEqual(get_rescale_target_sizes(transform.Compose([Rescale(long_size=640)])), (None, 640))
+        self.assertEqual(get_rescale_target_sizes(transform.Compose([RandomRotate(), Rescale(short_size=512)])),
+                         (None, None))
+        self.assertEqual(get_rescale_target_sizes(transform.Compose([Rescale(scale_factor=0.5)])), (None, None))
+
+    def test_benchmark_image_loaders(self):
+        results = benchmark_image_loaders([self.jpeg_path], loaders={
+            'full': lambda path: Image.open(path).convert('RGB'),
+            'reduced': lambda path: pil_reduced_resolution_loader(path, min_short_size=256)})
+        self.assertEqual(results['full']['mean_pixels'], 2048 * 1024)
+        self.assertEqual(results['reduced']['mean_pixels'], 512 * 256)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+
+import torch
+import torch.nn as nn
+
+from super_gradients.training.models import ARCHITECTURES
+from super_gradients.training.models.detection_models.csp_darknet53 import Conv
+from super_gradients.training.utils import HpmStruct
+from super_gradients.training.utils.export_utils import ExportableSiLU
+from super_gradients.training.utils.inference_optimization import optimize_for_inference
+from super_gradients.training.utils.module_utils import ConvBNReLU, NormalizationAdapter
+from super_gradients.training.utils.regularization_utils import DropPath
+
+
+class ReversedRegistrationBlock(nn.Module):
+    """
+    The BatchNorm is registered before the convolution, so its children are not adjacent Conv -> BN pairs
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.bn = nn.BatchNorm2d(8)
+        self.conv = nn.Conv2d(8, 8, 3, padding=1)
+        self.shared_conv = nn.Conv2d(8, 8, 1)
+        self.shared_bn = nn.BatchNorm2d(8)
+        self.drop_path = DropPath(drop_prob=0.2)
+
+    def forward(self, x):
+        x = x + self.drop_path(self.bn(self.conv(x)))
+        # THE OUTPUT OF shared_conv IS USED TWICE, SO IT CAN NOT BE FUSED WITH shared_bn
+        y = self.shared_conv(x)
+        return self.shared_bn(y) + y
+
+
+class OptimizationTestModel(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.adapter = NormalizationAdapter([0.5, 0.4, 0.3], [0.2, 0.25, 0.3], [0.45, 0.45, 0.45], [0.22, 0.22, 0.22])
+        self.stem = nn.Conv2d(3, 8, 1)
+        self.conv_bn_relu = ConvBNReLU(8, 8, 3, padding=1)
+        self.yolo_conv = Conv(8, 8, 3, 1, ExportableSiLU)
+        self.block = ReversedRegistrationBlock()
+        self.dropout = nn.Dropout(0.5)
+        self.fc = nn.Linear(8, 10)
+
+    def forward(self, x):
+        x = self.block(self.yolo_conv(self.conv_bn_relu(self.stem(self.adapter(x)))))
+        return self.fc(self.dropout(x.mean((2, 3))))
+
+
+def randomize_batchnorm_statistics(model: nn.Module):
+    for module in model.modules():
+        if isinstance(module, nn.BatchNorm2d):
+            module.running_mean.uniform_(-0.5, 0.5)
+            module.running_var.uniform_(0.5, 2.)
+            module.weight.data.uniform_(0.5, 1.5)
+            module.bias.data.uniform_(-0.5, 0.5)
+
+
+class InferenceOptimizationTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+
+    def test_optimizations(self):
+        model = OptimizationTestModel()
+        randomize_batchnorm_statistics(model)
+        optimized_model, report = optimize_for_inference(model, input_size=(2, 3, 16, 16), latency_repetitions=2,
+                                                         verbose=False)
+
+        self.assertEqual(report['conv_bn_fusions'], 3)
+        self.assertEqual(report['normalization_adapters_folded'], 1)
+        self.assertEqual(report['dropouts_removed'], 2)
+        self.assertEqual(report['activations_swapped'], 1)
+        self.assertLess(report['max_abs_diff'], 1e-4)
+        self.assertIn('latency_after', report)
+
+        # THE MODULE STRUCTURE IS KEPT, THE FUSED LAYERS ARE REPLACED
+        self.assertIsInstance(optimized_model, OptimizationTestModel)
+        self.assertIsInstance(optimized_model.conv_bn_relu.seq.bn, nn.Identity)
+        self.assertIsInstance(optimized_model.yolo_conv.bn, nn.Identity)
+        self.assertIsInstance(optimized_model.yolo_conv.act, nn.SiLU)
+        self.assertIsInstance(optimized_model.block.bn, nn.Identity)
+        self.assertIsInstance(optimized_model.block.shared_bn, nn.BatchNorm2d)
+        self.assertIsInstance(optimized_model.adapter, nn.Identity)
+
+        # THE ORIGINAL MODEL IS LEFT UNTOUCHED
+        self.assertIsInstance(model.block.bn, nn.BatchNorm2d)
+        self.assertTrue(model.training)
+
+    def test_padded_convolution_keeps_the_normalization_adapter(self):
+        model = nn.Sequential(NormalizationAdapter([0.5] * 3, [0.2] * 3, [0.4] * 3, [0.3] * 3), nn.Conv2d(3, 4, 3, padding=1))
+        optimized_model, report = optimize_for_inference(model, input_size=(1, 3, 8, 8), latency_repetitions=0,
+                                                         verbose=False)
+        self.assertEqual(report['normalization_adapters_folded'], 0)
+        self.assertIsInstance(optimized_model[0], NormalizationAdapter)
+
+    def test_architectures(self):
+        for architecture, input_size in [('resnet18_cifar', (2, 3, 32, 32)), ('repvgg_a0', (2, 3, 64, 64)),
+                                         ('yolo_v5s', (1, 3, 64, 64))]:
+            model = ARCHITECTURES[architecture](arch_params=HpmStruct(num_classes=10, build_residual_branches=True))
+            randomize_batchnorm_statistics(model)
+            optimized_model, report = optimize_for_inference(model, input_size=input_size, latency_repetitions=0,
+                                                             verbose=False)
+            self.assertIsInstance(optimized_model, type(model))
+            self.assertFalse(any(isinstance(module, nn.BatchNorm2d) for module in optimized_model.modules()),
+                             f'Not all the BatchNorms of {architecture} were folded')
+            if architecture == 'repvgg_a0':
+                self.assertGreater(report['repvgg_blocks'], 0)
+            else:
+                self.assertGreater(report['conv_bn_fusions'], 0)
+
+    def test_verification_failure(self):
+        class NonDeterministicModel(nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.conv = nn.Conv2d(3, 3, 1)
+
+            def forward(self, x):
+                return self.conv(x) + torch.rand_like(x)
+
+        with self.assertRaises(RuntimeError):
+            optimize_for_inference(NonDeterministicModel(), input_size=(1, 3, 8, 8), latency_repetitions=0,
+                                   verbose=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+
+import numpy as np
+import torch
+
+from super_gradients import SgModel
+from super_gradients.training.models.detection_models.yolov5 import YoloV5PostPredictionCallback
+from super_gradients.training.utils.inference_pipeline import InferencePipeline
+
+
+class InferencePipelineTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        np.random.seed(0)
+        self.images = np.random.randint(0, 256, size=(10, 32, 32, 3), dtype=np.uint8)
+        self.mean, self.std = (0.4914, 0.4822, 0.4465), (0.2023, 0.1994, 0.2010)
+
+    def _expected_inputs(self, images):
+        inputs = torch.from_numpy(images).permute(0, 3, 1, 2).float() / 255
+        return (inputs - torch.tensor(self.mean).view(1, 3, 1, 1)) / torch.tensor(self.std).view(1, 3, 1, 1)
+
+    def _build_model(self, architecture, num_classes=10, **kwargs):
+        model = SgModel('inference_pipeline_test', model_checkpoints_location='local', device='cpu', **kwargs)
+        model.build_model(architecture, arch_params={'num_classes': num_classes})
+        # RANDOM BATCHNORM STATISTICS, SO THAT FUSING THEM IS NOT A NO-OP
+        for module in model.net.modules():
+            if isinstance(module, torch.nn.BatchNorm2d):
+                module.running_mean.uniform_(-0.1, 0.1)
+                module.running_var.uniform_(0.5, 1.5)
+        return model
+
+    def test_preprocess(self):
+        pipeline = InferencePipeline(torch.nn.Conv2d(3, 4, 1), mean=self.mean, std=self.std)
+        expected = self._expected_inputs(self.images)
+        self.assertTrue(torch.allclose(pipeline.preprocess(self.images), expected, atol=1e-5))
+        self.assertTrue(torch.allclose(pipeline.preprocess(list(self.images)), expected, atol=1e-5))
+        self.assertTrue(torch.allclose(pipeline.preprocess(self.images[0]), expected[:1], atol=1e-5))
+
+        # FLOAT TENSORS ARE TAKEN AS (N, C, H, W) AND ARE NOT RESCALED
+        tensor = torch.from_numpy(self.images).permute(0, 3, 1, 2).float() / 255
+        self.assertTrue(torch.allclose(pipeline.preprocess(tensor), expected, atol=1e-5))
+
+        pipeline = InferencePipeline(torch.nn.Conv2d(3, 4, 1), channels_last=True)
+        self.assertTrue(pipeline.preprocess(self.images).is_contiguous(memory_format=torch.channels_last))
+
+    def test_classification_matches_the_network(self):
+        model = self._build_model('resnet18_cifar')
+        pipeline = InferencePipeline.from_sg_model(model, mean=self.mean, std=self.std, batch_size=4)
+
+        # THE PIPELINE WORKS ON A FUSED COPY, THE ORIGINAL NETWORK IS LEFT UNTOUCHED
+        self.assertTrue(model.net.training)
+        self.assertFalse(any(isinstance(module, torch.nn.BatchNorm2d) for module in pipeline.net.modules()))
+
+        model.net.eval()
+        with torch.no_grad():
+            expected = model.net(self._expected_inputs(self.images))
+        outputs = pipeline(self.images)
+        self.assertEqual(outputs.shape, (10, 10))
+        self.assertTrue(torch.allclose(outputs, expected, atol=1e-4))
+
+        streamed = torch.stack(list(pipeline.stream(iter(self.images))))
+        self.assertTrue(torch.allclose(streamed, expected, atol=1e-4))
+
+    def test_stream_mixed_sizes(self):
+        pipeline = InferencePipeline(torch.nn.Conv2d(3, 2, 1), task='segmentation', batch_size=3)
+        images = [np.random.randint(0, 256, size=(16 + 8 * (i // 4), 24, 3), dtype=np.uint8) for i in range(8)]
+        predictions = list(pipeline.stream(images))
+        self.assertEqual(len(predictions), 8)
+        for image, prediction in zip(images, predictions):
+            self.assertEqual(prediction.shape, image.shape[:2])
+            self.assertTrue(torch.equal(prediction, pipeline(image)[0]))
+
+    def test_detection_post_processing(self):
+        model = self._build_model('yolo_v5s', num_classes=80, post_prediction_callback=YoloV5PostPredictionCallback())
+        pipeline = InferencePipeline.from_sg_model(model, batch_size=2)
+        self.assertEqual(pipeline.task, 'detection')
+
+        images = np.random.randint(0, 256, size=(3, 64, 64, 3), dtype=np.uint8)
+        predictions = pipeline(images)
+        self.assertEqual(len(predictions), 3)
+        self.assertEqual(len(list(pipeline.stream(images))), 3)
+
+    def test_invalid_task(self):
+        with self.assertRaises(ValueError):
+            InferencePipeline(torch.nn.Conv2d(3, 2, 1), task='captioning')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import copy
+import unittest
+
+import torch
+
+from super_gradients.training.losses.kd_losses import KDLogitsLoss
+from super_gradients.training.models.classification_models.resnet import ResNet18, ResNet50
+from super_gradients.training.models.kd_modules.kd_module import KDModule
+from super_gradients.training.utils import HpmStruct
+
+
+def reference_kd_forward(kd_module: KDModule, x):
+    """
+    The reference KDModule.forward - the teacher runs in the student's autograd context, precision and device
+    """
+    return kd_module.student(x), kd_module.teacher(x)
+
+
+class KDModuleTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        self.student = ResNet18(arch_params=HpmStruct(num_classes=10))
+        self.teacher = ResNet50(arch_params=HpmStruct(num_classes=10))
+
+    def _kd_module(self, run_teacher_on_eval=True, **arch_params) -> KDModule:
+        return KDModule(arch_params=HpmStruct(**arch_params), student=copy.deepcopy(self.student),
+                        teacher=copy.deepcopy(self.teacher), run_teacher_on_eval=run_teacher_on_eval)
+
+    def test_inference_mode_teacher(self):
+        kd_module = self._kd_module()
+        # INPUTS THAT REQUIRE GRAD - THE TEACHER'S ACTIVATIONS ARE STILL NOT RECORDED
+        x = torch.rand(2, 3, 32, 32, requires_grad=True)
+        output = kd_module(x)
+        _, expected_teacher_output = reference_kd_forward(kd_module, x)
+        self.assertIsNotNone(expected_teacher_output.grad_fn)
+        self.assertIsNone(output.teacher_output.grad_fn)
+        self.assertFalse(output.teacher_output.is_inference())
+        self.assertTrue(torch.allclose(output.teacher_output, expected_teacher_output, atol=1e-5))
+
+        # THE TEACHER OUTPUT IS USED IN THE LOSS BACKWARD PASS
+        loss, _ = KDLogitsLoss(torch.nn.CrossEntropyLoss())(output, torch.randint(0, 10, (2,)))
+        loss.backward()
+        self.assertIsNotNone(x.grad)
+
+    def test_teacher_in_train_mode(self):
+        kd_module = self._kd_module(run_teacher_on_eval=False)
+        kd_module.train()
+        running_mean = kd_module.teacher.bn1.running_mean.clone()
+        kd_module(torch.rand(2, 3, 32, 32))
+        self.assertFalse(torch.equal(running_mean, kd_module.teacher.bn1.running_mean))
+
+    def test_reduced_precision_channels_last_teacher(self):
+        kd_module = self._kd_module(teacher_dtype='bfloat16', teacher_memory_format='channels_last')
+        # THE PLACEMENT OF THE TEACHER IS KEPT WHEN THE KD MODULE IS MOVED
+        kd_module = kd_module.to('cpu').float()
+        self.assertEqual(kd_module.teacher.conv1.weight.dtype, torch.bfloat16)
+        self.assertTrue(kd_module.teacher.conv1.weight.is_contiguous(memory_format=torch.channels_last))
+        self.assertEqual(kd_module.student.conv1.weight.dtype, torch.float32)
+
+        x = torch.rand(2, 3, 32, 32)
+        output = kd_module(x)
+        with torch.no_grad():
+            expected_teacher_output = self.teacher.eval()(x)
+        self.assertEqual(output.teacher_output.dtype, torch.float32)
+        self.assertTrue(torch.allclose(output.teacher_output, expected_teacher_output, rtol=0.1, atol=0.1))
+
+    def test_unsupported_teacher_dtype(self):
+        with self.assertRaises(ValueError):
+            self._kd_module(teacher_dtype='float64')
+
+    @unittest.skipIf(not torch.cuda.is_available(), 'CUDA is not available')
+    def test_teacher_stream_and_device(self):
+        teacher_device = f'cuda:{torch.cuda.device_count() - 1}'
+        kd_module = self._kd_module(teacher_stream=True, teacher_device=teacher_device).to('cuda:0')
+        self.assertEqual(str(kd_module.teacher.conv1.weight.device), teacher_device)
+        x = torch.rand(2, 3, 32, 32, device='cuda:0')
+        output = kd_module(x)
+        with torch.no_grad():
+            expected_teacher_output = self.teacher.eval().to('cuda:0')(x)
+        self.assertEqual(output.teacher_output.device, x.device)
+        self.assertTrue(torch.allclose(output.teacher_output, expected_teacher_output, atol=1e-4))
+
+
+if __name__ == '__main__':
+    unittest.main()
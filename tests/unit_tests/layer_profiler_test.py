@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import torch
+import torch.nn as nn
+
+from super_gradients.training.utils.layer_profiler import LayerProfiler, count_module_macs_and_flops, \
+    profile_model_layers
+
+
+class SharedActivationModel(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.block = nn.Sequential(nn.Conv2d(3, 8, 3, padding=1, bias=False), nn.BatchNorm2d(8))
+        self.act = nn.ReLU()
+        self.fc = nn.Linear(8, 10)
+
+    def forward(self, x):
+        x = self.act(self.block(x))
+        x = self.act(x.mean((2, 3)))
+        return self.fc(x)
+
+
+class LayerProfilerTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.model = SharedActivationModel()
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def test_count_macs_and_flops(self):
+        conv = nn.Conv2d(4, 6, 3, groups=2)
+        macs, flops = count_module_macs_and_flops(conv, (torch.rand(1, 4, 10, 10),), torch.rand(1, 6, 8, 8))
+        self.assertEqual(macs, 6 * 8 * 8 * 2 * 9)
+        self.assertEqual(flops, 2 * macs + 6 * 8 * 8)
+
+        linear = nn.Linear(5, 3, bias=False)
+        self.assertEqual(count_module_macs_and_flops(linear, (torch.rand(2, 5),), torch.rand(2, 3)), (30, 60))
+        self.assertEqual(count_module_macs_and_flops(nn.ReLU(), (torch.rand(2, 5),), torch.rand(2, 5)), (0, 10))
+
+    def test_stats(self):
+        with LayerProfiler(self.model, input_dims=(3, 16, 16), batch_size=2, device='cpu') as profiler:
+            stats = profiler.profile(iterations=5, warmup=1)
+
+        self.assertEqual(list(stats.keys()), ['block.0', 'block.1', 'block', 'act', 'fc', ''])
+        self.assertEqual(stats['block.0']['output_shape'], [2, 8, 16, 16])
+        self.assertEqual(stats['block.0']['macs'], 2 * 8 * 16 * 16 * 3 * 9)
+        self.assertEqual(stats['block.0']['activation_memory'], 2 * 8 * 16 * 16 * 4)
+        self.assertEqual(stats['fc']['params'], 8 * 10 + 10)
+
+        # BLOCKS AGGREGATE THEIR LAYERS
+        self.assertTrue(stats['block']['is_block'])
+        self.assertEqual(stats['block']['macs'], stats['block.0']['macs'])
+        self.assertEqual(stats['block']['flops'], stats['block.0']['flops'] + stats['block.1']['flops'])
+        self.assertEqual(stats['']['params'], sum(p.numel() for p in self.model.parameters()))
+        self.assertEqual(stats['']['macs'], sum(stats[name]['macs'] for name in ['block.0', 'fc']))
+
+        # THE SHARED ACTIVATION IS COUNTED FOR BOTH OF ITS CALLS
+        self.assertEqual(stats['act']['calls'], 2)
+        self.assertEqual(stats['act']['flops'], 2 * 8 * 16 * 16 + 2 * 8)
+
+        for name, layer_stats in stats.items():
+            self.assertGreater(layer_stats['time'], 0)
+        self.assertGreaterEqual(stats['']['time'], stats['block']['time'])
+
+        table = profiler.get_table(max_depth=1)
+        self.assertIn('Total MACs', table)
+        self.assertNotIn('BatchNorm2d', table)
+
+    def test_hooks_are_registered_once_and_removed(self):
+        profiler = LayerProfiler(self.model, input_dims=(3, 16, 16), device='cpu')
+        num_hooks = sum(len(module._forward_hooks) + len(module._forward_pre_hooks) for module in self.model.modules())
+        self.assertEqual(num_hooks, 2 * len(list(self.model.modules())))
+
+        profiler.profile(iterations=3, warmup=1)
+        self.assertEqual(sum(len(module._forward_hooks) for module in self.model.modules()), num_hooks // 2)
+
+        profiler.remove_hooks()
+        self.assertEqual(sum(len(module._forward_hooks) for module in self.model.modules()), 0)
+
+    def test_chrome_trace(self):
+        trace_path = os.path.join(self.tmp_dir, 'trace.json')
+        stats, table = profile_model_layers(self.model, (3, 16, 16), device='cpu', iterations=2, warmup=1,
+                                            trace_path=trace_path)
+        self.assertIn('fc', stats)
+        with open(trace_path) as f:
+            event_names = {event.get('name') for event in json.load(f)['traceEvents']}
+        self.assertIn('block.0 (Conv2d)', event_names)
+        self.assertIn('model (SharedActivationModel)', event_names)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+
+import numpy as np
+import torch
+from torch.utils.data import TensorDataset, DataLoader
+
+from super_gradients import SgModel
+from super_gradients.training.datasets.mixup import CollateMixup, bbox_to_mask
+from super_gradients.training.metrics import Accuracy
+
+
+class MixupTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        np.random.seed(0)
+        self.num_classes = 5
+        self.batch = [(torch.rand(3, 16, 24), i % self.num_classes) for i in range(8)]
+        self.inputs = torch.stack([b[0] for b in self.batch])
+
+    def _assert_soft_targets(self, targets, batch_size):
+        self.assertEqual(targets.shape, (batch_size, self.num_classes))
+        self.assertTrue(torch.allclose(targets.sum(1), torch.ones(batch_size)))
+
+    def test_bbox_to_mask(self):
+        masks = bbox_to_mask((np.array([0, 2]), np.array([4, 3]), np.array([1, 0]), np.array([3, 5])), (10, 6))
+        self.assertEqual(masks.shape, (2, 1, 10, 6))
+        self.assertEqual(masks[0].sum().item(), 4 * 2)
+        self.assertEqual(masks[1].sum().item(), 1 * 5)
+        self.assertTrue(masks[0, 0, :4, 1:3].all())
+
+    def test_elem_mixup(self):
+        collate = CollateMixup(mixup_alpha=1., cutmix_alpha=0., mode='elem', num_classes=self.num_classes,
+                               label_smoothing=0.)
+        output, targets = collate(self.batch)
+        self.assertEqual(output.shape, self.inputs.shape)
+        self._assert_soft_targets(targets, 8)
+
+        # THE MIXED IMAGE IS THE BLEND OF i AND batch_size - i - 1 WITH THE WEIGHT OF ITS OWN LABEL
+        for i in range(8):
+            lam = targets[i, self.batch[i][1]].item() if self.batch[i][1] != self.batch[7 - i][1] else None
+            if lam is not None:
+                expected = self.inputs[i] * lam + self.inputs[7 - i] * (1 - lam)
+                self.assertTrue(torch.allclose(output[i], expected, atol=1e-5))
+
+    def test_elem_cutmix(self):
+        collate = CollateMixup(mixup_alpha=0., cutmix_alpha=1., mode='elem', num_classes=self.num_classes)
+        output, _ = collate(self.batch)
+
+        # EVERY PIXEL COMES EITHER FROM THE ELEMENT ITSELF OR FROM ITS MIXING PARTNER
+        own = (output == self.inputs).all(1)
+        partner = (output == self.inputs.flip(0)).all(1)
+        self.assertTrue((own | partner).all())
+
+    def test_half_mode(self):
+        collate = CollateMixup(mixup_alpha=1., cutmix_alpha=1., mode='half', num_classes=self.num_classes)
+        output, targets = collate(self.batch)
+        self.assertEqual(output.shape, (4, 3, 16, 24))
+        self._assert_soft_targets(targets, 4)
+
+    def test_pair_cutmix_swaps_patches(self):
+        collate = CollateMixup(mixup_alpha=0., cutmix_alpha=1., mode='pair', num_classes=self.num_classes)
+        output, _ = collate(self.batch)
+        for i in range(4):
+            j = 7 - i
+            swapped = (output[i] == self.inputs[j]).all(0) & (output[i] != self.inputs[i]).any(0)
+            # THE PAIR EXCHANGES THE SAME BBOX
+            self.assertTrue(torch.equal(output[j][:, swapped], self.inputs[i][:, swapped]))
+
+    def test_pair_mixup_targets(self):
+        collate = CollateMixup(mixup_alpha=1., cutmix_alpha=0., mode='pair', num_classes=self.num_classes)
+        output, targets = collate(self.batch)
+        self.assertEqual(output.shape, self.inputs.shape)
+        self._assert_soft_targets(targets, 8)
+
+    def test_batch_mode(self):
+        collate = CollateMixup(mixup_alpha=1., cutmix_alpha=1., mode='batch', num_classes=self.num_classes)
+        output, targets = collate(self.batch)
+        self.assertEqual(output.shape, self.inputs.shape)
+        self._assert_soft_targets(targets, 8)
+
+    def test_mix_on_device(self):
+        collate = CollateMixup(mixup_alpha=1., cutmix_alpha=1., mode='elem', num_classes=self.num_classes,
+                               mix_on_device=True)
+        inputs, targets = collate(self.batch)
+        self.assertTrue(torch.equal(inputs, self.inputs))
+        self.assertEqual(targets.tolist(), [b[1] for b in self.batch])
+
+        output, soft_targets = collate.mix(inputs, targets)
+        self.assertEqual(output.shape, self.inputs.shape)
+        self._assert_soft_targets(soft_targets, 8)
+
+    def test_train_with_mix_on_device(self):
+        inputs, labels = torch.randn(16, 3, 32, 32), torch.randint(0, self.num_classes, size=(16,))
+        collate = CollateMixup(mixup_alpha=1., cutmix_alpha=1., mode='elem', num_classes=self.num_classes,
+                               mix_on_device=True)
+        train_loader = DataLoader(TensorDataset(inputs, labels), batch_size=8, collate_fn=collate)
+        valid_loader = DataLoader(TensorDataset(inputs, labels), batch_size=8)
+
+        model = SgModel("mixup_on_device_test", model_checkpoints_location='local', train_loader=train_loader,
+                        valid_loader=valid_loader, classes=list(range(self.num_classes)))
+        model.build_model("resnet18_cifar", arch_params={"num_classes": self.num_classes})
+        train_params = {"max_epochs": 1, "lr_updates": [1], "lr_decay_factor": 0.1, "lr_mode": "step",
+                        "lr_warmup_epochs": 0, "initial_lr": 0.1, "loss": torch.nn.CrossEntropyLoss(),
+                        "optimizer": "SGD", "criterion_params": {}, "optimizer_params": {"momentum": 0.9},
+                        "train_metrics_list": [Accuracy()], "valid_metrics_list": [Accuracy()],
+                        "metric_to_watch": "Accuracy", "greater_metric_to_watch_is_better": True}
+        model.train(train_params)
+
+    def test_odd_batch_size(self):
+        collate = CollateMixup(mode='elem', num_classes=self.num_classes)
+        with self.assertRaises(Exception):
+            collate(self.batch[:-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import torch
+
+from super_gradients.training.models import ARCHITECTURES
+from super_gradients.training.utils import HpmStruct
+from super_gradients.training.utils.model_export import DetectionModelWithNMS, create_onnxruntime_session, \
+    export_model
+from super_gradients.training.utils.ssd_utils import DefaultBoxes
+
+
+class ModelExportTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.output_dir)
+
+    def test_classification_export_and_benchmark(self):
+        model = ARCHITECTURES['resnet18_cifar'](arch_params=HpmStruct(num_classes=10))
+        _, report = export_model(model, self.output_dir, 'resnet18_cifar', input_size=(1, 3, 32, 32), benchmark=True,
+                                 batch_sizes=(1, 2), verbose=False)
+
+        self.assertTrue(os.path.exists(report['onnx_path']))
+        self.assertTrue(os.path.exists(report['torchscript_path']))
+        self.assertLess(report['onnx_max_abs_diff'], 1e-4)
+        self.assertLess(report['torchscript_max_abs_diff'], 1e-4)
+        self.assertEqual({(result['runtime'], result['batch_size']) for result in report['benchmark']},
+                         {(runtime, batch_size) for runtime in ['pytorch', 'onnxruntime', 'torchscript']
+                          for batch_size in [1, 2]})
+        self.assertEqual(set(report['fastest_runtime'].keys()), {1, 2})
+
+        # THE ORIGINAL MODEL IS LEFT UNTOUCHED
+        self.assertTrue(model.training)
+
+    def test_yolov5_export_with_nms(self):
+        model = ARCHITECTURES['yolo_v5s'](arch_params=HpmStruct(num_classes=10))
+        # WITH THE INITIAL BIASES OF THE DETECT HEAD ALMOST ALL THE CONFIDENCES ARE BELOW THE THRESHOLD
+        for conv in model._head._modules_list[-1].m:
+            torch.nn.init.zeros_(conv.bias)
+        prepared_model, report = export_model(model, self.output_dir, 'yolo_v5s', input_size=(1, 3, 64, 64),
+                                              embed_nms=True, nms_conf=0.1, verbose=False)
+        self.assertIsInstance(prepared_model, DetectionModelWithNMS)
+        self.assertLess(report['onnx_max_abs_diff'], 1e-3)
+
+        # THE BATCH SIZE OF THE EXPORTED NMS IS DYNAMIC
+        session = create_onnxruntime_session(report['onnx_path'])
+        detections = session.run(None, {session.get_inputs()[0].name: torch.rand(3, 3, 64, 64).numpy()})[0]
+        self.assertEqual(detections.shape[1], 7)
+        self.assertGreater(len(detections), 0)
+        self.assertTrue(set(detections[:, 0].tolist()) <= {0., 1., 2.})
+
+    def test_ssd_export_with_nms(self):
+        model = ARCHITECTURES['ssd_mobilenet_v1'](arch_params=HpmStruct(num_classes=10))
+        # THE DEFAULT BOXES OF THE FEATURE MAPS OF ssd_mobilenet_v1 (38, 19, 10, 5, 3, 2) FOR 300x300 INPUTS
+        dboxes = DefaultBoxes(300, [38, 19, 10, 5, 3, 2], [8, 16, 32, 64, 100, 150], [21, 45, 99, 153, 207, 261, 315],
+                              [[2], [2, 3], [2, 3], [2, 3], [2], [2]])
+        _, report = export_model(model, self.output_dir, 'ssd', input_size=(1, 3, 300, 300), formats=['onnx'],
+                                 embed_nms=True, nms_conf=0.05, dboxes=dboxes, verbose=False)
+        self.assertLess(report['onnx_max_abs_diff'], 1e-3)
+        self.assertNotIn('torchscript_path', report)
+
+        session = create_onnxruntime_session(report['onnx_path'])
+        detections = session.run(None, {session.get_inputs()[0].name: torch.rand(1, 3, 300, 300).numpy()})[0]
+        self.assertEqual(detections.shape[1], 7)
+        # THE BACKGROUND CLASS (0) IS NEVER DETECTED
+        self.assertTrue((detections[:, 6] >= 1).all())
+
+    def test_unsupported_exports(self):
+        model = ARCHITECTURES['resnet18_cifar'](arch_params=HpmStruct(num_classes=10))
+        with self.assertRaises(ValueError):
+            export_model(model, self.output_dir, formats=['tflite'], verbose=False)
+        with self.assertRaises(ValueError):
+            export_model(model, self.output_dir, input_size=(1, 3, 32, 32), embed_nms=True, verbose=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+import torch
+
+from super_gradients.training.utils.callbacks import MultiScaleResizeCallback, PhaseContext, Phase
+
+
+class MultiScaleResizeCallbackTest(unittest.TestCase):
+
+    def test_sizes_are_synchronized(self):
+        # TWO INSTANCES WITH THE SAME SEED EMULATE TWO DDP RANKS
+        rank_0, rank_1 = MultiScaleResizeCallback(target_size=320), MultiScaleResizeCallback(target_size=320)
+        sizes_0 = [rank_0.get_size(epoch, batch_idx) for epoch in range(3) for batch_idx in range(50)]
+        sizes_1 = [rank_1.get_size(epoch, batch_idx) for epoch in range(3) for batch_idx in range(50)]
+        self.assertEqual(sizes_0, sizes_1)
+
+        # THE SIZE CHANGES ONLY EVERY change_frequency BATCHES, AND ONLY WITHIN THE FIXED SET OF SIZES
+        self.assertEqual(len(set(sizes_0[:10])), 1)
+        self.assertTrue(set(sizes_0).issubset(set(rank_0.sizes.tolist())))
+        self.assertGreater(len(set(sizes_0)), 1)
+
+    def test_resize_classification_batch(self):
+        callback = MultiScaleResizeCallback(min_image_size=64, max_image_size=128, change_frequency=1)
+        self.assertEqual(callback.phase, Phase.TRAIN_BATCH_START)
+        shapes = set()
+        for batch_idx in range(20):
+            targets = torch.randint(0, 10, (2,))
+            context = PhaseContext(epoch=0, batch_idx=batch_idx, inputs=torch.rand(2, 3, 96, 64), target=targets)
+            callback(context)
+            size = callback.get_size(0, batch_idx)
+            self.assertEqual(max(context.inputs.shape[2:]), size)
+            self.assertEqual(context.inputs.shape[2] % 32, 0)
+            self.assertEqual(context.inputs.shape[3] % 32, 0)
+            self.assertIs(context.target, targets)
+            shapes.add(tuple(context.inputs.shape))
+        self.assertLessEqual(len(shapes), len(callback.sizes))
+
+    def test_resize_segmentation_targets(self):
+        callback = MultiScaleResizeCallback(min_image_size=128, max_image_size=128)
+        mask = torch.randint(0, 5, (2, 64, 64))
+        context = PhaseContext(epoch=0, batch_idx=0, inputs=torch.rand(2, 3, 64, 64), target=mask)
+        callback(context)
+        self.assertEqual(context.inputs.shape, (2, 3, 128, 128))
+        self.assertEqual(context.target.shape, (2, 128, 128))
+        self.assertEqual(context.target.dtype, mask.dtype)
+        self.assertTrue(torch.equal(context.target[:, ::2, ::2], mask))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,37 @@ import torch
 import unittest
 import torch.nn.functional as F
 
-from super_gradients.training.losses.ohem_ce_loss import OhemCELoss
+from super_gradients.training.losses.ohem_ce_loss import OhemCELoss, OhemBCELoss, OhemLoss
+
+
+def sort_ohem_loss(criterion: OhemLoss, logits, labels):
+    """
+    The reference OhemLoss.forward - full descending sort of the pixel losses
+    """
+    if isinstance(criterion, OhemBCELoss):
+        logits, labels = logits.squeeze(1), labels.float()
+    loss = criterion.criteria(logits, labels).view(-1)
+    if criterion.num_pixels_exclude_ignored:
+        loss = loss[labels.view(-1) != criterion.ignore_lb]
+        num_pixels = loss.numel()
+    else:
+        num_pixels = labels.numel()
+    num_mining = min(int(criterion.mining_percent * num_pixels), num_pixels - 1)
+    thresh = criterion.thresh.to(logits.device)
+    loss, _ = torch.sort(loss, descending=True)
+    if loss[num_mining] > thresh:
+        loss = loss[loss > thresh]
+    else:
+        loss = loss[:num_mining]
+    return torch.mean(loss)
+
+
+def random_segmentation_batch(batch_size: int, num_classes: int, img_size: int, ignore_lb: int = None):
+    logits = torch.randn(batch_size, num_classes, img_size, img_size) * 2
+    labels = torch.randint(0, max(num_classes, 2), (batch_size, img_size, img_size))
+    if ignore_lb is not None:
+        labels[torch.rand(labels.shape) < 0.2] = ignore_lb
+    return logits, labels
 
 
 class OhemLossTest(unittest.TestCase):
@@ -78,6 +108,31 @@ class OhemLossTest(unittest.TestCase):
 
         self.assertAlmostEqual(expected_loss, loss, delta=1e-5)
 
+    def test_parity_with_sort(self):
+        torch.manual_seed(0)
+        for threshold, mining_percent, exclude_ignored in [(0.7, 0.1, True), (0.7, 0.1, False), (0.05, 0.3, True),
+                                                           (0.9, 1., True), (0.2, 0., False)]:
+            criterions = [(OhemCELoss(threshold, mining_percent, ignore_lb=255,
+                                      num_pixels_exclude_ignored=exclude_ignored), 19, 255),
+                          (OhemBCELoss(threshold, mining_percent, num_pixels_exclude_ignored=exclude_ignored), 1, None)]
+            for criterion, num_classes, ignore_lb in criterions:
+                logits, labels = random_segmentation_batch(2, num_classes, self.img_size, ignore_lb)
+                logits.requires_grad_()
+                loss = criterion(logits, labels)
+                expected_loss = sort_ohem_loss(criterion, logits, labels)
+                self.assertTrue(torch.allclose(loss, expected_loss, rtol=1e-5))
+                gradient, = torch.autograd.grad(loss, logits)
+                expected_gradient, = torch.autograd.grad(expected_loss, logits)
+                self.assertTrue(torch.allclose(gradient, expected_gradient, atol=1e-9))
+
+    def test_ties_at_the_mining_boundary(self):
+        # QUANTIZED LOGITS - MANY PIXEL LOSSES ARE EQUAL TO THE (num_mining + 1)-TH LARGEST LOSS
+        torch.manual_seed(0)
+        logits, labels = random_segmentation_batch(2, 3, self.img_size)
+        logits = logits.round()
+        criterion = OhemCELoss(threshold=0.01, mining_percent=0.3)
+        self.assertTrue(torch.allclose(criterion(logits, labels), sort_ohem_loss(criterion, logits, labels), rtol=1e-5))
+
 
 if __name__ == '__main__':
     unittest.main()
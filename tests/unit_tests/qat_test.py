@@ -0,0 +1,107 @@
+import os
+import unittest
+
+import torch
+import torch.nn as nn
+
+from super_gradients.training import SgModel
+from super_gradients.training.datasets.dataset_interfaces import ClassificationTestDatasetInterface
+from super_gradients.training.metrics import Accuracy, Top5
+from super_gradients.training.models import ARCHITECTURES
+from super_gradients.training.utils import HpmStruct
+from super_gradients.training.utils.quantization_utils import QATModule, prepare_model_for_qat
+
+
+class QATTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        self.backend = 'fbgemm' if 'fbgemm' in torch.backends.quantized.supported_engines else 'qnnpack'
+        self.dataset = ClassificationTestDatasetInterface(dataset_params={'batch_size': 4}, batch_size=8)
+        self.training_params = {"max_epochs": 2, "lr_updates": [1], "lr_decay_factor": 0.1, "lr_mode": "step",
+                                "lr_warmup_epochs": 0, "initial_lr": 0.01, "loss": "cross_entropy",
+                                "optimizer": "SGD", "criterion_params": {},
+                                "optimizer_params": {"weight_decay": 1e-4, "momentum": 0.9},
+                                "train_metrics_list": [Accuracy()], "valid_metrics_list": [Accuracy(), Top5()],
+                                "loss_logging_items_names": ["Loss"], "metric_to_watch": "Accuracy",
+                                "greater_metric_to_watch_is_better": True, "average_best_models": False,
+                                "ema": True,
+                                "qat": {"backend": self.backend, "freeze_bn_epoch": 1, "freeze_observers_epoch": 1}}
+
+    def test_prepare_model_for_qat(self):
+        model = ARCHITECTURES['resnet18_cifar'](arch_params=HpmStruct(num_classes=10))
+        qat_module = prepare_model_for_qat(model, torch.rand(2, 3, 32, 32), backend=self.backend)
+
+        fake_quantizers = [module for module in qat_module.modules()
+                           if isinstance(module, torch.ao.quantization.FakeQuantizeBase)]
+        self.assertGreater(len(fake_quantizers), 0)
+        self.assertTrue(qat_module.training)
+
+        # THE OPTIMIZER PARAM GROUPS OF THE FLOAT MODEL HOLD THE WEIGHTS OF THE PREPARED MODEL
+        param_groups = qat_module.initialize_param_groups(0.1, HpmStruct())
+        float_param_ids = {id(param) for group in param_groups for _, param in group['named_params']}
+        self.assertEqual(float_param_ids, {id(param) for param in qat_module.parameters()})
+
+        qat_module(torch.rand(2, 3, 32, 32))
+        qat_module.freeze_observers()
+        self.assertTrue(all(fake_quantizer.observer_enabled.item() == 0 for fake_quantizer in fake_quantizers))
+
+        quantized_model = qat_module.convert()
+        self.assertTrue(any(isinstance(module, torch.ao.nn.intrinsic.quantized.ConvReLU2d)
+                            for module in quantized_model.modules()))
+        self.assertEqual(quantized_model(torch.rand(2, 3, 32, 32)).shape, (2, 10))
+
+    def test_train_with_qat(self):
+        model = SgModel('qat_test', model_checkpoints_location='local', device='cpu')
+        model.connect_dataset_interface(self.dataset)
+        model.build_model('resnet18_cifar', arch_params={'num_classes': 5})
+        model.train(training_params=self.training_params)
+
+        self.assertIsInstance(model.net.module, QATModule)
+        for net in [model.net, model.ema_model.ema]:
+            fake_quantizers = [module for module in net.modules()
+                               if isinstance(module, torch.ao.quantization.FakeQuantizeBase)]
+            self.assertTrue(all(fake_quantizer.observer_enabled.item() == 0 for fake_quantizer in fake_quantizers))
+        self.assertTrue(all(module.freeze_bn for module in model.net.modules()
+                            if isinstance(module, torch.ao.nn.intrinsic.qat.ConvBn2d)))
+
+        self.assertIsNotNone(model.quantized_net)
+        int8_model_path = os.path.join(model.checkpoints_dir_path, 'ckpt_int8.pt')
+        self.assertTrue(os.path.exists(int8_model_path))
+        self.assertEqual(torch.jit.load(int8_model_path)(torch.rand(1, 3, 32, 32)).shape, (1, 5))
+
+        # THE CHECKPOINTS ARE SAVED WITH THE QAT PARAMS, SO THE NET IS PREPARED BEFORE THEIR WEIGHTS ARE LOADED
+        state = model._get_net_state()
+        self.assertEqual(state['qat_params']['backend'], self.backend)
+        resumed_model = SgModel('qat_test', model_checkpoints_location='local', device='cpu')
+        resumed_model.connect_dataset_interface(self.dataset)
+        resumed_model.build_model('resnet18_cifar', arch_params={'num_classes': 5})
+        resumed_model._prepare_qat(state['qat_params'])
+        resumed_model.net.load_state_dict(state['net'])
+        self.assertIsInstance(resumed_model.net.module, QATModule)
+        self.assertIsInstance(resumed_model.net.module.qat_model.conv1, nn.Module)
+
+    def test_resume_qat_checkpoint(self):
+        model = SgModel('qat_resume_test', model_checkpoints_location='local', device='cpu')
+        model.connect_dataset_interface(self.dataset)
+        model.build_model('resnet18_cifar', arch_params={'num_classes': 5})
+        model.train(training_params={**self.training_params, "max_epochs": 1, "ema": False,
+                                     "qat": {"backend": self.backend}})
+
+        # THE SKIPPED MODULE TYPES ARE SAVED AS DOTTED PATHS, SO THE CHECKPOINT IS LOADED WITHOUT UNPICKLING CLASSES
+        ckpt_path = os.path.join(model.checkpoints_dir_path, 'ckpt_latest.pth')
+        skip_module_types = torch.load(ckpt_path, map_location='cpu')['qat_params']['skip_module_types']
+        self.assertTrue(all(isinstance(module_type, str) for module_type in skip_module_types))
+
+        resumed_model = SgModel('qat_resume_test', model_checkpoints_location='local', device='cpu')
+        resumed_model.connect_dataset_interface(self.dataset)
+        resumed_model.build_model('resnet18_cifar', arch_params={'num_classes': 5},
+                                  checkpoint_params={'load_checkpoint': True})
+        self.assertIsInstance(resumed_model.net.module, QATModule)
+        self.assertEqual(resumed_model.net.module.qat_params, model.net.module.qat_params)
+        for name, tensor in model.net.state_dict().items():
+            self.assertTrue(torch.equal(tensor, resumed_model.net.state_dict()[name]), name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, TensorDataset
+
+from super_gradients.training import SgModel
+from super_gradients.training.datasets.dataset_interfaces import ClassificationTestDatasetInterface
+from super_gradients.training.metrics import Accuracy, Top5
+from super_gradients.training.models import ARCHITECTURES
+from super_gradients.training.models.detection_models.yolov5 import Detect
+from super_gradients.training.utils import HpmStruct
+from super_gradients.training.utils.quantization_utils import evaluate_on_cpu, quantize_model_ptq
+
+
+class QuantizationUtilsTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        self.backend = 'fbgemm' if 'fbgemm' in torch.backends.quantized.supported_engines else 'qnnpack'
+        self.loader = DataLoader(TensorDataset(torch.rand(16, 3, 32, 32), torch.randint(0, 10, (16,))), batch_size=4)
+
+    def test_quantize_classification_model(self):
+        model = ARCHITECTURES['resnet18_cifar'](arch_params=HpmStruct(num_classes=10))
+        quantized_model = quantize_model_ptq(model, self.loader, num_calibration_batches=2, backend=self.backend)
+
+        quantized_conv_types = (torch.ao.nn.quantized.Conv2d, torch.ao.nn.intrinsic.quantized.ConvReLU2d)
+        self.assertTrue(any(isinstance(module, quantized_conv_types) for module in quantized_model.modules()))
+        self.assertFalse(any(isinstance(module, nn.BatchNorm2d) for module in quantized_model.modules()))
+
+        # THE ORIGINAL MODEL IS LEFT UNTOUCHED
+        self.assertTrue(model.training)
+        self.assertTrue(any(isinstance(module, nn.BatchNorm2d) for module in model.modules()))
+
+        inputs = next(iter(self.loader))[0]
+        with torch.no_grad():
+            float_outputs, quantized_outputs = model.eval()(inputs), quantized_model(inputs)
+        self.assertEqual(quantized_outputs.shape, float_outputs.shape)
+        self.assertLess((quantized_outputs - float_outputs).abs().max().item(), 0.5)
+
+        metrics = evaluate_on_cpu(quantized_model, self.loader, [Accuracy(), Top5()], num_batches=2)
+        self.assertEqual(set(metrics.keys()), {'Accuracy', 'Top5'})
+
+    def test_skipped_detection_head_stays_in_float(self):
+        model = ARCHITECTURES['yolo_v5s'](arch_params=HpmStruct(num_classes=10))
+        loader = DataLoader(TensorDataset(torch.rand(2, 3, 64, 64), torch.zeros(2, 6)), batch_size=1)
+        quantized_model = quantize_model_ptq(model, loader, num_calibration_batches=2, backend=self.backend)
+
+        detect_heads = [module for module in quantized_model.modules() if isinstance(module, Detect)]
+        self.assertEqual(len(detect_heads), 1)
+        self.assertTrue(all(type(conv) is nn.Conv2d for conv in detect_heads[0].m))
+
+        quantized_model.eval()
+        with torch.no_grad():
+            outputs = quantized_model(torch.rand(1, 3, 64, 64))
+        self.assertEqual(outputs[0].shape[-1], 15)
+
+    def test_unsupported_backend(self):
+        with self.assertRaises(ValueError):
+            quantize_model_ptq(nn.Conv2d(3, 3, 1), self.loader, backend='tensorrt')
+
+    def test_sg_model_quantize(self):
+        dataset = ClassificationTestDatasetInterface(dataset_params={'batch_size': 4}, batch_size=8)
+        model = SgModel('quantization_test', model_checkpoints_location='local', device='cpu')
+        model.connect_dataset_interface(dataset)
+        model.build_model('resnet18_cifar', arch_params={'num_classes': 5})
+
+        quantized_model, report = model.quantize(num_calibration_batches=2, backend=self.backend,
+                                                 latency_repetitions=2, verbose=False)
+        self.assertEqual(set(report['fp32'].keys()), {'Accuracy', 'Top5'})
+        self.assertEqual(set(report['delta'].keys()), {'Accuracy', 'Top5'})
+        self.assertGreater(report['speedup'], 0)
+        self.assertIsInstance(model.net.module.conv1, nn.Conv2d)
+
+
+if __name__ == '__main__':
+    unittest.main()
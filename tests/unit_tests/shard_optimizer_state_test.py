@@ -0,0 +1,135 @@
+import copy
+import os
+import shutil
+import tempfile
+import unittest
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from torch import nn
+from torch.utils.data import DataLoader, Subset, TensorDataset
+
+from super_gradients.training import SgModel
+from super_gradients.training.metrics import Accuracy
+from super_gradients.training.params import TrainingParams
+from super_gradients.training.utils.optimizer_utils import build_optimizer, get_optimizer_state_bytes, \
+    is_sharded_optimizer
+
+WORLD_SIZE = 2
+BATCH_SIZE = 4
+NUM_BATCHES = 4
+
+
+def small_net() -> nn.Module:
+    # NO BATCH NORM - THE PER-RANK BATCH STATISTICS WOULD DIFFER FROM THE SINGLE PROCESS ONES
+    return nn.Sequential(nn.Conv2d(3, 16, 3), nn.ReLU(), nn.Conv2d(16, 16, 3), nn.ReLU(), nn.Conv2d(16, 16, 3),
+                         nn.ReLU(), nn.Conv2d(16, 16, 3), nn.ReLU(), nn.AdaptiveAvgPool2d(1), nn.Flatten(),
+                         nn.Linear(16, 10))
+
+
+def training_params(**kwargs) -> dict:
+    return {"max_epochs": 2, "lr_mode": "step", "lr_updates": [1], "lr_decay_factor": 0.1, "lr_warmup_epochs": 0,
+            "initial_lr": 0.01, "loss": "cross_entropy", "optimizer": "Adam", "train_metrics_list": [Accuracy()],
+            "valid_metrics_list": [Accuracy()], "loss_logging_items_names": ["Loss"], "metric_to_watch": "Accuracy",
+            "greater_metric_to_watch_is_better": True, "average_best_models": False, **kwargs}
+
+
+def build_sg_model(experiment_name: str, loader: DataLoader, initial_state: dict, tmp_dir: str) -> SgModel:
+    model = SgModel(experiment_name, device='cpu', ckpt_root_dir=tmp_dir, train_loader=loader, valid_loader=loader,
+                    classes=list(range(10)))
+    net = small_net()
+    net.load_state_dict(initial_state)
+    model.build_model(net, arch_params={'num_classes': 10})
+    return model
+
+
+def train_sharded_rank(rank: int, dataset: TensorDataset, initial_state: dict, tmp_dir: str):
+    dist.init_process_group('gloo', init_method=f"file://{os.path.join(tmp_dir, 'init_file')}", rank=rank,
+                            world_size=WORLD_SIZE)
+    try:
+        # BATCH i OF THE RANK IS ITS HALF OF BATCH i OF THE SINGLE PROCESS TRAINING
+        indices = [i * BATCH_SIZE * WORLD_SIZE + rank * BATCH_SIZE + j for i in range(NUM_BATCHES)
+                   for j in range(BATCH_SIZE)]
+        model = build_sg_model(f'sharded_{rank}', DataLoader(Subset(dataset, indices), batch_size=BATCH_SIZE),
+                               initial_state, tmp_dir)
+        # CPU DDP OVER GLOO (SgModel BUILDS DDP FOR CUDA DEVICES ONLY), THE MAIN PROCESS SAVES THE CHECKPOINTS
+        model.net = nn.parallel.DistributedDataParallel(model.net.module)
+        model.ddp_silent_mode = rank > 0
+        model.train(training_params(shard_optimizer_state=True))
+        dist.barrier()
+
+        # RESUMING - THE CONSOLIDATED STATE IS SHARDED AGAIN
+        checkpoint = torch.load(os.path.join(tmp_dir, 'sharded_0', 'ckpt_latest.pth'), map_location='cpu')
+        resumed_optimizer = build_optimizer(nn.parallel.DistributedDataParallel(small_net()), lr=0.01,
+                                            training_params=TrainingParams(**training_params(shard_optimizer_state=True)))
+        # A COPY - ZeroRedundancyOptimizer.load_state_dict CLEARS THE STATE OF THE OTHER RANKS IN ITS ARGUMENT
+        resumed_optimizer.load_state_dict(copy.deepcopy(checkpoint['optimizer_state_dict']))
+        local_state = model.optimizer.optim.state_dict()['state']
+        resumed_local_state = resumed_optimizer.optim.state_dict()['state']
+        resumed = local_state.keys() == resumed_local_state.keys() and all(
+            torch.allclose(value, resumed_local_state[index][key])
+            for index, param_state in local_state.items() for key, value in param_state.items())
+
+        torch.save({'sharded': is_sharded_optimizer(model.optimizer), 'resumed': resumed,
+                    'state_bytes': get_optimizer_state_bytes(model.optimizer),
+                    'net': model.net.module.state_dict(), 'optimizer_state_dict': checkpoint['optimizer_state_dict']},
+                   os.path.join(tmp_dir, f'rank_{rank}.pth'))
+    finally:
+        dist.destroy_process_group()
+
+
+class ShardOptimizerStateTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        self.tmp_dir = tempfile.mkdtemp()
+        num_samples = NUM_BATCHES * BATCH_SIZE * WORLD_SIZE
+        self.dataset = TensorDataset(torch.rand(num_samples, 3, 16, 16), torch.randint(0, 10, (num_samples,)))
+        self.initial_state = small_net().state_dict()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def test_no_sharding_without_ddp(self):
+        model = build_sg_model('not_distributed', DataLoader(self.dataset, batch_size=BATCH_SIZE), self.initial_state,
+                               self.tmp_dir)
+        model.train(training_params(shard_optimizer_state=True, max_epochs=1, save_model=False))
+        self.assertFalse(is_sharded_optimizer(model.optimizer))
+
+    @unittest.skipIf(not dist.is_available(), 'torch.distributed is not available')
+    def test_sharded_optimizer_state(self):
+        expected_model = build_sg_model('single_process', DataLoader(self.dataset, batch_size=BATCH_SIZE * WORLD_SIZE),
+                                        self.initial_state, self.tmp_dir)
+        expected_model.train(training_params(save_model=False))
+        expected_state_dict = expected_model.optimizer.state_dict()
+
+        mp.spawn(train_sharded_rank, args=(self.dataset, self.initial_state, self.tmp_dir), nprocs=WORLD_SIZE,
+                 join=True)
+        results = [torch.load(os.path.join(self.tmp_dir, f'rank_{rank}.pth')) for rank in range(WORLD_SIZE)]
+
+        for result in results:
+            self.assertTrue(result['sharded'])
+            self.assertTrue(result['resumed'])
+            # THE SAME WEIGHTS AS THE SINGLE PROCESS TRAINING WITH A FULL OPTIMIZER
+            for key, expected_value in expected_model.net.module.state_dict().items():
+                self.assertTrue(torch.allclose(result['net'][key], expected_value, atol=1e-5), key)
+
+        # THE CHECKPOINT HOLDS THE CONSOLIDATED (FULL) OPTIMIZER STATE, LOADABLE BY A NON-SHARDED OPTIMIZER
+        optimizer_state_dict = results[0]['optimizer_state_dict']
+        self.assertEqual(optimizer_state_dict['state'].keys(), expected_state_dict['state'].keys())
+        for index, param_state in expected_state_dict['state'].items():
+            for key, expected_value in param_state.items():
+                self.assertTrue(torch.allclose(torch.as_tensor(optimizer_state_dict['state'][index][key]),
+                                               torch.as_tensor(expected_value), atol=1e-6), f'{index} {key}')
+        torch.optim.Adam(small_net().parameters()).load_state_dict(optimizer_state_dict)
+
+        # EVERY RANK HOLDS ABOUT 1 / WORLD_SIZE OF THE OPTIMIZER STATE
+        full_state_bytes = get_optimizer_state_bytes(expected_model.optimizer)
+        state_bytes = [result['state_bytes'] for result in results]
+        self.assertEqual(sum(state_bytes), full_state_bytes)
+        self.assertLess(max(state_bytes), full_state_bytes * 0.75)
+
+
+if __name__ == '__main__':
+    unittest.main()
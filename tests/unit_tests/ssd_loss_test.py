@@ -0,0 +1,85 @@
+import unittest
+
+import torch
+
+from super_gradients.training.losses.ssd_loss import SSDLoss
+from super_gradients.training.utils.ssd_utils import DefaultBoxes
+
+
+def per_image_ssd_loss(loss: SSDLoss, predictions, targets):
+    """
+    The reference SSDLoss.forward - per image default box matching and hard negative mining by double sort
+    """
+    ploc, plabel = predictions
+    matches = [loss.match_dboxes(targets[targets[:, 0] == i]) for i in range(ploc.shape[0])]
+    batch_target_locations = torch.stack([target_locations for target_locations, _ in matches])
+    batch_target_labels = torch.stack([target_labels for _, target_labels in matches]).type(torch.long)
+
+    mask = batch_target_labels > 0
+    pos_num = mask.sum(dim=1)
+    vec_gd = loss._norm_relative_bbox(batch_target_locations)
+    sl1 = (mask.float() * loss.sl1_loss(ploc, vec_gd).sum(dim=1)).sum(dim=1)
+
+    con = loss.con_loss(plabel, batch_target_labels)
+    con_neg = con.clone()
+    con_neg[mask] = 0
+    _, con_idx = con_neg.sort(dim=1, descending=True)
+    _, con_rank = con_idx.sort(dim=1)
+    neg_num = torch.clamp(3 * pos_num, max=mask.size(1)).unsqueeze(-1)
+    neg_mask = con_rank < neg_num
+    closs = (con * (mask.float() + neg_mask.float())).sum(dim=1)
+
+    total_loss = (2 - loss.alpha) * sl1 + loss.alpha * closs
+    num_mask = (pos_num > 0).float()
+    pos_num = pos_num.float().clamp(min=1e-6)
+    ret = (total_loss * num_mask / pos_num).mean(dim=0)
+    return ret, torch.cat((sl1.mean().unsqueeze(0), closs.mean().unsqueeze(0), ret.unsqueeze(0))).detach()
+
+
+def random_batch(batch_size: int, num_targets: int, num_dboxes: int, num_classes: int = 21):
+    xy = torch.rand(num_targets, 2) * 0.8 + 0.1
+    wh = torch.rand(num_targets, 2) * 0.5 + 0.05
+    targets = torch.cat([torch.randint(0, batch_size, (num_targets, 1)).float(),
+                         torch.randint(1, num_classes, (num_targets, 1)).float(), xy, wh], dim=1)
+    predictions = (torch.randn(batch_size, 4, num_dboxes), torch.randn(batch_size, num_classes, num_dboxes))
+    return predictions, targets
+
+
+class SSDLossTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        self.loss = SSDLoss(DefaultBoxes.dboxes300_coco())
+        self.num_dboxes = self.loss.dboxes.shape[2]
+
+    def test_batched_matching(self):
+        _, targets = random_batch(4, 30, self.num_dboxes)
+        # AN IMAGE WITHOUT TARGETS
+        targets = targets[targets[:, 0] != 2]
+        target_locations, target_labels = self.loss.match_dboxes_batch(targets, 4)
+        self.assertEqual(target_locations.shape, (4, 4, self.num_dboxes))
+        for i in range(4):
+            expected_locations, expected_labels = self.loss.match_dboxes(targets[targets[:, 0] == i])
+            self.assertTrue(torch.equal(target_locations[i], expected_locations))
+            self.assertTrue(torch.equal(target_labels[i], expected_labels))
+        self.assertFalse(target_labels[2].any())
+
+    def test_loss_parity(self):
+        for batch_size, num_targets in [(1, 1), (4, 20), (8, 100), (3, 0)]:
+            predictions, targets = random_batch(batch_size, num_targets, self.num_dboxes)
+            loss, loss_items = self.loss(predictions, targets)
+            expected_loss, expected_loss_items = per_image_ssd_loss(self.loss, predictions, targets)
+            self.assertTrue(torch.allclose(loss, expected_loss, rtol=1e-5))
+            self.assertTrue(torch.allclose(loss_items, expected_loss_items, rtol=1e-5))
+
+    def test_gradients_parity(self):
+        predictions, targets = random_batch(4, 20, self.num_dboxes)
+        predictions = tuple(prediction.requires_grad_() for prediction in predictions)
+        gradients = torch.autograd.grad(self.loss(predictions, targets)[0], predictions)
+        expected_gradients = torch.autograd.grad(per_image_ssd_loss(self.loss, predictions, targets)[0], predictions)
+        for gradient, expected_gradient in zip(gradients, expected_gradients):
+            self.assertTrue(torch.allclose(gradient, expected_gradient, atol=1e-7))
+
+
+if __name__ == '__main__':
+    unittest.main()
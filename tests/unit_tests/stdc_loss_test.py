@@ -0,0 +1,83 @@
+import unittest
+
+import torch
+import torch.nn.functional as F
+
+from super_gradients.training.losses.stdc_loss import DetailAggregateModule, STDCLoss, get_stride_boundary_targets
+from super_gradients.training.utils.segmentation_utils import to_one_hot
+
+LAPLACIAN_KERNEL = [-1, -1, -1, -1, 8, -1, -1, -1, -1]
+
+
+def one_hot_boundary_targets(detail_module: DetailAggregateModule, gt_masks: torch.Tensor):
+    """
+    The reference DetailAggregateModule.forward - grouped laplacian convolutions of the one-hot encoded masks
+    """
+    num_classes = detail_module.num_classes
+    laplacian_kernel = torch.tensor(LAPLACIAN_KERNEL, dtype=torch.float32, device=gt_masks.device)\
+        .reshape(1, 1, 3, 3).expand(num_classes, 1, 3, 3)
+    if num_classes > 1:
+        one_hot = to_one_hot(gt_masks, num_classes, detail_module.ignore_label).float()
+    else:
+        one_hot = gt_masks.unsqueeze(1).float()
+    stride_targets = []
+    for stride in (1, 2, 4):
+        targets = F.conv2d(one_hot, laplacian_kernel, stride=stride, padding=1, groups=num_classes)
+        targets = detail_module._to_one_channel_binary(targets, detail_module.detail_threshold)
+        stride_targets.append(F.interpolate(targets, gt_masks.shape[1:], mode='nearest'))
+    boundary_targets = F.conv2d(torch.cat(stride_targets, dim=1), detail_module.fuse_kernel)
+    return detail_module._to_one_channel_binary(boundary_targets, 0.3)
+
+
+def random_blob_masks(batch_size: int, num_classes: int, height: int, width: int):
+    # LOW RESOLUTION LABELS, UPSAMPLED - REGIONS WITH BOUNDARIES, AS IN SEGMENTATION MASKS
+    low_resolution = torch.randint(0, num_classes, (batch_size, 1, height // 8 + 1, width // 8 + 1)).float()
+    return F.interpolate(low_resolution, (height, width), mode='nearest').squeeze(1).long()
+
+
+class STDCLossTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+
+    def test_boundary_targets_parity(self):
+        for num_classes, detail_threshold, (height, width) in [(19, 1., (64, 64)), (19, 3.5, (61, 83)),
+                                                               (5, 8., (33, 30)), (3, 1., (17, 9))]:
+            detail_module = DetailAggregateModule(num_classes=num_classes, ignore_label=num_classes,
+                                                  detail_threshold=detail_threshold)
+            gt_masks = random_blob_masks(2, num_classes + 1, height, width)
+            # SINGLE PIXEL REGIONS, THE IGNORED LABEL INCLUDED
+            gt_masks[torch.rand(gt_masks.shape) < 0.05] = num_classes
+            gt_masks[torch.rand(gt_masks.shape) < 0.05] = 0
+            expected_targets = one_hot_boundary_targets(detail_module, gt_masks)
+            self.assertTrue(torch.equal(detail_module(gt_masks), expected_targets))
+
+    def test_binary_boundary_targets_parity(self):
+        detail_module = DetailAggregateModule(num_classes=1, ignore_label=None, learnable_fusing_kernel=False)
+        gt_masks = random_blob_masks(2, 2, 50, 70)
+        self.assertTrue(torch.equal(detail_module(gt_masks), one_hot_boundary_targets(detail_module, gt_masks)))
+
+    def test_stride_boundary_targets(self):
+        gt_masks = torch.zeros(1, 8, 8, dtype=torch.long)
+        gt_masks[:, 2:6, 2:6] = 1
+        boundary_targets = get_stride_boundary_targets(gt_masks, strides=(1,))
+        # THE IMAGE BORDER AND BOTH SIDES OF THE REGION BORDER ARE BOUNDARIES, THE INSIDE OF THE REGIONS IS NOT
+        self.assertEqual(boundary_targets.shape, (1, 1, 8, 8))
+        self.assertEqual(boundary_targets[0, 0, 0].tolist(), [1.] * 8)
+        self.assertEqual(boundary_targets[0, 0, 3].tolist(), [1., 1., 1., 0., 0., 1., 1., 1.])
+        self.assertEqual(boundary_targets[0, 0, 2, 3].item(), 1.)
+
+    def test_stdc_loss(self):
+        criterion = STDCLoss(num_classes=19, ignore_index=19)
+        gt_masks = random_blob_masks(2, 20, 64, 64)
+        preds = [torch.randn(2, 19, 64, 64, requires_grad=True) for _ in range(3)] + \
+                [torch.randn(2, 1, 64, 64, requires_grad=True)]
+        loss, loss_items = criterion(preds, gt_masks)
+        loss.backward()
+        self.assertEqual(loss_items.shape, (5,))
+        self.assertTrue(torch.isfinite(loss))
+        self.assertEqual([name for name, _ in criterion.get_train_named_params()], ['fuse_kernel'])
+
+
+if __name__ == '__main__':
+    unittest.main()
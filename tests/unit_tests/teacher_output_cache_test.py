@@ -0,0 +1,177 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import torch
+from torch.utils.data import DataLoader, Dataset, TensorDataset
+
+from super_gradients.training.datasets.mixup import CollateMixup
+from super_gradients.training.exceptions.kd_model_exceptions import TeacherOutputCacheBatchTransformException
+from super_gradients.training.kd_model.kd_model import KDModel
+from super_gradients.training.losses.kd_losses import KDLogitsLoss
+from super_gradients.training.metrics import Accuracy
+from super_gradients.training.models.classification_models.resnet import ResNet18
+from super_gradients.training.models.kd_modules.kd_module import KDModule
+from super_gradients.training.models.kd_modules.teacher_output_cache import SampleIndexDataset, TeacherOutputCache, \
+    build_teacher_output_cache
+from super_gradients.training.utils import HpmStruct
+from super_gradients.training.utils.callbacks import MultiScaleResizeCallback, Phase, PhaseCallback, PhaseContext, \
+    TeacherOutputCacheCallback
+
+
+class RandomNoiseDataset(Dataset):
+    """
+    A dataset with a random augmentation - gaussian noise added to every sample
+    """
+
+    def __init__(self, num_samples: int, num_classes: int, image_size: int = 32):
+        self.images = torch.rand(num_samples, 3, image_size, image_size)
+        self.labels = torch.randint(0, num_classes, (num_samples,))
+
+    def __len__(self):
+        return len(self.images)
+
+    def __getitem__(self, index):
+        return self.images[index] + 0.1 * torch.randn_like(self.images[index]), self.labels[index]
+
+
+class TeacherOutputRecorderCallback(PhaseCallback):
+    def __init__(self):
+        super(TeacherOutputRecorderCallback, self).__init__(Phase.TRAIN_BATCH_END)
+        self.teacher_outputs = []
+
+    def __call__(self, context):
+        self.teacher_outputs.append((context.sample_index.clone(), context.augmentation_seed.clone(),
+                                     context.preds.teacher_output.detach().clone()))
+
+
+KD_TRAINING_PARAMS = {"max_epochs": 2, "lr_mode": "step", "lr_updates": [1], "lr_decay_factor": 0.1,
+                      "lr_warmup_epochs": 0, "initial_lr": 0.1, "loss": KDLogitsLoss(torch.nn.CrossEntropyLoss()),
+                      "optimizer": "SGD", "train_metrics_list": [Accuracy()], "valid_metrics_list": [Accuracy()],
+                      "loss_logging_items_names": ["Loss", "Task Loss", "Distillation Loss"],
+                      "metric_to_watch": "Accuracy", "greater_metric_to_watch_is_better": True,
+                      "average_best_models": False}
+
+
+class TeacherOutputCacheTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        self.cache_dir = tempfile.mkdtemp()
+        self.teacher = ResNet18(arch_params=HpmStruct(num_classes=10)).eval()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.cache_dir)
+
+    def _teacher_outputs(self, dataset: SampleIndexDataset, seed: int) -> torch.Tensor:
+        dataset.augmentation_seed = seed
+        inputs = torch.stack([dataset[i][0] for i in range(len(dataset))])
+        dataset.augmentation_seed = None
+        with torch.no_grad():
+            return self.teacher(inputs)
+
+    def test_sample_index_dataset(self):
+        dataset = SampleIndexDataset(RandomNoiseDataset(4, 10), num_augmentations=3)
+        dataset.augmentation_seed = 1
+        inputs, targets, additional_items = dataset[2]
+        self.assertEqual(additional_items, {'sample_index': 2, 'augmentation_seed': 1})
+        # THE AUGMENTATION IS REPRODUCIBLE, AND DIFFERENT FOR EVERY SEED
+        self.assertTrue(torch.equal(inputs, dataset[2][0]))
+        dataset.augmentation_seed = 2
+        self.assertFalse(torch.equal(inputs, dataset[2][0]))
+        # THE GLOBAL RNG STATE IS RESTORED, AND THE CUDA GENERATORS ARE NOT RESEEDED
+        rng_state = torch.get_rng_state()
+        cuda_rng_states = torch.cuda.get_rng_state_all() if torch.cuda.is_available() else []
+        dataset[0]
+        self.assertTrue(torch.equal(rng_state, torch.get_rng_state()))
+        if torch.cuda.is_available():
+            self.assertTrue(all(torch.equal(state, cuda_state)
+                                for state, cuda_state in zip(cuda_rng_states, torch.cuda.get_rng_state_all())))
+
+    def test_build_and_read(self):
+        dataset = SampleIndexDataset(RandomNoiseDataset(10, 10), num_augmentations=2)
+        for top_k in [None, 3]:
+            cache_dir = os.path.join(self.cache_dir, str(top_k))
+            build_teacher_output_cache(self.teacher, DataLoader(dataset, batch_size=4, shuffle=True), cache_dir,
+                                       top_k=top_k)
+            cache = TeacherOutputCache(cache_dir)
+            for seed in range(2):
+                expected_outputs = self._teacher_outputs(dataset, seed)
+                outputs = cache.read(torch.arange(10), torch.full((10,), seed))
+                if top_k is None:
+                    self.assertTrue(torch.allclose(outputs, expected_outputs, rtol=1e-3, atol=1e-3))
+                else:
+                    top_values, top_indices = expected_outputs.topk(top_k, dim=1)
+                    self.assertTrue(torch.allclose(outputs.gather(1, top_indices), top_values, rtol=1e-3, atol=1e-3))
+                    self.assertEqual(torch.isinf(outputs).sum(dim=1).tolist(), [10 - top_k] * 10)
+                    # THE TEACHER'S SOFTMAX IS RENORMALIZED OVER ITS TOP-K CLASSES
+                    self.assertTrue(torch.allclose(torch.softmax(outputs, dim=1).gather(1, top_indices),
+                                                   torch.softmax(top_values, dim=1), atol=1e-3))
+
+    def test_read_missing_samples(self):
+        cache = TeacherOutputCache.create(self.cache_dir, num_samples=4, num_classes=10)
+        cache.write(torch.randn(2, 10), [0, 1])
+        self.assertEqual(cache.read([1, 0]).shape, (2, 10))
+        with self.assertRaises(ValueError):
+            cache.read([2])
+
+    def _kd_model(self, dataset: SampleIndexDataset, collate_fn=None) -> KDModel:
+        student = ResNet18(arch_params=HpmStruct(num_classes=10))
+        kd_module = KDModule(arch_params=HpmStruct(teacher_output_cache_dir=self.cache_dir), student=student,
+                             teacher=self.teacher, run_teacher_on_eval=True)
+        kd_model = KDModel('test_kd_training_with_cache', device='cpu',
+                           train_loader=DataLoader(dataset, batch_size=4, shuffle=True, collate_fn=collate_fn),
+                           valid_loader=DataLoader(TensorDataset(torch.rand(4, 3, 32, 32), torch.randint(0, 10, (4,))),
+                                                   batch_size=4),
+                           classes=list(range(10)))
+        kd_model.build_model(kd_module, student_architecture=student, teacher_architecture=self.teacher,
+                             student_arch_params={'num_classes': 10}, teacher_arch_params={'num_classes': 10})
+        return kd_model
+
+    def test_kd_training_with_cache(self):
+        dataset = SampleIndexDataset(RandomNoiseDataset(8, 10), num_augmentations=2)
+        build_teacher_output_cache(self.teacher, DataLoader(dataset, batch_size=4), self.cache_dir)
+        expected_outputs = [self._teacher_outputs(dataset, seed) for seed in range(2)]
+
+        recorder = TeacherOutputRecorderCallback()
+        self._kd_model(dataset).train(dict(KD_TRAINING_PARAMS, phase_callbacks=[recorder]))
+
+        # THE TRAINING BATCHES GOT THE CACHED TEACHER OUTPUTS OF THEIR SAMPLES AND AUGMENTATIONS
+        self.assertEqual(len(recorder.teacher_outputs), 4)
+        for sample_indices, augmentation_seeds, teacher_output in recorder.teacher_outputs:
+            expected_output = torch.stack([expected_outputs[seed][index]
+                                           for index, seed in zip(sample_indices.tolist(), augmentation_seeds.tolist())])
+            self.assertTrue(torch.allclose(teacher_output, expected_output, rtol=1e-3, atol=1e-3))
+
+    def test_batch_transforms_are_rejected(self):
+        dataset = SampleIndexDataset(RandomNoiseDataset(8, 10))
+        build_teacher_output_cache(self.teacher, DataLoader(dataset, batch_size=4), self.cache_dir)
+        # THE CACHED OUTPUTS ARE OF THE UNMIXED, UNRESIZED SAMPLES
+        for collate_fn, phase_callbacks in [(CollateMixup(num_classes=10, mix_on_device=True), []),
+                                            (None, [MultiScaleResizeCallback(min_image_size=32, max_image_size=64)])]:
+            with self.assertRaises(TeacherOutputCacheBatchTransformException):
+                self._kd_model(dataset, collate_fn).train(dict(KD_TRAINING_PARAMS, phase_callbacks=phase_callbacks))
+
+    def test_callback_without_cache_keys(self):
+        # e.g. THE BATCHES OF A LOADER WHOSE DATASET IS NOT A SampleIndexDataset
+        kd_module = KDModule(arch_params=HpmStruct(), student=ResNet18(arch_params=HpmStruct(num_classes=10)),
+                             teacher=self.teacher, run_teacher_on_eval=True)
+        TeacherOutputCacheCallback()(PhaseContext(net=kd_module))
+        self.assertIsNone(kd_module._teacher_output_keys)
+
+    def test_top_k_storage(self):
+        teacher = ResNet18(arch_params=HpmStruct(num_classes=1000)).eval()
+        dataset = SampleIndexDataset(TensorDataset(torch.rand(64, 3, 32, 32), torch.zeros(64).long()))
+        storage = {}
+        for top_k in [None, 10]:
+            cache_dir = os.path.join(self.cache_dir, str(top_k))
+            storage[top_k] = build_teacher_output_cache(teacher, DataLoader(dataset, batch_size=16), cache_dir,
+                                                        top_k=top_k).storage_bytes
+        # 64 x 1000 FLOAT16 LOGITS, AND 64 x 10 FLOAT16 VALUES AND INT16 CLASS INDICES (AND THE FILE HEADERS)
+        self.assertGreater(storage[None], 64 * 1000 * 2)
+        self.assertLess(storage[10], storage[None] / 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,11 @@
+import copy
 import unittest
+
+import torch
+from torch.profiler import ProfilerActivity, profile
+
+from super_gradients.training.models import ARCHITECTURES
+from super_gradients.training.models.classification_models.vit import ATTENTION_BACKENDS, Attention
 from super_gradients.training.utils.utils import HpmStruct
 from super_gradients.training.datasets.dataset_interfaces.dataset_interface import ClassificationTestDatasetInterface
 from super_gradients import SgModel
@@ -26,6 +33,57 @@ class TestViT(unittest.TestCase):
         model.build_model('vit_base', load_checkpoint=False)
         model.train(training_params=self.train_params)
 
+    def test_attention_backends_parity(self):
+        torch.manual_seed(0)
+        math_attention = Attention(64, heads=4)
+        x = torch.randn(2, 50, 64, requires_grad=True)
+        expected_output = math_attention(x)
+        expected_gradients = torch.autograd.grad(expected_output.square().sum(), [x] + list(math_attention.parameters()))
+        for attention_backend in ['sdpa', 'chunked']:
+            attention = Attention(64, heads=4, attention_backend=attention_backend, attention_chunk_size=7)
+            attention.load_state_dict(math_attention.state_dict())
+            output = attention(x)
+            self.assertTrue(torch.allclose(output, expected_output, atol=1e-5), attention_backend)
+            gradients = torch.autograd.grad(output.square().sum(), [x] + list(attention.parameters()))
+            for gradient, expected_gradient in zip(gradients, expected_gradients):
+                self.assertTrue(torch.allclose(gradient, expected_gradient, atol=1e-4), attention_backend)
+
+    def test_attention_backend_arch_params(self):
+        torch.manual_seed(0)
+        arch_params = {"image_size": (64, 64), "patch_size": (16, 16), "num_classes": 10}
+        model = ARCHITECTURES['vit_base'](arch_params=HpmStruct(**arch_params)).eval()
+        chunked_model = ARCHITECTURES['vit_base'](arch_params=HpmStruct(**arch_params, attention_backend='chunked',
+                                                                        attention_chunk_size=5)).eval()
+        chunked_model.load_state_dict(model.state_dict())
+        self.assertEqual(chunked_model.transformer.blocks[0].attn.attention_backend, 'chunked')
+        x = torch.rand(2, 3, 64, 64)
+        with torch.no_grad():
+            self.assertTrue(torch.allclose(chunked_model(x), model(x), atol=1e-4))
+
+        with self.assertRaises(ValueError):
+            ARCHITECTURES['vit_base'](arch_params=HpmStruct(**arch_params, attention_backend='flash'))
+
+    def test_attention_backends_memory(self):
+        torch.manual_seed(0)
+        math_attention = Attention(256, heads=4)
+        # 512px IMAGES WITH 16x16 PATCHES (AND A CLS TOKEN)
+        batch_size, sequence_length = 2, 1025
+        x = torch.randn(batch_size, sequence_length, 256, requires_grad=True)
+        max_allocations = {}
+        for attention_backend in ATTENTION_BACKENDS:
+            attention = copy.deepcopy(math_attention)
+            attention.attention_backend = attention_backend
+            attention.attention_chunk_size = 128
+            attention(x).sum().backward()
+            with profile(activities=[ProfilerActivity.CPU], profile_memory=True) as profiler:
+                attention(x).sum().backward()
+            max_allocations[attention_backend] = max(event.cpu_memory_usage for event in profiler.events())
+
+        # THE MATH BACKEND ALLOCATES THE FULL (float32) ATTENTION MATRIX, THE CHUNKED ONE ONLY 128 ROWS OF IT AT A TIME
+        attention_matrix_bytes = batch_size * 4 * sequence_length ** 2 * 4
+        self.assertGreaterEqual(max_allocations['math'], attention_matrix_bytes)
+        self.assertLess(max_allocations['chunked'], attention_matrix_bytes / 2)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+
+import torch
+
+from super_gradients.training.losses.yolo_v5_loss import YoLoV5DetectionLoss
+from super_gradients.training.models.detection_models.yolov5 import COCO_DETECTION_80_CLASSES_BBOX_ANCHORS
+
+
+def build_targets_per_layer(loss: YoLoV5DetectionLoss, predictions, targets):
+    """
+    The reference (per detection layer) target assignment that YoLoV5DetectionLoss.build_targets replaces
+    """
+    num_anchors, num_targets = loss.anchors.num_anchors, targets.shape[0]
+    target_classes, target_boxes, indices, anchors = [], [], [], []
+
+    gain = torch.ones(7, device=targets.device)
+    anchor_indices = torch.arange(num_anchors, device=targets.device)
+    anchor_indices = anchor_indices.float().view(num_anchors, 1).repeat(1, num_targets)
+    targets = torch.cat((targets.repeat(num_anchors, 1, 1), anchor_indices[:, :, None]), 2)
+
+    bias = 0.5
+    off = torch.tensor([[0, 0], [1, 0], [0, 1], [-1, 0], [0, -1]], device=targets.device).float() * bias
+
+    for i in range(loss.anchors.detection_layers_num):
+        anch = loss.anchors.anchors[i]
+        gain[2:6] = torch.tensor(predictions[i].shape)[[3, 2, 3, 2]]
+        t = targets * gain
+        if num_targets:
+            r = t[:, :, 4:6] / anch[:, None]
+            t = t[torch.max(r, 1. / r).max(2)[0] < loss.anchor_threshold]
+            gxy = t[:, 2:4]
+            gxi = gain[[2, 3]] - gxy
+            j, k = ((gxy % 1. < bias) & (gxy > 1.)).T
+            l, m = ((gxi % 1. < bias) & (gxi > 1.)).T
+            j = torch.stack((torch.ones_like(j), j, k, l, m))
+            t = t.repeat((5, 1, 1))[j]
+            offsets = (torch.zeros_like(gxy)[None] + off[:, None])[j]
+        else:
+            t = targets[0]
+            offsets = 0
+
+        b, c = t[:, :2].long().T
+        gxy = t[:, 2:4]
+        gwh = t[:, 4:6]
+        gij = (gxy - offsets).long()
+        gi, gj = gij.T
+        # (THE TENSOR BOUNDS OF THE ORIGINAL clamp_ CAN NOT BE CAST TO THE LONG INDICES WITH RECENT TORCH VERSIONS)
+        gi, gj = gi.clamp_(0, int(gain[2]) - 1), gj.clamp_(0, int(gain[3]) - 1)
+        a = t[:, 6].long()
+        indices.append((b, a, gj, gi))
+        target_boxes.append(torch.cat((gxy - gij, gwh), 1))
+        anchors.append(anch[a])
+        target_classes.append(c)
+
+    return target_classes, target_boxes, indices, anchors
+
+
+def random_targets(num_targets: int, batch_size: int, num_classes: int = 80) -> torch.Tensor:
+    """
+    :return: [num_targets x 6] targets - image id in a batch, class, box x y w h (relative to the image size)
+    """
+    xy = torch.rand(num_targets, 2)
+    wh = torch.rand(num_targets, 2) * 0.5 + 0.01
+    return torch.cat([torch.randint(0, batch_size, (num_targets, 1)).float(),
+                      torch.randint(0, num_classes, (num_targets, 1)).float(), xy, wh], dim=1)
+
+
+def random_predictions(batch_size: int, height: int, width: int, num_classes: int = 80):
+    return [torch.randn(batch_size, 3, height // stride, width // stride, num_classes + 5) for stride in [8, 16, 32]]
+
+
+class YoloV5LossTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        self.loss = YoLoV5DetectionLoss(anchors=COCO_DETECTION_80_CLASSES_BBOX_ANCHORS)
+
+    def _assert_equal_assignments(self, expected, assigned):
+        for expected_layers, assigned_layers in zip(expected, assigned):
+            self.assertEqual(len(expected_layers), len(assigned_layers))
+            for expected_layer, assigned_layer in zip(expected_layers, assigned_layers):
+                for expected_tensor, assigned_tensor in zip(expected_layer if isinstance(expected_layer, tuple)
+                                                            else [expected_layer],
+                                                            assigned_layer if isinstance(assigned_layer, tuple)
+                                                            else [assigned_layer]):
+                    self.assertEqual(expected_tensor.dtype, assigned_tensor.dtype)
+                    self.assertTrue(torch.equal(expected_tensor, assigned_tensor))
+
+    def test_build_targets_equivalence(self):
+        for num_targets, batch_size, height, width in [(20, 4, 320, 320), (300, 2, 256, 416), (1, 1, 64, 96),
+                                                       (0, 2, 320, 320)]:
+            predictions = random_predictions(batch_size, height, width)
+            targets = random_targets(num_targets, batch_size)
+            self._assert_equal_assignments(build_targets_per_layer(self.loss, predictions, targets),
+                                           self.loss.build_targets(predictions, targets))
+
+    def test_targets_on_grid_borders(self):
+        # TARGETS ON THE BORDERS OF THE IMAGE AND ON CELL BOUNDARIES (THE NEIGHBOUR CELLS AND THE CLAMPING)
+        predictions = random_predictions(1, 64, 64)
+        targets = torch.tensor([[0, 1, 0., 0., 0.2, 0.2], [0, 2, 1., 1., 0.3, 0.1], [0, 3, 0.5, 0.25, 0.1, 0.1],
+                                [0, 4, 0.999, 0.001, 0.05, 0.4], [0, 5, 0.52, 0.48, 0.9, 0.9]])
+        self._assert_equal_assignments(build_targets_per_layer(self.loss, predictions, targets),
+                                       self.loss.build_targets(predictions, targets))
+
+    def test_loss_equivalence(self):
+        predictions = random_predictions(2, 128, 192)
+        targets = random_targets(50, 2)
+        loss, loss_items = self.loss(predictions, targets)
+
+        reference_loss = YoLoV5DetectionLoss(anchors=COCO_DETECTION_80_CLASSES_BBOX_ANCHORS)
+        reference_loss.build_targets = lambda p, t: build_targets_per_layer(reference_loss, p, t)
+        expected_loss, expected_loss_items = reference_loss(predictions, targets)
+        self.assertTrue(torch.allclose(loss, expected_loss))
+        self.assertTrue(torch.allclose(loss_items, expected_loss_items))
+
+
+if __name__ == '__main__':
+    unittest.main()
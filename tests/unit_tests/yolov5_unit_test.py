@@ -3,7 +3,8 @@ import unittest
 import torch
 import torch.nn as nn
 
-from super_gradients.training.models.detection_models.yolov5 import YoLoV5N, YoLoV5S, YoLoV5M, YoLoV5L, YoLoV5X, Custom_YoLoV5
+from super_gradients.training.models.detection_models.yolov5 import YoLoV5N, YoLoV5S, YoLoV5M, YoLoV5L, YoLoV5X, \
+    Custom_YoLoV5, Detect
 from super_gradients.training.utils.utils import HpmStruct
 
 
@@ -65,6 +66,46 @@ class TestYoloV5(unittest.TestCase):
 
             self.assertEqual(params_total, optimizer_params_total)
 
+    def test_detect_grid_cache(self):
+        yolo_model = YoLoV5N(self.arch_params).eval()
+        detect = yolo_model._head._modules_list[-1]
+
+        def reference_decode(outputs):
+            # THE ORIGINAL (NOT CACHED) DECODING OF THE DETECT OUTPUTS x(bs,3,ny,nx,85)
+            decoded = []
+            for i, x in enumerate(outputs):
+                bs, _, ny, nx, _ = x.shape
+                y = x.sigmoid()
+                xy = (y[..., 0:2] * 2. - 0.5 + Detect._make_grid(nx, ny)) * detect.stride[i]
+                wh = (y[..., 2:4] * 2) ** 2 * detect.anchor_grid[i].view(1, detect.num_anchors, 1, 1, 2)
+                decoded.append(torch.cat([xy, wh, y[..., 4:]], dim=4).view(bs, -1, detect.num_outputs))
+            return torch.cat(decoded, 1)
+
+        for input_size in [(2, 3, 64, 96), (1, 3, 96, 64), (2, 3, 64, 96)]:
+            inputs = torch.rand(*input_size)
+            with torch.no_grad():
+                predictions, outputs = yolo_model(inputs)
+            # THE IN-PLACE DECODING (WITHOUT GRADIENTS) AND THE OUT-OF-PLACE DECODING MATCH THE ORIGINAL DECODING
+            self.assertTrue(torch.allclose(predictions, reference_decode(outputs), atol=1e-4))
+            self.assertTrue(torch.allclose(yolo_model(inputs)[0], predictions, atol=1e-4))
+        # A GRID PER DETECTION LAYER AND RESOLUTION
+        self.assertEqual(len(detect._grid_cache), 2 * detect.detection_layers_num)
+
+        # THE LEAST RECENTLY USED GRIDS ARE EVICTED
+        detect.grid_cache_size = 4
+        with torch.no_grad():
+            yolo_model(torch.rand(1, 3, 128, 128))
+        self.assertEqual(len(detect._grid_cache), 4)
+        # (DETECTION LAYER, ny, nx) - THE GRIDS OF THE LAST DETECTION LAYER OF THE 64x96 INPUTS AND OF THE 128x128 INPUT
+        self.assertEqual([key[:3] for key in detect._grid_cache.keys()], [(2, 2, 3), (0, 16, 16), (1, 8, 8), (2, 4, 4)])
+
+        # CHANGING THE ANCHORS CLEARS THE CACHE
+        detect.anchor_grid.mul_(2)
+        inputs = torch.rand(1, 3, 64, 64)
+        with torch.no_grad():
+            predictions, outputs = yolo_model(inputs)
+        self.assertTrue(torch.allclose(predictions, reference_decode(outputs), atol=1e-4))
+
 
 if __name__ == '__main__':
     unittest.main()